@@ -1,17 +1,127 @@
 from .data_loader import (
     load_data_for_tab,
+    load_columns_for_tab,
+    colunas_da_aba,
+    load_data_for_states,
+    ler_dados_estado,
+    impressao_estado,
+    gerar_arquivo_arrow,
     filter_data_by_states,
     agrupar_estados_em_regioes,
     calcular_seguro,
+    codificar_notas,
+    decodificar_notas,
+    nota_compacta,
     optimize_dtypes,
     release_memory,
 )
+from .esquema_categorias import (
+    obter_esquema,
+    coluna_rotulo,
+    rotular_serie,
+    adicionar_rotulos,
+)
+from .impressao_digital import (
+    registrar_impressao_digital,
+    obter_impressao_digital,
+    herdar_impressao_digital,
+)
+from .cubo_agregado import (
+    calcular_cubo,
+    AcumuladorCubo,
+    consultar_cubo,
+    medias_estado_competencia,
+    salvar_cubo,
+    obter_cubo,
+)
+from .histograma_notas import (
+    calcular_histogramas,
+    AcumuladorHistograma,
+    indexar_histograma,
+    contagens_histograma,
+    quantis_histograma,
+    mediana_histograma,
+    salvar_histogramas,
+    obter_histogramas,
+)
+from .contingencia_social import (
+    calcular_contingencias,
+    AcumuladorContingencias,
+    consultar_contingencia,
+    densificar_contingencias,
+    salvar_contingencias,
+    obter_contingencias,
+    obter_contingencias_densas,
+)
+from .estatisticas_notas import (
+    calcular_momentos_notas,
+    combinar_momentos,
+    finalizar_momentos,
+    calcular_estatisticas_notas,
+    calcular_medias_por_grupo,
+    contar_notas_grade,
+    quantis_contagens,
+    calcular_quantis_notas,
+    calcular_limites_iqr,
+    distribuicao_notas,
+    estatisticas_faixas,
+    calcular_faixas_notas,
+)
 
 __all__ = [
     "load_data_for_tab",
+    "load_columns_for_tab",
+    "colunas_da_aba",
+    "load_data_for_states",
+    "ler_dados_estado",
+    "impressao_estado",
+    "gerar_arquivo_arrow",
     "filter_data_by_states",
     "agrupar_estados_em_regioes",
     "calcular_seguro",
+    "codificar_notas",
+    "decodificar_notas",
+    "nota_compacta",
     "optimize_dtypes",
     "release_memory",
+    "obter_esquema",
+    "coluna_rotulo",
+    "rotular_serie",
+    "adicionar_rotulos",
+    "registrar_impressao_digital",
+    "obter_impressao_digital",
+    "herdar_impressao_digital",
+    "calcular_cubo",
+    "AcumuladorCubo",
+    "consultar_cubo",
+    "medias_estado_competencia",
+    "salvar_cubo",
+    "obter_cubo",
+    "calcular_histogramas",
+    "AcumuladorHistograma",
+    "indexar_histograma",
+    "contagens_histograma",
+    "quantis_histograma",
+    "mediana_histograma",
+    "salvar_histogramas",
+    "obter_histogramas",
+    "calcular_contingencias",
+    "AcumuladorContingencias",
+    "consultar_contingencia",
+    "densificar_contingencias",
+    "salvar_contingencias",
+    "obter_contingencias",
+    "obter_contingencias_densas",
+    "calcular_momentos_notas",
+    "combinar_momentos",
+    "finalizar_momentos",
+    "calcular_estatisticas_notas",
+    "calcular_medias_por_grupo",
+    "contar_notas_grade",
+    "quantis_contagens",
+    "calcular_quantis_notas",
+    "calcular_limites_iqr",
+    "distribuicao_notas",
+    "estatisticas_faixas",
+    "calcular_faixas_notas",
 ]
@@ -0,0 +1,591 @@
+"""
+Pipeline de geração dos dados do dashboard (substitui o notebook Filtragem.ipynb).
+
+Lê os microdados tratados em lotes (record batches) e grava, em uma única
+passada e com memória limitada, os arquivos de todas as abas, os arquivos de
+tipos (dtypes_<aba>.json), os cubos de agregados (data/cubo/<aba>), os
+histogramas de notas (data/histograma/<aba>), os cubos de contingências
+(data/contingencia/<aba>: pares de variáveis sociais e, na aba de desempenho,
+pares com a categoria de desempenho), opcionalmente o armazenamento
+particionado por UF e um manifesto (manifest.json) descrevendo o que foi gerado.
+
+Uso:
+    python -m data.build_dados --origem microdados_tratado.parquet --dtypes data/dtypes.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from data.data_loader import (COLUNA_PARTICAO, DIRETORIO_ARROW, DIRETORIO_PARTICOES, ESCALA_NOTAS,
+                              TIPO_NOTA_COMPACTA, gerar_arquivo_arrow)
+from data.cubo_agregado import AcumuladorCubo, salvar_cubo, variaveis_do_cubo
+from data.histograma_notas import AcumuladorHistograma, salvar_histogramas
+from data.contingencia_social import (ALVOS_CONTINGENCIA, AcumuladorContingencias, salvar_contingencias,
+                                      variaveis_da_contingencia)
+
+# ------------------------------------------------------------
+# CONFIGURAÇÃO DAS ABAS
+# ------------------------------------------------------------
+
+COLUNAS_NOTAS = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO']
+
+COLUNAS_POR_ABA = {
+    'localizacao': [
+        'SG_UF_PROVA', 'SG_REGIAO',
+    ],
+    'geral': [
+        'SG_UF_PROVA', 'SG_REGIAO',
+        # Presença
+        'TP_PRESENCA_CN', 'TP_PRESENCA_CH', 'TP_PRESENCA_LC', 'TP_PRESENCA_MT',
+        'TP_PRESENCA_GERAL', 'TP_PRESENCA_REDACAO',
+        # Notas
+        *COLUNAS_NOTAS,
+    ],
+    'aspectos_sociais': [
+        'SG_UF_PROVA', 'SG_REGIAO',
+        # Variáveis sociais
+        'TP_SEXO', 'TP_COR_RACA', 'TP_ESTADO_CIVIL', 'TP_FAIXA_ETARIA', 'TP_ST_CONCLUSAO',
+        'TP_DEPENDENCIA_ADM_ESC', 'TP_ESCOLA', 'TP_ENSINO', 'TP_LOCALIZACAO_ESC',
+        # Questões socioeconômicas
+        'Q001', 'Q002', 'Q005', 'TP_FAIXA_SALARIAL', 'Q025',
+        # Infraestrutura
+        'NU_INFRAESTRUTURA',
+    ],
+    'desempenho': [
+        'SG_UF_PROVA', 'SG_REGIAO',
+        # Características do candidato
+        'TP_SEXO', 'TP_COR_RACA', 'TP_DEPENDENCIA_ADM_ESC', 'TP_ST_CONCLUSAO',
+        'TP_FAIXA_ETARIA', 'TP_ESTADO_CIVIL', 'TP_ESCOLA', 'TP_ENSINO',
+        'TP_LOCALIZACAO_ESC', 'NU_INFRAESTRUTURA',
+        # Notas
+        *COLUNAS_NOTAS,
+        # Categorias de desempenho
+        'NU_DESEMPENHO',
+        # Questões socioeconômicas
+        'Q001', 'Q002', 'Q005', 'TP_FAIXA_SALARIAL', 'Q025',
+    ],
+}
+
+# Colunas usadas apenas pelo filtro da aba de desempenho
+COLUNAS_FILTRO_DESEMPENHO = ['TP_PRESENCA_GERAL', 'NU_MEDIA_GERAL', *COLUNAS_NOTAS]
+
+# Nota mínima (em todas as provas e na média) para entrar na aba de desempenho
+NOTA_MINIMA_DESEMPENHO = 100
+
+# Abas que recebem cubo de agregados (UF × categoria × competência)
+ABAS_CUBO = ('geral', 'desempenho')
+
+# Abas que recebem histogramas de notas (UF × competência), lidos pelas medianas da página Geral
+ABAS_HISTOGRAMA = ('geral',)
+
+COMPRESSOES_VALIDAS = ['snappy', 'zstd', 'gzip', 'brotli', 'lz4', 'none']
+
+
+# ------------------------------------------------------------
+# FUNÇÕES DE TRANSFORMAÇÃO DOS LOTES
+# ------------------------------------------------------------
+
+def _valores_decodificados(coluna):
+    """
+    Retorna a coluna com o dicionário decodificado (valores simples).
+
+    Parâmetros:
+    -----------
+    coluna : pyarrow.ChunkedArray ou Array
+        Coluna do lote
+
+    Retorna:
+    --------
+    pyarrow.ChunkedArray ou Array: Coluna sem codificação de dicionário
+    """
+    if pa.types.is_dictionary(coluna.type):
+        return pc.cast(coluna, coluna.type.value_type)
+    return coluna
+
+
+def _como_float(coluna):
+    """Converte uma coluna (numérica, texto ou dicionário) para float64."""
+    return pc.cast(_valores_decodificados(coluna), pa.float64())
+
+
+def aplicar_tipos_lote(tabela: pa.Table, tipos: Dict[str, str]) -> pa.Table:
+    """
+    Padroniza os tipos de um lote conforme o dtypes.json dos microdados.
+
+    Categóricas são gravadas como valores simples (o parquet as codifica em
+    dicionário por row group) e numéricas são convertidas para o tipo final,
+    garantindo o mesmo schema em todos os lotes.
+
+    Parâmetros:
+    -----------
+    tabela : pyarrow.Table
+        Lote lido da origem
+    tipos : Dict[str, str]
+        Mapeamento coluna -> dtype do pandas
+
+    Retorna:
+    --------
+    pyarrow.Table: Lote com tipos padronizados
+    """
+    for indice, nome in enumerate(tabela.column_names):
+        coluna = _valores_decodificados(tabela.column(nome))
+        tipo = tipos.get(nome)
+
+        if tipo and tipo != 'category':
+            coluna = pc.cast(coluna, pa.from_numpy_dtype(np.dtype(tipo)))
+
+        tabela = tabela.set_column(indice, nome, coluna)
+
+    return tabela
+
+
+def codificar_notas_lote(tabela: pa.Table) -> pa.Table:
+    """
+    Converte as notas de um lote para décimos de ponto em uint16 (ver codificar_notas).
+
+    Notas ausentes, -1 ou zero viram 0 (nota inválida).
+
+    Parâmetros:
+    -----------
+    tabela : pyarrow.Table
+        Lote com as notas em pontos
+
+    Retorna:
+    --------
+    pyarrow.Table: Lote com as notas compactas
+    """
+    tipo_compacto = pa.from_numpy_dtype(np.dtype(TIPO_NOTA_COMPACTA))
+    maximo = np.iinfo(TIPO_NOTA_COMPACTA).max
+
+    for coluna in COLUNAS_NOTAS:
+        if coluna not in tabela.column_names:
+            continue
+
+        nota = _como_float(tabela.column(coluna))
+        decimos = pc.round(pc.multiply(nota, float(ESCALA_NOTAS)))
+        decimos = pc.max_element_wise(pc.min_element_wise(decimos, float(maximo)), 1.0)
+        decimos = pc.fill_null(pc.if_else(pc.greater(nota, 0), decimos, 0.0), 0.0)
+        tabela = tabela.set_column(tabela.column_names.index(coluna), coluna, pc.cast(decimos, tipo_compacto))
+
+    return tabela
+
+
+def mascara_desempenho(tabela: pa.Table):
+    """
+    Calcula o filtro da aba de desempenho: presentes nos dois dias, com média
+    válida e todas as notas (e a média) maiores ou iguais a NOTA_MINIMA_DESEMPENHO.
+
+    Parâmetros:
+    -----------
+    tabela : pyarrow.Table
+        Lote com as colunas de COLUNAS_FILTRO_DESEMPENHO
+
+    Retorna:
+    --------
+    pyarrow.ChunkedArray: Máscara booleana (nulos tratados como False)
+    """
+    mascara = pc.equal(_como_float(tabela.column('TP_PRESENCA_GERAL')), 3)
+
+    if 'NU_MEDIA_GERAL' in tabela.column_names:
+        media = _como_float(tabela.column('NU_MEDIA_GERAL'))
+        mascara = pc.and_(mascara, pc.not_equal(media, -1))
+        mascara = pc.and_(mascara, pc.greater_equal(media, NOTA_MINIMA_DESEMPENHO))
+
+    for coluna in COLUNAS_NOTAS:
+        if coluna in tabela.column_names:
+            nota = _como_float(tabela.column(coluna))
+            mascara = pc.and_(mascara, pc.greater_equal(nota, NOTA_MINIMA_DESEMPENHO))
+
+    return pc.fill_null(mascara, False)
+
+
+# ------------------------------------------------------------
+# ESCRITA DOS ARQUIVOS
+# ------------------------------------------------------------
+
+class EscritorAba:
+    """
+    Acumula lotes de uma aba e grava row groups do tamanho configurado.
+
+    Parâmetros:
+    -----------
+    aba : str
+        Nome da aba
+    destino : str
+        Diretório de saída
+    tamanho_row_group : int
+        Número de linhas por row group
+    compressao : str
+        Codec de compressão do parquet
+    ordenar_por : List[str]
+        Colunas para ordenar as linhas dentro de cada row group
+    particionar : bool
+        Se True, também grava o dataset particionado por UF
+    """
+
+    def __init__(self, aba: str, destino: str, tamanho_row_group: int,
+                 compressao: str, ordenar_por: List[str], particionar: bool):
+        self.aba = aba
+        self.caminho = os.path.join(destino, f"sample_{aba}.parquet")
+        self.tamanho_row_group = tamanho_row_group
+        self.compressao = None if compressao == 'none' else compressao
+        self.ordenar_por = ordenar_por
+        self.particionar = particionar
+        self.diretorio_particoes = os.path.join(destino, os.path.basename(DIRETORIO_PARTICOES), aba)
+
+        self.pendentes: List[pa.Table] = []
+        self.linhas_pendentes = 0
+        self.linhas = 0
+        self.escritor: Optional[pq.ParquetWriter] = None
+        self.escritores_uf: Dict[str, pq.ParquetWriter] = {}
+
+        if self.particionar and os.path.isdir(self.diretorio_particoes):
+            shutil.rmtree(self.diretorio_particoes)
+
+    def adicionar(self, tabela: pa.Table) -> None:
+        """Acumula um lote e grava sempre que um row group completo estiver disponível."""
+        if tabela.num_rows == 0:
+            return
+
+        self.pendentes.append(tabela)
+        self.linhas_pendentes += tabela.num_rows
+
+        if self.linhas_pendentes >= self.tamanho_row_group:
+            self._gravar_pendentes()
+
+    def _gravar_pendentes(self, final: bool = False) -> None:
+        """
+        Grava as linhas acumuladas em row groups completos, ordenados se configurado.
+
+        Parâmetros:
+        -----------
+        final : bool, default=False
+            Se True, grava também o último row group incompleto
+        """
+        if not self.pendentes:
+            return
+
+        tabela = pa.concat_tables(self.pendentes)
+        completas = tabela.num_rows if final else tabela.num_rows - tabela.num_rows % self.tamanho_row_group
+
+        # O restante (row group incompleto) continua pendente para o próximo lote
+        restante = tabela.slice(completas)
+        self.pendentes = [restante] if restante.num_rows else []
+        self.linhas_pendentes = restante.num_rows
+
+        for inicio in range(0, completas, self.tamanho_row_group):
+            row_group = tabela.slice(inicio, min(self.tamanho_row_group, completas - inicio))
+
+            colunas_ordem = [col for col in self.ordenar_por if col in row_group.column_names]
+            if colunas_ordem:
+                row_group = row_group.sort_by([(col, 'ascending') for col in colunas_ordem])
+
+            if self.escritor is None:
+                self.escritor = pq.ParquetWriter(self.caminho, row_group.schema, compression=self.compressao)
+            self.escritor.write_table(row_group, row_group_size=self.tamanho_row_group)
+            self.linhas += row_group.num_rows
+
+            if self.particionar and COLUNA_PARTICAO in row_group.column_names:
+                self._gravar_particoes(row_group)
+
+    def _gravar_particoes(self, tabela: pa.Table) -> None:
+        """Grava as linhas de cada UF no diretório hive SG_UF_PROVA=<UF> da aba."""
+        ufs = tabela.column(COLUNA_PARTICAO)
+        tabela_sem_uf = tabela.drop_columns([COLUNA_PARTICAO])
+
+        for uf in pc.unique(ufs).to_pylist():
+            if uf is None:
+                continue
+
+            parte = tabela_sem_uf.filter(pc.equal(ufs, uf))
+            escritor = self.escritores_uf.get(uf)
+
+            if escritor is None:
+                diretorio = os.path.join(self.diretorio_particoes, f"{COLUNA_PARTICAO}={uf}")
+                os.makedirs(diretorio, exist_ok=True)
+                escritor = pq.ParquetWriter(os.path.join(diretorio, "part-0.parquet"),
+                                            parte.schema, compression=self.compressao)
+                self.escritores_uf[uf] = escritor
+
+            escritor.write_table(parte)
+
+    def finalizar(self) -> Dict[str, object]:
+        """
+        Grava o restante, fecha os arquivos e retorna a descrição da aba para o manifesto.
+
+        Retorna:
+        --------
+        Dict[str, object]: Arquivo, linhas, row groups, bytes e hash SHA-256
+        """
+        self._gravar_pendentes(final=True)
+
+        if self.escritor is not None:
+            self.escritor.close()
+        for escritor in self.escritores_uf.values():
+            escritor.close()
+
+        if not os.path.exists(self.caminho):
+            return {'arquivo': self.caminho, 'linhas': 0}
+
+        metadados = pq.ParquetFile(self.caminho).metadata
+
+        return {
+            'arquivo': self.caminho,
+            'linhas': self.linhas,
+            'row_groups': metadados.num_row_groups,
+            'bytes': os.path.getsize(self.caminho),
+            'sha256': calcular_hash_arquivo(self.caminho),
+            'particoes': sorted(self.escritores_uf) if self.particionar else [],
+        }
+
+
+def calcular_hash_arquivo(caminho: str, tamanho_bloco: int = 1 << 20) -> str:
+    """
+    Calcula o SHA-256 de um arquivo lendo-o em blocos.
+
+    Parâmetros:
+    -----------
+    caminho : str
+        Caminho do arquivo
+    tamanho_bloco : int, default=1 MiB
+        Tamanho de cada leitura
+
+    Retorna:
+    --------
+    str: Hash hexadecimal
+    """
+    hash_arquivo = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            hash_arquivo.update(bloco)
+    return hash_arquivo.hexdigest()
+
+
+# ------------------------------------------------------------
+# PIPELINE
+# ------------------------------------------------------------
+
+def gerar_dados(
+    origem: str,
+    arquivo_dtypes: str,
+    destino: str = "data",
+    tamanho_lote: int = 250_000,
+    tamanho_row_group: int = 250_000,
+    compressao: str = "zstd",
+    ordenar_por: Optional[List[str]] = None,
+    particionar: bool = False,
+    gerar_arrow: bool = False,
+    notas_compactas: bool = True,
+) -> Dict[str, object]:
+    """
+    Gera os arquivos de todas as abas em uma única passada pelos microdados.
+
+    Parâmetros:
+    -----------
+    origem : str
+        Parquet com os microdados tratados
+    arquivo_dtypes : str
+        JSON com o dtype (pandas) de cada coluna dos microdados
+    destino : str, default="data"
+        Diretório de saída
+    tamanho_lote : int, default=250000
+        Linhas lidas por lote; limita o pico de memória
+    tamanho_row_group : int, default=250000
+        Linhas por row group nos arquivos gerados
+    compressao : str, default="zstd"
+        Codec de compressão ('snappy', 'zstd', 'gzip', 'brotli', 'lz4', 'none')
+    ordenar_por : List[str], opcional
+        Colunas para ordenar as linhas dentro de cada row group
+    particionar : bool, default=False
+        Se True, grava também o dataset particionado por UF (ver load_data_for_states)
+    gerar_arrow : bool, default=False
+        Se True, gera ao final os arquivos Arrow IPC de cada aba em <destino>/arrow
+        (ver gerar_arquivo_arrow)
+    notas_compactas : bool, default=True
+        Se True, grava as notas como décimos de ponto em uint16 (ver codificar_notas)
+
+    Retorna:
+    --------
+    Dict[str, object]: Conteúdo do manifesto gravado em <destino>/manifest.json
+    """
+    inicio = time.perf_counter()
+    ordenar_por = ordenar_por or []
+
+    with open(arquivo_dtypes, encoding="utf-8") as f:
+        tipos = json.load(f)
+
+    arquivo = pq.ParquetFile(origem)
+    colunas_origem = set(arquivo.schema_arrow.names)
+
+    # Ler apenas as colunas usadas por alguma aba ou pelo filtro de desempenho
+    colunas_leitura = [col for col in dict.fromkeys(
+        [col for colunas in COLUNAS_POR_ABA.values() for col in colunas] + COLUNAS_FILTRO_DESEMPENHO
+    ) if col in colunas_origem]
+
+    colunas_abas = {aba: [col for col in colunas if col in colunas_origem]
+                    for aba, colunas in COLUNAS_POR_ABA.items()}
+
+    os.makedirs(destino, exist_ok=True)
+    escritores = {aba: EscritorAba(aba, destino, tamanho_row_group, compressao, ordenar_por, particionar)
+                  for aba in colunas_abas}
+
+    # Cubos de agregados, histogramas e contagens por UF de cada par de variáveis, acumulados
+    # lote a lote em arrays densos: a memória não cresce com o número de linhas lidas
+    cubos = {aba: AcumuladorCubo(COLUNAS_NOTAS, variaveis_do_cubo(aba)) for aba in ABAS_CUBO if aba in colunas_abas}
+    histogramas = {aba: AcumuladorHistograma(COLUNAS_NOTAS) for aba in ABAS_HISTOGRAMA if aba in colunas_abas}
+
+    variaveis_contingencia = {aba: variaveis_da_contingencia(colunas_abas[aba])
+                              for aba in ALVOS_CONTINGENCIA if aba in colunas_abas}
+    contingencias = {aba: AcumuladorContingencias(variaveis, ALVOS_CONTINGENCIA[aba])
+                     for aba, variaveis in variaveis_contingencia.items() if len(variaveis) > 1}
+
+    linhas_lidas = 0
+    estados = set()
+
+    for lote in arquivo.iter_batches(batch_size=tamanho_lote, columns=colunas_leitura):
+        tabela = aplicar_tipos_lote(pa.Table.from_batches([lote]), tipos)
+        linhas_lidas += tabela.num_rows
+
+        # O filtro de desempenho usa as notas em pontos, então é calculado antes da compactação
+        filtro_desempenho = mascara_desempenho(tabela) if 'desempenho' in colunas_abas else None
+        if notas_compactas:
+            tabela = codificar_notas_lote(tabela)
+
+        if COLUNA_PARTICAO in tabela.column_names:
+            estados.update(uf for uf in pc.unique(tabela.column(COLUNA_PARTICAO)).to_pylist() if uf is not None)
+
+        for aba, colunas in colunas_abas.items():
+            dados_aba = tabela
+            if aba == 'desempenho':
+                dados_aba = dados_aba.filter(filtro_desempenho)
+            escritores[aba].adicionar(dados_aba.select(colunas))
+
+            acumuladores = [por_aba[aba] for por_aba in (cubos, histogramas, contingencias) if aba in por_aba]
+            if acumuladores:
+                dados_lote = dados_aba.select(colunas).to_pandas()
+                for acumulador in acumuladores:
+                    acumulador.adicionar(dados_lote)
+                del dados_lote
+
+        del tabela, lote
+        print(f"Processadas {linhas_lidas:,} linhas")
+
+    abas = {}
+    for aba, escritor in escritores.items():
+        abas[aba] = escritor.finalizar()
+
+        # Arquivo de tipos da aba, como gerado anteriormente pelo notebook
+        abas[aba]['dtypes'] = {
+            col: TIPO_NOTA_COMPACTA if notas_compactas and col in COLUNAS_NOTAS else tipos[col]
+            for col in colunas_abas[aba] if col in tipos
+        }
+        with open(os.path.join(destino, f"dtypes_{aba}.json"), 'w', encoding="utf-8") as f:
+            json.dump(abas[aba]['dtypes'], f)
+
+        if gerar_arrow and abas[aba]['linhas'] > 0:
+            abas[aba]['arrow'] = gerar_arquivo_arrow(
+                aba,
+                origem=abas[aba]['arquivo'],
+                diretorio=os.path.join(destino, os.path.basename(DIRETORIO_ARROW)),
+                tipos=abas[aba]['dtypes'],
+                tamanho_lote=tamanho_lote
+            )
+
+        # Formato longo e esparso dos acumuladores, montado só na gravação
+        cubo = cubos[aba].resultado() if aba in cubos else {}
+        if cubo:
+            diretorio_cubo = salvar_cubo(cubo, aba, os.path.join(destino, "cubo"))
+            abas[aba]['cubo'] = {
+                'diretorio': diretorio_cubo,
+                'variaveis': sorted(cubo.keys()),
+            }
+
+        histograma = histogramas[aba].resultado() if aba in histogramas else None
+        if histograma is not None and not histograma.empty:
+            abas[aba]['histograma'] = {
+                'diretorio': salvar_histogramas(histograma, aba, os.path.join(destino, "histograma")),
+                'competencias': sorted(histograma['competencia'].cat.categories.astype(str)),
+            }
+
+        contingencia = contingencias[aba].resultado() if aba in contingencias else {}
+        if contingencia:
+            abas[aba]['contingencia'] = {
+                'diretorio': salvar_contingencias(contingencia, aba, os.path.join(destino, "contingencia")),
+                'pares': sorted(contingencia.keys()),
+            }
+
+    manifesto = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'origem': os.path.abspath(origem),
+        'origem_sha256': calcular_hash_arquivo(origem),
+        'linhas_origem': linhas_lidas,
+        'estados': sorted(estados),
+        'parametros': {
+            'tamanho_lote': tamanho_lote,
+            'tamanho_row_group': tamanho_row_group,
+            'compressao': compressao,
+            'ordenar_por': ordenar_por,
+            'particionar': particionar,
+            'nota_minima_desempenho': NOTA_MINIMA_DESEMPENHO,
+            'escala_notas': ESCALA_NOTAS if notas_compactas else 1,
+        },
+        'abas': abas,
+        'duracao_segundos': round(time.perf_counter() - inicio, 1),
+    }
+
+    with open(os.path.join(destino, "manifest.json"), 'w', encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+    return manifesto
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Gera os arquivos de dados do dashboard a partir dos microdados tratados."
+    )
+    parser.add_argument("--origem", required=True, help="Parquet com os microdados tratados")
+    parser.add_argument("--dtypes", required=True, help="JSON com o dtype de cada coluna (ex.: data/dtypes.json)")
+    parser.add_argument("--destino", default="data", help="Diretório de saída (padrão: data)")
+    parser.add_argument("--tamanho-lote", type=int, default=250_000, help="Linhas lidas por lote")
+    parser.add_argument("--row-group", type=int, default=250_000, help="Linhas por row group")
+    parser.add_argument("--compressao", default="zstd", choices=COMPRESSOES_VALIDAS, help="Codec do parquet")
+    parser.add_argument("--ordenar-por", nargs="*", default=["SG_UF_PROVA"],
+                        help="Colunas para ordenar cada row group (padrão: SG_UF_PROVA)")
+    parser.add_argument("--particionar", action="store_true", help="Gravar também o dataset particionado por UF")
+    parser.add_argument("--arrow", action="store_true", help="Gerar também os arquivos Arrow IPC de cada aba")
+    parser.add_argument("--sem-notas-compactas", action="store_true",
+                        help="Gravar as notas em pontos (float) em vez de décimos em uint16")
+    args = parser.parse_args(argv)
+
+    manifesto = gerar_dados(
+        origem=args.origem,
+        arquivo_dtypes=args.dtypes,
+        destino=args.destino,
+        tamanho_lote=args.tamanho_lote,
+        tamanho_row_group=args.row_group,
+        compressao=args.compressao,
+        ordenar_por=args.ordenar_por,
+        particionar=args.particionar,
+        gerar_arrow=args.arrow,
+        notas_compactas=not args.sem_notas_compactas,
+    )
+
+    for aba, info in manifesto['abas'].items():
+        print(f"{aba}: {info['linhas']:,} linhas -> {info['arquivo']}")
+    print(f"Concluído em {manifesto['duracao_segundos']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import pandas as pd
+import numpy as np
+from typing import Any, Dict, List, Sequence
+
+# ------------------------------------------------------------
+# CÓDIGOS INTEIROS ESTÁVEIS PARA ACUMULADORES DENSOS
+# ------------------------------------------------------------
+#
+# Os acumuladores do build (cubo, histogramas e contingências) somam cada
+# lote em arrays numpy densos indexados por códigos inteiros. Os códigos de
+# uma categórica (ou de pd.factorize) mudam de um lote para outro, então cada
+# eixo usa um CodificadorValores: o primeiro valor visto recebe o código 0, o
+# seguinte o 1, e assim por diante, em todos os lotes.
+
+
+class CodificadorValores:
+    """
+    Atribui códigos inteiros estáveis, entre lotes, aos valores de uma coluna.
+
+    Atributos:
+    ----------
+    valores : List
+        Valor de cada código, na ordem em que apareceram
+    """
+
+    def __init__(self):
+        self.valores: List[Any] = []
+        self._codigos: Dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.valores)
+
+    def codificar(self, serie: pd.Series) -> np.ndarray:
+        """
+        Retorna o código de cada linha (-1 para ausentes), criando códigos para valores novos.
+
+        Parâmetros:
+        -----------
+        serie : Series
+            Coluna do lote
+
+        Retorna:
+        --------
+        np.ndarray: Códigos int64
+        """
+        # Categóricas são fatoradas pelos próprios códigos (O(número de categorias) no dicionário)
+        codigos_lote, valores_lote = pd.factorize(serie, use_na_sentinel=True)
+        codigos_lote = np.asarray(codigos_lote, dtype='int64')
+        if len(valores_lote) == 0:
+            return codigos_lote
+
+        traducao = np.array([self._codigo(valor) for valor in np.asarray(valores_lote, dtype=object)],
+                            dtype='int64')
+        return np.where(codigos_lote >= 0, traducao[codigos_lote], -1)
+
+    def _codigo(self, valor: Any) -> int:
+        """Retorna o código do valor, registrando-o se for novo."""
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = self._codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def valores_array(self) -> np.ndarray:
+        """Retorna os valores como array (object), indexável pelos códigos."""
+        valores = np.empty(len(self.valores), dtype=object)
+        valores[:] = self.valores
+        return valores
+
+
+def ampliar(array: np.ndarray, formato: Sequence[int], preenchimento: float = 0) -> np.ndarray:
+    """
+    Amplia um array denso até o formato informado, preservando as células existentes.
+
+    Usado quando um lote traz códigos novos em algum eixo.
+
+    Parâmetros:
+    -----------
+    array : np.ndarray
+        Array acumulado
+    formato : Sequence[int]
+        Formato mínimo desejado (eixo a eixo)
+    preenchimento : float, default=0
+        Valor das células novas
+
+    Retorna:
+    --------
+    np.ndarray: O próprio array, se já comportar o formato, ou uma cópia ampliada
+    """
+    acrescimos = [(0, max(0, alvo - atual)) for atual, alvo in zip(array.shape, formato)]
+    if not any(depois for _, depois in acrescimos):
+        return array
+    return np.pad(array, acrescimos, constant_values=preenchimento)
@@ -0,0 +1,428 @@
+import os
+import streamlit as st
+import pandas as pd
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from data.codificacao import CodificadorValores, ampliar
+from data.esquema_categorias import eh_coluna_rotulo
+from data.impressao_digital import (arquivos_parquet, impressao_arquivo, impressao_arquivos,
+                                    registrar_impressao_digital, herdar_impressao_digital, normalizar_estados)
+
+# ------------------------------------------------------------
+# CUBO DE CONTINGÊNCIAS (UF × VARIÁVEL SOCIAL × VARIÁVEL SOCIAL)
+# ------------------------------------------------------------
+#
+# Para cada par de variáveis sociais, guarda as contagens de candidatos por
+# UF e combinação de categorias, em formato longo e esparso (só células com
+# contagem > 0): SG_UF_PROVA, categoria_x, categoria_y e contagem. As
+# categorias são os valores originais dos microdados (antes dos mapeamentos).
+#
+# Cada par aparece uma única vez, com as variáveis em ordem alfabética (ver
+# chave_par); a tabela de contingência de qualquer par e de qualquer seleção
+# de estados é a soma de poucas linhas do cubo (ver consultar_contingencia).
+#
+# Na aba de desempenho só são cruzados os pares com a categoria de
+# desempenho (ver ALVOS_CONTINGENCIA), sobre a população dessa aba.
+
+DIRETORIO_CONTINGENCIAS = "data/contingencia"
+ABA_CONTINGENCIAS = "aspectos_sociais"
+SEPARADOR_PAR = "__"
+
+# Abas com cubo de contingências e a variável cruzada com as demais em cada uma (None: todos os pares)
+ALVOS_CONTINGENCIA = {
+    'aspectos_sociais': None,
+    'desempenho': 'NU_DESEMPENHO',
+}
+
+# Colunas geográficas: a UF é o eixo do cubo e a região é função da UF
+COLUNAS_FORA_CONTINGENCIA = ('SG_UF_PROVA', 'SG_REGIAO')
+
+# Notas são contínuas e não entram nas tabelas de contingência
+PREFIXO_NOTAS = 'NU_NOTA_'
+
+
+def variaveis_da_contingencia(colunas: Iterable[str]) -> List[str]:
+    """
+    Retorna as variáveis sociais cruzadas no cubo de contingências.
+
+    Parâmetros:
+    -----------
+    colunas : Iterable[str]
+        Colunas disponíveis na aba de aspectos sociais
+
+    Retorna:
+    --------
+    List[str]: Variáveis sociais, na ordem das colunas (sem as colunas de rótulos e de notas)
+    """
+    return [
+        col for col in colunas
+        if col not in COLUNAS_FORA_CONTINGENCIA and not eh_coluna_rotulo(col) and not col.startswith(PREFIXO_NOTAS)
+    ]
+
+
+def chave_par(var_x: str, var_y: str) -> str:
+    """
+    Retorna a chave do par de variáveis no cubo (independente da ordem).
+
+    Parâmetros:
+    -----------
+    var_x, var_y : str
+        Variáveis do par
+
+    Retorna:
+    --------
+    str: Chave '<menor>__<maior>'
+    """
+    primeira, segunda = sorted([var_x, var_y])
+    return f"{primeira}{SEPARADOR_PAR}{segunda}"
+
+
+def calcular_contingencias(
+    df: pd.DataFrame,
+    variaveis: Iterable[str],
+    alvo: Optional[str] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Calcula as contagens por UF de todos os pares de variáveis sociais.
+
+    Parâmetros:
+    -----------
+    df : DataFrame
+        Microdados com SG_UF_PROVA e as variáveis
+    variaveis : Iterable[str]
+        Variáveis sociais a cruzar
+    alvo : str, opcional
+        Se informada, só os pares que contêm esta variável são calculados
+
+    Retorna:
+    --------
+    Dict[str, DataFrame]: Contagens por par (ver chave_par)
+    """
+    acumulador = AcumuladorContingencias(variaveis, alvo)
+    acumulador.adicionar(df)
+    return acumulador.resultado()
+
+
+class AcumuladorContingencias:
+    """
+    Acumula as contagens dos pares de variáveis sociais lote a lote em arrays densos.
+
+    Cada par é contado com um único np.bincount sobre o código combinado
+    (UF, categoria_x, categoria_y) e somado a um array UF × categoria_x ×
+    categoria_y, com códigos estáveis entre lotes (ver data.codificacao);
+    linhas com UF ou alguma das duas categorias ausente ficam fora do par,
+    como no dropna de preparar_dados_correlacao. O formato longo e esparso é
+    montado apenas em resultado().
+
+    Parâmetros:
+    -----------
+    variaveis : Iterable[str]
+        Variáveis sociais a cruzar
+    alvo : str, opcional
+        Se informada, só os pares que contêm esta variável são calculados
+    """
+
+    def __init__(self, variaveis: Iterable[str], alvo: Optional[str] = None):
+        self.variaveis = sorted(var for var in dict.fromkeys(variaveis) if var != 'SG_UF_PROVA')
+        self.alvo = alvo
+        self.ufs = CodificadorValores()
+        self.categorias = {var: CodificadorValores() for var in self.variaveis}
+        self.contagens: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def adicionar(self, df: pd.DataFrame) -> None:
+        """
+        Soma as contagens de um lote de microdados.
+
+        Parâmetros:
+        -----------
+        df : DataFrame
+            Lote com SG_UF_PROVA e as variáveis
+        """
+        variaveis = [var for var in self.variaveis if var in df.columns]
+        if df.empty or len(variaveis) < 2 or 'SG_UF_PROVA' not in df.columns:
+            return
+
+        codigos_uf = self.ufs.codificar(df['SG_UF_PROVA'])
+        codificadas = {var: self.categorias[var].codificar(df[var]) for var in variaveis}
+        num_ufs = len(self.ufs)
+
+        for i, var_x in enumerate(variaveis):
+            codigos_x = codificadas[var_x]
+            num_x = len(self.categorias[var_x])
+            # Código parcial (UF, categoria_x), reaproveitado por todos os pares de var_x
+            base_x = codigos_uf * num_x + codigos_x
+            validos_x = (codigos_uf >= 0) & (codigos_x >= 0)
+
+            for var_y in variaveis[i + 1:]:
+                if self.alvo is not None and self.alvo not in (var_x, var_y):
+                    continue
+
+                codigos_y = codificadas[var_y]
+                num_y = len(self.categorias[var_y])
+                validos = validos_x & (codigos_y >= 0)
+
+                par = (var_x, var_y)
+                self.contagens[par] = ampliar(
+                    self.contagens.get(par, np.zeros((0, 0, 0), dtype='int64')), (num_ufs, num_x, num_y)
+                )
+                self.contagens[par] += np.bincount(
+                    base_x[validos] * num_y + codigos_y[validos],
+                    minlength=num_ufs * num_x * num_y
+                ).reshape(num_ufs, num_x, num_y)
+
+    def resultado(self) -> Dict[str, pd.DataFrame]:
+        """
+        Monta o formato longo e esparso (só células com contagem > 0) de cada par.
+
+        Retorna:
+        --------
+        Dict[str, DataFrame]: Contagens por par (ver chave_par)
+        """
+        ufs = self.ufs.valores_array()
+
+        contingencias = {}
+        for (var_x, var_y), contagens in self.contagens.items():
+            posicao_uf, posicao_x, posicao_y = np.nonzero(contagens)
+            contingencias[chave_par(var_x, var_y)] = _normalizar_contingencia(pd.DataFrame({
+                'SG_UF_PROVA': ufs[posicao_uf],
+                'categoria_x': self.categorias[var_x].valores_array()[posicao_x],
+                'categoria_y': self.categorias[var_y].valores_array()[posicao_y],
+                'contagem': contagens[posicao_uf, posicao_x, posicao_y],
+            }))
+
+        return contingencias
+
+
+def _normalizar_contingencia(tabela: pd.DataFrame) -> pd.DataFrame:
+    """Padroniza os tipos das chaves e das contagens do cubo."""
+    tabela['SG_UF_PROVA'] = tabela['SG_UF_PROVA'].astype(str)
+    tabela['contagem'] = tabela['contagem'].astype('int64')
+    return tabela
+
+
+def consultar_contingencia(
+    contingencias: Dict[str, pd.DataFrame],
+    var_x: str,
+    var_y: str,
+    estados: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """
+    Monta a tabela de contingência de um par de variáveis para uma seleção de estados.
+
+    Parâmetros:
+    -----------
+    contingencias : Dict[str, DataFrame]
+        Cubo de contingências (ver obter_contingencias)
+    var_x : str
+        Variável das linhas
+    var_y : str
+        Variável das colunas
+    estados : Sequence[str], opcional
+        Estados da seleção; None combina todos os estados disponíveis
+
+    Retorna:
+    --------
+    DataFrame: Contagens com as categorias originais de var_x nas linhas e de
+    var_y nas colunas (só categorias observadas), ou DataFrame vazio se o par
+    não estiver no cubo
+    """
+    tabela = contingencias.get(chave_par(var_x, var_y)) if contingencias else None
+    if tabela is None or tabela.empty:
+        return pd.DataFrame()
+
+    if estados is not None:
+        tabela = tabela[tabela['SG_UF_PROVA'].isin(normalizar_estados(estados))]
+
+    # O cubo guarda o par em ordem alfabética; se var_x vier depois, as colunas trocam de papel
+    linhas, colunas = ('categoria_x', 'categoria_y') if var_x <= var_y else ('categoria_y', 'categoria_x')
+
+    contagem = (
+        tabela.groupby([linhas, colunas], sort=True)['contagem'].sum()
+        .unstack(fill_value=0)
+        .astype('int64')
+    )
+    contagem.index.name = var_x
+    contagem.columns.name = var_y
+    return contagem
+
+
+def densificar_contingencias(
+    contingencias: Dict[str, pd.DataFrame]
+) -> Tuple[np.ndarray, Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+    """
+    Converte o cubo de contingências em arrays densos UF × categoria_x × categoria_y.
+
+    Todos os pares usam o mesmo eixo de UFs, de modo que a tabela de uma
+    seleção de estados é a soma do array sobre uma única máscara de UFs.
+
+    Parâmetros:
+    -----------
+    contingencias : Dict[str, DataFrame]
+        Cubo de contingências (ver obter_contingencias)
+
+    Retorna:
+    --------
+    Tuple[ndarray, Dict]: (UFs do eixo comum, e para cada par os valores de
+    categoria_x, os valores de categoria_y e as contagens)
+    """
+    ufs = np.array(sorted({uf for tabela in contingencias.values() for uf in tabela['SG_UF_PROVA'].unique()}),
+                   dtype=object)
+    posicao_uf = pd.Index(ufs)
+
+    densas = {}
+    for par, tabela in contingencias.items():
+        codigos_x, valores_x = pd.factorize(tabela['categoria_x'])
+        codigos_y, valores_y = pd.factorize(tabela['categoria_y'])
+
+        contagens = np.zeros((len(ufs), len(valores_x), len(valores_y)), dtype='int64')
+        np.add.at(contagens, (posicao_uf.get_indexer(tabela['SG_UF_PROVA']), codigos_x, codigos_y),
+                  tabela['contagem'].to_numpy())
+        densas[par] = (np.asarray(valores_x, dtype=object), np.asarray(valores_y, dtype=object), contagens)
+
+    return ufs, densas
+
+
+# ------------------------------------------------------------
+# PERSISTÊNCIA E CARREGAMENTO
+# ------------------------------------------------------------
+
+def salvar_contingencias(
+    contingencias: Dict[str, pd.DataFrame],
+    tab_name: str = ABA_CONTINGENCIAS,
+    destino: str = DIRETORIO_CONTINGENCIAS
+) -> str:
+    """
+    Grava o cubo de contingências como um parquet por par de variáveis.
+
+    Parâmetros:
+    -----------
+    contingencias : Dict[str, DataFrame]
+        Contagens por par
+    tab_name : str, default=ABA_CONTINGENCIAS
+        Nome da aba
+    destino : str, default=DIRETORIO_CONTINGENCIAS
+        Diretório raiz dos cubos de contingências
+
+    Retorna:
+    --------
+    str: Diretório do cubo da aba
+    """
+    diretorio = os.path.join(destino, tab_name.lower())
+    os.makedirs(diretorio, exist_ok=True)
+
+    for par, tabela in contingencias.items():
+        tabela.to_parquet(os.path.join(diretorio, f"{par}.parquet"), index=False, engine='pyarrow')
+
+    return diretorio
+
+
+def obter_contingencias(tab_name: str = ABA_CONTINGENCIAS) -> Dict[str, pd.DataFrame]:
+    """
+    Retorna o cubo de contingências das variáveis sociais, compartilhado entre sessões.
+
+    Usa o cubo gerado pelo pipeline de dados (data/contingencia/<aba>) quando
+    disponível; caso contrário, calcula-o a partir da UF e das variáveis
+    sociais da aba. A versão dos arquivos lidos faz parte da chave do cache,
+    então um cubo regravado é lido na chamada seguinte, e falhas não ficam
+    em cache.
+
+    Parâmetros:
+    -----------
+    tab_name : str, default=ABA_CONTINGENCIAS
+        Nome da aba (ver ALVOS_CONTINGENCIA)
+
+    Retorna:
+    --------
+    Dict[str, DataFrame]: Contagens por par, ou dicionário vazio em caso de erro
+    """
+    tab = tab_name.lower()
+
+    try:
+        return _carregar_contingencias(tab, _impressao_contingencias(tab))
+
+    except Exception as e:
+        print(f"Erro ao obter cubo de contingências da aba {tab_name}: {e}")
+        return {}
+
+
+def _impressao_contingencias(tab: str) -> str:
+    """Retorna o hash dos arquivos do cubo de contingências da aba ou, sem eles, o dos dados de origem."""
+    arquivos = arquivos_parquet(os.path.join(DIRETORIO_CONTINGENCIAS, tab))
+    if arquivos:
+        return impressao_arquivos(arquivos)
+
+    # Importar localmente para evitar importação circular
+    from data.data_loader import _impressao_fonte_tab
+    return f"fonte:{_impressao_fonte_tab(tab)}"
+
+
+@st.cache_resource(ttl=3600, max_entries=4, show_spinner=False)
+def _carregar_contingencias(tab: str, impressao: str) -> Dict[str, pd.DataFrame]:
+    """
+    Lê ou calcula o cubo de contingências de uma aba (cache interno de obter_contingencias, por versão).
+
+    Erros são propagados para que obter_contingencias não guarde um cubo vazio no cache.
+    """
+    arquivos = arquivos_parquet(os.path.join(DIRETORIO_CONTINGENCIAS, tab))
+    if arquivos:
+        contingencias = {}
+        for caminho in arquivos:
+            par = os.path.splitext(os.path.basename(caminho))[0]
+            contingencias[par] = registrar_impressao_digital(
+                pd.read_parquet(caminho, engine='pyarrow'), 'contingencia', tab, par, impressao_arquivo(caminho)
+            )
+        return contingencias
+
+    # Importar localmente para evitar importação circular
+    from data.data_loader import colunas_da_aba, load_columns_for_tab
+
+    variaveis = variaveis_da_contingencia(colunas_da_aba(tab))
+    dados = load_columns_for_tab(tab, ['SG_UF_PROVA'] + variaveis)
+    if dados.empty:
+        raise RuntimeError(f"dados da aba {tab} indisponíveis para calcular as contingências")
+
+    tabelas = calcular_contingencias(dados, variaveis, ALVOS_CONTINGENCIA.get(tab))
+    return {
+        par: herdar_impressao_digital(tabela, dados, 'contingencia', par)
+        for par, tabela in tabelas.items()
+    }
+
+
+def obter_contingencias_densas(
+    tab_name: str = ABA_CONTINGENCIAS
+) -> Tuple[np.ndarray, Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+    """
+    Retorna o cubo de contingências de uma aba em arrays densos (ver densificar_contingencias).
+
+    Compartilhado entre sessões e, como obter_contingencias, chaveado pela
+    versão dos arquivos do cubo; falhas não ficam em cache.
+
+    Parâmetros:
+    -----------
+    tab_name : str, default=ABA_CONTINGENCIAS
+        Nome da aba (ver ALVOS_CONTINGENCIA)
+
+    Retorna:
+    --------
+    Tuple[ndarray, Dict]: UFs do eixo comum e arrays por par (vazios em caso de erro)
+    """
+    tab = tab_name.lower()
+
+    try:
+        return _carregar_contingencias_densas(tab, _impressao_contingencias(tab))
+    except Exception as e:
+        print(f"Erro ao densificar cubo de contingências da aba {tab_name}: {e}")
+        return np.array([], dtype=object), {}
+
+
+@st.cache_resource(ttl=3600, max_entries=4, show_spinner=False)
+def _carregar_contingencias_densas(
+    tab: str,
+    impressao: str
+) -> Tuple[np.ndarray, Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+    """Densifica o cubo de contingências de uma aba (cache interno de obter_contingencias_densas, por versão)."""
+    contingencias = _carregar_contingencias(tab, impressao)
+    if not contingencias:
+        raise RuntimeError(f"cubo de contingências da aba {tab} vazio")
+    return densificar_contingencias(contingencias)
@@ -0,0 +1,426 @@
+import os
+import streamlit as st
+import pandas as pd
+import numpy as np
+from typing import Dict, Iterable, List, Sequence
+
+from data.codificacao import CodificadorValores, ampliar
+from data.data_loader import decodificar_notas
+from data.impressao_digital import (
+    arquivos_parquet,
+    impressao_arquivo,
+    impressao_arquivos,
+    registrar_impressao_digital,
+    herdar_impressao_digital,
+)
+
+# ------------------------------------------------------------
+# CUBO DE AGREGADOS (UF × VARIÁVEL CATEGÓRICA × COMPETÊNCIA)
+# ------------------------------------------------------------
+#
+# Para cada variável, o cubo é um DataFrame longo com as colunas
+# SG_UF_PROVA, categoria (ausente na variável TOTAL), competencia e as
+# estatísticas n, soma, soma_quadrados, minimo e maximo das notas válidas
+# (maiores que zero). Todas as estatísticas são somáveis/combináveis, então
+# médias, variâncias e desvios de qualquer seleção de estados saem da soma
+# de poucas linhas do cubo, sem percorrer os microdados.
+
+DIRETORIO_CUBOS = "data/cubo"
+VARIAVEL_TOTAL = "TOTAL"
+COLUNAS_ESTATISTICAS = ['n', 'soma', 'soma_quadrados', 'minimo', 'maximo']
+
+
+def variaveis_do_cubo(tab_name: str) -> List[str]:
+    """
+    Retorna as variáveis categóricas agregadas no cubo de uma aba.
+
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba ('geral', 'desempenho')
+
+    Retorna:
+    --------
+    List[str]: Variáveis categóricas (a variável TOTAL é sempre incluída à parte)
+    """
+    if tab_name.lower() != 'desempenho':
+        return []
+
+    # Importar localmente para evitar importação circular (utils.helpers importa data)
+    from utils.helpers.mappings import get_mappings
+    return list(get_mappings()['variaveis_categoricas'].keys())
+
+
+def calcular_cubo(
+    df: pd.DataFrame,
+    colunas_notas: Sequence[str],
+    variaveis: Iterable[str] = ()
+) -> Dict[str, pd.DataFrame]:
+    """
+    Calcula o cubo de agregados de um DataFrame.
+
+    Parâmetros:
+    -----------
+    df : DataFrame
+        Microdados com SG_UF_PROVA, as colunas de notas e as variáveis
+    colunas_notas : Sequence[str]
+        Colunas de notas (competências)
+    variaveis : Iterable[str], default=()
+        Variáveis categóricas a cruzar com UF e competência
+
+    Retorna:
+    --------
+    Dict[str, DataFrame]: Cubo por variável (inclui VARIAVEL_TOTAL)
+    """
+    acumulador = AcumuladorCubo(colunas_notas, variaveis)
+    acumulador.adicionar(df)
+    return acumulador.resultado()
+
+
+class AcumuladorCubo:
+    """
+    Acumula o cubo de agregados lote a lote em arrays densos.
+
+    Para cada variável, as estatísticas ficam em arrays competência × UF ×
+    categoria, indexados por códigos estáveis entre lotes (ver
+    data.codificacao); a memória depende só do número de categorias, não do
+    número de linhas lidas. O formato longo do cubo é montado apenas em
+    resultado().
+
+    Parâmetros:
+    -----------
+    colunas_notas : Sequence[str]
+        Colunas de notas (competências)
+    variaveis : Iterable[str], default=()
+        Variáveis categóricas a cruzar com UF e competência
+    """
+
+    def __init__(self, colunas_notas: Sequence[str], variaveis: Iterable[str] = ()):
+        self.colunas_notas = list(colunas_notas)
+        self.variaveis = [VARIAVEL_TOTAL] + [var for var in dict.fromkeys(variaveis) if var != 'SG_UF_PROVA']
+        self.ufs = CodificadorValores()
+        self.categorias = {variavel: CodificadorValores() for variavel in self.variaveis}
+        self.competencias_vistas = np.zeros(len(self.colunas_notas), dtype=bool)
+        self.arrays: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def adicionar(self, df: pd.DataFrame) -> None:
+        """
+        Soma um lote de microdados ao cubo.
+
+        Parâmetros:
+        -----------
+        df : DataFrame
+            Lote com SG_UF_PROVA, as colunas de notas e as variáveis
+        """
+        notas = [(k, col) for k, col in enumerate(self.colunas_notas) if col in df.columns]
+        if df.empty or not notas or 'SG_UF_PROVA' not in df.columns:
+            return
+
+        codigos_uf = self.ufs.codificar(df['SG_UF_PROVA'])
+
+        # Notas inválidas (zero, -1 ou ausentes) ficam fora das estatísticas
+        valores = {}
+        for k, coluna in notas:
+            notas_coluna = decodificar_notas(df[coluna]).to_numpy(dtype='float64', na_value=np.nan)
+            valores[k] = (notas_coluna, notas_coluna > 0)
+            self.competencias_vistas[k] = True
+
+        for variavel in self.variaveis:
+            if variavel == VARIAVEL_TOTAL:
+                codigos_categoria = np.zeros(len(df), dtype='int64')
+                num_categorias = 1
+            elif variavel in df.columns:
+                codigos_categoria = self.categorias[variavel].codificar(df[variavel])
+                num_categorias = len(self.categorias[variavel])
+            else:
+                continue
+
+            arrays = self._arrays_variavel(variavel, len(self.ufs), num_categorias)
+            num_celulas = len(self.ufs) * num_categorias
+
+            # Grupos sem UF ou sem categoria ficam fora, como no groupby com dropna
+            linhas = (codigos_uf >= 0) & (codigos_categoria >= 0)
+            celulas = codigos_uf * num_categorias + codigos_categoria
+            presentes = np.bincount(celulas[linhas], minlength=num_celulas) > 0
+            arrays['presenca'] |= presentes.reshape(arrays['presenca'].shape)
+
+            for k, (notas_coluna, validas) in valores.items():
+                selecao = linhas & validas
+                celulas_validas = celulas[selecao]
+                notas_validas = notas_coluna[selecao]
+                arrays['n'][k] += np.bincount(celulas_validas, minlength=num_celulas).reshape(arrays['n'][k].shape)
+                arrays['soma'][k] += np.bincount(
+                    celulas_validas, weights=notas_validas, minlength=num_celulas
+                ).reshape(arrays['soma'][k].shape)
+                arrays['soma_quadrados'][k] += np.bincount(
+                    celulas_validas, weights=notas_validas ** 2, minlength=num_celulas
+                ).reshape(arrays['soma_quadrados'][k].shape)
+                np.minimum.at(arrays['minimo'][k].reshape(-1), celulas_validas, notas_validas)
+                np.maximum.at(arrays['maximo'][k].reshape(-1), celulas_validas, notas_validas)
+
+    def _arrays_variavel(self, variavel: str, num_ufs: int, num_categorias: int) -> Dict[str, np.ndarray]:
+        """Retorna os arrays da variável, criados ou ampliados para os códigos atuais."""
+        num_competencias = len(self.colunas_notas)
+        arrays = self.arrays.get(variavel)
+        if arrays is None:
+            arrays = self.arrays[variavel] = {
+                'presenca': np.zeros((0, 0), dtype=bool),
+                'n': np.zeros((num_competencias, 0, 0), dtype='int64'),
+                'soma': np.zeros((num_competencias, 0, 0), dtype='float64'),
+                'soma_quadrados': np.zeros((num_competencias, 0, 0), dtype='float64'),
+                'minimo': np.full((num_competencias, 0, 0), np.inf),
+                'maximo': np.full((num_competencias, 0, 0), -np.inf),
+            }
+
+        preenchimentos = {'minimo': np.inf, 'maximo': -np.inf}
+        for nome, array in arrays.items():
+            formato = (num_ufs, num_categorias) if nome == 'presenca' else (num_competencias, num_ufs, num_categorias)
+            arrays[nome] = ampliar(array, formato, preenchimentos.get(nome, 0))
+        return arrays
+
+    def resultado(self) -> Dict[str, pd.DataFrame]:
+        """
+        Monta o formato longo do cubo a partir dos arrays acumulados.
+
+        Retorna:
+        --------
+        Dict[str, DataFrame]: Cubo por variável (inclui VARIAVEL_TOTAL), com
+        uma linha por (UF, [categoria], competência) de cada grupo presente
+        nos dados; grupos sem notas válidas têm n = 0
+        """
+        competencias = [col for k, col in enumerate(self.colunas_notas) if self.competencias_vistas[k]]
+        indices_competencias = np.flatnonzero(self.competencias_vistas)
+        ufs = self.ufs.valores_array()
+
+        cubo = {}
+        for variavel, arrays in self.arrays.items():
+            posicao_uf, posicao_categoria = np.nonzero(arrays['presenca'])
+            num_grupos = len(posicao_uf)
+
+            # Grupo a grupo, com as competências em sequência
+            por_grupo = {
+                nome: arrays[nome][indices_competencias][:, posicao_uf, posicao_categoria].T.reshape(-1)
+                for nome in COLUNAS_ESTATISTICAS
+            }
+            n = por_grupo['n']
+            tabela = {'SG_UF_PROVA': np.repeat(ufs[posicao_uf], len(competencias))}
+            if variavel != VARIAVEL_TOTAL:
+                categorias = self.categorias[variavel].valores_array()
+                tabela['categoria'] = np.repeat(categorias[posicao_categoria], len(competencias))
+            tabela.update({
+                'competencia': np.tile(np.asarray(competencias, dtype=object), num_grupos),
+                'n': n,
+                'soma': por_grupo['soma'],
+                'soma_quadrados': por_grupo['soma_quadrados'],
+                'minimo': np.where(n > 0, por_grupo['minimo'], np.nan),
+                'maximo': np.where(n > 0, por_grupo['maximo'], np.nan),
+            })
+            cubo[variavel] = _normalizar_cubo(pd.DataFrame(tabela))
+
+        return cubo
+
+
+def _normalizar_cubo(cubo: pd.DataFrame) -> pd.DataFrame:
+    """Padroniza os tipos das chaves e das estatísticas do cubo."""
+    cubo['SG_UF_PROVA'] = cubo['SG_UF_PROVA'].astype(str)
+    cubo['competencia'] = cubo['competencia'].astype(str)
+    cubo['n'] = cubo['n'].astype('int64')
+    for coluna in ['soma', 'soma_quadrados', 'minimo', 'maximo']:
+        cubo[coluna] = cubo[coluna].astype('float64')
+    return cubo
+
+
+def consultar_cubo(
+    cubo: Dict[str, pd.DataFrame],
+    estados: Sequence[str],
+    variavel: str = VARIAVEL_TOTAL,
+    agrupar_por: Sequence[str] = ('competencia',)
+) -> pd.DataFrame:
+    """
+    Responde contagem, média, variância, desvio, mínimo e máximo a partir do cubo.
+
+    Parâmetros:
+    -----------
+    cubo : Dict[str, DataFrame]
+        Cubo de agregados
+    estados : Sequence[str]
+        Estados da seleção
+    variavel : str, default=VARIAVEL_TOTAL
+        Variável categórica do cruzamento
+    agrupar_por : Sequence[str], default=('competencia',)
+        Dimensões do resultado: 'SG_UF_PROVA', 'categoria' e/ou 'competencia'
+
+    Retorna:
+    --------
+    DataFrame: Uma linha por combinação de agrupar_por, com n, media,
+    variancia (amostral), desvio_padrao, minimo e maximo
+    """
+    colunas_resultado = list(agrupar_por) + ['n', 'media', 'variancia', 'desvio_padrao', 'minimo', 'maximo']
+
+    tabela = cubo.get(variavel) if cubo else None
+    if tabela is None or tabela.empty:
+        return pd.DataFrame(columns=colunas_resultado)
+
+    tabela = tabela[tabela['SG_UF_PROVA'].isin(list(estados))]
+    if tabela.empty:
+        return pd.DataFrame(columns=colunas_resultado)
+
+    agregado = tabela.groupby(list(agrupar_por), sort=False, observed=True).agg(
+        n=('n', 'sum'),
+        soma=('soma', 'sum'),
+        soma_quadrados=('soma_quadrados', 'sum'),
+        minimo=('minimo', 'min'),
+        maximo=('maximo', 'max'),
+    ).reset_index()
+
+    n = agregado['n'].to_numpy(dtype='float64')
+    soma = agregado['soma'].to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = np.where(n > 0, soma / n, 0.0)
+        variancia = np.where(n > 1, (agregado['soma_quadrados'].to_numpy() - soma * media) / (n - 1), 0.0)
+
+    # Erros de arredondamento podem produzir variâncias levemente negativas
+    agregado['media'] = media
+    agregado['variancia'] = np.clip(variancia, 0.0, None)
+    agregado['desvio_padrao'] = np.sqrt(agregado['variancia'])
+
+    return agregado[colunas_resultado]
+
+
+def medias_estado_competencia(
+    cubo: Dict[str, pd.DataFrame],
+    estados: Sequence[str],
+    colunas_notas: Sequence[str]
+) -> pd.DataFrame:
+    """
+    Monta a matriz de médias estado × competência a partir do cubo.
+
+    Parâmetros:
+    -----------
+    cubo : Dict[str, DataFrame]
+        Cubo de agregados
+    estados : Sequence[str]
+        Estados da seleção (a ordem é preservada)
+    colunas_notas : Sequence[str]
+        Competências, na ordem desejada
+
+    Retorna:
+    --------
+    DataFrame: Índice = estados presentes no cubo, colunas = competências;
+    NaN onde não há notas válidas
+    """
+    consulta = consultar_cubo(cubo, estados, agrupar_por=('SG_UF_PROVA', 'competencia'))
+    if consulta.empty:
+        return pd.DataFrame(columns=list(colunas_notas), dtype='float64')
+
+    consulta['media'] = consulta['media'].where(consulta['n'] > 0)
+    matriz = consulta.pivot(index='SG_UF_PROVA', columns='competencia', values='media')
+
+    estados_presentes = [estado for estado in estados if estado in matriz.index]
+    return matriz.reindex(index=estados_presentes, columns=list(colunas_notas)).astype('float64')
+
+
+# ------------------------------------------------------------
+# PERSISTÊNCIA E CARREGAMENTO
+# ------------------------------------------------------------
+
+def salvar_cubo(cubo: Dict[str, pd.DataFrame], tab_name: str, destino: str = DIRETORIO_CUBOS) -> str:
+    """
+    Grava o cubo de uma aba como um parquet por variável.
+
+    Parâmetros:
+    -----------
+    cubo : Dict[str, DataFrame]
+        Cubo de agregados
+    tab_name : str
+        Nome da aba
+    destino : str, default=DIRETORIO_CUBOS
+        Diretório raiz dos cubos
+
+    Retorna:
+    --------
+    str: Diretório do cubo da aba
+    """
+    diretorio = os.path.join(destino, tab_name.lower())
+    os.makedirs(diretorio, exist_ok=True)
+
+    for variavel, tabela in cubo.items():
+        tabela.to_parquet(os.path.join(diretorio, f"{variavel}.parquet"), index=False, engine='pyarrow')
+
+    return diretorio
+
+
+def obter_cubo(tab_name: str) -> Dict[str, pd.DataFrame]:
+    """
+    Retorna o cubo de agregados de uma aba, compartilhado entre sessões.
+
+    Usa o cubo gerado pelo pipeline de dados (data/cubo/<aba>) quando
+    disponível; caso contrário, calcula-o a partir das colunas necessárias da
+    aba. A versão dos arquivos lidos faz parte da chave do cache, então um
+    cubo regravado é lido na chamada seguinte, e falhas não ficam em cache.
+
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba ('geral', 'desempenho')
+
+    Retorna:
+    --------
+    Dict[str, DataFrame]: Cubo por variável, ou dicionário vazio em caso de erro
+    """
+    tab = tab_name.lower()
+
+    try:
+        return _carregar_cubo(tab, _impressao_cubo(tab))
+
+    except Exception as e:
+        print(f"Erro ao obter cubo de agregados da aba {tab_name}: {e}")
+        return {}
+
+
+def _impressao_cubo(tab: str) -> str:
+    """Retorna o hash dos arquivos do cubo da aba ou, sem eles, o dos dados de origem."""
+    arquivos = arquivos_parquet(os.path.join(DIRETORIO_CUBOS, tab))
+    if arquivos:
+        return impressao_arquivos(arquivos)
+
+    # Importar localmente para evitar importação circular
+    from data.data_loader import _impressao_fonte_tab
+    return f"fonte:{_impressao_fonte_tab(tab)}"
+
+
+@st.cache_resource(ttl=3600, max_entries=4, show_spinner=False)
+def _carregar_cubo(tab: str, impressao: str) -> Dict[str, pd.DataFrame]:
+    """
+    Lê ou calcula o cubo de uma aba (cache interno de obter_cubo, por versão dos arquivos).
+
+    Erros são propagados para que obter_cubo não guarde um cubo vazio no cache.
+    """
+    arquivos = arquivos_parquet(os.path.join(DIRETORIO_CUBOS, tab))
+    if arquivos:
+        # Cada tabela recebe a impressão do seu arquivo: consultas com optimized_cache
+        # sobre ela usam a chave barata (e o cache em disco)
+        cubo = {}
+        for caminho in arquivos:
+            variavel = os.path.splitext(os.path.basename(caminho))[0]
+            cubo[variavel] = registrar_impressao_digital(
+                pd.read_parquet(caminho, engine='pyarrow'), 'cubo', tab, variavel, impressao_arquivo(caminho)
+            )
+        return cubo
+
+    # Importar localmente para evitar importação circular
+    from data.data_loader import load_columns_for_tab
+    from utils.helpers.mappings import get_mappings
+
+    colunas_notas = get_mappings()['colunas_notas']
+    variaveis = variaveis_do_cubo(tab)
+    dados = load_columns_for_tab(tab, ['SG_UF_PROVA'] + list(colunas_notas) + variaveis)
+    if dados.empty:
+        raise RuntimeError(f"dados da aba {tab} indisponíveis para calcular o cubo")
+
+    tabelas = calcular_cubo(dados, colunas_notas, [variavel for variavel in variaveis if variavel in dados.columns])
+    return {
+        variavel: herdar_impressao_digital(tabela, dados, 'cubo', variavel)
+        for variavel, tabela in tabelas.items()
+    }
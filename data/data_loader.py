@@ -2,49 +2,617 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import gc
-from typing import Dict, List
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from data.esquema_categorias import adicionar_rotulos, colunas_origem
+from data.impressao_digital import (
+    herdar_impressao_digital,
+    impressao_arquivo,
+    impressao_arquivos,
+    normalizar_estados,
+    registrar_impressao_digital,
+)
+
+# Diretório raiz do armazenamento particionado por UF (formato hive: SG_UF_PROVA=XX)
+DIRETORIO_PARTICOES = "data/particionado"
+COLUNA_PARTICAO = "SG_UF_PROVA"
+
+# Diretório dos arquivos Arrow IPC já tipados (categóricas como dicionário),
+# lidos por memory-map sem passar por optimize_dtypes
+DIRETORIO_ARROW = "data/arrow"
+
+# Notas (NU_NOTA_*) armazenadas em décimos de ponto como uint16: 512,3 -> 5123.
+# O valor 0 marca nota inválida (ausente, -1 ou zero), de modo que os filtros
+# "nota > 0" continuam válidos sem decodificar a coluna.
+ESCALA_NOTAS = 10
+TIPO_NOTA_COMPACTA = 'uint16'
+
+# Leituras refeitas quando os arquivos de uma aba mudam durante a leitura
+TENTATIVAS_LEITURA = 3
+
+# Linhas por lote na geração dos arquivos Arrow IPC
+TAMANHO_LOTE_ARROW = 250_000
 
 # ------------------------------------------------------------
 # FUNÇÕES DE CARREGAMENTO DE DADOS
 # ------------------------------------------------------------
 
-@st.cache_data(ttl=3600)
-def load_data_for_tab(tab_name: str, apenas_filtros: bool = False):
+def load_data_for_tab(tab_name: str, apenas_filtros: bool = False, colunas: Optional[List[str]] = None):
     """
     Carrega dados otimizados para uma aba específica.
     Versão simplificada e de alto desempenho.
     
+    O resultado fica no registro compartilhado do processo (st.cache_resource):
+    todas as sessões e páginas recebem o mesmo objeto, sem desserialização,
+    com colunas somente leitura. A versão dos arquivos da aba faz parte da
+    chave do cache, então um arquivo novo é lido na chamada seguinte.
+    
     Parâmetros:
     -----------
     tab_name : str
         Nome da aba para a qual carregar os dados ('geral', 'aspectos_sociais', 'desempenho')
     apenas_filtros : bool, default=False
         Se True, carrega apenas os dados mínimos necessários para os filtros
+    colunas : List[str], opcional
+        Colunas necessárias. Se informado, delega para load_columns_for_tab,
+        que lê do parquet apenas essas colunas
         
     Retorna:
     --------
     DataFrame: Dados carregados para a aba especificada
     """
+    if colunas is not None and not apenas_filtros:
+        return load_columns_for_tab(tab_name, colunas)
 
     try:
         # Para filtros, carregar apenas a coluna de UF do arquivo genérico
-        if apenas_filtros:
-            return pd.read_parquet("data/sample_localizacao.parquet", 
-                                  engine='pyarrow')
+        tab = "localizacao" if apenas_filtros else tab_name.lower()
+        return _carregar_dados_tab(tab, _impressao_fonte_tab(tab))
+        
+    except Exception as e:
+        st.error(f"Erro ao carregar dados para aba {tab_name}: {e}")
+        return pd.DataFrame()
+
+
+@st.cache_resource(ttl=3600, max_entries=10, show_spinner=False)
+def _carregar_dados_tab(tab: str, impressao: str) -> pd.DataFrame:
+    """
+    Lê os dados de uma aba (cache interno de load_data_for_tab, por versão dos arquivos).
+    
+    A impressão digital registrada é a da versão efetivamente lida, que pode
+    ser mais nova que a da chave se os arquivos mudarem entre as duas.
+    """
+    # Carregar dados específicos da aba já com os tipos otimizados
+    dados, impressao_lida = _ler_dados_versionados(tab)
+    return registrar_impressao_digital(dados, 'aba', tab, impressao_lida)
+
+
+def _ler_dados_tab(tab: str, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Lê os dados de uma aba, preferindo o arquivo Arrow IPC pré-tipado.
+    
+    Se data/arrow/<aba>.arrow existir, ele é mapeado em memória e convertido
+    sem cópia nem astype. Caso contrário, lê o parquet da aba e aplica
+    optimize_dtypes. Em ambos os casos, as colunas de rótulos da aba
+    (<VARIAVEL>_NOME, ver data.esquema_categorias) são criadas aqui.
+    
+    Parâmetros:
+    -----------
+    tab : str
+        Nome da aba em minúsculas
+    colunas : List[str], opcional
+        Colunas a ler; None para todas. Pedir uma coluna de rótulos lê a
+        variável original, que também fica no resultado
+        
+    Retorna:
+    --------
+    DataFrame: Dados da aba com tipos otimizados e rótulos
+    """
+    caminho = _arquivo_dados_tab(tab)
+    colunas = colunas_origem(tab, colunas) if colunas is not None else None
+    
+    if caminho.endswith('.arrow'):
+        return adicionar_rotulos(_ler_arrow_mapeado(caminho, colunas), tab)
+    
+    dados = pd.read_parquet(caminho, engine='pyarrow', columns=colunas)
+    return adicionar_rotulos(optimize_dtypes(dados, tab), tab)
+
+
+def _ler_dados_versionados(tab: str, colunas: Optional[List[str]] = None) -> Tuple[pd.DataFrame, str]:
+    """
+    Lê os dados de uma aba junto com o hash da versão dos arquivos lida.
+    
+    O hash é conferido antes e depois da leitura; se os arquivos mudarem no
+    meio dela (por exemplo, durante um novo build), a leitura é refeita.
+    
+    Parâmetros:
+    -----------
+    tab : str
+        Nome da aba em minúsculas
+    colunas : List[str], opcional
+        Colunas a ler; None para todas
+        
+    Retorna:
+    --------
+    Tuple[DataFrame, str]: Dados somente leitura e hash da versão lida
+    """
+    for _ in range(TENTATIVAS_LEITURA):
+        impressao = _impressao_fonte_tab(tab)
+        dados = _tornar_somente_leitura(_ler_dados_tab(tab, colunas))
+        if _impressao_fonte_tab(tab) == impressao:
+            return dados, impressao
+    
+    raise RuntimeError(f"os arquivos da aba {tab} mudaram durante {TENTATIVAS_LEITURA} leituras seguidas")
+
+
+def _arquivo_dados_tab(tab: str) -> str:
+    """Retorna o arquivo lido para a aba: o Arrow IPC pré-tipado, se existir, ou o parquet."""
+    caminho_arrow = os.path.join(DIRETORIO_ARROW, f"{tab}.arrow")
+    return caminho_arrow if os.path.exists(caminho_arrow) else f"data/sample_{tab}.parquet"
+
+
+def colunas_da_aba(tab_name: str) -> List[str]:
+    """
+    Retorna as colunas armazenadas no arquivo de uma aba, lendo apenas o schema.
+
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba ('geral', 'aspectos_sociais', 'desempenho', 'localizacao')
+
+    Retorna:
+    --------
+    List[str]: Colunas do arquivo (sem as colunas de rótulos, criadas na leitura)
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    caminho = _arquivo_dados_tab(tab_name.lower())
+    if caminho.endswith('.arrow'):
+        with pa.memory_map(caminho, 'r') as fonte:
+            return list(pa.ipc.open_file(fonte).schema.names)
+
+    return list(pq.read_schema(caminho).names)
+
+
+def _impressao_fonte_tab(tab: str) -> str:
+    """
+    Retorna o hash do conteúdo de origem de uma aba (ver data.impressao_digital).
+    
+    Para o parquet, o arquivo de tipos também entra no hash, pois
+    optimize_dtypes altera a representação das colunas.
+    
+    Parâmetros:
+    -----------
+    tab : str
+        Nome da aba em minúsculas
+        
+    Retorna:
+    --------
+    str: Hash hexadecimal
+    """
+    caminho = _arquivo_dados_tab(tab)
+    if caminho.endswith('.arrow'):
+        return impressao_arquivo(caminho)
+    return impressao_arquivos([caminho, f'data/dtypes_{tab}.json'])
+
+
+def _ler_arrow_mapeado(caminho: str, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Lê um arquivo Arrow IPC por memory-map (zero-copy).
+    
+    Colunas numéricas sem nulos e os índices das categóricas apontam
+    diretamente para as páginas mapeadas do arquivo; por isso os arrays
+    resultantes são somente leitura.
+    
+    Parâmetros:
+    -----------
+    caminho : str
+        Caminho do arquivo .arrow
+    colunas : List[str], opcional
+        Colunas a ler; None para todas
+        
+    Retorna:
+    --------
+    DataFrame: Dados do arquivo
+    """
+    import pyarrow as pa
+    
+    fonte = pa.memory_map(caminho, 'r')
+    tabela = pa.ipc.open_file(fonte).read_all()
+    
+    if colunas is not None:
+        tabela = tabela.select(colunas)
+    
+    # split_blocks evita consolidar as colunas em um único bloco (o que copiaria os dados)
+    return tabela.to_pandas(split_blocks=True)
+
+
+def gerar_arquivo_arrow(
+    tab_name: str,
+    origem: Optional[str] = None,
+    diretorio: str = DIRETORIO_ARROW,
+    tipos: Optional[Dict[str, str]] = None,
+    tamanho_lote: int = TAMANHO_LOTE_ARROW
+) -> str:
+    """
+    Grava os dados de uma aba como Arrow IPC já tipado, para leitura por memory-map.
+    
+    Os tipos da aba são aplicados uma única vez aqui, lote a lote a partir do
+    scanner de dataset do parquet (sem carregar a aba inteira); categóricas
+    são gravadas como colunas de dicionário, com o mesmo dicionário em todos
+    os lotes, e floats mantêm NaN como valor (e não como nulo), permitindo a
+    conversão sem cópia na leitura. O arquivo é gravado sem compressão,
+    requisito para o acesso zero-copy, e só substitui o anterior ao final.
+    
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba ('geral', 'aspectos_sociais', 'desempenho', 'localizacao')
+    origem : str, opcional
+        Arquivo parquet de origem. Padrão: data/sample_<aba>.parquet
+    diretorio : str, default=DIRETORIO_ARROW
+        Diretório de saída do arquivo <aba>.arrow
+    tipos : Dict[str, str], opcional
+        Tipo de cada coluna. Padrão: data/dtypes_<aba>.json
+    tamanho_lote : int, default=TAMANHO_LOTE_ARROW
+        Linhas lidas e gravadas por lote
+        
+    Retorna:
+    --------
+    str: Caminho do arquivo .arrow gerado
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    
+    tab = tab_name.lower()
+    origem = origem or f"data/sample_{tab}.parquet"
+    destino = os.path.join(diretorio, f"{tab}.arrow")
+    temporario = f"{destino}.tmp"
+    
+    dataset = ds.dataset(origem, format='parquet')
+    tipos = tipos if tipos is not None else _ler_dtypes(tab)
+    tipos = {col: tipo for col, tipo in tipos.items() if col in dataset.schema.names}
+    
+    # O formato de arquivo IPC não permite trocar o dicionário entre lotes:
+    # as categorias de cada coluna são levantadas antes, uma coluna por vez
+    categorias = {
+        col: _categorias_dataset(dataset, col) for col, tipo in tipos.items() if tipo == 'category'
+    }
+    
+    def tabela_tipada(dados: pd.DataFrame):
+        dados = optimize_dtypes(dados, tipos)
+        for col, valores in categorias.items():
+            dados[col] = pd.Categorical(dados[col], categories=valores)
+        return converter_para_tabela_arrow(dados)
+    
+    os.makedirs(diretorio, exist_ok=True)
+    with pa.OSFile(temporario, 'wb') as arquivo:
+        escritor = None
+        for lote in dataset.to_batches(batch_size=tamanho_lote):
+            tabela = tabela_tipada(lote.to_pandas())
+            if escritor is None:
+                escritor = pa.ipc.new_file(arquivo, tabela.schema)
+            escritor.write_table(tabela)
+        
+        if escritor is None:
+            # Origem sem linhas: gravar apenas o esquema
+            tabela = tabela_tipada(dataset.schema.empty_table().to_pandas())
+            escritor = pa.ipc.new_file(arquivo, tabela.schema)
+        escritor.close()
+    
+    os.replace(temporario, destino)
+    return destino
+
+
+def _categorias_dataset(dataset, coluna: str) -> pd.Index:
+    """Categorias de uma coluna do dataset, na ordem que astype('category') produziria."""
+    unicos = [lote.column(0).unique().to_pandas() for lote in dataset.to_batches(columns=[coluna])]
+    valores = pd.concat(unicos, ignore_index=True) if unicos else pd.Series([], dtype='object')
+    return valores.astype('category').cat.categories
+
+
+def converter_para_tabela_arrow(df: pd.DataFrame):
+    """
+    Converte um DataFrame já tipado em tabela Arrow adequada para memory-map.
+    
+    Parâmetros:
+    -----------
+    df : DataFrame
+        DataFrame com os tipos finais (categóricas e numéricos)
+        
+    Retorna:
+    --------
+    pyarrow.Table: Tabela com categóricas como dicionário e NaN preservado
+    """
+    import pyarrow as pa
+    
+    arrays = []
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            arrays.append(pa.array(df[col]))
+        else:
+            # A partir de um ndarray, o pyarrow mantém NaN como valor (sem bitmap de nulos)
+            arrays.append(pa.array(df[col].to_numpy()))
+    
+    return pa.Table.from_arrays(arrays, names=list(df.columns))
+
+
+@st.cache_resource(show_spinner=False)
+def _obter_armazenamento_colunas() -> Dict[str, object]:
+    """
+    Retorna o armazenamento de colunas compartilhado entre sessões.
+    
+    Cada coluna é guardada uma única vez por versão dos arquivos da aba (chave
+    (aba, hash da fonte, coluna)), de modo que seções diferentes da mesma
+    página reaproveitam o que já foi lido sem misturar versões.
+    
+    Retorna:
+    --------
+    Dict[str, object]: Dicionário com as colunas carregadas e o lock de acesso
+    """
+    return {'colunas': {}, 'lock': threading.Lock()}
+
+
+def load_columns_for_tab(tab_name: str, colunas: List[str]) -> pd.DataFrame:
+    """
+    Carrega apenas as colunas solicitadas de uma aba, com cache por coluna.
+    
+    Colunas já carregadas anteriormente são reaproveitadas; somente as que
+    ainda não estão em memória são lidas do parquet (projeção de colunas),
+    e apenas elas passam pela otimização de tipos. Quando os arquivos da aba
+    mudam, as colunas da versão anterior são descartadas.
+    
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba ('geral', 'aspectos_sociais', 'desempenho', 'localizacao')
+    colunas : List[str]
+        Colunas necessárias para a seção que está sendo renderizada
+        
+    Retorna:
+    --------
+    DataFrame: Dados da aba contendo apenas as colunas solicitadas
+    """
+    # Remover duplicadas preservando a ordem pedida
+    colunas = list(dict.fromkeys(colunas))
+    if not colunas:
+        return pd.DataFrame()
+    
+    tab = tab_name.lower()
+    armazenamento = _obter_armazenamento_colunas()
+    
+    try:
+        with armazenamento['lock']:
+            cache_colunas = armazenamento['colunas']
+            impressao = _impressao_fonte_tab(tab)
+            faltantes = [col for col in colunas if (tab, impressao, col) not in cache_colunas]
+            
+            if faltantes:
+                # Ler somente as colunas ainda não carregadas
+                novas, impressao_lida = _ler_dados_versionados(tab, faltantes)
+                
+                if impressao_lida != impressao:
+                    # Os arquivos mudaram após a consulta: ler todas as colunas da nova versão
+                    faltantes = colunas
+                    novas, impressao = _ler_dados_versionados(tab, faltantes)
+                
+                for col in faltantes:
+                    cache_colunas[(tab, impressao, col)] = novas[col]
+            
+            # Descartar colunas de versões anteriores dos arquivos da aba
+            for chave in [chave for chave in cache_colunas if chave[0] == tab and chave[1] != impressao]:
+                del cache_colunas[chave]
+            
+            series = {col: cache_colunas[(tab, impressao, col)] for col in colunas}
         
-        # Carregar dados específicos da aba
-        dados_especificos = pd.read_parquet(f"data/sample_{tab_name.lower()}.parquet", engine='pyarrow')
+        # Montar o DataFrame sem copiar os dados das colunas em cache
+        dados = pd.DataFrame(series, copy=False)
+        return registrar_impressao_digital(dados, 'aba', tab, impressao, 'colunas', tuple(colunas))
         
-        # Aplicar otimização de tipos de dados
-        dados_especificos = optimize_dtypes(dados_especificos, tab_name)
+    except Exception as e:
+        st.error(f"Erro ao carregar colunas {colunas} para aba {tab_name}: {e}")
+        return pd.DataFrame()
+
+
+def load_data_for_states(
+    tab_name: str,
+    estados: List[str],
+    colunas: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Carrega os dados de uma aba apenas para os estados selecionados.
+    
+    Quando existe o armazenamento particionado por UF da aba
+    (data/particionado/<aba>/SG_UF_PROVA=XX), apenas as partições dos estados
+    pedidos são lidas, via filtro de dataset do pyarrow. Caso contrário, o
+    arquivo único da aba é carregado e filtrado com filter_data_by_states.
+    
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba ('geral', 'aspectos_sociais', 'desempenho')
+    estados : List[str]
+        Lista de siglas de estados a carregar
+    colunas : List[str], opcional
+        Colunas necessárias. Se None, todas as colunas são carregadas
         
-        return dados_especificos
+    Retorna:
+    --------
+    DataFrame: Dados da aba restritos aos estados selecionados
+    """
+    if not estados:
+        return pd.DataFrame()
+    
+    tab = tab_name.lower()
+    estados_chave = normalizar_estados(estados)
+    colunas_chave = tuple(dict.fromkeys(colunas)) if colunas is not None else None
+    
+    try:
+        return _carregar_particoes_estados(tab, estados_chave, colunas_chave, _impressao_estados(tab, estados_chave))
         
     except Exception as e:
-        st.error(f"Erro ao carregar dados para aba {tab_name}: {e}")
+        st.error(f"Erro ao carregar dados da aba {tab_name} para os estados selecionados: {e}")
         return pd.DataFrame()
 
 
+@st.cache_resource(ttl=600, max_entries=4, show_spinner=False)
+def _carregar_particoes_estados(
+    tab: str,
+    estados: Tuple[str, ...],
+    colunas: Optional[Tuple[str, ...]],
+    impressao: str
+) -> pd.DataFrame:
+    """
+    Lê as partições dos estados informados (cache interno de load_data_for_states).
+    
+    Sessões com a mesma seleção compartilham o mesmo DataFrame somente leitura.
+    A impressão dos arquivos das partições só compõe a chave do cache, para
+    que partições regravadas sejam lidas de novo; erros são propagados, e
+    assim não ficam em cache.
+    """
+    return _ler_particoes_estados(tab, estados, colunas)
+
+
+def ler_dados_estado(tab_name: str, estado: str, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Lê os dados de um único estado, sem passar pelo cache de seleções.
+    
+    Usado no cálculo dos agregados parciais por UF: ler um estado não
+    desloca do cache as seleções completas usadas pelas páginas.
+    
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba ('geral', 'aspectos_sociais', 'desempenho')
+    estado : str
+        Sigla do estado
+    colunas : List[str], opcional
+        Colunas a ler; None para todas
+        
+    Retorna:
+    --------
+    DataFrame: Dados do estado com tipos otimizados
+    """
+    colunas_chave = tuple(dict.fromkeys(colunas)) if colunas is not None else None
+    return _ler_particoes_estados(tab_name.lower(), (estado,), colunas_chave)
+
+
+def impressao_estado(tab_name: str, estado: str) -> str:
+    """
+    Retorna o hash dos dados de origem de um estado.
+    
+    Com o armazenamento particionado, cobre apenas os arquivos da partição
+    do estado (e os tipos aplicados), de modo que alterar um estado não
+    invalida os agregados dos demais. Sem partições, é o hash da fonte da aba.
+    
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba
+    estado : str
+        Sigla do estado
+        
+    Retorna:
+    --------
+    str: Hash hexadecimal
+    """
+    return _impressao_estados(tab_name.lower(), (estado,))
+
+
+def _impressao_estados(tab: str, estados: Tuple[str, ...]) -> str:
+    """Hash das partições dos estados (e dos tipos aplicados) ou, sem partições, da fonte da aba."""
+    diretorio = os.path.join(DIRETORIO_PARTICOES, tab)
+    if not os.path.isdir(diretorio):
+        return _impressao_fonte_tab(tab)
+    return impressao_arquivos(_arquivos_particoes(diretorio, estados) + [f'data/dtypes_{tab}.json'])
+
+
+def _arquivos_particoes(diretorio: str, estados: Tuple[str, ...]) -> List[str]:
+    """Lista os arquivos parquet das partições dos estados informados."""
+    return [
+        os.path.join(raiz, arquivo)
+        for estado in estados
+        for raiz, _, arquivos_uf in os.walk(os.path.join(diretorio, f"{COLUNA_PARTICAO}={estado}"))
+        for arquivo in arquivos_uf if arquivo.endswith('.parquet')
+    ]
+
+
+def _ler_particoes_estados(
+    tab: str,
+    estados: Tuple[str, ...],
+    colunas: Optional[Tuple[str, ...]]
+) -> pd.DataFrame:
+    """
+    Lê as partições dos estados informados, com impressão digital.
+    
+    Erros de leitura são propagados para quem chama.
+    
+    Parâmetros:
+    -----------
+    tab : str
+        Nome da aba em minúsculas
+    estados : Tuple[str, ...]
+        Siglas dos estados, ordenadas (compõem a chave do cache)
+    colunas : Tuple[str, ...], opcional
+        Colunas a ler; None para todas
+        
+    Retorna:
+    --------
+    DataFrame: Dados das partições selecionadas com tipos otimizados
+    """
+    diretorio = os.path.join(DIRETORIO_PARTICOES, tab)
+    
+    if not os.path.isdir(diretorio):
+        # Sem armazenamento particionado: arquivo único + filtro em memória
+        if colunas is not None:
+            colunas_leitura = list(colunas)
+            if COLUNA_PARTICAO not in colunas_leitura:
+                colunas_leitura.append(COLUNA_PARTICAO)
+            dados = load_columns_for_tab(tab, colunas_leitura)
+        else:
+            dados = load_data_for_tab(tab)
+        
+        # Os carregadores da aba devolvem um DataFrame vazio em caso de erro
+        if dados.empty:
+            raise RuntimeError(f"dados da aba {tab} indisponíveis")
+        
+        dados = filter_data_by_states(dados, list(estados))
+        dados = dados[list(colunas)] if colunas is not None else dados
+        return registrar_impressao_digital(
+            _tornar_somente_leitura(dados),
+            'aba', tab, _impressao_fonte_tab(tab), 'estados', estados, 'colunas', colunas
+        )
+    
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    
+    particionamento = ds.partitioning(pa.schema([(COLUNA_PARTICAO, pa.string())]), flavor="hive")
+    dataset = ds.dataset(diretorio, format="parquet", partitioning=particionamento)
+    
+    # O filtro sobre a coluna de partição descarta diretórios inteiros antes da leitura
+    tabela = dataset.to_table(
+        columns=colunas_origem(tab, colunas) if colunas is not None else None,
+        filter=ds.field(COLUNA_PARTICAO).isin(list(estados))
+    )
+    
+    dados = adicionar_rotulos(optimize_dtypes(tabela.to_pandas(), tab), tab)
+    del tabela
+    
+    # Colunas de rótulos pedidas trazem junto a variável original
+    if colunas is not None and len(dados.columns) != len(colunas):
+        dados = dados[list(colunas)]
+    
+    # Impressão digital: apenas os arquivos das partições lidas (e os tipos aplicados)
+    return registrar_impressao_digital(
+        _tornar_somente_leitura(dados),
+        'particoes', tab, _impressao_estados(tab, estados), 'estados', estados, 'colunas', colunas
+    )
+
+
 # ------------------------------------------------------------
 # FUNÇÕES DE FILTRO E PROCESSAMENTO
 # ------------------------------------------------------------
@@ -68,7 +636,10 @@ def filter_data_by_states(df: pd.DataFrame, estados: List[str]) -> pd.DataFrame:
         return pd.DataFrame(columns=df.columns)
     
     # Filtrar e criar uma view em vez de cópia para economizar memória
-    return df[df['SG_UF_PROVA'].isin(estados)]
+    filtrado = df[df['SG_UF_PROVA'].isin(estados)]
+    
+    # Mantém a chave barata de cache (origem + seleção normalizada de estados)
+    return herdar_impressao_digital(filtrado, df, 'estados', normalizar_estados(estados))
 
 
 def agrupar_estados_em_regioes(estados: List[str], regioes_mapping: Dict[str, List[str]]) -> List[str]:
@@ -110,6 +681,78 @@ def agrupar_estados_em_regioes(estados: List[str], regioes_mapping: Dict[str, Li
     return resultado
 
 
+def nota_compacta(valores) -> bool:
+    """
+    Indica se uma série/array de notas está na representação compacta (décimos em uint16).
+    
+    Parâmetros:
+    -----------
+    valores : Series ou array
+        Valores de nota
+        
+    Retorna:
+    --------
+    bool: True se os valores estão em décimos de ponto (uint16)
+    """
+    return getattr(valores, 'dtype', None) == np.dtype(TIPO_NOTA_COMPACTA)
+
+
+def codificar_notas(serie: pd.Series) -> pd.Series:
+    """
+    Converte notas em pontos (float) para décimos de ponto em uint16.
+    
+    Notas ausentes, -1 ou zero viram 0 (nota inválida).
+    
+    Parâmetros:
+    -----------
+    serie : Series
+        Notas em pontos
+        
+    Retorna:
+    --------
+    Series: Notas em décimos de ponto (uint16)
+    """
+    if nota_compacta(serie):
+        return serie
+    
+    valores = serie.to_numpy(dtype='float64', na_value=np.nan)
+    with np.errstate(invalid='ignore'):
+        # Notas válidas ficam com pelo menos 1 décimo para não se confundirem com o marcador 0
+        decimos = np.clip(np.rint(valores * ESCALA_NOTAS), 1, np.iinfo(TIPO_NOTA_COMPACTA).max)
+        decimos = np.where(valores > 0, decimos, 0).astype(TIPO_NOTA_COMPACTA)
+    
+    return pd.Series(decimos, index=serie.index, name=serie.name)
+
+
+def decodificar_notas(valores, dtype: str = 'float64'):
+    """
+    Converte notas compactas (décimos em uint16) de volta para pontos.
+    
+    Valores que não estão na representação compacta são devolvidos sem
+    alteração, então a função pode ser aplicada a qualquer coluna de nota.
+    Notas inválidas (0) continuam 0, preservando os filtros "nota > 0".
+    
+    Parâmetros:
+    -----------
+    valores : Series ou array
+        Notas em qualquer representação
+    dtype : str, default='float64'
+        Tipo de ponto flutuante do resultado
+        
+    Retorna:
+    --------
+    Series ou array: Notas em pontos (mesmo tipo de contêiner da entrada)
+    """
+    if not nota_compacta(valores):
+        return valores
+    
+    pontos = np.asarray(valores).astype(dtype) / np.dtype(dtype).type(ESCALA_NOTAS)
+    
+    if isinstance(valores, pd.Series):
+        return pd.Series(pontos, index=valores.index, name=valores.name)
+    return pontos
+
+
 def calcular_seguro(serie_dados, operacao='media'):
     """
     Calcula estatísticas de forma segura, lidando com valores missing.
@@ -128,12 +771,15 @@ def calcular_seguro(serie_dados, operacao='media'):
     try:
         # Converter para array NumPy e remover valores inválidos
         if isinstance(serie_dados, pd.Series):
+            # Notas compactas (décimos em uint16) voltam para pontos
+            serie_dados = decodificar_notas(serie_dados)
+            
             # Converter para float64 para evitar overflow com float16
             if serie_dados.dtype in ['float16', 'int16']:
                 serie_dados = serie_dados.astype('float64')
             array_dados = serie_dados.dropna().values
         else:
-            array_dados = np.array(serie_dados, dtype='float64')
+            array_dados = np.array(decodificar_notas(serie_dados), dtype='float64')
             array_dados = array_dados[~np.isnan(array_dados)]
         
         # Remover valores infinitos
@@ -194,6 +840,9 @@ def optimize_dtypes(df: pd.DataFrame, dtypes) -> pd.DataFrame:
     -----------
     df : DataFrame
         DataFrame a ser otimizado
+    dtypes : str ou Dict[str, str]
+        Sufixo do arquivo data/dtypes_<dtypes>.json com os tipos de cada
+        coluna, ou o próprio mapeamento coluna -> tipo
         
     Retorna:
     --------
@@ -202,12 +851,74 @@ def optimize_dtypes(df: pd.DataFrame, dtypes) -> pd.DataFrame:
     if df.empty:
         return df
     
-    # Otimizar inteiros
-    arquivo_dtypes = f'data/dtypes_{dtypes}.json'
+    # Aplicar apenas os tipos das colunas presentes (leitura projetada)
+    tipos_aba = dtypes if isinstance(dtypes, dict) else _ler_dtypes(dtypes)
+    tipos = {col: tipo for col, tipo in tipos_aba.items() if col in df.columns}
+    
+    # Pular colunas que já estão no tipo final para evitar cópias desnecessárias
+    tipos = {col: tipo for col, tipo in tipos.items() if str(df[col].dtype) != tipo}
+    
+    # Notas em pontos são convertidas para décimos (um astype direto truncaria e estouraria o -1)
+    notas = [col for col, tipo in tipos.items() if tipo == TIPO_NOTA_COMPACTA]
+    if notas:
+        df = df.assign(**{col: codificar_notas(df[col]) for col in notas})
+        tipos = {col: tipo for col, tipo in tipos.items() if col not in notas}
+    
+    if tipos:
+        df = df.astype(tipos)
+    
+    return df
 
-    dtypes = pd.read_json(arquivo_dtypes, orient='index', typ='series')
 
-    df = df.astype(dtypes)
+@lru_cache(maxsize=None)
+def _ler_dtypes(nome: str) -> Dict[str, str]:
+    """
+    Lê (uma única vez por processo) o arquivo data/dtypes_<nome>.json.
+    
+    Parâmetros:
+    -----------
+    nome : str
+        Sufixo do arquivo de tipos
+        
+    Retorna:
+    --------
+    Dict[str, str]: Mapeamento coluna -> tipo
+    """
+    arquivo_dtypes = f'data/dtypes_{nome}.json'
+    tipos = pd.read_json(arquivo_dtypes, orient='index', typ='series')
+    return {col: str(tipo) for col, tipo in tipos.items()}
+
+
+def _tornar_somente_leitura(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Marca como não graváveis os arrays NumPy que sustentam as colunas.
+    
+    Usado nos DataFrames do registro compartilhado (st.cache_resource): como
+    o mesmo objeto é entregue a todas as sessões, qualquer escrita acidental
+    in-place passa a gerar erro em vez de afetar os demais usuários.
+    Operações que criam novos objetos (filtros, astype, copy) seguem normais.
+    
+    Parâmetros:
+    -----------
+    df : DataFrame
+        DataFrame a proteger (modificado no próprio objeto)
+        
+    Retorna:
+    --------
+    DataFrame: O mesmo DataFrame, com arrays somente leitura
+    """
+    # Blocos internos: colunas numéricas podem estar consolidadas em um único
+    # array 2D, e é nele (não nas views por coluna) que as escritas ocorrem
+    arrays = [bloco.values for bloco in df._mgr.blocks]
+    
+    # Views por coluna já criadas (e guardadas em cache pelo pandas) não herdam a flag
+    arrays.extend(df[col].array for col in df.columns)
+    
+    for valores in arrays:
+        # Categorical e NumpyExtensionArray expõem o ndarray de dados/códigos em _ndarray
+        valores = getattr(valores, '_ndarray', valores)
+        if isinstance(valores, np.ndarray):
+            valores.flags.writeable = False
     
     return df
 
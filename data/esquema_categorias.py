@@ -0,0 +1,170 @@
+import pandas as pd
+import numpy as np
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+# ------------------------------------------------------------
+# REGISTRO DE RÓTULOS DAS VARIÁVEIS CATEGÓRICAS
+# ------------------------------------------------------------
+#
+# Os rótulos (por exemplo, 1 -> 'Branca') são aplicados uma única vez, na
+# carga dos dados: para cada variável com mapeamento, a aba ganha a coluna
+# <VARIAVEL>_NOME ao lado da coluna original. A coluna original mantém os
+# códigos canônicos (usados em filtros, cubos e parciais por UF); a coluna
+# de rótulos é uma categórica com as categorias na ordem do mapeamento.
+#
+# A tradução é feita no nível das categorias (O(número de categorias)):
+# quando as categorias originais já correspondem, na ordem, às do
+# mapeamento, a coluna de rótulos reaproveita os próprios códigos.
+
+SUFIXO_ROTULO = '_NOME'
+
+# Grupo de mapeamentos (chave de get_mappings) que rotula cada aba
+GRUPOS_ROTULOS_POR_ABA = {
+    'aspectos_sociais': 'variaveis_sociais',
+}
+
+
+@lru_cache(maxsize=None)
+def obter_esquema(tab_name: str) -> Dict[str, Dict[Any, str]]:
+    """
+    Retorna (uma única vez por processo) os mapeamentos de rótulos de uma aba.
+
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba
+
+    Retorna:
+    --------
+    Dict[str, Dict]: Mapeamento código -> rótulo de cada variável rotulada
+    """
+    grupo = GRUPOS_ROTULOS_POR_ABA.get(tab_name.lower())
+    if grupo is None:
+        return {}
+
+    # Importar localmente para evitar importação circular (utils.helpers importa data)
+    from utils.helpers.mappings import get_mappings
+
+    return {
+        variavel: config['mapeamento']
+        for variavel, config in get_mappings().get(grupo, {}).items()
+        if config.get('mapeamento')
+    }
+
+
+def coluna_rotulo(variavel: str) -> str:
+    """
+    Retorna o nome da coluna de rótulos de uma variável.
+
+    Parâmetros:
+    -----------
+    variavel : str
+        Nome da variável (coluna com os códigos)
+
+    Retorna:
+    --------
+    str: '<variavel>_NOME'
+    """
+    return f'{variavel}{SUFIXO_ROTULO}'
+
+
+def eh_coluna_rotulo(coluna: str) -> bool:
+    """Indica se a coluna é uma coluna de rótulos gerada pelo registro."""
+    return coluna.endswith(SUFIXO_ROTULO)
+
+
+def colunas_origem(tab_name: str, colunas: Iterable[str]) -> List[str]:
+    """
+    Traduz colunas pedidas para as colunas a ler do arquivo da aba.
+
+    Colunas de rótulos não existem no arquivo: no lugar delas é lida a
+    variável original correspondente.
+
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba
+    colunas : Iterable[str]
+        Colunas pedidas (podem incluir colunas de rótulos)
+
+    Retorna:
+    --------
+    List[str]: Colunas a ler, sem repetições
+    """
+    esquema = obter_esquema(tab_name)
+    origem = []
+    for coluna in colunas:
+        variavel = coluna[:-len(SUFIXO_ROTULO)] if eh_coluna_rotulo(coluna) else None
+        origem.append(variavel if variavel in esquema else coluna)
+    return list(dict.fromkeys(origem))
+
+
+def rotular_serie(serie: pd.Series, mapeamento: Dict[Any, str], nome: Optional[str] = None) -> pd.Series:
+    """
+    Cria a série de rótulos de uma variável categórica.
+
+    Valores sem rótulo no mapeamento ficam ausentes (NaN), e todas as
+    categorias do mapeamento existem na série, na ordem dele.
+
+    Parâmetros:
+    -----------
+    serie : Series
+        Coluna com os códigos
+    mapeamento : Dict
+        Mapeamento código -> rótulo
+    nome : str, opcional
+        Nome da série resultante; por padrão, coluna_rotulo(serie.name)
+
+    Retorna:
+    --------
+    Series: Categórica com os rótulos
+    """
+    categorias = list(dict.fromkeys(mapeamento.values()))
+    nome = nome if nome is not None else coluna_rotulo(str(serie.name))
+
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        return pd.Series(pd.Categorical(serie.map(mapeamento), categories=categorias), index=serie.index, name=nome)
+
+    # Posição do rótulo de cada categoria original (-1 quando não há rótulo)
+    posicao = {rotulo: i for i, rotulo in enumerate(categorias)}
+    traducao = np.array([posicao.get(mapeamento.get(valor), -1) for valor in serie.cat.categories], dtype='int64')
+
+    codigos = serie.cat.codes.to_numpy()
+    if len(traducao) == len(categorias) and np.array_equal(traducao, np.arange(len(categorias))):
+        novos_codigos = codigos
+    else:
+        # O código -1 (ausente) indexa o último elemento, que também é -1
+        novos_codigos = np.append(traducao, -1)[codigos]
+
+    rotulos = pd.Categorical.from_codes(novos_codigos, categories=categorias, validate=False)
+    return pd.Series(rotulos, index=serie.index, name=nome)
+
+
+def adicionar_rotulos(df: pd.DataFrame, tab_name: str) -> pd.DataFrame:
+    """
+    Adiciona ao DataFrame recém-carregado as colunas de rótulos da aba.
+
+    As colunas são inseridas no próprio DataFrame (sem copiar as demais),
+    então a função deve ser chamada antes de ele ser compartilhado.
+
+    Parâmetros:
+    -----------
+    df : DataFrame
+        Dados da aba com os tipos já aplicados
+    tab_name : str
+        Nome da aba
+
+    Retorna:
+    --------
+    DataFrame: O mesmo DataFrame, com as colunas <VARIAVEL>_NOME
+    """
+    if df.empty:
+        return df
+
+    for variavel, mapeamento in obter_esquema(tab_name).items():
+        coluna = coluna_rotulo(variavel)
+        if variavel in df.columns and coluna not in df.columns:
+            df[coluna] = rotular_serie(df[variavel], mapeamento, coluna)
+
+    return df
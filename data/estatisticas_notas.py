@@ -0,0 +1,519 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from data.data_loader import ESCALA_NOTAS, decodificar_notas, nota_compacta
+
+# ------------------------------------------------------------
+# ESTATÍSTICAS DESCRITIVAS DAS NOTAS EM UMA PASSADA
+# ------------------------------------------------------------
+#
+# Os momentos são guardados como somas de potências (n, soma, soma_quadrados,
+# soma_cubos, soma_quartas) mais mínimo e máximo das notas válidas (finitas e
+# maiores que zero), uma linha por competência. Como no cubo de agregados,
+# tudo é somável: momentos de lotes ou de estados diferentes se combinam com
+# combinar_momentos, e média, desvio, assimetria e curtose saem do total.
+
+COLUNAS_MOMENTOS = ['n', 'soma', 'soma_quadrados', 'soma_cubos', 'soma_quartas', 'minimo', 'maximo']
+COLUNAS_ESTATISTICAS_NOTAS = ['n', 'media', 'variancia', 'desvio_padrao', 'assimetria', 'curtose', 'minimo', 'maximo']
+LINHAS_POR_BLOCO = 500_000   # linhas processadas por vez (limita as matrizes temporárias)
+
+# Quantis por contagem: as notas do ENEM estão na grade de 0,1 ponto (no máximo
+# ~10.001 valores distintos), então um bincount sobre a grade responde qualquer
+# quantil exatamente, em tempo linear e sem ordenar. Valores fora da grade
+# (por exemplo, médias de várias notas) caem no cálculo por ordenação.
+TOLERANCIA_GRADE = 1e-4            # folga para notas guardadas em float32
+LIMITE_CELULAS_GRADE = 1_000_001   # maior domínio (em décimos) contado por bincount
+
+
+def calcular_momentos_notas(df: pd.DataFrame, colunas_notas: Sequence[str]) -> pd.DataFrame:
+    """
+    Calcula os momentos de todas as competências de uma vez, com uma única máscara de validade.
+
+    Parâmetros:
+    -----------
+    df : DataFrame
+        Microdados com as colunas de notas (compactas ou em pontos)
+    colunas_notas : Sequence[str]
+        Colunas de notas; as ausentes do DataFrame são ignoradas
+
+    Retorna:
+    --------
+    DataFrame: Uma linha por competência (índice 'competencia'), colunas COLUNAS_MOMENTOS
+    """
+    colunas = [coluna for coluna in colunas_notas if coluna in df.columns]
+    momentos = pd.DataFrame(0.0, index=pd.Index(colunas, name='competencia'), columns=COLUNAS_MOMENTOS)
+    momentos['minimo'] = np.inf
+    momentos['maximo'] = -np.inf
+
+    if not colunas or df.empty:
+        return momentos
+
+    blocos = [
+        _momentos_bloco(df.iloc[inicio:inicio + LINHAS_POR_BLOCO], colunas)
+        for inicio in range(0, len(df), LINHAS_POR_BLOCO)
+    ]
+    return combinar_momentos(blocos)
+
+
+def _momentos_bloco(df: pd.DataFrame, colunas: Sequence[str]) -> pd.DataFrame:
+    """Momentos de um bloco de linhas (matriz linhas × competências)."""
+    valores = np.column_stack([
+        np.asarray(decodificar_notas(df[coluna]), dtype='float64') for coluna in colunas
+    ])
+
+    with np.errstate(invalid='ignore'):
+        validos = np.isfinite(valores) & (valores > 0)
+
+    zerados = np.where(validos, valores, 0.0)
+    quadrados = zerados * zerados
+
+    return pd.DataFrame({
+        'n': validos.sum(axis=0).astype('float64'),
+        'soma': zerados.sum(axis=0),
+        'soma_quadrados': quadrados.sum(axis=0),
+        'soma_cubos': (quadrados * zerados).sum(axis=0),
+        'soma_quartas': (quadrados * quadrados).sum(axis=0),
+        'minimo': np.where(validos, valores, np.inf).min(axis=0),
+        'maximo': np.where(validos, valores, -np.inf).max(axis=0),
+    }, index=pd.Index(list(colunas), name='competencia'))
+
+
+def combinar_momentos(momentos: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Combina momentos de lotes ou partições diferentes.
+
+    Parâmetros:
+    -----------
+    momentos : Iterable[DataFrame]
+        Resultados de calcular_momentos_notas
+
+    Retorna:
+    --------
+    DataFrame: Momentos combinados, uma linha por competência
+    """
+    tabela = pd.concat(list(momentos))
+    grupos = tabela.groupby(level='competencia', sort=False)
+
+    combinado = grupos[['n', 'soma', 'soma_quadrados', 'soma_cubos', 'soma_quartas']].sum()
+    combinado['minimo'] = grupos['minimo'].min()
+    combinado['maximo'] = grupos['maximo'].max()
+    return combinado[COLUNAS_MOMENTOS]
+
+
+def finalizar_momentos(momentos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte somas de potências em estatísticas descritivas.
+
+    Desvio padrão amostral (ddof=1); assimetria e curtose (excesso, de Fisher)
+    populacionais, como em scipy.stats.skew/kurtosis. Sem dados suficientes
+    (n < 2 para a variância, n < 4 para assimetria e curtose), o valor é 0.
+
+    Parâmetros:
+    -----------
+    momentos : DataFrame
+        Resultado de calcular_momentos_notas ou combinar_momentos
+
+    Retorna:
+    --------
+    DataFrame: Uma linha por competência, colunas COLUNAS_ESTATISTICAS_NOTAS
+    """
+    n = momentos['n'].to_numpy(dtype='float64')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = momentos['soma'].to_numpy() / n
+        bruto2 = momentos['soma_quadrados'].to_numpy() / n
+        bruto3 = momentos['soma_cubos'].to_numpy() / n
+        bruto4 = momentos['soma_quartas'].to_numpy() / n
+
+        # Momentos centrais a partir dos momentos brutos
+        central2 = np.maximum(bruto2 - media ** 2, 0.0)
+        central3 = bruto3 - 3 * media * bruto2 + 2 * media ** 3
+        central4 = bruto4 - 4 * media * bruto3 + 6 * media ** 2 * bruto2 - 3 * media ** 4
+
+        variancia = central2 * n / (n - 1)
+        assimetria = central3 / central2 ** 1.5
+        curtose = central4 / central2 ** 2 - 3
+
+    possui_dados = n > 0
+    variancia_valida = (n > 1) & np.isfinite(variancia)
+    formato_valido = (n >= 4) & (central2 > 0)
+
+    estatisticas = pd.DataFrame({
+        'n': n.astype('int64'),
+        'media': np.where(possui_dados, media, 0.0),
+        'variancia': np.where(variancia_valida, variancia, 0.0),
+        'desvio_padrao': np.where(variancia_valida, np.sqrt(np.where(variancia_valida, variancia, 0.0)), 0.0),
+        'assimetria': np.where(formato_valido & np.isfinite(assimetria), assimetria, 0.0),
+        'curtose': np.where(formato_valido & np.isfinite(curtose), curtose, 0.0),
+        'minimo': np.where(possui_dados, momentos['minimo'].to_numpy(), 0.0),
+        'maximo': np.where(possui_dados, momentos['maximo'].to_numpy(), 0.0),
+    }, index=momentos.index)
+
+    return estatisticas
+
+
+def calcular_estatisticas_notas(
+    df: pd.DataFrame,
+    colunas_notas: Sequence[str],
+    quantis: Optional[Sequence[float]] = None
+) -> pd.DataFrame:
+    """
+    Estatísticas descritivas de várias competências, lendo cada nota uma vez.
+
+    Substitui chamadas repetidas de calcular_seguro sobre a mesma série.
+
+    Parâmetros:
+    -----------
+    df : DataFrame
+        Microdados com as colunas de notas (compactas ou em pontos)
+    colunas_notas : Sequence[str]
+        Colunas de notas
+    quantis : Sequence[float], opcional
+        Quantis exatos a incluir (entre 0 e 1), nas colunas 'q<quantil>'
+        (por exemplo, 'q0.5' para a mediana)
+
+    Retorna:
+    --------
+    DataFrame: Uma linha por competência, colunas COLUNAS_ESTATISTICAS_NOTAS (+ quantis)
+    """
+    estatisticas = finalizar_momentos(calcular_momentos_notas(df, colunas_notas))
+
+    for quantil in quantis or ():
+        estatisticas[f"q{quantil}"] = 0.0
+
+    if quantis:
+        for coluna in estatisticas.index:
+            notas = df[coluna]
+            if estatisticas.at[coluna, 'n'] > 0:
+                valores = calcular_quantis_notas(notas[notas > 0], quantis)
+                for quantil, valor in zip(quantis, valores):
+                    estatisticas.at[coluna, f"q{quantil}"] = float(valor)
+
+    return estatisticas
+
+
+def calcular_medias_por_grupo(
+    df: pd.DataFrame,
+    coluna_grupo: str,
+    colunas_notas: Sequence[str]
+) -> pd.DataFrame:
+    """
+    Médias das notas válidas (> 0) de cada grupo × competência, em uma redução agrupada.
+
+    Os grupos são numerados uma única vez (pd.factorize) e, para cada
+    competência, contagens e somas de todos os grupos saem de um bincount,
+    sem laço por grupo; o custo não depende do número de categorias.
+
+    Parâmetros:
+    -----------
+    df : DataFrame
+        Microdados com a coluna de grupo e as notas (compactas ou em pontos)
+    coluna_grupo : str
+        Coluna de agrupamento (variável categórica, UF, ...); ausentes são ignorados
+    colunas_notas : Sequence[str]
+        Colunas de notas; as ausentes do DataFrame são ignoradas
+
+    Retorna:
+    --------
+    DataFrame: Formato longo, colunas [coluna_grupo, 'competencia', 'n', 'media'],
+    grupos na ordem de aparição e competências na ordem de colunas_notas
+    (média 0 quando o grupo não tem notas válidas)
+    """
+    colunas = [coluna for coluna in colunas_notas if coluna in df.columns]
+    codigos, grupos = pd.factorize(df[coluna_grupo])
+    num_grupos = len(grupos)
+
+    contagens = np.zeros((num_grupos, len(colunas)))
+    somas = np.zeros((num_grupos, len(colunas)))
+    grupo_valido = codigos >= 0
+
+    for indice, coluna in enumerate(colunas):
+        # Notas compactas são somadas em décimos: somas inteiras, exatas em float64
+        escala = ESCALA_NOTAS if nota_compacta(df[coluna]) else 1
+        valores = np.asarray(df[coluna] if escala > 1 else decodificar_notas(df[coluna]), dtype='float64')
+        with np.errstate(invalid='ignore'):
+            validos = grupo_valido & np.isfinite(valores) & (valores > 0)
+        contagens[:, indice] = np.bincount(codigos[validos], minlength=num_grupos)
+        somas[:, indice] = np.bincount(codigos[validos], weights=valores[validos], minlength=num_grupos) / escala
+
+    medias = np.divide(somas, contagens, out=np.zeros_like(somas), where=contagens > 0)
+
+    return pd.DataFrame({
+        coluna_grupo: np.repeat(np.asarray(grupos, dtype=object), len(colunas)),
+        'competencia': np.tile(np.asarray(colunas, dtype=object), num_grupos),
+        'n': contagens.ravel().astype('int64'),
+        'media': medias.ravel(),
+    })
+
+
+def contar_notas_grade(valores) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Conta os valores na grade de 0,1 ponto, em uma passada.
+
+    Parâmetros:
+    -----------
+    valores : Series ou array
+        Notas (compactas ou em pontos); ausentes e infinitos são ignorados
+
+    Retorna:
+    --------
+    Tuple[np.ndarray, int]: (contagens, início), em que contagens[i] é o número de
+    valores iguais a (início + i) / ESCALA_NOTAS; None se os valores não estão na
+    grade ou se o domínio passa de LIMITE_CELULAS_GRADE
+    """
+    if nota_compacta(valores):
+        codigos = np.asarray(valores).astype('int64')
+    else:
+        pontos = np.asarray(valores, dtype='float64')
+        pontos = pontos[np.isfinite(pontos)]
+        codigos_float = np.rint(pontos * ESCALA_NOTAS)
+        if len(pontos) and np.abs(codigos_float / ESCALA_NOTAS - pontos).max() > TOLERANCIA_GRADE:
+            return None
+        codigos = codigos_float.astype('int64')
+
+    if len(codigos) == 0:
+        return np.zeros(0, dtype='int64'), 0
+
+    inicio = int(codigos.min())
+    if int(codigos.max()) - inicio + 1 > LIMITE_CELULAS_GRADE:
+        return None
+
+    return np.bincount(codigos - inicio), inicio
+
+
+def quantis_contagens(contagens: np.ndarray, inicio: int, quantis: Sequence[float]) -> np.ndarray:
+    """
+    Quantis exatos a partir das contagens da grade (interpolação linear, como np.quantile).
+
+    Parâmetros:
+    -----------
+    contagens, inicio :
+        Resultado de contar_notas_grade
+    quantis : Sequence[float]
+        Quantis desejados (entre 0 e 1)
+
+    Retorna:
+    --------
+    np.ndarray: Valores dos quantis (zeros se não houver valores)
+    """
+    grade = (inicio + np.arange(len(contagens))) / ESCALA_NOTAS
+    return _quantis_ponderados(grade, contagens, quantis)
+
+
+def _quantis_ponderados(suporte: np.ndarray, pesos: np.ndarray, quantis: Sequence[float]) -> np.ndarray:
+    """Quantis (interpolação linear) de valores ordenados 'suporte' repetidos 'pesos' vezes."""
+    quantis = np.asarray(quantis, dtype='float64')
+    acumulado = np.cumsum(pesos)
+    total = int(acumulado[-1]) if len(acumulado) else 0
+    if total == 0:
+        return np.zeros(len(quantis))
+
+    # Posições (base 0) dos valores ordenados vizinhos de cada quantil
+    posicoes = (total - 1) * quantis
+    inferior = np.floor(posicoes).astype('int64')
+    superior = np.minimum(inferior + 1, total - 1)
+
+    valor_inferior = suporte[np.searchsorted(acumulado, inferior, side='right')]
+    valor_superior = suporte[np.searchsorted(acumulado, superior, side='right')]
+
+    return valor_inferior + (posicoes - inferior) * (valor_superior - valor_inferior)
+
+
+def calcular_quantis_notas(valores, quantis: Sequence[float]) -> np.ndarray:
+    """
+    Quantis exatos de uma série de notas, por contagem quando os valores estão na grade.
+
+    Parâmetros:
+    -----------
+    valores : Series ou array
+        Notas (compactas ou em pontos); ausentes e infinitos são ignorados
+    quantis : Sequence[float]
+        Quantis desejados (entre 0 e 1)
+
+    Retorna:
+    --------
+    np.ndarray: Valores dos quantis (zeros se não houver valores)
+    """
+    contagem = contar_notas_grade(valores)
+    if contagem is not None:
+        return quantis_contagens(*contagem, quantis)
+
+    pontos = np.asarray(decodificar_notas(valores), dtype='float64')
+    pontos = pontos[np.isfinite(pontos)]
+    if len(pontos) == 0:
+        return np.zeros(len(quantis))
+    return np.quantile(pontos, list(quantis))
+
+
+def calcular_limites_iqr(valores, fator: float = 1.5) -> Dict[str, Any]:
+    """
+    Quartis, intervalo interquartil e limites de outliers (Tukey), com a contagem de outliers.
+
+    Parâmetros:
+    -----------
+    valores : Series ou array
+        Notas (compactas ou em pontos); ausentes e infinitos são ignorados
+    fator : float, default=1.5
+        Multiplicador do IQR para os limites
+
+    Retorna:
+    --------
+    Dict[str, Any]: n, q1, q3, iqr, limite_inferior, limite_superior e
+    outliers (valores fora dos limites)
+    """
+    contagem = contar_notas_grade(valores)
+
+    if contagem is not None:
+        contagens, inicio = contagem
+        n = int(contagens.sum())
+        q1, q3 = quantis_contagens(contagens, inicio, [0.25, 0.75]) if n else (0.0, 0.0)
+    else:
+        pontos = np.asarray(decodificar_notas(valores), dtype='float64')
+        pontos = pontos[np.isfinite(pontos)]
+        n = len(pontos)
+        q1, q3 = np.quantile(pontos, [0.25, 0.75]) if n else (0.0, 0.0)
+
+    iqr = q3 - q1
+    limite_inferior = q1 - fator * iqr
+    limite_superior = q3 + fator * iqr
+
+    if n == 0:
+        outliers = 0
+    elif contagem is not None:
+        # Valores da grade estritamente fora dos limites
+        grade = (inicio + np.arange(len(contagens))) / ESCALA_NOTAS
+        outliers = int(contagens[(grade < limite_inferior) | (grade > limite_superior)].sum())
+    else:
+        outliers = int(((pontos < limite_inferior) | (pontos > limite_superior)).sum())
+
+    return {
+        'n': n,
+        'q1': float(q1),
+        'q3': float(q3),
+        'iqr': float(iqr),
+        'limite_inferior': float(limite_inferior),
+        'limite_superior': float(limite_superior),
+        'outliers': outliers,
+    }
+
+
+# ------------------------------------------------------------
+# FAIXAS DE NOTAS
+# ------------------------------------------------------------
+#
+# A distribuição de uma série de notas é guardada como (suporte, pesos): os
+# valores distintos em ordem crescente e quantas vezes cada um aparece (na
+# grade de 0,1 ponto, no máximo ~10.001 pares). Contagem, média, desvio e
+# mediana de qualquer faixa [mínimo, máximo) saem de somas acumuladas sobre
+# esses pares, então esquemas de faixas diferentes (ou editados pelo usuário)
+# são avaliados sem percorrer os microdados de novo.
+
+COLUNAS_FAIXAS = ['contagem', 'percentual', 'media', 'mediana', 'desvio_padrao']
+
+
+def distribuicao_notas(valores) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Valores distintos (ordenados) e suas contagens, em uma passada quando as notas estão na grade.
+
+    Parâmetros:
+    -----------
+    valores : Series ou array
+        Notas (compactas ou em pontos); ausentes e infinitos são ignorados
+
+    Retorna:
+    --------
+    Tuple[np.ndarray, np.ndarray]: (suporte em pontos, pesos)
+    """
+    contagem = contar_notas_grade(valores)
+    if contagem is not None:
+        contagens, inicio = contagem
+        presentes = np.flatnonzero(contagens)
+        return (inicio + presentes) / ESCALA_NOTAS, contagens[presentes]
+
+    pontos = np.asarray(decodificar_notas(valores), dtype='float64')
+    suporte, pesos = np.unique(pontos[np.isfinite(pontos)], return_counts=True)
+    return suporte, pesos
+
+
+def estatisticas_faixas(
+    suporte: np.ndarray,
+    pesos: np.ndarray,
+    faixas: Dict[str, Tuple[float, float]],
+    total: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Contagem, percentual, média, mediana e desvio padrão (ddof=1) de cada faixa.
+
+    Parâmetros:
+    -----------
+    suporte, pesos :
+        Resultado de distribuicao_notas
+    faixas : Dict[str, Tuple[float, float]]
+        Nome da faixa -> (mínimo, máximo), intervalo [mínimo, máximo); use
+        -np.inf/np.inf para faixas abertas
+    total : int, opcional
+        Base dos percentuais (padrão: total de valores da distribuição)
+
+    Retorna:
+    --------
+    DataFrame: Uma linha por faixa (na ordem de 'faixas'), colunas COLUNAS_FAIXAS
+    """
+    pesos = np.asarray(pesos, dtype='float64')
+    acumulado_n = np.concatenate([[0.0], np.cumsum(pesos)])
+    acumulado_soma = np.concatenate([[0.0], np.cumsum(pesos * suporte)])
+    acumulado_quadrados = np.concatenate([[0.0], np.cumsum(pesos * suporte ** 2)])
+
+    if total is None:
+        total = acumulado_n[-1]
+
+    limites = np.array(list(faixas.values()), dtype='float64').reshape(-1, 2)
+    inicio = np.searchsorted(suporte, limites[:, 0], side='left')
+    fim = np.maximum(np.searchsorted(suporte, limites[:, 1], side='left'), inicio)
+
+    contagem = acumulado_n[fim] - acumulado_n[inicio]
+    soma = acumulado_soma[fim] - acumulado_soma[inicio]
+    quadrados = acumulado_quadrados[fim] - acumulado_quadrados[inicio]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = np.where(contagem > 0, soma / contagem, 0.0)
+        variancia = np.where(contagem > 1, (quadrados - soma * media) / (contagem - 1), 0.0)
+        percentual = contagem / total * 100 if total else np.zeros(len(contagem))
+
+    medianas = [
+        float(_quantis_ponderados(suporte[i:j], pesos[i:j], [0.5])[0]) if j > i else 0.0
+        for i, j in zip(inicio, fim)
+    ]
+
+    return pd.DataFrame({
+        'contagem': contagem.astype('int64'),
+        'percentual': percentual,
+        'media': media,
+        'mediana': medianas,
+        'desvio_padrao': np.sqrt(np.maximum(variancia, 0.0)),
+    }, index=pd.Index(list(faixas.keys()), name='faixa'))
+
+
+def calcular_faixas_notas(
+    valores,
+    esquemas: Dict[str, Dict[str, Tuple[float, float]]],
+    total: Optional[int] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Classifica as notas em vários esquemas de faixas com uma única passada sobre os dados.
+
+    Parâmetros:
+    -----------
+    valores : Series ou array
+        Notas válidas (compactas ou em pontos)
+    esquemas : Dict[str, Dict[str, Tuple[float, float]]]
+        Nome do esquema -> faixas (ver estatisticas_faixas)
+    total : int, opcional
+        Base dos percentuais (padrão: total de valores)
+
+    Retorna:
+    --------
+    Dict[str, DataFrame]: Resultado de estatisticas_faixas para cada esquema
+    """
+    suporte, pesos = distribuicao_notas(valores)
+    return {nome: estatisticas_faixas(suporte, pesos, faixas, total) for nome, faixas in esquemas.items()}
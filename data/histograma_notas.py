@@ -0,0 +1,355 @@
+import os
+import streamlit as st
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+from data.codificacao import CodificadorValores, ampliar
+from data.data_loader import ESCALA_NOTAS, decodificar_notas
+from data.estatisticas_notas import quantis_contagens
+from data.impressao_digital import (
+    impressao_arquivo,
+    registrar_impressao_digital,
+    herdar_impressao_digital,
+    normalizar_estados,
+)
+
+# ------------------------------------------------------------
+# HISTOGRAMAS DE NOTAS (ESBOÇOS DE QUANTIS COMBINÁVEIS)
+# ------------------------------------------------------------
+#
+# As notas do ENEM vão de 0 a 1000 na grade de 0,1 ponto (a mesma das notas
+# compactas), então o histograma conta cada valor possível: faixa i é a nota
+# i / ESCALA_NOTAS. Somar as contagens de vários estados dá o mesmo
+# histograma que seria obtido dos microdados juntos, e os quantis saem
+# exatos (ver quantis_histograma).
+#
+# O histograma de uma aba é guardado em formato longo e esparso (só faixas
+# com contagem > 0): SG_UF_PROVA e competencia como categóricas,
+# faixa_decimos e contagem. Arquivos de versões anteriores (faixas de 1
+# ponto, coluna faixa) são ignorados e recalculados.
+
+DIRETORIO_HISTOGRAMAS = "data/histograma"
+ARQUIVO_HISTOGRAMA = "TOTAL.parquet"
+LARGURA_FAIXA = 1 / ESCALA_NOTAS
+NOTA_MAXIMA = 1000
+NUM_FAIXAS = NOTA_MAXIMA * ESCALA_NOTAS + 1  # a última faixa guarda a nota máxima
+COLUNA_FAIXA = 'faixa_decimos'
+COLUNAS_HISTOGRAMA = ['SG_UF_PROVA', 'competencia', COLUNA_FAIXA, 'contagem']
+
+
+def calcular_histogramas(df: pd.DataFrame, colunas_notas: Sequence[str]) -> pd.DataFrame:
+    """
+    Calcula os histogramas de notas por UF e competência.
+
+    Parâmetros:
+    -----------
+    df : DataFrame
+        Microdados com SG_UF_PROVA e as colunas de notas
+    colunas_notas : Sequence[str]
+        Colunas de notas (competências)
+
+    Retorna:
+    --------
+    DataFrame: Histograma em formato longo (ver COLUNAS_HISTOGRAMA)
+    """
+    acumulador = AcumuladorHistograma(colunas_notas)
+    acumulador.adicionar(df)
+    return acumulador.resultado()
+
+
+class AcumuladorHistograma:
+    """
+    Acumula os histogramas de notas lote a lote em um array denso.
+
+    As contagens ficam em um array competência × UF × faixa (NUM_FAIXAS),
+    com as UFs em códigos estáveis entre lotes (ver data.codificacao); o
+    formato longo e esparso é montado apenas em resultado().
+
+    Parâmetros:
+    -----------
+    colunas_notas : Sequence[str]
+        Colunas de notas (competências)
+    """
+
+    def __init__(self, colunas_notas: Sequence[str]):
+        self.colunas_notas = list(colunas_notas)
+        self.ufs = CodificadorValores()
+        self.contagens = np.zeros((len(self.colunas_notas), 0, NUM_FAIXAS), dtype='int64')
+
+    def adicionar(self, df: pd.DataFrame) -> None:
+        """
+        Soma as notas válidas (maiores que zero) de um lote ao histograma.
+
+        Parâmetros:
+        -----------
+        df : DataFrame
+            Lote com SG_UF_PROVA e as colunas de notas
+        """
+        notas = [(k, col) for k, col in enumerate(self.colunas_notas) if col in df.columns]
+        if df.empty or not notas or 'SG_UF_PROVA' not in df.columns:
+            return
+
+        codigos_uf = self.ufs.codificar(df['SG_UF_PROVA'])
+        self.contagens = ampliar(self.contagens, (len(self.colunas_notas), len(self.ufs), NUM_FAIXAS))
+        num_celulas = len(self.ufs) * NUM_FAIXAS
+
+        for k, competencia in notas:
+            valores = decodificar_notas(df[competencia]).to_numpy(dtype='float64', na_value=np.nan)
+            validas = (valores > 0) & (codigos_uf >= 0)
+            if not validas.any():
+                continue
+
+            faixas = np.clip(np.rint(valores[validas] * ESCALA_NOTAS).astype('int64'), 0, NUM_FAIXAS - 1)
+            self.contagens[k] += np.bincount(
+                codigos_uf[validas] * NUM_FAIXAS + faixas, minlength=num_celulas
+            ).reshape(len(self.ufs), NUM_FAIXAS)
+
+    def resultado(self) -> pd.DataFrame:
+        """
+        Monta o formato longo e esparso (só faixas com contagem > 0) do histograma.
+
+        Retorna:
+        --------
+        DataFrame: Histograma em formato longo (ver COLUNAS_HISTOGRAMA)
+        """
+        posicao_competencia, posicao_uf, faixas = np.nonzero(self.contagens)
+        competencias = np.asarray(self.colunas_notas, dtype=object)
+
+        return _normalizar_histograma(pd.DataFrame({
+            'SG_UF_PROVA': self.ufs.valores_array()[posicao_uf],
+            'competencia': competencias[posicao_competencia],
+            COLUNA_FAIXA: faixas,
+            'contagem': self.contagens[posicao_competencia, posicao_uf, faixas],
+        }))
+
+
+def _normalizar_histograma(histograma: pd.DataFrame) -> pd.DataFrame:
+    """Padroniza os tipos: chaves categóricas (códigos inteiros), faixas int16 e contagens int64."""
+    histograma['SG_UF_PROVA'] = histograma['SG_UF_PROVA'].astype(str).astype('category')
+    histograma['competencia'] = histograma['competencia'].astype(str).astype('category')
+    histograma[COLUNA_FAIXA] = histograma[COLUNA_FAIXA].astype('int16')
+    histograma['contagem'] = histograma['contagem'].astype('int64')
+    return histograma[COLUNAS_HISTOGRAMA]
+
+
+def indexar_histograma(histograma: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Converte o histograma longo em uma matriz densa UF × faixa por competência.
+
+    Com o índice, as contagens de uma seleção de estados são a soma de
+    poucas linhas de uma matriz (ver contagens_histograma).
+
+    Parâmetros:
+    -----------
+    histograma : DataFrame
+        Histograma em formato longo (ver COLUNAS_HISTOGRAMA)
+
+    Retorna:
+    --------
+    Dict[str, DataFrame]: Para cada competência, contagens com as UFs no
+    índice e as faixas (0 a NUM_FAIXAS - 1) nas colunas, somente leitura
+    """
+    if histograma.empty:
+        return {}
+
+    histograma = _normalizar_histograma(histograma.copy())
+    ufs = histograma['SG_UF_PROVA'].cat.categories
+    codigos_uf = histograma['SG_UF_PROVA'].cat.codes.to_numpy(dtype='int64')
+    codigos_competencia = histograma['competencia'].cat.codes.to_numpy()
+    celulas = codigos_uf * NUM_FAIXAS + histograma[COLUNA_FAIXA].to_numpy(dtype='int64')
+    contagens_celulas = histograma['contagem'].to_numpy(dtype='float64')
+
+    indice = {}
+    for codigo, competencia in enumerate(histograma['competencia'].cat.categories):
+        selecao = codigos_competencia == codigo
+        contagens = np.bincount(
+            celulas[selecao], weights=contagens_celulas[selecao], minlength=len(ufs) * NUM_FAIXAS
+        ).astype('int64').reshape(len(ufs), NUM_FAIXAS)
+        contagens.setflags(write=False)
+
+        indice[str(competencia)] = pd.DataFrame(
+            contagens,
+            index=pd.Index(ufs.astype(str), name='SG_UF_PROVA'),
+            columns=pd.RangeIndex(NUM_FAIXAS, name=COLUNA_FAIXA),
+            copy=False
+        )
+
+    return indice
+
+
+def contagens_histograma(
+    histogramas: Optional[Dict[str, pd.DataFrame]],
+    competencia: str,
+    estados: Optional[Sequence[str]] = None
+) -> np.ndarray:
+    """
+    Combina os histogramas dos estados selecionados em um vetor denso de contagens.
+
+    Parâmetros:
+    -----------
+    histogramas : Dict[str, DataFrame], opcional
+        Histogramas indexados por competência (ver obter_histogramas)
+    competencia : str
+        Coluna de nota desejada
+    estados : Sequence[str], opcional
+        Estados da seleção; None combina todos os estados disponíveis
+
+    Retorna:
+    --------
+    np.ndarray: Contagens por faixa (tamanho NUM_FAIXAS); faixa i = nota i / ESCALA_NOTAS
+    """
+    tabela = histogramas.get(competencia) if histogramas else None
+    if tabela is None or tabela.empty:
+        return np.zeros(NUM_FAIXAS, dtype='int64')
+
+    contagens = tabela.to_numpy()
+    if estados is None:
+        return contagens.sum(axis=0)
+
+    linhas = tabela.index.get_indexer(list(normalizar_estados(estados)))
+    return contagens[linhas[linhas >= 0]].sum(axis=0)
+
+
+def quantis_histograma(contagens: np.ndarray, quantis: Sequence[float]) -> List[float]:
+    """
+    Calcula quantis exatos a partir de um vetor de contagens por faixa.
+
+    Cada faixa é um valor da grade de notas, então o resultado é o mesmo de
+    calcular_quantis_notas sobre as notas que geraram as contagens.
+
+    Parâmetros:
+    -----------
+    contagens : np.ndarray
+        Contagens por faixa (ver contagens_histograma)
+    quantis : Sequence[float]
+        Quantis desejados, entre 0 e 1
+
+    Retorna:
+    --------
+    List[float]: Valor de cada quantil (0.0 se não houver contagens)
+    """
+    quantis = np.clip(np.asarray(quantis, dtype='float64'), 0.0, 1.0)
+    return [float(v) for v in quantis_contagens(np.asarray(contagens, dtype='int64'), 0, quantis)]
+
+
+def mediana_histograma(contagens: np.ndarray) -> float:
+    """
+    Calcula a mediana a partir de um vetor de contagens por faixa.
+
+    Parâmetros:
+    -----------
+    contagens : np.ndarray
+        Contagens por faixa (ver contagens_histograma)
+
+    Retorna:
+    --------
+    float: Mediana (0.0 se não houver contagens)
+    """
+    return quantis_histograma(contagens, [0.5])[0]
+
+
+# ------------------------------------------------------------
+# PERSISTÊNCIA E CARREGAMENTO
+# ------------------------------------------------------------
+
+def salvar_histogramas(
+    histograma: pd.DataFrame,
+    tab_name: str,
+    destino: str = DIRETORIO_HISTOGRAMAS
+) -> str:
+    """
+    Grava o histograma de uma aba (ver ARQUIVO_HISTOGRAMA).
+
+    Parâmetros:
+    -----------
+    histograma : DataFrame
+        Histograma em formato longo (ver COLUNAS_HISTOGRAMA)
+    tab_name : str
+        Nome da aba
+    destino : str, default=DIRETORIO_HISTOGRAMAS
+        Diretório raiz dos histogramas
+
+    Retorna:
+    --------
+    str: Diretório do histograma da aba
+    """
+    diretorio = os.path.join(destino, tab_name.lower())
+    os.makedirs(diretorio, exist_ok=True)
+
+    histograma.to_parquet(os.path.join(diretorio, ARQUIVO_HISTOGRAMA), index=False, engine='pyarrow')
+
+    return diretorio
+
+
+def obter_histogramas(tab_name: str) -> Dict[str, pd.DataFrame]:
+    """
+    Retorna os histogramas de notas de uma aba, compartilhados entre sessões.
+
+    Usa o histograma gerado pelo pipeline de dados (data/histograma/<aba>)
+    quando disponível; caso contrário, calcula-o a partir das notas da aba.
+    O resultado já vem indexado por competência (ver indexar_histograma). A
+    versão do arquivo lido faz parte da chave do cache, então um histograma
+    regravado é lido na chamada seguinte, e falhas não ficam em cache.
+
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba ('geral')
+
+    Retorna:
+    --------
+    Dict[str, DataFrame]: Contagens UF × faixa por competência, ou dicionário vazio em caso de erro
+    """
+    tab = tab_name.lower()
+
+    try:
+        return _carregar_histogramas(tab, _impressao_histogramas(tab))
+
+    except Exception as e:
+        print(f"Erro ao obter histogramas de notas da aba {tab_name}: {e}")
+        return {}
+
+
+def _impressao_histogramas(tab: str) -> str:
+    """Retorna o hash do arquivo de histograma da aba ou, sem ele, o dos dados de origem."""
+    caminho = os.path.join(DIRETORIO_HISTOGRAMAS, tab, ARQUIVO_HISTOGRAMA)
+    if os.path.exists(caminho):
+        return impressao_arquivo(caminho)
+
+    # Importar localmente para evitar importação circular
+    from data.data_loader import _impressao_fonte_tab
+    return f"fonte:{_impressao_fonte_tab(tab)}"
+
+
+@st.cache_resource(ttl=3600, max_entries=4, show_spinner=False)
+def _carregar_histogramas(tab: str, impressao: str) -> Dict[str, pd.DataFrame]:
+    """
+    Lê ou calcula e indexa o histograma de uma aba (cache interno de obter_histogramas, por versão do arquivo).
+
+    Erros são propagados para que obter_histogramas não guarde um resultado vazio no cache.
+    """
+    caminho = os.path.join(DIRETORIO_HISTOGRAMAS, tab, ARQUIVO_HISTOGRAMA)
+    if os.path.exists(caminho):
+        histograma = pd.read_parquet(caminho, engine='pyarrow')
+        if COLUNA_FAIXA in histograma.columns:
+            # Impressão por competência, a partir do arquivo (ver obter_cubo)
+            return {
+                competencia: registrar_impressao_digital(tabela, 'histograma', tab, competencia, impressao)
+                for competencia, tabela in indexar_histograma(histograma).items()
+            }
+        print(f"Aviso: histograma da aba {tab} em formato antigo (faixas de 1 ponto); recalculando")
+
+    # Importar localmente para evitar importação circular
+    from data.data_loader import load_columns_for_tab
+    from utils.helpers.mappings import get_mappings
+
+    colunas_notas = get_mappings()['colunas_notas']
+    dados = load_columns_for_tab(tab, ['SG_UF_PROVA'] + list(colunas_notas))
+    if dados.empty:
+        raise RuntimeError(f"dados da aba {tab} indisponíveis para calcular os histogramas")
+
+    return {
+        competencia: herdar_impressao_digital(tabela, dados, 'histograma', competencia)
+        for competencia, tabela in indexar_histograma(calcular_histogramas(dados, colunas_notas)).items()
+    }
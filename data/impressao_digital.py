@@ -0,0 +1,206 @@
+import hashlib
+import os
+import threading
+import weakref
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+# ------------------------------------------------------------
+# IMPRESSÕES DIGITAIS DOS DATASETS
+# ------------------------------------------------------------
+#
+# Uma impressão digital é uma tupla curta que identifica o conteúdo de um
+# DataFrame sem olhar para os dados: o hash do arquivo de origem mais as
+# etapas que o produziram (aba, colunas, estados selecionados...). Ela é
+# registrada pelos carregadores de dados e usada como chave de cache no lugar
+# do hash dos microdados (ver utils.helpers.cache_utils.optimized_cache).
+#
+# O registro é por objeto: vale apenas para o DataFrame registrado (que deve
+# ser tratado como imutável) e é descartado quando ele é coletado. Se o
+# formato do objeto mudar (linhas ou colunas), a impressão deixa de valer.
+
+TAMANHO_BLOCO_HASH = 1 << 20
+
+_impressoes: Dict[int, Tuple[tuple, Tuple[int, int], tuple]] = {}
+_lock = threading.Lock()
+
+
+def impressao_arquivo(caminho: str) -> str:
+    """
+    Retorna o hash SHA-256 do conteúdo de um arquivo.
+
+    O hash é calculado uma única vez por versão do arquivo (caminho, data de
+    modificação e tamanho); chamadas seguintes custam apenas um os.stat.
+
+    Parâmetros:
+    -----------
+    caminho : str
+        Caminho do arquivo
+
+    Retorna:
+    --------
+    str: Hash hexadecimal do conteúdo
+    """
+    info = os.stat(caminho)
+    return _hash_arquivo(os.path.abspath(caminho), info.st_mtime_ns, info.st_size)
+
+
+@lru_cache(maxsize=256)
+def _hash_arquivo(caminho: str, modificado_em: int, tamanho: int) -> str:
+    """Calcula o SHA-256 do arquivo (cache por caminho, data de modificação e tamanho)."""
+    hash_arquivo = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO_HASH), b''):
+            hash_arquivo.update(bloco)
+    return hash_arquivo.hexdigest()
+
+
+def impressao_arquivos(caminhos: Iterable[str]) -> str:
+    """
+    Combina os hashes de vários arquivos (por exemplo, partições) em um só.
+
+    Parâmetros:
+    -----------
+    caminhos : Iterable[str]
+        Caminhos dos arquivos
+
+    Retorna:
+    --------
+    str: Hash hexadecimal da combinação, independente da ordem dos caminhos
+    """
+    combinado = hashlib.sha256()
+    for caminho in sorted(os.path.abspath(c) for c in caminhos):
+        combinado.update(caminho.encode())
+        combinado.update(impressao_arquivo(caminho).encode())
+    return combinado.hexdigest()
+
+
+def arquivos_parquet(diretorio: str) -> List[str]:
+    """
+    Lista, em ordem, os arquivos .parquet de um diretório (vazio se ele não existir).
+
+    Parâmetros:
+    -----------
+    diretorio : str
+        Diretório a listar
+
+    Retorna:
+    --------
+    List[str]: Caminhos dos arquivos
+    """
+    if not os.path.isdir(diretorio):
+        return []
+    return [
+        os.path.join(diretorio, arquivo)
+        for arquivo in sorted(os.listdir(diretorio))
+        if arquivo.endswith('.parquet')
+    ]
+
+
+def normalizar_estados(estados: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """
+    Normaliza uma seleção de estados (ordem e repetições não importam).
+
+    Parâmetros:
+    -----------
+    estados : Iterable[str], opcional
+        Siglas dos estados
+
+    Retorna:
+    --------
+    Tuple[str, ...]: Siglas únicas e ordenadas
+    """
+    return tuple(sorted(set(str(estado) for estado in estados))) if estados else ()
+
+
+def registrar_impressao_digital(df: pd.DataFrame, *componentes) -> pd.DataFrame:
+    """
+    Associa uma impressão digital a um DataFrame.
+
+    Parâmetros:
+    -----------
+    df : DataFrame
+        DataFrame a registrar (deve ser tratado como imutável a partir daqui)
+    componentes : objetos hasheáveis
+        Partes da impressão (por exemplo, 'aba', nome da aba e hash do arquivo)
+
+    Retorna:
+    --------
+    DataFrame: O próprio DataFrame, para encadeamento
+    """
+    if not isinstance(df, pd.DataFrame):
+        return df
+
+    chave = id(df)
+    with _lock:
+        novo = chave not in _impressoes
+        _impressoes[chave] = (tuple(componentes), df.shape, tuple(df.columns))
+
+    # Remover o registro quando o DataFrame for coletado (o id pode ser reutilizado)
+    if novo:
+        weakref.finalize(df, _descartar_impressao, chave)
+
+    return df
+
+
+def _descartar_impressao(chave: int) -> None:
+    """Remove o registro de um DataFrame coletado."""
+    with _lock:
+        _impressoes.pop(chave, None)
+
+
+def obter_impressao_digital(df) -> Optional[tuple]:
+    """
+    Retorna a impressão digital de um DataFrame, se houver uma válida.
+
+    Parâmetros:
+    -----------
+    df : DataFrame
+        DataFrame consultado
+
+    Retorna:
+    --------
+    tuple ou None: Impressão registrada, ou None se o objeto não foi
+    registrado ou se suas linhas/colunas mudaram desde o registro
+    """
+    if not isinstance(df, pd.DataFrame):
+        return None
+
+    with _lock:
+        registro = _impressoes.get(id(df))
+
+    if registro is None:
+        return None
+
+    impressao, formato, colunas = registro
+    if df.shape != formato or tuple(df.columns) != colunas:
+        return None
+
+    return impressao
+
+
+def herdar_impressao_digital(derivado: pd.DataFrame, origem: pd.DataFrame, *etapa) -> pd.DataFrame:
+    """
+    Registra em um DataFrame derivado a impressão da origem acrescida da etapa aplicada.
+
+    Se a origem não tiver impressão, o derivado também fica sem.
+
+    Parâmetros:
+    -----------
+    derivado : DataFrame
+        Resultado da transformação
+    origem : DataFrame
+        DataFrame de entrada da transformação
+    etapa : objetos hasheáveis
+        Descrição determinística da transformação (nome e parâmetros)
+
+    Retorna:
+    --------
+    DataFrame: O próprio DataFrame derivado
+    """
+    impressao = obter_impressao_digital(origem)
+    if impressao is None or derivado is origem:
+        return derivado
+    return registrar_impressao_digital(derivado, *impressao, *etapa)
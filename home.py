@@ -5,6 +5,8 @@ import pandas as pd
 from utils.helpers.mappings import get_mappings
 from data.data_loader import load_data_for_tab
 from utils.helpers.sidebar_filter import render_sidebar_filters
+from utils.helpers.regiao_utils import obter_regioes_disponiveis
+from utils.helpers.aquecimento_cache import iniciar_aquecimento_cache
 
 import os
 os.environ["STREAMLIT_WATCH_USE_POLLING"] = "true"
@@ -12,12 +14,15 @@ os.environ["STREAMLIT_WATCH_USE_POLLING"] = "true"
 
 # Configuração inicial da página
 st.set_page_config(
-    page_title="Dashboard ENEM Sudeste - Análise Acadêmica", 
+    page_title="Dashboard ENEM - Análise Acadêmica", 
     page_icon="🏠", 
     layout="wide",
     initial_sidebar_state="expanded"
 )
 
+# Pré-calcular a seleção padrão (Brasil) em segundo plano, uma vez por processo
+iniciar_aquecimento_cache()
+
 # Aplicar CSS personalizado para melhorar a aparência
 st.markdown("""
 <style>
@@ -137,42 +142,27 @@ def init_session_state():
     if 'last_data_update' not in st.session_state:
         st.session_state.last_data_update = "01/07/2025"
 
-# Função para limpar cache e memória entre navegações
+# Função para liberar memória entre navegações
 def clear_page_memory():
-    """Limpa cache específico de páginas"""
-    # Limpar apenas cache relacionado a dados específicos de páginas
-    if hasattr(st.cache_data, 'clear'):
-        st.cache_data.clear()
+    """Libera memória da sessão sem limpar os caches compartilhados entre sessões"""
     gc.collect()
 
 # Inicializar session state
 init_session_state()
 
 
-# Título principal com indicação regional
-st.title("🌎 Dashboard ENEM 2023 - Região Sudeste")
-st.markdown("#### Plataforma de Análise Acadêmica para Pesquisa Educacional - Versão Sudeste")
+# Título principal
+st.title("🌎 Dashboard ENEM 2023 - Brasil")
+st.markdown("#### Plataforma de Análise Acadêmica para Pesquisa Educacional")
 
-# Aviso importante sobre a divisão regional
+# Aviso sobre a cobertura nacional
 st.markdown("""
-<div class="warning-card">
-    <h4>📍 Cobertura Regional desta Plataforma</h4>
+<div class="info-card">
+    <h4>📍 Cobertura Nacional</h4>
     <p>
-        Esta versão da plataforma contém dados das regiões <strong>Sudeste</strong>. Para análise das regiões <strong>Norte, Nordeste, Centro-Oeste e Sul</strong> , acesse as <strong> Versões abaixo</strong> da plataforma.
-    </p>
-    <p style="margin-top: 1rem;">
-        <a href="https://enem-insights-norte.streamlit.app/" target="_blank" class="link-button">
-            🌐 Acessar Versão Norte (AC, AP, AM, PA, RO, RR, TO)
-        </a>
-            <a href="https://enem-insights-nordeste.streamlit.app/" target="_blank" class="link-button">
-            🌐 Acessar Versão Nordeste (AL, BA, CE, MA, PB, PE, PI, RN, SE)
-        </a>
-            <a href="https://enem-insights-centro-oeste.streamlit.app/" target="_blank" class="link-button">
-            🌐 Acessar Versão Centro-Oeste (DF, GO, MT, MS)
-        </a>
-            <a href="https://enem-insights-sul.streamlit.app/" target="_blank" class="link-button">
-            🌐 Acessar Versão Sul (PR, RS, SC)
-        </a>
+        Esta plataforma reúne em uma única aplicação os dados de <strong>todas as regiões</strong> do Brasil.
+        Os dados são carregados sob demanda, apenas para os estados e colunas de cada análise,
+        então utilize os filtros da barra lateral para delimitar a região ou os estados de interesse.
     </p>
 </div>
 """, unsafe_allow_html=True)
@@ -208,7 +198,7 @@ with main_col1:
         <h3>🏠 Análise Geral</h3>
         <p><span class="badge">Estatísticas Descritivas</span><span class="badge">Distribuições</span><span class="badge">Comparativos Regionais</span></p>
         <p>
-            Oferece uma visão abrangente e panorâmica do cenário educacional das regiões Sudeste no ENEM 2023. 
+            Oferece uma visão abrangente e panorâmica do cenário educacional brasileiro no ENEM 2023. 
             Este módulo implementa análises estatísticas descritivas robustas, incluindo métricas de tendência central, 
             dispersão e forma das distribuições, proporcionando insights fundamentais sobre os padrões de desempenho educacional.
         </p>
@@ -278,12 +268,15 @@ with main_col2:
     else:
         raise ValueError("filtros_dados não é um DataFrame válido.")
     
-    st.info("🌎 **Escopo**: Todas as regiões do Sudeste disponíveis")
+    # Regiões configuradas (data/regioes.json) presentes nos dados
+    regioes_disponiveis = obter_regioes_disponiveis(todos_estados)
+    
+    st.info(f"🌎 **Escopo**: {len(regioes_disponiveis)} regiões e {len(todos_estados)} estados disponíveis")
     
     # Status do sistema
     st.markdown("""
     <div class="success-card">
-        <h3>🔍 Informações do Dataset Regional</h3>
+        <h3>🔍 Informações do Dataset</h3>
     </div>
     """, unsafe_allow_html=True)
     
@@ -292,53 +285,23 @@ with main_col2:
 
 
     with col1:
-        st.metric("Registros Regionais", "1.305.362", help="Candidatos das regiões Sudeste")
-        st.metric("Cobertura Regional", "33,18%", help="Percentual do território nacional coberto nesta versão")
+        st.metric("Registros", f"{len(filtros_dados):,}".replace(',', '.'), help="Candidatos disponíveis para análise")
+        st.metric("Estados Cobertos", f"{len(todos_estados)} de 27", help="Unidades da federação presentes nos dados")
     
     with col2:
         st.metric("Variáveis Analíticas", "31", help="Total de variáveis processadas e otimizadas")
         st.metric("Processamento", st.session_state.last_data_update, help="Data da última otimização dos dados")
     
-    # Estados incluídos nesta versão
+    # Estados incluídos
     st.markdown("""
     <div class="feature-card">
         <h3>🗺️ Regiões Incluídas</h3>
     </div>
     """, unsafe_allow_html=True)
     
-    st.markdown("""
-    **Sudeste:** SP, RJ, MG, ES  
-    
-    Para análise de Norte, Nordeste, Centro-Oeste e Sul utilize as versões abaixo:.
-    """)
-    
-    # Card específico para redirecionamento à versão Norte
-    st.markdown("""
-    <div class="info-card">
-        <h3>🌐 Precisa Analisar Outras Regiões?</h3>
-        <p>
-            Se você precisa analisar dados das regiões <strong>Norte, Nordeste</strong> ou dos estados 
-            <strong>MT e GO</strong> do Centro-Oeste, acesse nossa versão complementar:
-        </p>
-        <p style="text-align: center; margin-top: 1rem;">
-            <a href="https://enem-insights-norte.streamlit.app/" target="_blank" class="link-button">
-                📊 Dashboard ENEM Norte
-            </a>
-            <a href="https://enem-insights-nordeste.streamlit.app/" target="_blank" class="link-button">
-                📊 Dashboard ENEM Nordeste
-            </a>
-            <a href="https://enem-insights-centro-oeste.streamlit.app/" target="_blank" class="link-button">
-                📊 Dashboard ENEM Centro-Oeste
-            </a>
-            <a href="https://enem-insights-sul.streamlit.app/" target="_blank" class="link-button">
-                📊 Dashboard ENEM Sul
-            </a>
-        </p>
-        <p style="font-size: 12px; margin-top: 0.5rem; text-align: center;">
-            <em>Mesma metodologia, dados complementares</em>
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown("  \n".join(
+        f"**{regiao}:** {', '.join(estados)}" for regiao, estados in regioes_disponiveis.items()
+    ))
     
     # Guia rápido
     st.markdown("""
@@ -399,8 +362,7 @@ with method_col3:
         <p>
             Esta pesquisa apresenta resultados observacionais que não estabelecem relações causais. 
             Trabalha exclusivamente com dados oficiais do INEP, respeitando integralmente as políticas 
-            de privacidade, anonimização e uso ético das informações. A divisão regional visa otimização 
-            técnica sem prejuízo à qualidade analítica.
+            de privacidade, anonimização e uso ético das informações.
         </p>
         <p><span class="badge">Ética em Pesquisa</span><span class="badge">LGPD Compliance</span></p>
     </div>
@@ -7,14 +7,18 @@ from utils.helpers.tooltip import titulo_com_tooltip, custom_metric_with_tooltip
 
 # Imports para gerenciamento de memória
 from utils.helpers.cache_utils import release_memory
+from utils.helpers.aquecimento_cache import iniciar_aquecimento_cache
 
 # Imports para carregamento de dados
-from data.data_loader import load_data_for_tab, filter_data_by_states
+from data.data_loader import load_columns_for_tab, filter_data_by_states
+from data.cubo_agregado import obter_cubo
+from data.histograma_notas import obter_histogramas, contagens_histograma
 from utils.helpers.mappings import get_mappings
 
 # Imports para preparação de dados
 from utils.prepara_dados import (
     preparar_dados_histograma,
+    preparar_dados_histograma_agregado,
     preparar_dados_grafico_faltas,
     preparar_dados_media_geral_estados,
     preparar_dados_comparativo_areas,
@@ -78,15 +82,16 @@ st.set_page_config(
     layout="wide"
 )
 
+# Aquecimento do cache (só a primeira chamada do processo dispara)
+iniciar_aquecimento_cache()
+
 def clear_geral_cache():
-    """Limpa cache específico da página Geral"""
+    """Registra a página atual na sessão"""
     st.session_state.current_page = "geral"
     
-    # Limpar cache de outras páginas se necessário
-    if hasattr(st.session_state, 'last_page') and st.session_state.last_page != "geral":
-        st.cache_data.clear()
-        gc.collect()
-    
+    # Os caches são compartilhados entre sessões e não são limpos na navegação:
+    # o gerenciador de cache (utils.helpers.cache_memoria) descarta entradas
+    # pouco usadas apenas quando a memória do servidor fica escassa
     st.session_state.last_page = "geral"
 
 def init_geral_session_state():
@@ -102,91 +107,14 @@ def init_geral_session_state():
     if 'locais_selecionados' not in st.session_state:
         st.session_state.locais_selecionados = []
 
-def get_cached_data_geral(estados_selecionados: List[str]):
-    """Carrega dados otimizados para a página Geral"""
-    
-    @st.cache_data(ttl=600, max_entries=2, show_spinner=False)
-    def _load_geral_data(estados_key: str):
-        """Cache interno para dados da página Geral"""
-        return load_data_for_tab("geral")
-    
-    # Usar string dos estados como chave para cache
-    estados_key = "_".join(sorted(estados_selecionados))
-    return _load_geral_data(estados_key)
-
-def get_all_data_geral():
-    """Carrega TODOS os dados (não filtrados) para a página Geral"""
-    
-    @st.cache_data(ttl=600, max_entries=1, show_spinner=False)
-    def _load_all_geral_data():
-        """Cache interno para TODOS os dados da página Geral"""
-        return load_data_for_tab("geral")
-    
-    return _load_all_geral_data()
-
-def optimize_memory_usage(microdados_estados: pd.DataFrame) -> pd.DataFrame:
+def get_all_data_geral(colunas: List[str]):
     """
-    Otimização de memória usando APENAS pandas - versão ultra-segura
+    Carrega TODOS os dados (não filtrados) para a página Geral.
     
-    Parâmetros:
-    -----------
-    microdados_estados : DataFrame
-        DataFrame original a ser otimizado
-        
-    Retorna:
-    --------
-    DataFrame: DataFrame com tipos otimizados
+    Apenas as colunas informadas são lidas do parquet; colunas já carregadas
+    por outras seções são reaproveitadas do cache por coluna.
     """
-    try:
-        # Verificação básica
-        if microdados_estados is None or microdados_estados.empty:
-            return microdados_estados
-        
-        # Criar cópia para não modificar o original
-        df_optimized = microdados_estados.copy()
-        
-        # Otimizações seguras coluna por coluna
-        for col in df_optimized.columns:
-            try:
-                dtype_original = df_optimized[col].dtype
-                
-                # Otimizar colunas categóricas (object)
-                if dtype_original == 'object':
-                    # Verificar se vale a pena converter para category
-                    unique_ratio = len(df_optimized[col].unique()) / len(df_optimized)
-                    if unique_ratio < 0.5:  # Se menos de 50% valores únicos
-                        df_optimized[col] = df_optimized[col].astype('category')
-                
-                # Otimizar inteiros
-                elif dtype_original in ['int64', 'Int64']:
-                    # Verificar se temos valores válidos
-                    if not df_optimized[col].isna().all():
-                        max_val = df_optimized[col].max()
-                        min_val = df_optimized[col].min()
-                        
-                        if pd.notna(max_val) and pd.notna(min_val):
-                            # Escolher tipo menor possível
-                            if max_val <= 127 and min_val >= -128:
-                                df_optimized[col] = df_optimized[col].astype('int8')
-                            elif max_val <= 32767 and min_val >= -32768:
-                                df_optimized[col] = df_optimized[col].astype('int16')
-                            elif max_val <= 2147483647 and min_val >= -2147483648:
-                                df_optimized[col] = df_optimized[col].astype('int32')
-                
-                # Otimizar floats
-                elif dtype_original == 'float64':
-                    # Usar downcast do pandas (mais seguro)
-                    df_optimized[col] = pd.to_numeric(df_optimized[col], downcast='float')
-                    
-            except Exception as col_error:
-                # Se erro em coluna específica, manter tipo original
-                continue
-        
-        return df_optimized
-        
-    except Exception as e:
-        # Se qualquer erro geral, retornar DataFrame original
-        return microdados_estados
+    return load_columns_for_tab("geral", colunas)
 
 def render_geral(
     microdados_estados: pd.DataFrame, 
@@ -218,10 +146,6 @@ def render_geral(
         st.warning("Selecione pelo menos um estado no filtro lateral para visualizar os dados.")
         return
     
-    # Otimizar dados na memória (ÚNICA ADIÇÃO)
-    with st.spinner("Otimizando dados..."):
-        microdados_estados = optimize_memory_usage(microdados_estados)
-    
     # Mostrar mensagem sobre os filtros aplicados - EXATAMENTE IGUAL À ORIGINAL
     mensagem = f"Analisando Dados Gerais para todo o Brasil" if len(estados_selecionados) == 27 else f"Dados filtrados para: {', '.join(locais_selecionados)}"
     st.info(mensagem)
@@ -239,7 +163,7 @@ def render_geral(
     # Exibir a visualização selecionada - EXATAMENTE IGUAL À ORIGINAL
     try:
         if analise_selecionada == "Distribuição de Notas":
-            exibir_histograma_notas(microdados_estados, colunas_notas, competencia_mapping, microdados_completos)
+            exibir_histograma_notas(microdados_estados, colunas_notas, competencia_mapping, microdados_completos, estados_selecionados)
         elif analise_selecionada == "Análise por Região/Estado":
             exibir_analise_regional(microdados_estados, estados_selecionados, colunas_notas, competencia_mapping)
         elif analise_selecionada == "Comparativo entre Áreas":
@@ -267,7 +191,9 @@ def exibir_metricas_principais(
     
     # Calcular métricas principais com spinner para indicar processamento
     with st.spinner("Calculando métricas principais..."):
-        metricas = analisar_metricas_principais(microdados_estados, estados_selecionados, colunas_notas)
+        metricas = analisar_metricas_principais(
+            microdados_estados, estados_selecionados, colunas_notas, cubo=obter_cubo("geral")
+        )
     
     # Função para formatar números com vírgula como separador decimal
     def formatar_numero_br(valor: float, casas_decimais: int = 2) -> str:
@@ -317,11 +243,14 @@ def exibir_histograma_notas(
     microdados_estados: pd.DataFrame, 
     colunas_notas: List[str], 
     competencia_mapping: Dict[str, str],
-    microdados_completos: Optional[pd.DataFrame] = None
+    microdados_completos: Optional[pd.DataFrame] = None,
+    estados_selecionados: Optional[List[str]] = None
 ) -> None:
     """
     Exibe um histograma interativo da distribuição de notas com análise estatística.
-    FUNÇÃO 100% IDÊNTICA À ORIGINAL
+    
+    As barras são agrupadas no servidor a partir dos histogramas pré-calculados
+    por UF; o gráfico não recebe as notas individuais.
     """
     try:
         # Título com tooltip explicativo
@@ -351,15 +280,31 @@ def exibir_histograma_notas(
             # Calcular estatísticas para a coluna selecionada
             # Usar o DataFrame completo para obter o total correto de candidatos
             df_para_estatisticas = microdados_completos if microdados_completos is not None else microdados_estados
-            estatisticas = analisar_distribuicao_notas(df_para_estatisticas, coluna_hist)
+            
+            # Mediana e percentis a partir dos histogramas pré-calculados dos mesmos estados
+            estados_estatisticas = None if microdados_completos is not None else list(microdados_estados['SG_UF_PROVA'].unique())
+            contagens = contagens_histograma(obter_histogramas("geral"), coluna_hist, estados_estatisticas)
+            estatisticas = analisar_distribuicao_notas(
+                df_para_estatisticas, 
+                coluna_hist, 
+                contagens if contagens.sum() > 0 else None
+            )
         
         # Criar e exibir o histograma
         with st.spinner("Gerando visualização..."):
+            # Barras agrupadas no servidor a partir dos histogramas dos estados selecionados
+            if estados_selecionados is None:
+                estados_selecionados = list(microdados_estados['SG_UF_PROVA'].unique())
+            df_barras = preparar_dados_histograma_agregado(
+                contagens_histograma(obter_histogramas("geral"), coluna_hist, estados_selecionados)
+            )
+            
             fig_hist = criar_histograma(
                 df_valido,
                 coluna_hist,
                 nome_area_hist,
-                estatisticas
+                estatisticas,
+                df_barras=df_barras
             )
             st.plotly_chart(fig_hist, use_container_width=True)
             
@@ -396,14 +341,8 @@ def exibir_analise_faltas(
     FUNÇÃO 100% IDÊNTICA À ORIGINAL
     """
     try:
-        # Definir mapeamento das colunas de presença
-        colunas_presenca = {
-            'TP_PRESENCA_CN': 'Ciências da Natureza',
-            'TP_PRESENCA_CH': 'Ciências Humanas',
-            'TP_PRESENCA_LC': 'Linguagens e Códigos',
-            'TP_PRESENCA_MT': 'Matemática',
-            'TP_PRESENCA_REDACAO': 'Redação'
-        }
+        # Mapeamento das colunas de presença
+        colunas_presenca = get_mappings()['colunas_presenca']
         
         # Título com tooltip
         titulo_com_tooltip("Análise de Faltas por Dia de Prova", get_tooltip_faltas(), "faltas_tooltip")
@@ -544,7 +483,8 @@ def exibir_analise_regional(
                 microdados_estados, 
                 estados_selecionados, 
                 colunas_notas, 
-                agrupar_por_regiao
+                agrupar_por_regiao,
+                cubo=obter_cubo("geral")
             )
             
             if df_medias is None or df_medias.empty:
@@ -639,7 +579,9 @@ def exibir_comparativo_areas(
                 microdados_estados,
                 estados_selecionados,
                 colunas_notas,
-                competencia_mapping
+                competencia_mapping,
+                cubo=obter_cubo("geral"),
+                histogramas=obter_histogramas("geral")
             )
             
             if df_areas.empty:
@@ -822,7 +764,9 @@ def main():
         # Carregar dados para estados selecionados
         with st.spinner("Carregando dados da análise geral..."):
             # Carregar dados completos (todos os estados) para cálculo de totais corretos
-            microdados_completos = get_all_data_geral()
+            # Apenas UF, presença geral e notas são usadas pelas seções desta página
+            colunas_necessarias = ['SG_UF_PROVA', 'TP_PRESENCA_GERAL'] + list(colunas_notas)
+            microdados_completos = get_all_data_geral(colunas_necessarias)
             
             # Filtrar dados pelos estados selecionados para análise
             microdados_estados = filter_data_by_states(microdados_completos, estados_selecionados)
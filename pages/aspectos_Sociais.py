@@ -10,18 +10,19 @@ from utils.helpers.tooltip import titulo_com_tooltip
 
 # Imports para gerenciamento de memória
 from utils.helpers.cache_utils import release_memory, optimized_cache
+from utils.helpers.aquecimento_cache import iniciar_aquecimento_cache
 
 # Imports para carregamento de dados
-from data.data_loader import load_data_for_tab, filter_data_by_states
+from data.data_loader import load_data_for_states
 from utils.helpers.mappings import get_mappings
 
 # Imports para preparação de dados
 from utils.prepara_dados import (
-    preparar_dados_correlacao,
-    preparar_dados_distribuicao,
-    contar_candidatos_por_categoria,
+    preparar_tabela_contingencia,
+    preparar_contagem_distribuicao,
     ordenar_categorias,
-    preparar_dados_grafico_aspectos_por_estado
+    preparar_dados_grafico_aspectos_por_estado,
+    NORMALIZACOES_BARRAS
 )
 
 # Imports para visualizações
@@ -30,13 +31,16 @@ from utils.visualizacao import (
     criar_grafico_barras_empilhadas,
     criar_grafico_sankey,
     criar_grafico_distribuicao,
-    criar_grafico_aspectos_por_estado
+    criar_grafico_aspectos_por_estado,
+    criar_grafico_matriz_associacao
 )
 
 # Imports para estatísticas
 from utils.estatisticas import (
     calcular_estatisticas_distribuicao,
     analisar_correlacao_categorias,
+    analisar_associacoes_sociais,
+    METRICAS_ASSOCIACAO,
 )
 
 # Imports para explicações
@@ -44,6 +48,7 @@ from utils.explicacao import (
     get_tooltip_correlacao_aspectos,
     get_tooltip_distribuicao_aspectos,
     get_tooltip_aspectos_por_estado,
+    get_tooltip_matriz_associacao,
     get_explicacao_distribuicao,
     get_explicacao_aspectos_por_estado
 )
@@ -53,7 +58,8 @@ from utils.expander import (
     criar_expander_analise_correlacao,
     criar_expander_dados_distribuicao,
     criar_expander_analise_regional,
-    criar_expander_dados_completos_estado
+    criar_expander_dados_completos_estado,
+    criar_expander_matriz_associacao
 )
 
 # Configuração da página
@@ -63,6 +69,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Aquecimento do cache (só a primeira chamada do processo dispara)
+iniciar_aquecimento_cache()
+
 import os
 os.environ["STREAMLIT_WATCH_USE_POLLING"] = "true"
 
@@ -70,14 +79,12 @@ os.environ["STREAMLIT_WATCH_USE_POLLING"] = "true"
 pd.options.display.float_format = '{:,.2f}'.format
 
 def clear_aspectos_cache():
-    """Limpa cache específico da página Aspectos Sociais"""
+    """Registra a página atual na sessão"""
     st.session_state.current_page = "aspectos_sociais"
     
-    # Limpar cache de outras páginas se necessário
-    if hasattr(st.session_state, 'last_page') and st.session_state.last_page != "aspectos_sociais":
-        st.cache_data.clear()
-        gc.collect()
-    
+    # Os caches são compartilhados entre sessões e não são limpos na navegação:
+    # o gerenciador de cache (utils.helpers.cache_memoria) descarta entradas
+    # pouco usadas apenas quando a memória do servidor fica escassa
     st.session_state.last_page = "aspectos_sociais"
 
 def init_aspectos_session_state():
@@ -94,80 +101,12 @@ def init_aspectos_session_state():
         st.session_state.locais_selecionados = []
 
 def get_cached_data_aspectos(estados_selecionados: List[str]):
-    """Carrega dados otimizados para a página Aspectos Sociais"""
-    
-    @st.cache_data(ttl=600, max_entries=2, show_spinner=False)
-    def _load_aspectos_data(estados_key: str):
-        """Cache interno para dados da página Aspectos Sociais"""
-        return load_data_for_tab("aspectos_sociais")
-    
-    # Usar string dos estados como chave para cache
-    estados_key = "_".join(sorted(estados_selecionados))
-    return _load_aspectos_data(estados_key)
-
-def optimize_memory_usage(microdados_estados: pd.DataFrame) -> pd.DataFrame:
     """
-    Otimização de memória usando APENAS pandas - versão ultra-segura
+    Carrega dados otimizados para a página Aspectos Sociais.
     
-    Parâmetros:
-    -----------
-    microdados_estados : DataFrame
-        DataFrame original a ser otimizado
-        
-    Retorna:
-    --------
-    DataFrame: DataFrame com tipos otimizados
+    Apenas as partições dos estados selecionados são lidas (ver load_data_for_states).
     """
-    try:
-        # Verificação básica
-        if microdados_estados is None or microdados_estados.empty:
-            return microdados_estados
-        
-        # Criar cópia para não modificar o original
-        df_optimized = microdados_estados.copy()
-        
-        # Otimizações seguras coluna por coluna
-        for col in df_optimized.columns:
-            try:
-                dtype_original = df_optimized[col].dtype
-                
-                # Otimizar colunas categóricas (object)
-                if dtype_original == 'object':
-                    # Verificar se vale a pena converter para category
-                    unique_ratio = len(df_optimized[col].unique()) / len(df_optimized)
-                    if unique_ratio < 0.5:  # Se menos de 50% valores únicos
-                        df_optimized[col] = df_optimized[col].astype('category')
-                
-                # Otimizar inteiros
-                elif dtype_original in ['int64', 'Int64']:
-                    # Verificar se temos valores válidos
-                    if not df_optimized[col].isna().all():
-                        max_val = df_optimized[col].max()
-                        min_val = df_optimized[col].min()
-                        
-                        if pd.notna(max_val) and pd.notna(min_val):
-                            # Escolher tipo menor possível
-                            if max_val <= 127 and min_val >= -128:
-                                df_optimized[col] = df_optimized[col].astype('int8')
-                            elif max_val <= 32767 and min_val >= -32768:
-                                df_optimized[col] = df_optimized[col].astype('int16')
-                            elif max_val <= 2147483647 and min_val >= -2147483648:
-                                df_optimized[col] = df_optimized[col].astype('int32')
-                
-                # Otimizar floats
-                elif dtype_original == 'float64':
-                    # Usar downcast do pandas (mais seguro)
-                    df_optimized[col] = pd.to_numeric(df_optimized[col], downcast='float')
-                    
-            except Exception as col_error:
-                # Se erro em coluna específica, manter tipo original
-                continue
-        
-        return df_optimized
-        
-    except Exception as e:
-        # Se qualquer erro geral, retornar DataFrame original
-        return microdados_estados
+    return load_data_for_states("aspectos_sociais", estados_selecionados)
 
 def render_aspectos_sociais(microdados_estados, estados_selecionados, locais_selecionados, variaveis_sociais):
     """
@@ -190,10 +129,6 @@ def render_aspectos_sociais(microdados_estados, estados_selecionados, locais_sel
         st.warning("Selecione pelo menos um estado no filtro lateral para visualizar os dados.")
         return
     
-    # Otimizar dados na memória (ÚNICA ADIÇÃO)
-    with st.spinner("Otimizando dados..."):
-        microdados_estados = optimize_memory_usage(microdados_estados)
-    
     # Mensagem informativa sobre filtros aplicados - EXATAMENTE IGUAL À ORIGINAL
     mensagem = "Analisando Aspectos Sociais para todo o Brasil" if len(estados_selecionados) == 27 else f"Dados filtrados para: {', '.join(locais_selecionados)}"
     st.info(mensagem)
@@ -201,7 +136,8 @@ def render_aspectos_sociais(microdados_estados, estados_selecionados, locais_sel
     # Permitir ao usuário selecionar a análise desejada - EXATAMENTE IGUAL À ORIGINAL
     analise_selecionada = st.radio(
         "Selecione a análise desejada:",
-        ["Correlação entre Aspectos Sociais", "Distribuição de Aspectos Sociais", "Aspectos Sociais por Estado/Região"],
+        ["Correlação entre Aspectos Sociais", "Distribuição de Aspectos Sociais", "Aspectos Sociais por Estado/Região",
+         "Visão Geral das Associações"],
         horizontal=True
     )
     
@@ -210,7 +146,9 @@ def render_aspectos_sociais(microdados_estados, estados_selecionados, locais_sel
         if analise_selecionada == "Correlação entre Aspectos Sociais":
             render_correlacao_aspectos_sociais(microdados_estados, estados_selecionados, locais_selecionados, variaveis_sociais)
         elif analise_selecionada == "Distribuição de Aspectos Sociais":
-            render_distribuicao_aspectos_sociais(microdados_estados, variaveis_sociais)
+            render_distribuicao_aspectos_sociais(microdados_estados, estados_selecionados, variaveis_sociais)
+        elif analise_selecionada == "Visão Geral das Associações":
+            render_matriz_associacao(estados_selecionados, locais_selecionados, variaveis_sociais)
         else:  # "Aspectos Sociais por Estado/Região"
             render_aspectos_por_estado(microdados_estados, estados_selecionados, variaveis_sociais)
     except Exception as e:
@@ -276,6 +214,22 @@ def render_correlacao_aspectos_sociais(microdados_estados, estados_selecionados,
             # Armazenar a seleção atual para o próximo ciclo - EXATAMENTE IGUAL À ORIGINAL
             st.session_state.var_y_previous = var_y
         
+        # Base do percentual das barras: recalculada sobre a tabela de contingência, sem nova leitura dos dados
+        normalizacao_barras = 'linha'
+        if tipo_grafico == "Barras Empilhadas":
+            rotulos_normalizacao = {
+                'linha': f"Cada categoria de {variaveis_sociais[var_x]['nome']}",
+                'coluna': f"Cada categoria de {variaveis_sociais[var_y]['nome']}",
+                'total': "Total de candidatos"
+            }
+            normalizacao_barras = st.radio(
+                "Percentual calculado sobre:",
+                NORMALIZACOES_BARRAS,
+                format_func=lambda x: rotulos_normalizacao[x],
+                horizontal=True,
+                key="normalizacao_barras"
+            )
+        
         # Verificar se ambas as variáveis existem nos dados - EXATAMENTE IGUAL À ORIGINAL
         colunas_ausentes = []
         if var_x not in microdados_estados.columns:
@@ -289,18 +243,18 @@ def render_correlacao_aspectos_sociais(microdados_estados, estados_selecionados,
         
         # Preparar dados para visualização - EXATAMENTE IGUAL À ORIGINAL
         with st.spinner("Preparando dados para análise..."):
-            df_preparado, var_x_plot, var_y_plot = preparar_dados_correlacao(
-                microdados_estados, var_x, var_y, variaveis_sociais
+            tabela_contingencia, var_x_plot, var_y_plot = preparar_tabela_contingencia(
+                estados_selecionados, var_x, var_y, variaveis_sociais
             )
         
         # Verificar se temos dados suficientes - EXATAMENTE IGUAL À ORIGINAL
-        if df_preparado.empty:
+        if tabela_contingencia.empty:
             st.warning("Não há dados suficientes para analisar a correlação entre estas variáveis.")
             return
         
         # Calcular métricas para análise estatística - EXATAMENTE IGUAL À ORIGINAL
         with st.spinner("Calculando métricas estatísticas..."):
-            metricas = analisar_correlacao_categorias(df_preparado, var_x_plot, var_y_plot)
+            metricas = analisar_correlacao_categorias(tabela_contingencia, var_x_plot, var_y_plot)
         
         # Texto para indicar estados no título - EXATAMENTE IGUAL À ORIGINAL
         estados_texto = ', '.join(locais_selecionados) if len(locais_selecionados) <= 3 else f"{len(estados_selecionados)} estados selecionados"
@@ -309,19 +263,19 @@ def render_correlacao_aspectos_sociais(microdados_estados, estados_selecionados,
         with st.spinner("Gerando visualização..."):
             if tipo_grafico == "Heatmap":
                 fig, explicacao = criar_grafico_heatmap(
-                    df_preparado, var_x, var_y, var_x_plot, var_y_plot, 
+                    tabela_contingencia, var_x, var_y, var_x_plot, var_y_plot, 
                     variaveis_sociais, estados_texto
                 )
                 
             elif tipo_grafico == "Barras Empilhadas":
                 fig, explicacao = criar_grafico_barras_empilhadas(
-                    df_preparado, var_x, var_y, var_x_plot, var_y_plot, 
-                    variaveis_sociais, estados_texto
+                    tabela_contingencia, var_x, var_y, var_x_plot, var_y_plot, 
+                    variaveis_sociais, estados_texto, normalizacao_barras
                 )
                 
             else:  # Sankey
                 fig, explicacao = criar_grafico_sankey(
-                    df_preparado, var_x, var_y, var_x_plot, var_y_plot, 
+                    tabela_contingencia, var_x, var_y, var_x_plot, var_y_plot, 
                     variaveis_sociais, estados_texto
                 )
         
@@ -330,16 +284,57 @@ def render_correlacao_aspectos_sociais(microdados_estados, estados_selecionados,
         st.info(explicacao)
         
         # Adicionar análise estatística detalhada - EXATAMENTE IGUAL À ORIGINAL
-        criar_expander_analise_correlacao(df_preparado, var_x, var_y, var_x_plot, var_y_plot, variaveis_sociais)
+        criar_expander_analise_correlacao(tabela_contingencia, var_x, var_y, var_x_plot, var_y_plot, variaveis_sociais)
         
         # Liberar memória após uso - OTIMIZAÇÃO ADICIONADA
-        release_memory([df_preparado, fig])
+        release_memory([tabela_contingencia, fig])
         
     except Exception as e:
         st.error(f"Erro ao exibir correlação de aspectos sociais: {str(e)}")
         st.warning("Verifique se as variáveis selecionadas estão disponíveis nos dados.")
 
-def render_distribuicao_aspectos_sociais(microdados_estados, variaveis_sociais):
+def render_matriz_associacao(estados_selecionados, locais_selecionados, variaveis_sociais):
+    """
+    Renderiza a matriz de associações entre todos os pares de aspectos sociais
+    (e de cada aspecto com a categoria de desempenho).
+    
+    As medidas saem dos cubos de contingências, sem ler os microdados.
+    """
+    try:
+        titulo_com_tooltip(
+            "Visão Geral das Associações", 
+            get_tooltip_matriz_associacao(), 
+            "matriz_associacao_tooltip"
+        )
+        
+        metrica = st.radio(
+            "Medida de associação:",
+            list(METRICAS_ASSOCIACAO),
+            format_func=lambda x: METRICAS_ASSOCIACAO[x],
+            horizontal=True,
+            key="metrica_matriz_associacao"
+        )
+        
+        with st.spinner("Calculando associações..."):
+            associacoes = analisar_associacoes_sociais(estados_selecionados, variaveis_sociais)
+        
+        if associacoes.empty:
+            st.warning("Não há dados suficientes para calcular as associações entre os aspectos sociais.")
+            return
+        
+        estados_texto = ', '.join(locais_selecionados) if len(locais_selecionados) <= 3 else f"{len(estados_selecionados)} estados selecionados"
+        
+        fig, explicacao = criar_grafico_matriz_associacao(associacoes, estados_texto, metrica)
+        st.plotly_chart(fig, use_container_width=True)
+        st.info(explicacao)
+        
+        criar_expander_matriz_associacao(associacoes)
+        
+    except Exception as e:
+        st.error(f"Erro ao exibir a matriz de associações: {str(e)}")
+        st.warning("Tente selecionar outra visualização ou verificar os filtros aplicados.")
+
+def render_distribuicao_aspectos_sociais(microdados_estados, estados_selecionados, variaveis_sociais):
     """
     Renderiza a análise de distribuição de um aspecto social.
     FUNÇÃO 100% IDÊNTICA À ORIGINAL
@@ -367,20 +362,13 @@ def render_distribuicao_aspectos_sociais(microdados_estados, variaveis_sociais):
         
         # Preparar dados para visualização - EXATAMENTE IGUAL À ORIGINAL
         with st.spinner("Preparando dados..."):
-            df_preparado, coluna_plot = preparar_dados_distribuicao(
-                microdados_estados, 
+            # Contagens combinadas a partir dos parciais de cada estado (cacheados por UF)
+            contagem_aspecto = preparar_contagem_distribuicao(
+                estados_selecionados, 
                 aspecto_social, 
                 variaveis_sociais
             )
             
-            # Verificar se temos dados suficientes - EXATAMENTE IGUAL À ORIGINAL
-            if df_preparado.empty:
-                st.warning(f"Não há dados suficientes para analisar a distribuição de {variaveis_sociais[aspecto_social]['nome']}.")
-                return
-            
-            # Contar candidatos por categoria - EXATAMENTE IGUAL À ORIGINAL
-            contagem_aspecto = contar_candidatos_por_categoria(df_preparado, coluna_plot)
-            
             # Verificar se temos categorias - EXATAMENTE IGUAL À ORIGINAL
             if contagem_aspecto.empty:
                 st.warning(f"Não foram encontradas categorias para {variaveis_sociais[aspecto_social]['nome']}.")
@@ -429,7 +417,7 @@ def render_distribuicao_aspectos_sociais(microdados_estados, variaveis_sociais):
         criar_expander_dados_distribuicao(contagem_aspecto, aspecto_social, variaveis_sociais)
         
         # Liberar memória após uso - OTIMIZAÇÃO ADICIONADA
-        release_memory([df_preparado, contagem_aspecto, fig])
+        release_memory([contagem_aspecto, fig])
         
     except Exception as e:
         st.error(f"Erro ao exibir distribuição de aspectos sociais: {str(e)}")
@@ -683,10 +671,8 @@ def main():
     try:
         # Carregar dados para estados selecionados
         with st.spinner("Carregando dados de aspectos sociais..."):
-            microdados_completos = get_cached_data_aspectos(estados_selecionados)
-            
-            # Filtrar dados pelos estados selecionados
-            microdados_estados = filter_data_by_states(microdados_completos, estados_selecionados)
+            # Apenas as partições dos estados selecionados são lidas
+            microdados_estados = get_cached_data_aspectos(estados_selecionados)
         
         if microdados_estados.empty:
             st.error("❌ Nenhum dado encontrado para os estados selecionados.")
@@ -706,8 +692,6 @@ def main():
     
     finally:
         # Limpeza final de memória
-        if 'microdados_completos' in locals():
-            release_memory(microdados_completos)
         if 'microdados_estados' in locals():
             release_memory(microdados_estados)
         gc.collect()
@@ -10,9 +10,11 @@ from utils.helpers.tooltip import titulo_com_tooltip
 
 # Imports para gerenciamento de memória
 from utils.helpers.cache_utils import release_memory
+from utils.helpers.aquecimento_cache import iniciar_aquecimento_cache
 
 # Imports para carregamento de dados
-from data.data_loader import load_data_for_tab, filter_data_by_states
+from data.data_loader import load_data_for_states
+from data.cubo_agregado import obter_cubo
 from utils.helpers.mappings import get_mappings
 
 # Imports para preparação de dados
@@ -70,17 +72,18 @@ st.set_page_config(
     layout="wide"
 )
 
+# Aquecimento do cache (só a primeira chamada do processo dispara)
+iniciar_aquecimento_cache()
+
 pd.options.display.float_format = '{:,.2f}'.format
 
 def clear_desempenho_cache():
-    """Limpa cache específico da página Desempenho"""
+    """Registra a página atual na sessão"""
     st.session_state.current_page = "desempenho"
     
-    # Limpar cache de outras páginas se necessário
-    if hasattr(st.session_state, 'last_page') and st.session_state.last_page != "desempenho":
-        st.cache_data.clear()
-        gc.collect()
-    
+    # Os caches são compartilhados entre sessões e não são limpos na navegação:
+    # o gerenciador de cache (utils.helpers.cache_memoria) descarta entradas
+    # pouco usadas apenas quando a memória do servidor fica escassa
     st.session_state.last_page = "desempenho"
 
 def init_desempenho_session_state():
@@ -97,88 +100,12 @@ def init_desempenho_session_state():
         st.session_state.locais_selecionados = []
 
 def get_cached_data_desempenho(estados_selecionados: List[str]):
-    """Carrega dados otimizados para a página Desempenho"""
-    
-    @st.cache_data(ttl=600, max_entries=2, show_spinner=False)
-    def _load_desempenho_data(estados_key: str):
-        """Cache interno para dados da página Desempenho - carrega múltiplas fontes"""
-        try:
-            # Carregar dados principais de desempenho
-            dados_desempenho = load_data_for_tab("desempenho")
-            
-            return dados_desempenho
-            
-        except Exception as e:
-            print(f"Erro ao carregar dados de desempenho: {e}")
-            return pd.DataFrame()
-    
-    # Usar string dos estados como chave para cache
-    estados_key = "_".join(sorted(estados_selecionados))
-    return _load_desempenho_data(estados_key)
-
-def optimize_memory_usage(microdados_estados: pd.DataFrame) -> pd.DataFrame:
     """
-    Otimização de memória usando APENAS pandas - versão ultra-segura
+    Carrega dados otimizados para a página Desempenho.
     
-    Parâmetros:
-    -----------
-    microdados_estados : DataFrame
-        DataFrame original a ser otimizado
-        
-    Retorna:
-    --------
-    DataFrame: DataFrame com tipos otimizados
+    Apenas as partições dos estados selecionados são lidas (ver load_data_for_states).
     """
-    try:
-        # Verificação básica
-        if microdados_estados is None or microdados_estados.empty:
-            return microdados_estados
-        
-        # Criar cópia para não modificar o original
-        df_optimized = microdados_estados.copy()
-        
-        # Otimizações seguras coluna por coluna
-        for col in df_optimized.columns:
-            try:
-                dtype_original = df_optimized[col].dtype
-                
-                # Otimizar colunas categóricas (object)
-                if dtype_original == 'object':
-                    # Verificar se vale a pena converter para category
-                    unique_ratio = len(df_optimized[col].unique()) / len(df_optimized)
-                    if unique_ratio < 0.5:  # Se menos de 50% valores únicos
-                        df_optimized[col] = df_optimized[col].astype('category')
-                
-                # Otimizar inteiros
-                elif dtype_original in ['int64', 'Int64']:
-                    # Verificar se temos valores válidos
-                    if not df_optimized[col].isna().all():
-                        max_val = df_optimized[col].max()
-                        min_val = df_optimized[col].min()
-                        
-                        if pd.notna(max_val) and pd.notna(min_val):
-                            # Escolher tipo menor possível
-                            if max_val <= 127 and min_val >= -128:
-                                df_optimized[col] = df_optimized[col].astype('int8')
-                            elif max_val <= 32767 and min_val >= -32768:
-                                df_optimized[col] = df_optimized[col].astype('int16')
-                            elif max_val <= 2147483647 and min_val >= -2147483648:
-                                df_optimized[col] = df_optimized[col].astype('int32')
-                
-                # Otimizar floats
-                elif dtype_original == 'float64':
-                    # Usar downcast do pandas (mais seguro)
-                    df_optimized[col] = pd.to_numeric(df_optimized[col], downcast='float')
-                    
-            except Exception as col_error:
-                # Se erro em coluna específica, manter tipo original
-                continue
-        
-        return df_optimized
-        
-    except Exception as e:
-        # Se qualquer erro geral, retornar DataFrame original
-        return microdados_estados
+    return load_data_for_states("desempenho", estados_selecionados)
 
 def exibir_secao_visualizacao(titulo, tooltip_text, tooltip_id, processar_func, exibir_func, explicacao_func, expander_func=None, **kwargs):
     """
@@ -255,10 +182,6 @@ def render_desempenho(microdados, microdados_estados, estados_selecionados,
         st.warning("Selecione pelo menos um estado no filtro lateral para visualizar os dados.")
         return
     
-    # Otimizar dados na memória (ÚNICA ADIÇÃO)
-    with st.spinner("Otimizando dados..."):
-        microdados_estados = optimize_memory_usage(microdados_estados)
-    
     # Mensagem informativa sobre filtros aplicados - EXATAMENTE IGUAL À ORIGINAL
     mensagem = f"Analisando Desempenho para todo o Brasil" if len(estados_selecionados) == 27 else f"Dados filtrados para: {', '.join(locais_selecionados)}"
     st.info(mensagem)
@@ -279,7 +202,7 @@ def render_desempenho(microdados, microdados_estados, estados_selecionados,
             # Carrega microdados_full apenas quando necessário - EXATAMENTE IGUAL À ORIGINAL
             with st.spinner("Preparando dados para análise comparativa..."):
                 microdados_full = preparar_dados_desempenho_geral(microdados_estados, colunas_notas, desempenho_mapping)
-            render_analise_comparativa(microdados_full, variaveis_categoricas, colunas_notas, competencia_mapping)
+            render_analise_comparativa(microdados_full, variaveis_categoricas, colunas_notas, competencia_mapping, estados_selecionados)
             release_memory(microdados_full)  # Libera memória após uso - EXATAMENTE IGUAL À ORIGINAL
         elif analise_selecionada == "Relação entre Competências":
             render_relacao_competencias(microdados_estados, colunas_notas, competencia_mapping, race_mapping)
@@ -292,7 +215,7 @@ def render_desempenho(microdados, microdados_estados, estados_selecionados,
     # Limpeza de memória otimizada (ÚNICA ADIÇÃO)
     release_memory(microdados_estados)
 
-def render_analise_comparativa(microdados_full, variaveis_categoricas, colunas_notas, competencia_mapping):
+def render_analise_comparativa(microdados_full, variaveis_categoricas, colunas_notas, competencia_mapping, estados_selecionados=None):
     """
     Renderiza a análise comparativa de desempenho por variável demográfica.
     FUNÇÃO 100% IDÊNTICA À ORIGINAL
@@ -307,6 +230,8 @@ def render_analise_comparativa(microdados_full, variaveis_categoricas, colunas_n
         Lista de colunas com notas a analisar
     competencia_mapping : dict
         Mapeamento de códigos para nomes de competências
+    estados_selecionados : list, opcional
+        Estados selecionados, usados para consultar o cubo de agregados
     """
     titulo_com_tooltip(
         "Análise Comparativa do Desempenho por Variáveis Demográficas", 
@@ -335,7 +260,9 @@ def render_analise_comparativa(microdados_full, variaveis_categoricas, colunas_n
             variavel_selecionada, 
             variaveis_categoricas, 
             colunas_notas, 
-            competencia_mapping
+            competencia_mapping,
+            cubo=obter_cubo("desempenho"),
+            estados=estados_selecionados
         )
     
     # Configuração dos filtros - EXATAMENTE IGUAL À ORIGINAL
@@ -656,14 +583,8 @@ def main():
     try:
         # Carregar dados para estados selecionados
         with st.spinner("Carregando dados de desempenho..."):
-            microdados_completos = get_cached_data_desempenho(estados_selecionados)
-            
-            # Filtrar dados pelos estados selecionados
-            microdados_estados = filter_data_by_states(microdados_completos, estados_selecionados)
-            
-            # Para análise comparativa, pode precisar de dados adicionais
-            # Vamos usar os dados completos como entrada para o comparativo
-            # pois ele precisa de todo o dataset para fazer a análise correta
+            # Apenas as partições dos estados selecionados são lidas
+            microdados_estados = get_cached_data_desempenho(estados_selecionados)
         
         if microdados_estados.empty:
             st.error("❌ Nenhum dado encontrado para os estados selecionados.")
@@ -671,7 +592,7 @@ def main():
         
         # Renderizar análise de desempenho (MANTÉM FUNCIONALIDADE 100% ORIGINAL)
         render_desempenho(
-            microdados_completos,  # dados completos para análise comparativa
+            microdados_estados,    # dados originais (já restritos aos estados selecionados)
             microdados_estados,    # dados filtrados por estado
             estados_selecionados, 
             locais_selecionados, 
@@ -688,8 +609,6 @@ def main():
     
     finally:
         # Limpeza final de memória
-        if 'microdados_completos' in locals():
-            release_memory(microdados_completos)
         if 'microdados_estados' in locals():
             release_memory(microdados_estados)
         gc.collect()
@@ -14,6 +14,10 @@ from .metricas_desempenho import (
 from .analise_aspectos_sociais import (
     calcular_estatisticas_distribuicao,
     analisar_correlacao_categorias,
+    remover_categorias_vazias,
+    calcular_associacoes_em_lote,
+    analisar_associacoes_sociais,
+    METRICAS_ASSOCIACAO,
     analisar_distribuicao_regional,
     calcular_estatisticas_por_categoria,
     analisar_tendencias_temporais
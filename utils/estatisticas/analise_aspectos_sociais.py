@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional
-from scipy.stats import chi2_contingency
+from typing import Dict, Any, List, Optional
+from scipy.stats import chi2 as distribuicao_qui_quadrado, chi2_contingency
 from utils.helpers.cache_utils import optimized_cache, memory_intensive_function
 from utils.helpers.mappings import get_mappings
 
@@ -19,6 +19,15 @@ LIMITE_CORRELACAO_FRACA = LIMIARES_ESTATISTICOS.get('correlacao_fraca', 0.3)
 LIMITE_CORRELACAO_MODERADA = LIMIARES_ESTATISTICOS.get('correlacao_moderada', 0.7)
 LIMITE_CORRELACAO_FORTE = 0.8  # Valor padrão para correlação forte
 
+# Medidas exibidas na matriz de associações (coluna do resultado -> nome)
+METRICAS_ASSOCIACAO = {
+    'v_cramer': "V de Cramér",
+    'coeficiente': "Coeficiente de contingência normalizado",
+    'valor_p': "Valor-p (qui-quadrado)",
+}
+
+NOME_VARIAVEL_DESEMPENHO = "Categoria de Desempenho"
+
 @optimized_cache(ttl=1800)
 def calcular_estatisticas_distribuicao(
     contagem_aspecto: pd.DataFrame
@@ -161,10 +170,9 @@ def _criar_estatisticas_distribuicao_vazias() -> Dict[str, Any]:
     }
 
 
-@memory_intensive_function
 @optimized_cache(ttl=1800)
 def analisar_correlacao_categorias(
-    df_correlacao: pd.DataFrame, 
+    tabela_contingencia: pd.DataFrame, 
     var_x_plot: str, 
     var_y_plot: str
 ) -> Dict[str, Any]:
@@ -173,8 +181,8 @@ def analisar_correlacao_categorias(
     
     Parâmetros:
     -----------
-    df_correlacao : DataFrame
-        DataFrame com os dados para análise
+    tabela_contingencia : DataFrame
+        Contagens por combinação de categorias (ver preparar_tabela_contingencia)
     var_x_plot : str
         Nome da variável para o eixo X
     var_y_plot : str
@@ -186,31 +194,24 @@ def analisar_correlacao_categorias(
         Dicionário com métricas de correlação e análise
     """
     # Verificar se temos dados válidos
-    if df_correlacao is None or df_correlacao.empty:
+    if tabela_contingencia is None or tabela_contingencia.empty:
         return _criar_resultado_correlacao_vazio()
     
-    # Verificar se as variáveis existem no DataFrame
-    if var_x_plot not in df_correlacao.columns or var_y_plot not in df_correlacao.columns:
-        print(f"Variáveis não encontradas no DataFrame: {var_x_plot}, {var_y_plot}")
+    # Verificar se as variáveis correspondem aos eixos da tabela
+    if tabela_contingencia.index.name != var_x_plot or tabela_contingencia.columns.name != var_y_plot:
+        print(f"Variáveis não encontradas na tabela de contingência: {var_x_plot}, {var_y_plot}")
         return _criar_resultado_correlacao_vazio()
     
     # Verificar se temos amostras suficientes
     min_amostras = LIMIARES_PROCESSAMENTO.get('min_amostras_correlacao', 100)
-    if len(df_correlacao) < min_amostras:
-        print(f"Amostras insuficientes para análise de correlação: {len(df_correlacao)} < {min_amostras}")
+    n_total = int(tabela_contingencia.to_numpy().sum())
+    if n_total < min_amostras:
+        print(f"Amostras insuficientes para análise de correlação: {n_total} < {min_amostras}")
         return _criar_resultado_correlacao_vazio('Amostras insuficientes')
     
     try:
-        # Remover valores ausentes
-        df_valido = df_correlacao.dropna(subset=[var_x_plot, var_y_plot])
-        
-        # Verificar se ainda temos dados suficientes após a limpeza
-        if len(df_valido) < min_amostras:
-            print(f"Amostras insuficientes após remoção de valores ausentes: {len(df_valido)} < {min_amostras}")
-            return _criar_resultado_correlacao_vazio('Amostras insuficientes após limpeza')
-        
-        # Criar tabela de contingência
-        tabela_contingencia = pd.crosstab(df_valido[var_x_plot], df_valido[var_y_plot])
+        # Manter apenas categorias observadas (como em pd.crosstab)
+        tabela_contingencia = remover_categorias_vazias(tabela_contingencia)
         
         # Verificar se a tabela tem dimensões suficientes
         if tabela_contingencia.shape[0] <= 1 or tabela_contingencia.shape[1] <= 1:
@@ -295,6 +296,145 @@ def analisar_correlacao_categorias(
         return _criar_resultado_correlacao_vazio(f"Erro: {str(e)}")
 
 
+def remover_categorias_vazias(tabela_contingencia: pd.DataFrame) -> pd.DataFrame:
+    """
+    Remove linhas e colunas sem nenhuma contagem da tabela de contingência.
+    
+    Parâmetros:
+    -----------
+    tabela_contingencia : DataFrame
+        Contagens por combinação de categorias
+        
+    Retorna:
+    --------
+    DataFrame: Tabela só com as categorias observadas
+    """
+    linhas = tabela_contingencia.sum(axis=1) > 0
+    colunas = tabela_contingencia.sum(axis=0) > 0
+    tabela = tabela_contingencia.loc[linhas.to_numpy(), colunas.to_numpy()]
+    
+    # Índices categóricos mantêm só as categorias que sobraram (como em pd.crosstab)
+    if isinstance(tabela.index, pd.CategoricalIndex):
+        tabela.index = tabela.index.remove_unused_categories()
+    if isinstance(tabela.columns, pd.CategoricalIndex):
+        tabela.columns = tabela.columns.remove_unused_categories()
+    return tabela
+
+
+def calcular_associacoes_em_lote(tabelas: np.ndarray) -> pd.DataFrame:
+    """
+    Calcula as medidas de associação de várias tabelas de contingência de uma só vez.
+    
+    Segue analisar_correlacao_categorias, com operações sobre o array de todas
+    as tabelas em vez de um chi2_contingency por par: categorias sem
+    candidatos são ignoradas, tabelas com um grau de liberdade recebem a
+    correção de Yates e tabelas abaixo do mínimo de amostras ou com menos de
+    duas categorias observadas em algum eixo ficam sem medidas (NaN).
+    
+    Parâmetros:
+    -----------
+    tabelas : ndarray
+        Contagens no formato tabelas × categorias de X × categorias de Y
+        (ver preparar_tabelas_associacao)
+        
+    Retorna:
+    --------
+    DataFrame
+        Uma linha por tabela, com n_amostras, qui_quadrado, gl, valor_p,
+        v_cramer e coeficiente (de contingência normalizado)
+    """
+    colunas = ['n_amostras', 'qui_quadrado', 'gl', 'valor_p', 'v_cramer', 'coeficiente']
+    if tabelas.ndim != 3 or len(tabelas) == 0:
+        return pd.DataFrame(columns=colunas)
+    
+    observado = tabelas.astype('float64')
+    totais_linhas = observado.sum(axis=2)
+    totais_colunas = observado.sum(axis=1)
+    n = totais_linhas.sum(axis=1)
+    
+    # Dimensões efetivas (só categorias observadas, como em remover_categorias_vazias)
+    num_linhas = (totais_linhas > 0).sum(axis=1)
+    num_colunas = (totais_colunas > 0).sum(axis=1)
+    gl = np.maximum(num_linhas - 1, 0) * np.maximum(num_colunas - 1, 0)
+    k = np.minimum(num_linhas, num_colunas)
+    
+    min_amostras = LIMIARES_PROCESSAMENTO.get('min_amostras_correlacao', 100)
+    validas = (n >= min_amostras) & (gl > 0)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        esperado = totais_linhas[:, :, None] * totais_colunas[:, None, :] / n[:, None, None]
+        diferenca = observado - esperado
+        
+        # Correção de Yates (como chi2_contingency com correction=True)
+        yates = (gl == 1)[:, None, None]
+        diferenca = np.where(yates, np.sign(diferenca) * np.maximum(np.abs(diferenca) - 0.5, 0), diferenca)
+        
+        qui_quadrado = np.where(esperado > 0, diferenca ** 2 / esperado, 0).sum(axis=(1, 2))
+        valor_p = distribuicao_qui_quadrado.sf(qui_quadrado, np.maximum(gl, 1))
+        v_cramer = np.sqrt(qui_quadrado / (n * (k - 1)))
+        coeficiente = np.sqrt(qui_quadrado / (qui_quadrado + n)) / np.sqrt((k - 1) / k)
+    
+    resultado = pd.DataFrame({
+        'n_amostras': n.astype('int64'),
+        'qui_quadrado': qui_quadrado,
+        'gl': gl,
+        'valor_p': valor_p,
+        'v_cramer': v_cramer,
+        'coeficiente': coeficiente,
+    })
+    resultado.loc[~validas, ['qui_quadrado', 'valor_p', 'v_cramer', 'coeficiente']] = np.nan
+    return resultado
+
+
+@optimized_cache(ttl=1800)
+def analisar_associacoes_sociais(
+    estados: List[str],
+    variaveis_sociais: Dict[str, Dict[str, Any]]
+) -> pd.DataFrame:
+    """
+    Calcula a matriz de associações entre todas as variáveis sociais (e de cada
+    uma com a categoria de desempenho) para uma seleção de estados.
+    
+    Parâmetros:
+    -----------
+    estados : List[str]
+        Estados selecionados
+    variaveis_sociais : Dict
+        Dicionário com mapeamentos e configurações das variáveis
+        
+    Retorna:
+    --------
+    DataFrame
+        Uma linha por par (Variavel_X, Variavel_Y, com os nomes em Nome_X e
+        Nome_Y) com as medidas de calcular_associacoes_em_lote, significativo
+        e tamanho_efeito
+    """
+    # Importar localmente para evitar importação circular
+    from utils.prepara_dados.prepara_dados_aspectos_sociais import preparar_tabelas_associacao
+    
+    try:
+        pares, tabelas = preparar_tabelas_associacao(estados, variaveis_sociais)
+        if pares.empty:
+            return pd.DataFrame()
+        
+        associacoes = pd.concat([pares, calcular_associacoes_em_lote(tabelas)], axis=1)
+        for eixo in ('X', 'Y'):
+            associacoes.insert(
+                associacoes.columns.get_loc(f'Variavel_{eixo}') + 1, f'Nome_{eixo}',
+                [variaveis_sociais.get(var, {}).get('nome', NOME_VARIAVEL_DESEMPENHO) for var in associacoes[f'Variavel_{eixo}']]
+            )
+        associacoes['significativo'] = associacoes['valor_p'] < 0.05
+        associacoes['tamanho_efeito'] = [
+            _classificar_tamanho_efeito(v) if np.isfinite(v) else "indefinido"
+            for v in associacoes['v_cramer']
+        ]
+        return associacoes
+    
+    except Exception as e:
+        print(f"Erro ao calcular matriz de associações: {e}")
+        return pd.DataFrame()
+
+
 def _interpretar_correlacao_categorias(coef: float) -> str:
     """
     Interpreta o valor do coeficiente de correlação para variáveis categóricas.
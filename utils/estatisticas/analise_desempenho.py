@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, Tuple, Any, Optional, List
+from data.data_loader import decodificar_notas
+from data.estatisticas_notas import calcular_quantis_notas, quantis_contagens
 from utils.helpers.cache_utils import optimized_cache, memory_intensive_function
 from utils.estatisticas.metricas_desempenho import calcular_indicadores_desigualdade
 from utils.helpers.mappings import get_mappings
@@ -131,6 +133,7 @@ def gerar_estatisticas_descritivas(
     dados = df[coluna]
     if excluir_zeros:
         dados = dados[dados > 0]
+    dados = decodificar_notas(dados)
     
     # Verificar se ainda temos dados após filtragem
     if dados.empty:
@@ -449,7 +452,8 @@ def _criar_resultado_comparativo_vazio() -> Dict[str, Any]:
 def calcular_percentis_desempenho(
     df: pd.DataFrame, 
     coluna: str, 
-    percentis: List[float] = [0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95]
+    percentis: List[float] = [0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95],
+    contagens: Optional[np.ndarray] = None
 ) -> Dict[str, float]:
     """
     Calcula percentis de desempenho para uma coluna específica.
@@ -462,11 +466,18 @@ def calcular_percentis_desempenho(
         Nome da coluna para análise
     percentis: List[float], default=[0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95]
         Lista de percentis a serem calculados
+    contagens: np.ndarray, opcional
+        Contagens na grade de 0,1 ponto da coluna (ver data.histograma_notas);
+        quando informado, os percentis (exatos) saem dele
         
     Retorna:
     --------
     Dict[str, float]: Dicionário com percentis calculados
     """
+    if contagens is not None:
+        valores = quantis_contagens(np.asarray(contagens, dtype='int64'), 0, percentis)
+        return {f"P{int(p*100)}": round(float(v), 2) for p, v in zip(percentis, valores)}
+    
     # Verificar se temos dados válidos
     if df is None or df.empty or coluna not in df.columns:
         return {f"P{int(p*100)}": 0 for p in percentis}
@@ -480,13 +491,9 @@ def calcular_percentis_desempenho(
         return {f"P{int(p*100)}": 0 for p in percentis}
     
     try:
-        # Calcular percentis
-        resultado = {}
-        for p in percentis:
-            valor_percentil = valores.quantile(p)
-            resultado[f"P{int(p*100)}"] = round(valor_percentil, 2)
-        
-        return resultado
+        # Calcular todos os percentis com uma única contagem na grade de notas
+        valores_percentis = calcular_quantis_notas(valores, percentis)
+        return {f"P{int(p*100)}": round(float(v), 2) for p, v in zip(percentis, valores_percentis)}
     
     except Exception as e:
         print(f"Erro ao calcular percentis: {e}")
@@ -1,7 +1,17 @@
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Optional, Any
-from data.data_loader import calcular_seguro
+from data.data_loader import calcular_seguro, decodificar_notas
+from data.cubo_agregado import medias_estado_competencia
+from data.estatisticas_notas import (
+    calcular_estatisticas_notas,
+    calcular_quantis_notas,
+    calcular_faixas_notas,
+    distribuicao_notas,
+    estatisticas_faixas,
+    quantis_contagens
+)
+from data.histograma_notas import NUM_FAIXAS
 from utils.helpers.cache_utils import optimized_cache, memory_intensive_function
 from utils.helpers.regiao_utils import obter_regiao_do_estado
 from utils.helpers.mappings import get_mappings
@@ -11,11 +21,35 @@ mappings = get_mappings()
 CONFIG_PROCESSAMENTO = mappings.get('config_processamento', {})
 LIMIARES_ESTATISTICOS = mappings.get('limiares_estatisticos', {})
 
+# Esquemas de faixas de nota: nome -> (mínimo, máximo), intervalo [mínimo, máximo)
+FAIXAS_DESEMPENHO = {
+    'Abaixo de 300': (-np.inf, 300),
+    '300 a 500': (300, 500),
+    '500 a 700': (500, 700),
+    '700 a 900': (700, 900),
+    '900 ou mais': (900, np.inf)
+}
+CONCEITOS_DESEMPENHO = {
+    'Insuficiente (abaixo de 450)': (-np.inf, 450),
+    'Regular (450 a 600)': (450, 600),
+    'Bom (600 a 750)': (600, 750),
+    'Muito bom (750 a 850)': (750, 850),
+    'Excelente (850 ou mais)': (850, np.inf)
+}
+FAIXAS_CONCEITO_PADRAO = {
+    'Insuficiente': (0, 450),
+    'Regular': (450, 600),
+    'Bom': (600, 750),
+    'Muito bom': (750, 850),
+    'Excelente': (850, 1000)
+}
+
 @optimized_cache(ttl=1800)  # Cache válido por 30 minutos
 def analisar_metricas_principais(
     microdados_estados: pd.DataFrame, 
     estados_selecionados: List[str], 
-    colunas_notas: List[str]
+    colunas_notas: List[str],
+    cubo: Optional[Dict[str, pd.DataFrame]] = None
 ) -> Dict[str, Any]:
     """
     Calcula as métricas principais para a aba Geral.
@@ -28,6 +62,8 @@ def analisar_metricas_principais(
         Lista de estados selecionados para análise
     colunas_notas : list
         Lista de colunas com notas das competências
+    cubo : Dict[str, DataFrame], opcional
+        Cubo de agregados; quando informado, as médias saem dele sem varrer os microdados
         
     Retorna:
     --------
@@ -51,7 +87,10 @@ def analisar_metricas_principais(
     
     try:
         # Calcular médias por estado e competência (usando processamento otimizado)
-        resultados = _calcular_medias_estados_competencias(microdados_estados, estados_selecionados, colunas_notas)
+        if cubo:
+            resultados = _calcular_medias_estados_competencias_cubo(cubo, estados_selecionados, colunas_notas)
+        else:
+            resultados = _calcular_medias_estados_competencias(microdados_estados, estados_selecionados, colunas_notas)
         
         # Extrair informações do resultado
         media_por_estado = resultados['todas_medias']
@@ -234,6 +273,53 @@ def _calcular_medias_estados_competencias(
         }
 
 
+def _calcular_medias_estados_competencias_cubo(
+    cubo: Dict[str, pd.DataFrame], 
+    estados: List[str], 
+    colunas_notas: List[str]
+) -> Dict[str, Any]:
+    """
+    Calcula médias por estado e competência a partir do cubo de agregados.
+    
+    Produz a mesma estrutura de _calcular_medias_estados_competencias.
+    
+    Parâmetros:
+    -----------
+    cubo: Dict[str, DataFrame]
+        Cubo de agregados (UF × competência)
+    estados: List[str]
+        Lista de estados para análise
+    colunas_notas: List[str]
+        Lista de colunas com notas
+        
+    Retorna:
+    --------
+    Dict[str, Any]: Dicionário com médias calculadas
+    """
+    try:
+        matriz = medias_estado_competencia(cubo, estados, colunas_notas)
+        
+        # Mesma ordem da versão original: estado a estado, competência a competência
+        valores = matriz.to_numpy().ravel()
+        todas_medias = valores[~np.isnan(valores)].tolist()
+        medias_por_estado = matriz.mean(axis=1).dropna().to_dict()
+        medias_por_competencia = matriz.mean(axis=0).dropna().to_dict()
+        
+        return {
+            'todas_medias': todas_medias,
+            'medias_por_estado': medias_por_estado,
+            'medias_por_competencia': medias_por_competencia
+        }
+        
+    except Exception as e:
+        print(f"Erro ao calcular médias pelo cubo de agregados: {e}")
+        return {
+            'todas_medias': [],
+            'medias_por_estado': {},
+            'medias_por_competencia': {}
+        }
+
+
 def _calcular_totais_por_regiao(df: pd.DataFrame) -> Dict[str, int]:
     """
     Calcula o total de candidatos por região.
@@ -273,7 +359,8 @@ def _calcular_totais_por_regiao(df: pd.DataFrame) -> Dict[str, int]:
 @optimized_cache(ttl=1800)
 def analisar_distribuicao_notas(
     df_dados: pd.DataFrame, 
-    coluna: str
+    coluna: str,
+    contagens: Optional[np.ndarray] = None
 ) -> Dict[str, Any]:
     """
     Analisa a distribuição de notas para uma área específica.
@@ -284,6 +371,10 @@ def analisar_distribuicao_notas(
         DataFrame com os dados filtrados
     coluna : str
         Nome da coluna a ser analisada
+    contagens : np.ndarray, opcional
+        Histograma de notas dos mesmos dados (ver data.histograma_notas); quando
+        conta as mesmas notas válidas, mediana e percentis (exatos) saem dele
+        sem uma nova contagem das notas
         
     Retorna:
     --------
@@ -307,50 +398,62 @@ def analisar_distribuicao_notas(
         return _criar_analise_distribuicao_vazia()
     
     try:
+        # Notas compactas (décimos em uint16) voltam para pontos
+        coluna_convertida = decodificar_notas(df_dados[coluna])
+        
         # Converter para float64 para evitar overflow com float16
-        if df_dados[coluna].dtype in ['float16', 'int16']:
-            coluna_convertida = df_dados[coluna].astype('float64')
-        else:
-            coluna_convertida = df_dados[coluna]
+        if coluna_convertida.dtype in ['float16', 'int16']:
+            coluna_convertida = coluna_convertida.astype('float64')
         
         # Dados apenas para notas válidas (maiores que 0 e diferentes de -1)
         # -1 representa candidatos ausentes no ENEM
-        df_valido = df_dados[
+        df_valido = coluna_convertida[
             (coluna_convertida > 0) & 
             (coluna_convertida != -1) & 
             (coluna_convertida.notna()) &
             (coluna_convertida < 1000)  # Adicionar limite superior para evitar outliers extremos
-        ]
+        ].to_frame(coluna)
         
         # Verificar se temos dados suficientes após filtragem
         if df_valido.empty:
             return _criar_analise_distribuicao_vazia()
         
         # Usar a coluna convertida para os cálculos
-        coluna_valida = coluna_convertida[df_valido.index]
-        
-        # Calcular estatísticas básicas
-        media = calcular_seguro(coluna_valida, 'media')
-        mediana = calcular_seguro(coluna_valida, 'mediana')
-        min_valor = calcular_seguro(coluna_valida, 'min')
-        max_valor = calcular_seguro(coluna_valida, 'max')
-        desvio_padrao = calcular_seguro(coluna_valida, 'std')
-        curtose = calcular_seguro(coluna_valida, 'curtose')
-        assimetria = calcular_seguro(coluna_valida, 'assimetria')
-        
-        # Calcular percentis de forma segura
-        percentis = _calcular_percentis_seguros(coluna_valida, [10, 25, 50, 75, 90, 95, 99])
+        coluna_valida = df_valido[coluna]
+        
+        # Calcular estatísticas básicas (uma única passada sobre as notas)
+        estatisticas = calcular_estatisticas_notas(df_valido, [coluna], quantis=None).loc[coluna]
+        media = float(estatisticas['media'])
+        min_valor = float(estatisticas['minimo'])
+        max_valor = float(estatisticas['maximo'])
+        desvio_padrao = float(estatisticas['desvio_padrao'])
+        curtose = float(estatisticas['curtose'])
+        assimetria = float(estatisticas['assimetria'])
+        
+        if contagens is not None:
+            # Mesmo recorte do filtro acima (notas abaixo de 1000): descartar a última faixa
+            contagens = np.asarray(contagens, dtype='int64').copy()
+            contagens[NUM_FAIXAS - 1:] = 0
+            # Histograma de outra versão dos dados: recontar as notas carregadas
+            if int(contagens.sum()) != len(coluna_valida):
+                contagens = None
+        
+        # Calcular percentis de forma segura (a mediana é o percentil 50)
+        percentis = _calcular_percentis_seguros(coluna_valida, [10, 25, 50, 75, 90, 95, 99], contagens)
+        mediana = float(percentis[50])
         
         # Calcular faixas de desempenho
         total_valido = len(df_valido)
         total_candidatos = len(df_dados)  # Total real de candidatos (incluindo ausentes)
-        faixas = _calcular_faixas_desempenho(df_valido, coluna, total_valido)
-        
-        # Análise de conceito (baseado em faixas típicas de nota do ENEM)
-        conceitos = _calcular_conceitos(df_valido, coluna, total_valido)
+        # Faixas de desempenho e conceitos (faixas típicas de nota do ENEM) em uma única classificação
+        faixas_notas = calcular_faixas_notas(
+            coluna_valida, {'faixas': FAIXAS_DESEMPENHO, 'conceitos': CONCEITOS_DESEMPENHO}, total_valido
+        )
+        faixas = faixas_notas['faixas']['percentual'].to_dict()
+        conceitos = faixas_notas['conceitos']['percentual'].to_dict()
         
         # Calcular intervalo de confiança para a média (95%)
-        intervalo_confianca = _calcular_intervalo_confianca(coluna_valida)
+        intervalo_confianca = _calcular_intervalo_confianca(media, desvio_padrao, total_valido)
         
         # Calcular coeficiente de variação (%) com validação
         if media > 0 and desvio_padrao > 0 and not np.isnan(desvio_padrao) and not np.isinf(desvio_padrao):
@@ -429,7 +532,11 @@ def _criar_analise_distribuicao_vazia() -> Dict[str, Any]:
     }
 
 
-def _calcular_percentis_seguros(serie: pd.Series, pontos_percentis: List[int]) -> Dict[int, float]:
+def _calcular_percentis_seguros(
+    serie: pd.Series, 
+    pontos_percentis: List[int], 
+    contagens: Optional[np.ndarray] = None
+) -> Dict[int, float]:
     """
     Calcula percentis de forma segura para uma série.
     
@@ -439,127 +546,48 @@ def _calcular_percentis_seguros(serie: pd.Series, pontos_percentis: List[int]) -
         Série com valores numéricos
     pontos_percentis: List[int]
         Lista de percentis a calcular
+    contagens: np.ndarray, opcional
+        Contagens na grade de 0,1 ponto da mesma série (ver
+        data.histograma_notas); quando informado, os percentis saem dele sem
+        recontar os valores
         
     Retorna:
     --------
     Dict[int, float]: Dicionário com percentis calculados
     """
     try:
-        # Converter para float64 para evitar overflow
-        if serie.dtype in ['float16', 'int16']:
-            serie = serie.astype('float64')
-        
-        # Remover valores inválidos
-        serie_limpa = serie.dropna()
-        serie_limpa = serie_limpa[np.isfinite(serie_limpa)]
+        if contagens is not None:
+            valores = quantis_contagens(contagens, 0, [p / 100 for p in pontos_percentis])
+            return {p: float(v) for p, v in zip(pontos_percentis, valores)}
         
-        if len(serie_limpa) == 0:
+        if len(serie) == 0:
             return {p: 0.0 for p in pontos_percentis}
         
-        return {p: np.percentile(serie_limpa, p) for p in pontos_percentis}
+        # Todos os percentis de uma vez, por contagem na grade de 0,1 ponto (ausentes são ignorados)
+        valores = calcular_quantis_notas(serie, [p / 100 for p in pontos_percentis])
+        return {p: float(v) for p, v in zip(pontos_percentis, valores)}
     except Exception as e:
         print(f"Erro ao calcular percentis: {e}")
         return {p: 0.0 for p in pontos_percentis}
 
 
-def _calcular_faixas_desempenho(df: pd.DataFrame, coluna: str, total: int) -> Dict[str, float]:
+def _calcular_intervalo_confianca(
+    media: float, 
+    desvio_padrao: float, 
+    n: int, 
+    nivel: float = 0.95
+) -> Tuple[float, float]:
     """
-    Calcula percentuais para diferentes faixas de desempenho.
+    Calcula intervalo de confiança para a média a partir das estatísticas da amostra.
     
     Parâmetros:
     -----------
-    df: DataFrame
-        DataFrame com dados válidos
-    coluna: str
-        Nome da coluna com notas
-    total: int
-        Total de registros válidos
-        
-    Retorna:
-    --------
-    Dict[str, float]: Dicionário com percentuais por faixa
-    """
-    if total == 0:
-        return {
-            'Abaixo de 300': 0.0,
-            '300 a 500': 0.0,
-            '500 a 700': 0.0,
-            '700 a 900': 0.0,
-            '900 ou mais': 0.0
-        }
-    
-    try:
-        return {
-            'Abaixo de 300': len(df[df[coluna] < 300]) / total * 100,
-            '300 a 500': len(df[(df[coluna] >= 300) & (df[coluna] < 500)]) / total * 100,
-            '500 a 700': len(df[(df[coluna] >= 500) & (df[coluna] < 700)]) / total * 100,
-            '700 a 900': len(df[(df[coluna] >= 700) & (df[coluna] < 900)]) / total * 100,
-            '900 ou mais': len(df[df[coluna] >= 900]) / total * 100
-        }
-    except Exception as e:
-        print(f"Erro ao calcular faixas de desempenho: {e}")
-        return {
-            'Abaixo de 300': 0.0,
-            '300 a 500': 0.0,
-            '500 a 700': 0.0,
-            '700 a 900': 0.0,
-            '900 ou mais': 0.0
-        }
-
-
-def _calcular_conceitos(df: pd.DataFrame, coluna: str, total: int) -> Dict[str, float]:
-    """
-    Calcula percentuais para diferentes conceitos.
-    
-    Parâmetros:
-    -----------
-    df: DataFrame
-        DataFrame com dados válidos
-    coluna: str
-        Nome da coluna com notas
-    total: int
-        Total de registros válidos
-        
-    Retorna:
-    --------
-    Dict[str, float]: Dicionário com percentuais por conceito
-    """
-    if total == 0:
-        return {
-            'Insuficiente (abaixo de 450)': 0.0,
-            'Regular (450 a 600)': 0.0,
-            'Bom (600 a 750)': 0.0,
-            'Muito bom (750 a 850)': 0.0,
-            'Excelente (850 ou mais)': 0.0
-        }
-    
-    try:
-        return {
-            'Insuficiente (abaixo de 450)': len(df[df[coluna] < 450]) / total * 100,
-            'Regular (450 a 600)': len(df[(df[coluna] >= 450) & (df[coluna] < 600)]) / total * 100,
-            'Bom (600 a 750)': len(df[(df[coluna] >= 600) & (df[coluna] < 750)]) / total * 100,
-            'Muito bom (750 a 850)': len(df[(df[coluna] >= 750) & (df[coluna] < 850)]) / total * 100,
-            'Excelente (850 ou mais)': len(df[df[coluna] >= 850]) / total * 100
-        }
-    except Exception as e:
-        print(f"Erro ao calcular conceitos: {e}")
-        return {
-            'Insuficiente (abaixo de 450)': 0.0,
-            'Regular (450 a 600)': 0.0,
-            'Bom (600 a 750)': 0.0,
-            'Muito bom (750 a 850)': 0.0,
-            'Excelente (850 ou mais)': 0.0
-        }
-
-
-def _calcular_intervalo_confianca(serie: pd.Series, nivel: float = 0.95) -> Tuple[float, float]:
-    """
-    Calcula intervalo de confiança para a média de uma série.
-    
-    Parâmetros:
-    -----------
-    serie: Series
-        Série com valores numéricos
+    media: float
+        Média da amostra
+    desvio_padrao: float
+        Desvio padrão amostral (ddof=1)
+    n: int
+        Tamanho da amostra
     nivel: float, default=0.95
         Nível de confiança (0.95 = 95%)
         
@@ -568,38 +596,12 @@ def _calcular_intervalo_confianca(serie: pd.Series, nivel: float = 0.95) -> Tupl
     Tuple[float, float]: Limite inferior e superior do intervalo
     """
     try:
-        from scipy import stats
-        
         # Verificar se temos dados suficientes
-        if len(serie) < 2:
-            return (0.0, 0.0)
-        
-        # Converter para float64 para evitar overflow
-        if serie.dtype in ['float16', 'int16']:
-            serie = serie.astype('float64')
-        
-        # Remover valores nulos ou inválidos
-        serie_limpa = serie.dropna()
-        if len(serie_limpa) < 2:
-            return (0.0, 0.0)
-        
-        # Remover valores infinitos
-        serie_limpa = serie_limpa[np.isfinite(serie_limpa)]
-        if len(serie_limpa) < 2:
-            return (0.0, 0.0)
-        
-        media = serie_limpa.mean()
-        
-        # Verificar se a média é válida
-        if not np.isfinite(media):
+        if n < 2 or not np.isfinite(media):
             return (0.0, 0.0)
         
         # Calcular erro padrão
-        try:
-            erro_padrao = stats.sem(serie_limpa)
-        except:
-            # Fallback manual
-            erro_padrao = serie_limpa.std(ddof=1) / np.sqrt(len(serie_limpa))
+        erro_padrao = desvio_padrao / np.sqrt(n)
         
         # Verificar se o erro padrão é válido
         if not np.isfinite(erro_padrao) or erro_padrao <= 0:
@@ -607,8 +609,9 @@ def _calcular_intervalo_confianca(serie: pd.Series, nivel: float = 0.95) -> Tupl
         
         # Calcular intervalo de confiança
         try:
-            intervalo = stats.t.interval(nivel, len(serie_limpa)-1, loc=media, scale=erro_padrao)
-        except:
+            from scipy import stats
+            intervalo = stats.t.interval(nivel, n - 1, loc=media, scale=erro_padrao)
+        except Exception:
             # Fallback simples
             margem_erro = 1.96 * erro_padrao  # Aproximação para grandes amostras
             intervalo = (media - margem_erro, media + margem_erro)
@@ -900,6 +903,15 @@ def _identificar_estados_menor_evasao(df: pd.DataFrame, top_n: int = 3) -> List[
         return []
 
 
+@optimized_cache(ttl=1800)
+def _distribuicao_notas_validas(df: pd.DataFrame, coluna: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Valores distintos e contagens das notas válidas (> 0) de uma coluna (ver data.estatisticas_notas).
+    """
+    notas = df[coluna]
+    return distribuicao_notas(notas[notas > 0])
+
+
 @optimized_cache(ttl=1800)
 def analisar_desempenho_por_faixa_nota(
     df: pd.DataFrame, 
@@ -932,11 +944,12 @@ def analisar_desempenho_por_faixa_nota(
         }
     
     try:
-        # Filtrar notas válidas
-        df_valido = df[df[coluna] > 0]
+        # Distribuição das notas válidas (cacheada): trocar as faixas não percorre os dados de novo
+        suporte, pesos = _distribuicao_notas_validas(df, coluna)
+        total = int(pesos.sum())
         
         # Verificar se temos dados após filtragem
-        if df_valido.empty:
+        if total == 0:
             return {
                 'contagem': {},
                 'percentual': {},
@@ -946,40 +959,29 @@ def analisar_desempenho_por_faixa_nota(
         
         # Definir faixas padrão se não fornecidas
         if faixas is None:
-            faixas = {
-                'Insuficiente': (0, 450),
-                'Regular': (450, 600),
-                'Bom': (600, 750),
-                'Muito bom': (750, 850),
-                'Excelente': (850, 1000)
-            }
-        
-        # Calcular contagem por faixa
-        contagem = {}
-        for nome, (min_val, max_val) in faixas.items():
-            contagem[nome] = len(df_valido[(df_valido[coluna] >= min_val) & (df_valido[coluna] < max_val)])
+            faixas = FAIXAS_CONCEITO_PADRAO
         
-        # Calcular percentuais
-        total = len(df_valido)
-        percentual = {nome: (count / total * 100) for nome, count in contagem.items()}
+        # Contagem, percentual, média, mediana e desvio de todas as faixas de uma vez
+        tabela_faixas = estatisticas_faixas(suporte, pesos, faixas, total)
+        contagem = {nome: int(valor) for nome, valor in tabela_faixas['contagem'].items()}
+        percentual = tabela_faixas['percentual'].to_dict()
         
         # Identificar faixa predominante
         faixa_predominante = max(contagem.items(), key=lambda x: x[1])[0] if contagem else ''
         
         # Criar estatísticas por faixa
-        estatisticas_faixas = {}
-        for nome, (min_val, max_val) in faixas.items():
-            notas_faixa = df_valido[(df_valido[coluna] >= min_val) & (df_valido[coluna] < max_val)][coluna]
-            if len(notas_faixa) > 0:
-                estatisticas_faixas[nome] = {
-                    'media': round(notas_faixa.mean(), 2),
-                    'mediana': round(notas_faixa.median(), 2),
-                    'desvio_padrao': round(notas_faixa.std(), 2) if len(notas_faixa) > 1 else 0,
-                    'contagem': len(notas_faixa),
-                    'percentual': round(len(notas_faixa) / total * 100, 2)
+        estatisticas_por_faixa = {}
+        for nome, linha in tabela_faixas.iterrows():
+            if linha['contagem'] > 0:
+                estatisticas_por_faixa[nome] = {
+                    'media': round(linha['media'], 2),
+                    'mediana': round(linha['mediana'], 2),
+                    'desvio_padrao': round(linha['desvio_padrao'], 2) if linha['contagem'] > 1 else 0,
+                    'contagem': int(linha['contagem']),
+                    'percentual': round(linha['percentual'], 2)
                 }
             else:
-                estatisticas_faixas[nome] = {
+                estatisticas_por_faixa[nome] = {
                     'media': 0,
                     'mediana': 0,
                     'desvio_padrao': 0,
@@ -992,7 +994,7 @@ def analisar_desempenho_por_faixa_nota(
             'percentual': {k: round(v, 2) for k, v in percentual.items()},
             'faixa_predominante': faixa_predominante,
             'total_valido': total,
-            'estatisticas_faixas': estatisticas_faixas
+            'estatisticas_faixas': estatisticas_por_faixa
         }
         
     except Exception as e:
@@ -1054,7 +1056,7 @@ def analisar_metricas_por_regiao(
                 if coluna in dados_regiao.columns:
                     notas_validas = dados_regiao[dados_regiao[coluna] > 0][coluna]
                     if len(notas_validas) > 0:
-                        metricas_regiao[coluna] = round(notas_validas.mean(), 2)
+                        metricas_regiao[coluna] = round(decodificar_notas(notas_validas).mean(), 2)
                     else:
                         metricas_regiao[coluna] = 0.0
             
@@ -8,7 +8,8 @@ from .expander_aspectos_sociais import (
     criar_expander_analise_correlacao,
     criar_expander_dados_distribuicao,
     criar_expander_analise_regional,
-    criar_expander_dados_completos_estado
+    criar_expander_dados_completos_estado,
+    criar_expander_matriz_associacao
 )
 
 from .expander_geral import (
@@ -6,6 +6,8 @@ from utils.estatisticas.analise_aspectos_sociais import (
     calcular_estatisticas_distribuicao,
     analisar_correlacao_categorias,
     analisar_distribuicao_regional,
+    remover_categorias_vazias,
+    METRICAS_ASSOCIACAO,
 )
 
 from utils.helpers.mappings import get_mappings
@@ -25,7 +27,7 @@ LIMITE_CORRELACAO_MODERADA = LIMIARES_ESTATISTICOS.get('correlacao_moderada', 0.
 LIMITE_CORRELACAO_FORTE = LIMIARES_ESTATISTICOS.get('correlacao_forte', 0.8)
 
 def criar_expander_analise_correlacao(
-    df_correlacao: pd.DataFrame, 
+    tabela_contingencia: pd.DataFrame, 
     var_x: str, 
     var_y: str, 
     var_x_plot: str, 
@@ -37,8 +39,8 @@ def criar_expander_analise_correlacao(
     
     Parâmetros:
     -----------
-    df_correlacao : DataFrame
-        DataFrame com dados correlacionados
+    tabela_contingencia : DataFrame
+        Contagens por combinação de categorias (ver preparar_tabela_contingencia)
     var_x : str
         Código da variável original para o eixo X
     var_y : str
@@ -51,7 +53,7 @@ def criar_expander_analise_correlacao(
         Dicionário com informações sobre as variáveis sociais
     """
     # Validar entrada
-    if df_correlacao is None or df_correlacao.empty:
+    if tabela_contingencia is None or tabela_contingencia.empty:
         st.warning("⚠️ Não há dados suficientes para análise estatística.")
         return
     
@@ -67,7 +69,7 @@ def criar_expander_analise_correlacao(
     with st.expander(f"📊 Análise estatística da correlação: {nome_x} × {nome_y}"):
         try:
             # Realizar análise de correlação
-            metricas = analisar_correlacao_categorias(df_correlacao, var_x_plot, var_y_plot)
+            metricas = analisar_correlacao_categorias(tabela_contingencia, var_x_plot, var_y_plot)
             
             # Seção 1: Resumo Executivo
             st.write("### 🎯 Resumo Executivo")
@@ -83,7 +85,7 @@ def criar_expander_analise_correlacao(
             
             # Seção 3: Análise de Combinações
             st.write("### 🔍 Análise de Combinações")
-            _mostrar_analise_categorias(df_correlacao, var_x_plot, var_y_plot, variaveis_sociais, var_x, var_y)
+            _mostrar_analise_categorias(tabela_contingencia, var_x_plot, var_y_plot, variaveis_sociais, var_x, var_y)
             
             st.divider()
             
@@ -95,12 +97,12 @@ def criar_expander_analise_correlacao(
             
             # Seção 5: Downloads e Exportação
             st.write("### 💾 Downloads e Exportação")
-            _mostrar_downloads_correlacao(df_correlacao, metricas, var_x, var_y, variaveis_sociais)
+            _mostrar_downloads_correlacao(tabela_contingencia, metricas, var_x, var_y, variaveis_sociais)
             
         except Exception as e:
             st.error(f"❌ Erro ao gerar análise estatística: {str(e)}")
             # Fallback para versão básica
-            _mostrar_correlacao_basica(df_correlacao, var_x_plot, var_y_plot, variaveis_sociais, var_x, var_y)
+            _mostrar_correlacao_basica(tabela_contingencia, var_x_plot, var_y_plot, variaveis_sociais, var_x, var_y)
 
 
 def criar_expander_dados_distribuicao(
@@ -314,6 +316,66 @@ def criar_expander_dados_completos_estado(
 
 # Funções auxiliares para a análise completa de dados por estado/região
 
+def criar_expander_matriz_associacao(associacoes: pd.DataFrame) -> None:
+    """
+    Cria um expander com a tabela ordenável das associações entre pares de variáveis.
+    
+    Parâmetros:
+    -----------
+    associacoes : DataFrame
+        Medidas por par de variáveis (ver analisar_associacoes_sociais)
+    """
+    if associacoes is None or associacoes.empty:
+        return
+    
+    with st.expander("📊 Tabela de associações entre os pares"):
+        try:
+            ordenacao = st.radio(
+                "Ordenar por:",
+                list(METRICAS_ASSOCIACAO),
+                format_func=lambda x: METRICAS_ASSOCIACAO[x],
+                horizontal=True,
+                key="ordenacao_matriz_associacao"
+            )
+            
+            # Associações mais fortes primeiro (para o valor-p, os menores); pares sem medida ao final
+            tabela = associacoes.sort_values(ordenacao, ascending=(ordenacao == 'valor_p'), na_position='last')
+            tabela = tabela[['Nome_X', 'Nome_Y', 'v_cramer', 'coeficiente', 'valor_p', 'qui_quadrado', 'gl',
+                             'n_amostras', 'tamanho_efeito', 'significativo']]
+            
+            st.dataframe(
+                tabela,
+                column_config={
+                    'Nome_X': st.column_config.TextColumn("Variável 1"),
+                    'Nome_Y': st.column_config.TextColumn("Variável 2"),
+                    'v_cramer': st.column_config.NumberColumn(METRICAS_ASSOCIACAO['v_cramer'], format="%.3f"),
+                    'coeficiente': st.column_config.NumberColumn(
+                        "Coef. normalizado", help=METRICAS_ASSOCIACAO['coeficiente'], format="%.3f"
+                    ),
+                    'valor_p': st.column_config.NumberColumn(METRICAS_ASSOCIACAO['valor_p'], format="%.4f"),
+                    'qui_quadrado': st.column_config.NumberColumn("Qui-quadrado", format="%.2f"),
+                    'gl': st.column_config.NumberColumn("GL", help="Graus de liberdade"),
+                    'n_amostras': st.column_config.NumberColumn("Candidatos", format="%d"),
+                    'tamanho_efeito': st.column_config.TextColumn("Tamanho do efeito"),
+                    'significativo': st.column_config.CheckboxColumn("Significativo (p < 0,05)")
+                },
+                hide_index=True,
+                height=400,
+                use_container_width=True
+            )
+            
+            st.download_button(
+                label="📥 Baixar matriz de associações (CSV)",
+                data=tabela.to_csv(index=False).encode('utf-8'),
+                file_name="matriz_associacoes_aspectos_sociais.csv",
+                mime="text/csv",
+                key="download_matriz_associacao"
+            )
+        
+        except Exception as e:
+            st.error(f"Erro ao exibir tabela de associações: {str(e)}")
+
+
 def _mostrar_resumo_executivo(df_dados: pd.DataFrame, tipo_localidade: str) -> None:
     """
     Mostra um resumo executivo dos dados por estado/região.
@@ -774,7 +836,7 @@ def _mostrar_metricas_estatisticas(metricas: Dict[str, Any]) -> None:
 
 
 def _mostrar_analise_categorias(
-    df_correlacao: pd.DataFrame, 
+    tabela_contingencia: pd.DataFrame, 
     var_x_plot: str, 
     var_y_plot: str, 
     variaveis_sociais: Dict[str, Dict[str, Any]], 
@@ -785,33 +847,25 @@ def _mostrar_analise_categorias(
     Mostra análise detalhada das combinações de categorias.
     """
     # Verificar se temos dados válidos
-    if df_correlacao is None or df_correlacao.empty:
+    if tabela_contingencia is None or tabela_contingencia.empty:
         st.warning("Dados insuficientes para análise de categorias.")
         return
     
-    if var_x_plot not in df_correlacao.columns or var_y_plot not in df_correlacao.columns:
+    if tabela_contingencia.index.name != var_x_plot or tabela_contingencia.columns.name != var_y_plot:
         st.warning("Variáveis não encontradas nos dados.")
         return
     
     try:
         st.write("#### Análise das combinações de categorias:")
         
-        # Criar tabela de contingência
-        tabela_contingencia = pd.crosstab(
-            df_correlacao[var_x_plot], 
-            df_correlacao[var_y_plot],
-            margins=True
-        )
+        # Tabela de contingência (só categorias observadas)
+        tabela = remover_categorias_vazias(tabela_contingencia)
         
         st.write("**Tabela de contingência:**")
-        st.dataframe(tabela_contingencia, use_container_width=True)
+        st.dataframe(_adicionar_margens(tabela), use_container_width=True)
         
         # Mostrar percentuais
-        tabela_percentuais = pd.crosstab(
-            df_correlacao[var_x_plot], 
-            df_correlacao[var_y_plot], 
-            normalize='index'
-        ) * 100
+        tabela_percentuais = tabela.div(tabela.sum(axis=1), axis=0) * 100
         
         st.write("**Percentuais por linha:**")
         st.dataframe(tabela_percentuais.round(1), use_container_width=True)
@@ -1251,7 +1305,7 @@ def _mostrar_interpretacao_correlacao(metricas: Dict, variaveis_sociais: Dict, v
         st.error(f"Erro ao gerar interpretação: {str(e)}")
 
 
-def _mostrar_downloads_correlacao(df_correlacao: pd.DataFrame, metricas: Dict, var_x: str, var_y: str, variaveis_sociais: Dict) -> None:
+def _mostrar_downloads_correlacao(tabela_contingencia: pd.DataFrame, metricas: Dict, var_x: str, var_y: str, variaveis_sociais: Dict) -> None:
     """
     Mostra seção de downloads para análise de correlação.
     """
@@ -1261,8 +1315,8 @@ def _mostrar_downloads_correlacao(df_correlacao: pd.DataFrame, metricas: Dict, v
         with col1:
             st.markdown("**📊 Dados da Análise:**")
             
-            # Preparar dados para download
-            dados_download = df_correlacao.copy()
+            # Preparar dados para download (uma linha por combinação de categorias)
+            dados_download = tabela_contingencia.stack(future_stack=True).rename('Contagem').reset_index()
             
             # Download dos dados
             csv = dados_download.to_csv(index=False)
@@ -1289,7 +1343,7 @@ def _mostrar_downloads_correlacao(df_correlacao: pd.DataFrame, metricas: Dict, v
         # Metadados
         st.markdown("**ℹ️ Metadados:**")
         st.info(f"""
-        - **Observações:** {len(df_correlacao):,}
+        - **Observações:** {int(tabela_contingencia.to_numpy().sum()):,}
         - **Variáveis:** {var_x} × {var_y}
         - **Análise:** {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M')}
         - **Método:** Coeficiente de Cramér's V
@@ -1299,7 +1353,7 @@ def _mostrar_downloads_correlacao(df_correlacao: pd.DataFrame, metricas: Dict, v
         st.error(f"Erro ao gerar downloads: {str(e)}")
 
 
-def _mostrar_correlacao_basica(df_correlacao: pd.DataFrame, var_x_plot: str, var_y_plot: str, variaveis_sociais: Dict, var_x: str, var_y: str) -> None:
+def _mostrar_correlacao_basica(tabela_contingencia: pd.DataFrame, var_x_plot: str, var_y_plot: str, variaveis_sociais: Dict, var_x: str, var_y: str) -> None:
     """
     Mostra versão básica da análise de correlação como fallback.
     """
@@ -1310,25 +1364,33 @@ def _mostrar_correlacao_basica(df_correlacao: pd.DataFrame, var_x_plot: str, var
         st.write(f"**Análise básica: {nome_x} × {nome_y}**")
         
         # Tabela de contingência simples
-        tabela_contingencia = pd.crosstab(
-            df_correlacao[var_x_plot], 
-            df_correlacao[var_y_plot], 
-            margins=True
-        )
+        tabela = remover_categorias_vazias(tabela_contingencia)
         
         st.write("**Tabela de contingência:**")
-        st.dataframe(tabela_contingencia)
+        st.dataframe(_adicionar_margens(tabela))
         
         # Estatísticas básicas
         st.write("**Estatísticas básicas:**")
-        st.write(f"- Total de observações: {len(df_correlacao):,}")
-        st.write(f"- Categorias em {nome_x}: {df_correlacao[var_x_plot].nunique()}")
-        st.write(f"- Categorias em {nome_y}: {df_correlacao[var_y_plot].nunique()}")
+        st.write(f"- Total de observações: {int(tabela.to_numpy().sum()):,}")
+        st.write(f"- Categorias em {nome_x}: {tabela.shape[0]}")
+        st.write(f"- Categorias em {nome_y}: {tabela.shape[1]}")
         
     except Exception as e:
         st.error(f"Erro na análise básica: {str(e)}")
 
 
+def _adicionar_margens(tabela: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adiciona a linha e a coluna de totais ('All', como em pd.crosstab com margins=True).
+    """
+    com_margens = tabela.copy()
+    com_margens.index = com_margens.index.astype(object)
+    com_margens.columns = com_margens.columns.astype(object)
+    com_margens['All'] = com_margens.sum(axis=1)
+    com_margens.loc['All'] = com_margens.sum(axis=0)
+    return com_margens
+
+
 def _gerar_insight_correlacao(coeficiente: float, nome_x: str, nome_y: str) -> str:
     """
     Gera insight contextualizado sobre a correlação.
@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 import warnings
 from typing import Dict, List, Any, Tuple
+from data.estatisticas_notas import calcular_estatisticas_notas
 from utils.estatisticas.analise_desempenho import analisar_desempenho_por_estado, calcular_estatisticas_comparativas
 from utils.helpers.mappings import get_mappings
 from utils.helpers.regiao_utils import obter_regiao_do_estado
@@ -742,11 +743,10 @@ def calcular_estatisticas_competencia(
         }
     
     try:
-        # Filtrar valores válidos
-        valores_validos = dados[coluna].dropna()
-        valores_validos = valores_validos[valores_validos > 0] if len(valores_validos) > 0 else valores_validos
+        # Estatísticas e quartis das notas válidas (> 0) em uma única passada
+        estatisticas = calcular_estatisticas_notas(dados, [coluna], quantis=[0.25, 0.5, 0.75]).loc[coluna]
         
-        if len(valores_validos) == 0:
+        if estatisticas['n'] == 0:
             return {
                 'média': 0,
                 'mediana': 0,
@@ -758,19 +758,18 @@ def calcular_estatisticas_competencia(
                 'q75': 0
             }
         
-        # Calcular estatísticas
-        media = valores_validos.mean()
-        desvio = valores_validos.std()
+        media = float(estatisticas['media'])
+        desvio = float(estatisticas['desvio_padrao'])
         
         return {
             'média': media,
-            'mediana': valores_validos.median(),
+            'mediana': float(estatisticas['q0.5']),
             'desvio_padrão': desvio,
             'coef_variação': (desvio / media * 100) if media > 0 else 0,
-            'mínimo': valores_validos.min(),
-            'máximo': valores_validos.max(),
-            'q25': valores_validos.quantile(0.25),
-            'q75': valores_validos.quantile(0.75)
+            'mínimo': float(estatisticas['minimo']),
+            'máximo': float(estatisticas['maximo']),
+            'q25': float(estatisticas['q0.25']),
+            'q75': float(estatisticas['q0.75'])
         }
     except Exception as e:
         print(f"Erro ao calcular estatísticas: {e}")
@@ -13,11 +13,13 @@ from .explicacao_aspectos_sociais import (
     get_tooltip_correlacao_aspectos,
     get_tooltip_distribuicao_aspectos,
     get_tooltip_aspectos_por_estado,
+    get_tooltip_matriz_associacao,
     get_explicacao_heatmap,
     get_explicacao_barras_empilhadas,
     get_explicacao_sankey,
     get_explicacao_distribuicao,
     get_explicacao_aspectos_por_estado,
+    get_explicacao_matriz_associacao,
     get_interpretacao_associacao,
     get_interpretacao_variabilidade_regional,
     get_analise_concentracao
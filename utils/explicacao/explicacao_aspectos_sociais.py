@@ -84,6 +84,28 @@ def get_tooltip_aspectos_por_estado() -> str:
     """
 
 
+def get_tooltip_matriz_associacao() -> str:
+    """
+    Retorna o texto do tooltip para a matriz de associações entre aspectos sociais.
+    
+    Retorna:
+    --------
+    str: Texto formatado em HTML para exibição em tooltip
+    """
+    return """
+    <b>Sobre esta visualização:</b><br>
+    Veja de uma vez a força da associação entre todos os pares de aspectos sociais e entre cada aspecto e a categoria de desempenho.
+    
+    <b>Como usar:</b><br>
+    - Escolha a medida: V de Cramér, coeficiente de contingência normalizado ou valor-p do qui-quadrado
+    - Passe o mouse sobre as células para ver o valor de cada par
+    - Abra a tabela de associações para ordenar os pares pela medida desejada
+    - Use a "Correlação entre Aspectos Sociais" para detalhar um par específico
+    
+    Os pares com a categoria de desempenho consideram apenas os candidatos incluídos na análise de desempenho.
+    """
+
+
 def get_explicacao_heatmap(var_x_nome: str, var_y_nome: str) -> str:
     """
     Retorna explicação contextualizada para o gráfico de heatmap.
@@ -127,7 +149,7 @@ def get_explicacao_heatmap(var_x_nome: str, var_y_nome: str) -> str:
     """
 
 
-def get_explicacao_barras_empilhadas(var_x_nome: str, var_y_nome: str) -> str:
+def get_explicacao_barras_empilhadas(var_x_nome: str, var_y_nome: str, normalizacao: str = 'linha') -> str:
     """
     Retorna explicação contextualizada para o gráfico de barras empilhadas.
     
@@ -137,6 +159,8 @@ def get_explicacao_barras_empilhadas(var_x_nome: str, var_y_nome: str) -> str:
         Nome da variável no eixo X
     var_y_nome : str
         Nome da variável no eixo Y
+    normalizacao : str, default='linha'
+        Base do percentual exibido: 'linha', 'coluna' ou 'total'
         
     Retorna:
     --------
@@ -147,13 +171,18 @@ def get_explicacao_barras_empilhadas(var_x_nome: str, var_y_nome: str) -> str:
         var_x_nome = "primeira característica" if not var_x_nome else var_x_nome
         var_y_nome = "segunda característica" if not var_y_nome else var_y_nome
     
+    composicao = {
+        'coluna': f"Cada segmento mostra a parcela de uma categoria de {var_y_nome} que está em cada categoria de {var_x_nome} (os segmentos de mesma cor somam 100%)",
+        'total': f"Cada segmento mostra a parcela do total de candidatos com aquela combinação de {var_x_nome} e {var_y_nome} (todos os segmentos somam 100%)",
+    }.get(normalizacao, f"Cada barra mostra a distribuição percentual de {var_y_nome} dentro de uma categoria de {var_x_nome}")
+    
     return f"""
     **Análise da distribuição de {var_y_nome} por {var_x_nome}:**
     
     O gráfico de barras empilhadas evidencia:
     
     - **Composição demográfica:**
-      Cada barra mostra a distribuição percentual de {var_y_nome} dentro de uma categoria de {var_x_nome}
+      {composicao}
     
     - **Comparação entre grupos:**
       Compare visualmente como a distribuição de {var_y_nome} varia entre diferentes categorias de {var_x_nome}
@@ -345,6 +374,37 @@ def get_explicacao_aspectos_por_estado(
     """
 
 
+def get_explicacao_matriz_associacao(metrica_nome: str) -> str:
+    """
+    Retorna explicação contextualizada para a matriz de associações.
+    
+    Parâmetros:
+    -----------
+    metrica_nome : str
+        Nome da medida exibida na matriz
+        
+    Retorna:
+    --------
+    str: Texto explicativo formatado em Markdown
+    """
+    return f"""
+    **Matriz de associações ({metrica_nome}):**
+    
+    Cada célula resume a tabela de contingência de um par de características:
+    
+    - **V de Cramér e coeficiente normalizado:**
+      Variam de 0 (características independentes) a 1 (uma característica determina a outra); valores acima de 0,3 já indicam associação relevante
+    
+    - **Valor-p:**
+      Probabilidade de observar uma associação desta força se as características fossem independentes; valores abaixo de 0,05 indicam associação estatisticamente significativa
+    
+    - **Tamanho da amostra:**
+      Com milhões de candidatos, quase toda associação é significativa; priorize a força da associação (V de Cramér) para comparar os pares
+    
+    Células vazias indicam pares sem candidatos suficientes na seleção atual. A linha da categoria de desempenho usa apenas os candidatos incluídos na análise de desempenho.
+    """
+
+
 def get_interpretacao_associacao(
     coeficiente: float, 
     var_x_nome: str, 
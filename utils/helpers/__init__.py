@@ -3,7 +3,9 @@ from .cache_utils import (
     memory_intensive_function,
     release_memory,
     clear_all_cache,
-    get_memory_usage
+    get_memory_usage,
+    obter_estatisticas_cache,
+    obter_estado_cache_memoria
 )
 
 from .regiao_utils import (
@@ -16,13 +18,10 @@ from .regiao_utils import (
 
 from .sidebar_filter import (
     render_sidebar_filters,
-    load_filter_data
+    load_filter_data,
+    obter_todos_estados
 )
 
 from .mappings import get_mappings
 
-
-from .sidebar_filter import (
-    render_sidebar_filters,
-    load_filter_data
-)
+from .aquecimento_cache import iniciar_aquecimento_cache, aquecer_cache
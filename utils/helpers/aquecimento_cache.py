@@ -0,0 +1,322 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# ------------------------------------------------------------
+# AQUECIMENTO DO CACHE (SELEÇÃO PADRÃO "BRASIL")
+# ------------------------------------------------------------
+#
+# A barra lateral abre com "Brasil (todos os estados)" marcado, então quase
+# toda primeira visita pede os mesmos agregados. Na primeira execução de
+# qualquer página (home.py e cada arquivo de pages/ chamam
+# iniciar_aquecimento_cache antes de ler o estado da sessão), uma thread em
+# segundo plano refaz o carregamento de cada página e chama as mesmas funções
+# com optimized_cache, com os mesmos argumentos das seções (valores padrão
+# dos filtros, todas as competências e todas as variáveis), deixando os
+# resultados no cache compartilhado (memória e disco).
+#
+# A thread não tem ScriptRunContext: ela só usa caches do processo
+# (st.cache_resource e o cache próprio do optimized_cache); chamadas que
+# cairiam no st.cache_data são executadas diretamente.
+#
+# Fora do `streamlit run` (build dos dados, scripts) o aquecimento nunca
+# começa. Ele pode ser desligado com ENEM_AQUECIMENTO_CACHE=0 e é
+# interrompido se a memória do servidor passar do limite de aviso.
+
+VARIAVEL_AMBIENTE_AQUECIMENTO = "ENEM_AQUECIMENTO_CACHE"
+
+_estado: Dict[str, Optional[threading.Thread]] = {'thread': None}
+_lock = threading.Lock()
+
+
+class _MemoriaInsuficiente(Exception):
+    """Memória do servidor acima do limite de aviso durante o aquecimento."""
+
+
+class _Etapa:
+    """
+    Executa as seções de uma página, contando sucessos e erros.
+
+    Parâmetros:
+    -----------
+    pagina : str
+        Nome da página (usado nos logs)
+    """
+
+    def __init__(self, pagina: str):
+        self.pagina = pagina
+        self.secoes = 0
+        self.erros = 0
+
+    def executar(self, secao: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Chama uma função de seção; um erro não interrompe as demais seções.
+
+        Retorna:
+        --------
+        Any: Resultado da função, ou None em caso de erro
+        """
+        # Importar localmente para evitar importação circular
+        from utils.helpers.cache_utils import get_memory_usage
+
+        if get_memory_usage()["warning"]:
+            raise _MemoriaInsuficiente()
+
+        try:
+            resultado = func(*args, **kwargs)
+            self.secoes += 1
+            return resultado
+        except Exception as e:
+            self.erros += 1
+            print(f"Erro ao aquecer o cache ({self.pagina} / {secao}): {e}")
+            return None
+
+
+def iniciar_aquecimento_cache() -> bool:
+    """
+    Inicia o aquecimento do cache em segundo plano, uma única vez por processo.
+
+    Só tem efeito quando chamada de uma página em execução (com
+    ScriptRunContext); em scripts e no build dos dados não faz nada.
+
+    Retorna:
+    --------
+    bool: True se o aquecimento foi iniciado por esta chamada
+    """
+    if os.environ.get(VARIAVEL_AMBIENTE_AQUECIMENTO, "1") == "0":
+        return False
+
+    # Importar localmente para evitar importação circular
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return False
+
+    with _lock:
+        if _estado['thread'] is not None:
+            return False
+
+        thread = threading.Thread(target=aquecer_cache, name="aquecimento-cache", daemon=True)
+        _estado['thread'] = thread
+        thread.start()
+        return True
+
+
+def aquecer_cache() -> Dict[str, float]:
+    """
+    Pré-calcula as seções das páginas Geral, Desempenho e Aspectos Sociais
+    para a seleção padrão (todos os estados).
+
+    Retorna:
+    --------
+    Dict[str, float]: Tempo em segundos gasto em cada página
+    """
+    # Importar localmente para evitar importação circular
+    from utils.helpers.mappings import get_mappings
+    from utils.helpers.sidebar_filter import obter_todos_estados
+
+    paginas = [
+        ("geral", _aquecer_geral),
+        ("desempenho", _aquecer_desempenho),
+        ("aspectos sociais", _aquecer_aspectos_sociais),
+    ]
+    tempos: Dict[str, float] = {}
+    inicio = time.perf_counter()
+
+    try:
+        estados = obter_todos_estados()
+        mappings = get_mappings()
+    except Exception as e:
+        print(f"Erro ao iniciar o aquecimento do cache: {e}")
+        return tempos
+
+    print(f"[aquecimento] Iniciando para {len(estados)} estados")
+
+    for indice, (pagina, aquecer_pagina) in enumerate(paginas, start=1):
+        etapa = _Etapa(pagina)
+        inicio_pagina = time.perf_counter()
+
+        try:
+            aquecer_pagina(etapa, estados, mappings)
+        except _MemoriaInsuficiente:
+            print(f"[aquecimento] Interrompido em {pagina}: memória acima do limite de aviso")
+            break
+        except Exception as e:
+            print(f"Erro ao aquecer o cache ({pagina}): {e}")
+        finally:
+            tempos[pagina] = time.perf_counter() - inicio_pagina
+
+        print(f"[aquecimento] ({indice}/{len(paginas)}) {pagina}: {etapa.secoes} seções "
+              f"em {tempos[pagina]:.1f}s ({etapa.erros} erros)")
+
+    print(f"[aquecimento] Concluído em {time.perf_counter() - inicio:.1f}s")
+    return tempos
+
+
+def _aquecer_geral(etapa: _Etapa, estados: List[str], mappings: Dict[str, Any]) -> None:
+    """Seções da página Geral (ver pages/analise_geral.py)."""
+    from data.data_loader import load_columns_for_tab, filter_data_by_states
+    from data.cubo_agregado import obter_cubo
+    from data.histograma_notas import obter_histogramas, contagens_histograma
+    from utils.prepara_dados import (
+        preparar_dados_histograma,
+        preparar_dados_histograma_agregado,
+        preparar_dados_grafico_faltas,
+        preparar_dados_media_geral_estados,
+        preparar_dados_comparativo_areas,
+        preparar_dados_evasao
+    )
+    from utils.estatisticas import analisar_metricas_principais, analisar_distribuicao_notas, analisar_faltas
+    from utils.estatisticas.analise_geral import analisar_desempenho_por_faixa_nota, analisar_metricas_por_regiao
+
+    colunas_notas = mappings['colunas_notas']
+    competencia_mapping = mappings['competencia_mapping']
+
+    microdados_completos = load_columns_for_tab("geral", ['SG_UF_PROVA', 'TP_PRESENCA_GERAL'] + list(colunas_notas))
+    microdados_estados = filter_data_by_states(microdados_completos, estados)
+    cubo = obter_cubo("geral")
+    histogramas = obter_histogramas("geral")
+
+    etapa.executar("métricas principais", analisar_metricas_principais,
+                   microdados_estados, estados, colunas_notas, cubo=cubo)
+
+    # Distribuição de notas, para cada competência
+    for area in colunas_notas:
+        resultado = etapa.executar(f"histograma {area}", preparar_dados_histograma,
+                                   microdados_estados, area, competencia_mapping)
+        if resultado is None or resultado[0].empty:
+            continue
+
+        df_valido, coluna_hist, _ = resultado
+        contagens = contagens_histograma(histogramas, coluna_hist, None)
+        etapa.executar(f"distribuição {area}", analisar_distribuicao_notas,
+                       microdados_completos, coluna_hist, contagens if contagens.sum() > 0 else None)
+        etapa.executar(f"barras {area}", preparar_dados_histograma_agregado,
+                       contagens_histograma(histogramas, coluna_hist, estados))
+        etapa.executar(f"faixas {area}", analisar_desempenho_por_faixa_nota,
+                       df_valido[df_valido[coluna_hist] > 0].copy(), coluna_hist)
+
+    # Análise por região/estado
+    for agrupar_por_regiao in (False, True):
+        etapa.executar("médias por estado", preparar_dados_media_geral_estados,
+                       microdados_estados, estados, colunas_notas, agrupar_por_regiao, cubo=cubo)
+    etapa.executar("métricas por região", analisar_metricas_por_regiao, microdados_estados, colunas_notas)
+
+    # Comparativo entre áreas
+    etapa.executar("comparativo entre áreas", preparar_dados_comparativo_areas,
+                   microdados_estados, estados, colunas_notas, competencia_mapping,
+                   cubo=cubo, histogramas=histogramas)
+
+    # Faltas e evasão
+    df_faltas = etapa.executar("faltas", preparar_dados_grafico_faltas,
+                               microdados_estados, estados, mappings['colunas_presenca'])
+    if df_faltas is not None and not df_faltas.empty:
+        etapa.executar("análise de faltas", analisar_faltas, df_faltas)
+    etapa.executar("evasão", preparar_dados_evasao, microdados_estados, estados)
+
+
+def _aquecer_desempenho(etapa: _Etapa, estados: List[str], mappings: Dict[str, Any]) -> None:
+    """Seções da página Desempenho (ver pages/desempenho.py)."""
+    from data.data_loader import load_data_for_states
+    from data.cubo_agregado import obter_cubo
+    from utils.prepara_dados import (
+        preparar_dados_comparativo,
+        preparar_dados_grafico_linha,
+        preparar_dados_desempenho_geral,
+        filtrar_dados_scatter,
+        preparar_dados_grafico_linha_desempenho
+    )
+    from utils.estatisticas import calcular_correlacao_competencias, analisar_desempenho_por_estado
+    from utils.estatisticas.analise_desempenho import calcular_estatisticas_comparativas
+
+    colunas_notas = mappings['colunas_notas']
+    competencia_mapping = mappings['competencia_mapping']
+    variaveis_categoricas = mappings['variaveis_categoricas']
+
+    microdados_estados = load_data_for_states("desempenho", estados)
+
+    # Análise comparativa, para cada variável demográfica (filtros no padrão)
+    microdados_full = etapa.executar("dados de desempenho", preparar_dados_desempenho_geral,
+                                     microdados_estados, colunas_notas, mappings['desempenho_mapping'])
+    if microdados_full is not None:
+        cubo = obter_cubo("desempenho")
+        for variavel in variaveis_categoricas:
+            if variavel not in microdados_full.columns:
+                continue
+
+            df_resultados = etapa.executar(f"comparativo {variavel}", preparar_dados_comparativo,
+                                           microdados_full, variavel, variaveis_categoricas, colunas_notas,
+                                           competencia_mapping, cubo=cubo, estados=estados)
+            if df_resultados is None or df_resultados.empty:
+                continue
+
+            etapa.executar(f"linhas {variavel}", preparar_dados_grafico_linha, df_resultados, None, None, False)
+            etapa.executar(f"estatísticas {variavel}", calcular_estatisticas_comparativas, df_resultados, variavel)
+
+    # Relação entre competências: cada competência no eixo X, com o eixo Y padrão
+    for eixo_x in colunas_notas:
+        eixo_y = next(coluna for coluna in colunas_notas if coluna != eixo_x)
+        resultado = etapa.executar(f"dispersão {eixo_x}", filtrar_dados_scatter,
+                                   microdados_estados, None, None, eixo_x, eixo_y, True,
+                                   filtro_raca=None, filtro_faixa_salarial=list(range(8)))
+        if resultado is not None:
+            etapa.executar(f"correlação {eixo_x}", calcular_correlacao_competencias, resultado[0], eixo_x, eixo_y)
+
+    # Médias por estado/região
+    for agrupar_por_regiao in (False, True):
+        df_grafico = etapa.executar("médias por estado", preparar_dados_grafico_linha_desempenho,
+                                    microdados_estados, estados, colunas_notas, competencia_mapping,
+                                    agrupar_por_regiao)
+        if df_grafico is None or df_grafico.empty:
+            continue
+
+        for area in ["Média Geral"] + sorted(df_grafico['Área'].unique().tolist()):
+            etapa.executar(f"desempenho por estado {area}", analisar_desempenho_por_estado, df_grafico, area)
+
+
+def _aquecer_aspectos_sociais(etapa: _Etapa, estados: List[str], mappings: Dict[str, Any]) -> None:
+    """Seções da página Aspectos Sociais (ver pages/aspectos_Sociais.py)."""
+    from data.data_loader import load_data_for_states
+    from data.contingencia_social import obter_contingencias
+    from utils.prepara_dados import (
+        preparar_tabela_contingencia,
+        preparar_contagem_distribuicao,
+        ordenar_categorias,
+        preparar_dados_grafico_aspectos_por_estado
+    )
+    from utils.estatisticas import (
+        calcular_estatisticas_distribuicao,
+        analisar_correlacao_categorias,
+        analisar_associacoes_sociais
+    )
+
+    variaveis_sociais = mappings['variaveis_sociais']
+
+    microdados_estados = load_data_for_states("aspectos_sociais", estados)
+    disponiveis = [variavel for variavel in variaveis_sociais if variavel in microdados_estados.columns]
+
+    # Todos os pares da correlação saem do mesmo cubo de contingências
+    etapa.executar("cubo de contingências", obter_contingencias)
+    etapa.executar("matriz de associações", analisar_associacoes_sociais, estados, variaveis_sociais)
+
+    for aspecto in disponiveis:
+        # Correlação: cada variável no eixo X, com a variável Y padrão (a primeira diferente)
+        var_y = next((variavel for variavel in variaveis_sociais if variavel != aspecto), None)
+        if var_y in disponiveis:
+            resultado = etapa.executar(f"correlação {aspecto}", preparar_tabela_contingencia,
+                                       estados, aspecto, var_y, variaveis_sociais)
+            if resultado is not None and not resultado[0].empty:
+                etapa.executar(f"métricas de correlação {aspecto}", analisar_correlacao_categorias, *resultado)
+
+        # Distribuição
+        contagem = etapa.executar(f"distribuição {aspecto}", preparar_contagem_distribuicao,
+                                  estados, aspecto, variaveis_sociais)
+        if contagem is not None and not contagem.empty:
+            contagem = ordenar_categorias(contagem, aspecto, variaveis_sociais)
+            etapa.executar(f"estatísticas {aspecto}", calcular_estatisticas_distribuicao, contagem)
+
+        # Distribuição por estado/região
+        for agrupar_por_regiao in (False, True):
+            etapa.executar(f"por estado {aspecto}", preparar_dados_grafico_aspectos_por_estado,
+                           microdados_estados, aspecto, estados, variaveis_sociais, agrupar_por_regiao)
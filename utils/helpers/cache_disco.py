@@ -0,0 +1,197 @@
+import os
+import threading
+import uuid
+from typing import Any
+
+import joblib
+import pandas as pd
+
+# ------------------------------------------------------------
+# CACHE PERSISTENTE EM DISCO (LRU COM LIMITE DE BYTES)
+# ------------------------------------------------------------
+#
+# Guarda os resultados das funções com optimized_cache que foram resolvidas
+# por impressão digital (ver data.impressao_digital). A chave já contém o
+# hash dos arquivos de dados, então um parquet alterado gera chaves novas e
+# os resultados antigos deixam de ser usados até saírem pelo LRU; o mesmo vale
+# para mudanças de código (ver _versao_codigo em cache_utils). A data de
+# modificação de cada arquivo marca o último acesso.
+
+DIRETORIO_CACHE_DISCO = ".cache/resultados"
+LIMITE_BYTES_CACHE_DISCO = 512 * 1024 ** 2   # orçamento total em disco (512 MiB)
+LIMITE_BYTES_ITEM_DISCO = 64 * 1024 ** 2     # resultados maiores não são persistidos
+EXTENSAO_CACHE_DISCO = ".joblib"
+
+_estado = {'bytes_em_uso': None}
+_lock = threading.Lock()
+
+
+class _Ausente:
+    """Marcador de resultado não encontrado no disco."""
+
+
+AUSENTE = _Ausente()
+
+
+def chave_disco(chave: tuple) -> str:
+    """
+    Converte uma chave de impressão digital no nome do arquivo do resultado.
+
+    Parâmetros:
+    -----------
+    chave : tuple
+        Chave de impressão digital (função, versão do código, impressões e parâmetros)
+
+    Retorna:
+    --------
+    str: Hash estável entre processos
+    """
+    return joblib.hash(chave)
+
+
+def carregar_resultado(chave: tuple) -> Any:
+    """
+    Lê um resultado persistido e marca o acesso para o LRU.
+
+    Parâmetros:
+    -----------
+    chave : tuple
+        Chave de impressão digital
+
+    Retorna:
+    --------
+    Any: Resultado salvo, ou AUSENTE se não houver (ou se o arquivo estiver corrompido)
+    """
+    caminho = _caminho(chave_disco(chave))
+    if not os.path.exists(caminho):
+        return AUSENTE
+
+    try:
+        resultado = joblib.load(caminho)
+        os.utime(caminho)
+        return resultado
+    except Exception as e:
+        print(f"Erro ao ler resultado do cache em disco ({caminho}): {e}")
+        _remover(caminho)
+        return AUSENTE
+
+
+def salvar_resultado(chave: tuple, resultado: Any) -> None:
+    """
+    Persiste um resultado e aplica o orçamento de bytes (LRU).
+
+    Resultados estimados acima de LIMITE_BYTES_ITEM_DISCO (por exemplo,
+    recortes dos microdados) não são gravados.
+
+    Parâmetros:
+    -----------
+    chave : tuple
+        Chave de impressão digital
+    resultado : Any
+        Valor retornado pela função
+    """
+    if _tamanho_estimado(resultado) > LIMITE_BYTES_ITEM_DISCO:
+        return
+
+    caminho = _caminho(chave_disco(chave))
+    temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+
+    try:
+        os.makedirs(DIRETORIO_CACHE_DISCO, exist_ok=True)
+        joblib.dump(resultado, temporario)
+        tamanho = os.path.getsize(temporario)
+
+        if tamanho > LIMITE_BYTES_ITEM_DISCO:
+            _remover(temporario)
+            return
+
+        # Troca atômica: leitores nunca veem um arquivo pela metade
+        anterior = os.path.getsize(caminho) if os.path.exists(caminho) else 0
+        os.replace(temporario, caminho)
+
+        with _lock:
+            if _estado['bytes_em_uso'] is not None:
+                _estado['bytes_em_uso'] += tamanho - anterior
+
+        reduzir_cache_disco()
+    except Exception as e:
+        print(f"Erro ao gravar resultado no cache em disco: {e}")
+        _remover(temporario)
+
+
+def reduzir_cache_disco(limite_bytes: int = LIMITE_BYTES_CACHE_DISCO) -> int:
+    """
+    Remove os resultados menos usados até o total caber no orçamento.
+
+    Parâmetros:
+    -----------
+    limite_bytes : int, default=LIMITE_BYTES_CACHE_DISCO
+        Orçamento total em bytes
+
+    Retorna:
+    --------
+    int: Bytes em uso após a redução
+    """
+    with _lock:
+        if _estado['bytes_em_uso'] is not None and _estado['bytes_em_uso'] <= limite_bytes:
+            return _estado['bytes_em_uso']
+
+        itens = _listar_itens()
+        em_uso = sum(tamanho for _, tamanho, _ in itens)
+
+        # Mais antigos (último acesso) primeiro
+        for caminho, tamanho, _ in sorted(itens, key=lambda item: item[2]):
+            if em_uso <= limite_bytes:
+                break
+            if _remover(caminho):
+                em_uso -= tamanho
+
+        _estado['bytes_em_uso'] = em_uso
+        return em_uso
+
+
+def limpar_cache_disco() -> None:
+    """Remove todos os resultados persistidos."""
+    with _lock:
+        for caminho, _, _ in _listar_itens():
+            _remover(caminho)
+        _estado['bytes_em_uso'] = 0
+
+
+def _listar_itens() -> list:
+    """Lista (caminho, bytes, último acesso) dos resultados persistidos."""
+    if not os.path.isdir(DIRETORIO_CACHE_DISCO):
+        return []
+
+    itens = []
+    for entrada in os.scandir(DIRETORIO_CACHE_DISCO):
+        if entrada.is_file() and entrada.name.endswith(EXTENSAO_CACHE_DISCO):
+            info = entrada.stat()
+            itens.append((entrada.path, info.st_size, info.st_mtime))
+    return itens
+
+
+def _caminho(nome: str) -> str:
+    """Caminho do arquivo de um resultado."""
+    return os.path.join(DIRETORIO_CACHE_DISCO, f"{nome}{EXTENSAO_CACHE_DISCO}")
+
+
+def _remover(caminho: str) -> bool:
+    """Remove um arquivo, ignorando se ele já não existir."""
+    try:
+        os.remove(caminho)
+        return True
+    except OSError:
+        return False
+
+
+def _tamanho_estimado(resultado: Any) -> int:
+    """Estimativa barata do tamanho em memória de DataFrames (inclusive dentro de tuplas/listas)."""
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        return int(resultado.memory_usage(index=True).sum()) if isinstance(resultado, pd.DataFrame) \
+            else int(resultado.memory_usage(index=True))
+    if isinstance(resultado, (tuple, list)):
+        return sum(_tamanho_estimado(item) for item in resultado)
+    if isinstance(resultado, dict):
+        return sum(_tamanho_estimado(item) for item in resultado.values())
+    return 0
@@ -0,0 +1,167 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# ------------------------------------------------------------
+# CACHE EM MEMÓRIA COM ORÇAMENTO DE BYTES (LRU)
+# ------------------------------------------------------------
+#
+# Guarda, para todo o processo, os resultados das funções com optimized_cache
+# resolvidas por impressão digital. Cada entrada é mantida serializada (como
+# no st.cache_data): toda leitura devolve uma cópia, então uma sessão nunca
+# altera o resultado de outra, e o tamanho de cada entrada é conhecido.
+#
+# Nada é descartado por navegação: entradas só saem quando expiram (ttl) ou,
+# da menos usada para a mais usada, quando o total guardado passa de
+# LIMITE_BYTES_CACHE_MEMORIA ou quando a memória do processo passa do limite
+# de aviso (ver cache_utils.MEMORIA_LIMITE_AVISO). Neste último caso, saem
+# apenas entradas que somem o excedente informado, preservando sempre as
+# MINIMO_ENTRADAS_CACHE_MEMORIA mais recentes.
+
+LIMITE_BYTES_CACHE_MEMORIA = 1024 ** 3   # teto absoluto do cache (1 GiB)
+MINIMO_ENTRADAS_CACHE_MEMORIA = 8        # entradas mantidas mesmo com a memória acima do limite
+INTERVALO_VERIFICACAO_MEMORIA = 1.0      # segundos entre consultas ao uso de memória do processo
+
+
+class _Ausente:
+    """Marcador de entrada não encontrada."""
+
+
+AUSENTE = _Ausente()
+
+
+class GerenciadorCacheMemoria:
+    """
+    Cache LRU de resultados serializados, com orçamento de memória.
+
+    Parâmetros:
+    -----------
+    memoria_excedente : Callable[[], int]
+        Função que retorna quantos bytes o processo usa acima do limite de aviso (0 se abaixo)
+    limite_bytes : int, default=LIMITE_BYTES_CACHE_MEMORIA
+        Total máximo de bytes guardados, independente do uso do processo
+    minimo_entradas : int, default=MINIMO_ENTRADAS_CACHE_MEMORIA
+        Entradas mais recentes que nunca são descartadas por pressão de memória
+    """
+
+    def __init__(
+        self,
+        memoria_excedente: Callable[[], int],
+        limite_bytes: int = LIMITE_BYTES_CACHE_MEMORIA,
+        minimo_entradas: int = MINIMO_ENTRADAS_CACHE_MEMORIA
+    ):
+        self.memoria_excedente = memoria_excedente
+        self.limite_bytes = limite_bytes
+        self.minimo_entradas = minimo_entradas
+
+        # chave -> (bytes serializados, expira_em); a ordem é a do último acesso
+        self._entradas: "OrderedDict[tuple, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._descartes = 0
+        self._ultima_verificacao = 0.0
+        self._lock = threading.Lock()
+
+    def obter(self, chave: tuple) -> Any:
+        """
+        Retorna uma cópia do resultado guardado e marca o acesso.
+
+        Parâmetros:
+        -----------
+        chave : tuple
+            Chave de impressão digital
+
+        Retorna:
+        --------
+        Any: Resultado, ou AUSENTE se não houver entrada válida
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return AUSENTE
+
+            dados, expira_em = entrada
+            if expira_em is not None and time.monotonic() > expira_em:
+                self._remover(chave, descarte=False)
+                return AUSENTE
+
+            self._entradas.move_to_end(chave)
+
+        return pickle.loads(dados)
+
+    def guardar(self, chave: tuple, resultado: Any, ttl: Optional[float] = None) -> None:
+        """
+        Guarda um resultado e aplica o orçamento de memória.
+
+        Parâmetros:
+        -----------
+        chave : tuple
+            Chave de impressão digital
+        resultado : Any
+            Valor a guardar (precisa ser serializável com pickle)
+        ttl : float, opcional
+            Tempo de vida em segundos; None para não expirar
+        """
+        try:
+            dados = pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"Erro ao serializar resultado para o cache em memória: {e}")
+            return
+
+        # Entradas maiores que o orçamento inteiro não são guardadas
+        if len(dados) > self.limite_bytes:
+            return
+
+        expira_em = time.monotonic() + ttl if ttl else None
+
+        with self._lock:
+            if chave in self._entradas:
+                self._remover(chave, descarte=False)
+            self._entradas[chave] = (dados, expira_em)
+            self._bytes += len(dados)
+            self._reduzir()
+
+    def _reduzir(self) -> None:
+        """Descarta as entradas menos usadas enquanto o orçamento estiver estourado (com o lock)."""
+        while self._entradas and self._bytes > self.limite_bytes:
+            self._remover(next(iter(self._entradas)))
+
+        # A consulta ao processo é limitada a uma por INTERVALO_VERIFICACAO_MEMORIA
+        agora = time.monotonic()
+        if agora - self._ultima_verificacao < INTERVALO_VERIFICACAO_MEMORIA:
+            return
+        self._ultima_verificacao = agora
+
+        excedente = self.memoria_excedente()
+        if excedente <= 0:
+            return
+
+        # Liberar no máximo o excedente, que é o que cabe ao cache devolver
+        alvo_bytes = max(self._bytes - excedente, 0)
+        while len(self._entradas) > self.minimo_entradas and self._bytes > alvo_bytes:
+            self._remover(next(iter(self._entradas)))
+
+    def _remover(self, chave: tuple, descarte: bool = True) -> None:
+        """Remove uma entrada e atualiza o total de bytes (com o lock)."""
+        dados, _ = self._entradas.pop(chave)
+        self._bytes -= len(dados)
+        if descarte:
+            self._descartes += 1
+
+    def limpar(self) -> None:
+        """Remove todas as entradas."""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> Dict[str, int]:
+        """
+        Retorna o estado atual do cache.
+
+        Retorna:
+        --------
+        Dict[str, int]: Número de entradas, bytes guardados e entradas descartadas pelo orçamento
+        """
+        with self._lock:
+            return {'entradas': len(self._entradas), 'bytes': self._bytes, 'descartes': self._descartes}
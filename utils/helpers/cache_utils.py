@@ -1,8 +1,20 @@
 import gc
+import hashlib
+import inspect
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
 import streamlit as st
-from functools import wraps
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from functools import lru_cache, wraps
 from typing import Any, Optional, List, Union, Callable, TypeVar, Dict
 
+from data.impressao_digital import obter_impressao_digital, registrar_impressao_digital
+from utils.helpers.cache_disco import AUSENTE, carregar_resultado, salvar_resultado
+from utils.helpers import cache_memoria
+
 # Definir type variables para uso em type hints genéricos
 T = TypeVar('T')  # Tipo de retorno da função
 InputType = TypeVar('InputType')  # Tipo de entrada para função
@@ -11,6 +23,49 @@ InputType = TypeVar('InputType')  # Tipo de entrada para função
 DEFAULT_TTL = 3600  # Tempo padrão de vida do cache em segundos (1 hora)
 MEMORIA_LIMITE_AVISO = 0.8  # 80% de uso de memória para aviso
 
+# Política de hash de DataFrames do st.cache_data (amostra de linhas acima do limiar),
+# usada apenas para estimar o tempo de hash evitado pelas chaves de impressão digital
+LIMIAR_AMOSTRA_HASH = 50_000
+TAMANHO_AMOSTRA_HASH = 10_000
+
+# Versão explícita dos resultados em disco: incrementar quando algo que não
+# está no código-fonte versionado abaixo mudar os resultados (por exemplo, o
+# formato dos arquivos gerados por data/build_dados.py)
+VERSAO_CACHE_DISCO = 1
+
+# Módulos (ou pacotes inteiros) cujo código-fonte entra na versão dos
+# resultados em disco de toda função decorada, além do módulo que a define
+MODULOS_VERSAO_CACHE = (
+    'data.data_loader',
+    'data.esquema_categorias',
+    'data.estatisticas_notas',
+    'data.histograma_notas',
+    'data.cubo_agregado',
+    'data.contingencia_social',
+    'utils.estatisticas',
+    'utils.prepara_dados',
+    'utils.helpers.mappings',
+    'utils.helpers.regiao_utils',
+)
+DIRETORIO_RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Arrays numéricos até este tamanho (por exemplo, contagens de histograma)
+# entram na chave de impressão pelo hash do conteúdo
+LIMITE_ELEMENTOS_ARRAY_CHAVE = 100_000
+
+# Instrumentação do cache por impressão digital (por função decorada)
+_estatisticas_cache: Dict[str, Dict[str, float]] = {}
+_custo_hash_por_impressao: Dict[tuple, float] = {}
+_lock_estatisticas = threading.Lock()
+
+
+# Cache em memória compartilhado pelo processo (descarte por LRU sob pressão de memória)
+_cache_memoria = cache_memoria.GerenciadorCacheMemoria(lambda: get_process_memory_excess())
+
+
+class _ArgumentoSemImpressao(Exception):
+    """Argumento que não pode compor uma chave barata (cai no hash do st.cache_data)."""
+
 
 def release_memory(obj: Optional[Union[Any, List[Any]]] = None) -> None:
     """
@@ -32,8 +87,8 @@ def release_memory(obj: Optional[Union[Any, List[Any]]] = None) -> None:
     gc.collect()
 
 def clear_memory():
-# Limpar cache do Streamlit
-    st.cache_data.clear()
+    # Os caches do processo são compartilhados entre sessões e não são limpos
+    # aqui: o gerenciador de cache descarta entradas quando falta memória
 
     # Limpar session state
     for key in list(st.session_state.keys()):
@@ -43,16 +98,38 @@ def clear_memory():
     gc.collect()
 
 
-def optimized_cache(ttl: int = DEFAULT_TTL, max_entries: Optional[int] = None) -> Callable[[Callable[..., T]], Callable[..., T]]:
+def optimized_cache(
+    ttl: int = DEFAULT_TTL,
+    max_entries: Optional[int] = None,
+    persistir: bool = True
+) -> Callable[[Callable[..., T]], Callable[..., T]]:
     """
     Wrapper para cache do Streamlit com funcionalidades adicionais.
     
+    Quando todos os DataFrames da chamada têm impressão digital (ver
+    data.impressao_digital) e os demais argumentos são valores simples, a
+    chave do cache é montada só com as impressões e os parâmetros: o
+    st.cache_data não chega a percorrer os microdados. Nos demais casos,
+    vale o hash normal do st.cache_data. DataFrames devolvidos por chamadas
+    com chave de impressão (inclusive dentro de tuplas) também recebem uma,
+    para encadear análises.
+    
+    Os resultados com chave de impressão ficam no cache em memória do
+    processo (ver utils.helpers.cache_memoria), que só descarta entradas,
+    das menos usadas para as mais usadas, quando a memória fica escassa.
+    
+    Resultados com chave de impressão também são persistidos em disco (ver
+    utils.helpers.cache_disco), de modo que sobrevivem a reinícios; a chave
+    inclui a versão do código da função e o hash dos arquivos de dados.
+    
     Parâmetros:
     -----------
     ttl : int, default=3600
         Tempo de vida do cache em segundos
     max_entries : int, opcional
         Número máximo de entradas no cache
+    persistir : bool, default=True
+        Se True, usa também o cache persistente em disco
         
     Retorna:
     --------
@@ -66,10 +143,54 @@ def optimized_cache(ttl: int = DEFAULT_TTL, max_entries: Optional[int] = None) -
             
         cached_func = st.cache_data(**cache_options)(func)
         
+        nome_funcao = f"{func.__module__}.{func.__qualname__}"
+        assinatura = inspect.signature(func)
+        
+        versao_codigo = _versao_codigo(func)
+        
+        def executar_por_impressao(chave: tuple, args: tuple, kwargs: dict) -> T:
+            if not persistir:
+                return func(*args, **kwargs)
+            
+            chave_persistente = (versao_codigo, chave)
+            resultado = carregar_resultado(chave_persistente)
+            if resultado is not AUSENTE:
+                _registrar_chamada(nome_funcao, acerto_disco=True)
+                return resultado
+            
+            resultado = func(*args, **kwargs)
+            salvar_resultado(chave_persistente, resultado)
+            return resultado
+        
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> T:
-            # Executa a função cacheada
-            result = cached_func(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                chave, dataframes = _montar_chave_impressao(nome_funcao, assinatura, args, kwargs)
+            except _ArgumentoSemImpressao:
+                _registrar_chamada(nome_funcao, por_impressao=False)
+                if get_script_run_ctx(suppress_warning=True) is None:
+                    # Fora de uma execução de script (ex.: aquecimento do cache) não há st.cache_data
+                    return func(*args, **kwargs)
+                # Executa a função cacheada (hash dos argumentos pelo st.cache_data)
+                return cached_func(*args, **kwargs)
+            
+            tempo_chave = time.perf_counter() - inicio
+            result = _cache_memoria.obter(chave)
+            if result is cache_memoria.AUSENTE:
+                result = executar_por_impressao(chave, args, kwargs)
+                _cache_memoria.guardar(chave, result, ttl)
+            
+            if isinstance(result, pd.DataFrame):
+                registrar_impressao_digital(result, 'resultado', chave)
+            elif isinstance(result, tuple):
+                # Funções que devolvem (DataFrame, metadados...): cada DataFrame pela posição
+                for posicao, item in enumerate(result):
+                    if isinstance(item, pd.DataFrame):
+                        registrar_impressao_digital(item, 'resultado', chave, posicao)
+            
+            _registrar_chamada(nome_funcao, por_impressao=True, tempo_chave=tempo_chave,
+                               tempo_hash_evitado=sum(_estimar_custo_hash(df) for df in dataframes))
             return result
             
         return wrapper
@@ -77,6 +198,245 @@ def optimized_cache(ttl: int = DEFAULT_TTL, max_entries: Optional[int] = None) -
     return decorator
 
 
+def _normalizar_argumento(valor: Any, dataframes: List[pd.DataFrame]) -> Any:
+    """
+    Converte um argumento em um valor hasheável e barato para a chave do cache.
+    
+    Parâmetros:
+    -----------
+    valor : Any
+        Argumento da função decorada
+    dataframes : List[DataFrame]
+        Lista onde são acumulados os DataFrames encontrados (para a instrumentação)
+        
+    Retorna:
+    --------
+    Any: Representação hasheável do argumento
+    
+    Levanta _ArgumentoSemImpressao para DataFrames sem impressão digital e
+    objetos que não são valores simples (Series, arrays grandes ou não
+    numéricos, objetos arbitrários).
+    """
+    if valor is None or isinstance(valor, (bool, int, float, str, bytes, np.generic)):
+        # O tipo evita colisões entre 1, 1.0 e True
+        return (type(valor).__name__, valor)
+    
+    if isinstance(valor, pd.DataFrame):
+        impressao = obter_impressao_digital(valor)
+        if impressao is None:
+            raise _ArgumentoSemImpressao()
+        dataframes.append(valor)
+        return ('DataFrame', impressao)
+    
+    if isinstance(valor, np.ndarray) and valor.dtype.kind in 'biuf' and valor.size <= LIMITE_ELEMENTOS_ARRAY_CHAVE:
+        conteudo = hashlib.sha256(np.ascontiguousarray(valor).tobytes()).hexdigest()
+        return ('ndarray', valor.dtype.str, valor.shape, conteudo)
+    
+    if isinstance(valor, (list, tuple)):
+        return (type(valor).__name__, tuple(_normalizar_argumento(item, dataframes) for item in valor))
+    
+    if isinstance(valor, (set, frozenset)):
+        return ('set', tuple(sorted((_normalizar_argumento(item, dataframes) for item in valor), key=repr)))
+    
+    if isinstance(valor, dict):
+        # A ordem das chaves é mantida: ela define a ordem de exibição em vários gráficos
+        return ('dict', tuple(
+            (_normalizar_argumento(chave, dataframes), _normalizar_argumento(item, dataframes))
+            for chave, item in valor.items()
+        ))
+    
+    raise _ArgumentoSemImpressao()
+
+
+def _montar_chave_impressao(
+    nome_funcao: str,
+    assinatura: inspect.Signature,
+    args: tuple,
+    kwargs: Dict[str, Any]
+) -> tuple:
+    """
+    Monta a chave de cache por impressão digital de uma chamada.
+    
+    Parâmetros:
+    -----------
+    nome_funcao : str
+        Nome qualificado da função decorada
+    assinatura : inspect.Signature
+        Assinatura da função (normaliza posicionais, nomeados e padrões)
+    args : tuple
+        Argumentos posicionais da chamada
+    kwargs : Dict[str, Any]
+        Argumentos nomeados da chamada
+        
+    Retorna:
+    --------
+    tuple: (chave, DataFrames da chamada)
+    """
+    try:
+        argumentos = assinatura.bind(*args, **kwargs)
+    except TypeError:
+        raise _ArgumentoSemImpressao()
+    argumentos.apply_defaults()
+    
+    dataframes: List[pd.DataFrame] = []
+    chave = (nome_funcao, tuple(
+        (nome, _normalizar_argumento(valor, dataframes)) for nome, valor in argumentos.arguments.items()
+    ))
+    return chave, dataframes
+
+
+def _versao_codigo(func: Callable[..., Any]) -> str:
+    """
+    Versão do código de uma função decorada (resultados em disco de versões antigas deixam de valer).
+    
+    Combina VERSAO_CACHE_DISCO, o código-fonte do módulo que define a função
+    (incluindo seus auxiliares) e o dos módulos de MODULOS_VERSAO_CACHE, de
+    modo que uma mudança em um motor de cálculo também invalida os resultados.
+    
+    Parâmetros:
+    -----------
+    func : Callable
+        Função decorada
+        
+    Retorna:
+    --------
+    str: Hash hexadecimal
+    """
+    versao = hashlib.sha256(f"{VERSAO_CACHE_DISCO}:{func.__module__}.{func.__qualname__}".encode())
+    try:
+        arquivos = [inspect.getsourcefile(func)]
+    except TypeError:
+        arquivos = []
+    if arquivos and arquivos[0]:
+        versao.update(_hash_arquivos_codigo(tuple(arquivos)).encode())
+    else:
+        versao.update(func.__code__.co_code)
+    versao.update(_hash_modulos_motor().encode())
+    return versao.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _hash_modulos_motor() -> str:
+    """Hash do código-fonte dos módulos de MODULOS_VERSAO_CACHE (uma vez por processo)."""
+    arquivos = []
+    for nome in MODULOS_VERSAO_CACHE:
+        caminho = os.path.join(DIRETORIO_RAIZ, *nome.split('.'))
+        if os.path.isdir(caminho):
+            arquivos.extend(
+                os.path.join(caminho, arquivo) for arquivo in os.listdir(caminho) if arquivo.endswith('.py')
+            )
+        elif os.path.exists(caminho + '.py'):
+            arquivos.append(caminho + '.py')
+    return _hash_arquivos_codigo(tuple(sorted(arquivos)))
+
+
+@lru_cache(maxsize=None)
+def _hash_arquivos_codigo(arquivos: tuple) -> str:
+    """Hash do conteúdo de arquivos de código-fonte (uma vez por processo)."""
+    versao = hashlib.sha256()
+    for arquivo in arquivos:
+        try:
+            with open(arquivo, 'rb') as f:
+                versao.update(f.read())
+        except OSError:
+            versao.update(arquivo.encode())
+    return versao.hexdigest()
+
+
+def _estimar_custo_hash(df: pd.DataFrame) -> float:
+    """
+    Estima (uma vez por impressão digital) quanto o st.cache_data levaria para hashear o DataFrame.
+    
+    Reproduz a política do Streamlit: acima de LIMIAR_AMOSTRA_HASH linhas, uma
+    amostra de TAMANHO_AMOSTRA_HASH linhas é sorteada e hasheada.
+    
+    Parâmetros:
+    -----------
+    df : DataFrame
+        DataFrame com impressão digital
+        
+    Retorna:
+    --------
+    float: Tempo estimado em segundos
+    """
+    impressao = obter_impressao_digital(df)
+    with _lock_estatisticas:
+        custo = _custo_hash_por_impressao.get(impressao)
+    if custo is not None:
+        return custo
+    
+    try:
+        inicio = time.perf_counter()
+        amostra = df.sample(n=TAMANHO_AMOSTRA_HASH, random_state=0) if len(df) >= LIMIAR_AMOSTRA_HASH else df
+        pd.util.hash_pandas_object(df.dtypes)
+        pd.util.hash_pandas_object(amostra)
+        custo = time.perf_counter() - inicio
+    except Exception:
+        custo = 0.0
+    
+    with _lock_estatisticas:
+        _custo_hash_por_impressao[impressao] = custo
+    return custo
+
+
+def _registrar_chamada(
+    nome_funcao: str,
+    por_impressao: bool = False,
+    tempo_chave: float = 0.0,
+    tempo_hash_evitado: float = 0.0,
+    acerto_disco: bool = False
+) -> None:
+    """Acumula a instrumentação do cache por impressão digital de uma função."""
+    with _lock_estatisticas:
+        estatisticas = _estatisticas_cache.setdefault(nome_funcao, {
+            'chamadas_por_impressao': 0,
+            'chamadas_sem_impressao': 0,
+            'acertos_disco': 0,
+            'tempo_chave_s': 0.0,
+            'tempo_hash_evitado_s': 0.0,
+        })
+        if acerto_disco:
+            estatisticas['acertos_disco'] += 1
+        elif por_impressao:
+            estatisticas['chamadas_por_impressao'] += 1
+            estatisticas['tempo_chave_s'] += tempo_chave
+            estatisticas['tempo_hash_evitado_s'] += tempo_hash_evitado
+        else:
+            estatisticas['chamadas_sem_impressao'] += 1
+
+
+def obter_estatisticas_cache() -> pd.DataFrame:
+    """
+    Retorna a instrumentação do cache por impressão digital.
+    
+    Retorna:
+    --------
+    DataFrame: Uma linha por função decorada com optimized_cache, contendo:
+        - chamadas_por_impressao: chamadas resolvidas pela chave de impressão digital
+        - chamadas_sem_impressao: chamadas que caíram no hash do st.cache_data
+        - acertos_disco: resultados lidos do cache persistente em disco
+        - tempo_chave_s: tempo total gasto montando as chaves de impressão
+        - tempo_hash_evitado_s: tempo estimado de hash dos DataFrames que foi evitado
+    """
+    with _lock_estatisticas:
+        linhas = {nome: dict(valores) for nome, valores in _estatisticas_cache.items()}
+    
+    colunas = ['chamadas_por_impressao', 'chamadas_sem_impressao', 'acertos_disco',
+               'tempo_chave_s', 'tempo_hash_evitado_s']
+    return pd.DataFrame.from_dict(linhas, orient='index', columns=colunas).rename_axis('funcao')
+
+
+def obter_estado_cache_memoria() -> Dict[str, int]:
+    """
+    Retorna o estado do cache em memória compartilhado pelo processo.
+    
+    Retorna:
+    --------
+    Dict[str, int]: Número de entradas, bytes guardados e entradas descartadas por falta de memória
+    """
+    return _cache_memoria.estatisticas()
+
+
 def get_memory_usage() -> Dict[str, Any]:
     """
     Retorna informações sobre o uso atual de memória.
@@ -108,12 +468,35 @@ def get_memory_usage() -> Dict[str, Any]:
         }
 
 
+def get_process_memory_excess() -> int:
+    """
+    Retorna quantos bytes o processo usa acima do limite de aviso.
+    
+    O limite é MEMORIA_LIMITE_AVISO da memória total do servidor, comparado
+    com a memória residente (RSS) deste processo, e não com o uso do sistema
+    inteiro, que o cache do processo não consegue reduzir.
+    
+    Retorna:
+    --------
+    int: Bytes acima do limite (0 se abaixo ou sem psutil)
+    """
+    try:
+        import psutil
+        
+        residente = psutil.Process().memory_info().rss
+        limite = psutil.virtual_memory().total * MEMORIA_LIMITE_AVISO
+        return max(int(residente - limite), 0)
+    except ImportError:
+        return 0
+
+
 def clear_all_cache() -> None:
     """
     Limpa todos os caches do Streamlit na sessão atual.
     """
     # Limpar cache de dados
     st.cache_data.clear()
+    _cache_memoria.limpar()
     
     # Limpar cache de recursos
     st.cache_resource.clear()
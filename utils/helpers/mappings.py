@@ -1,3 +1,6 @@
+from utils.helpers.regiao_utils import REGIOES_BRASIL
+
+
 
 def get_mappings():
     """Retorna todos os mapeamentos usados no dashboard."""
@@ -12,6 +15,15 @@ def get_mappings():
         'NU_NOTA_REDACAO': 'Redação'
     }
     
+    # Colunas de presença por prova (análise de faltas)
+    colunas_presenca = {
+        'TP_PRESENCA_CN': 'Ciências da Natureza',
+        'TP_PRESENCA_CH': 'Ciências Humanas',
+        'TP_PRESENCA_LC': 'Linguagens e Códigos',
+        'TP_PRESENCA_MT': 'Matemática',
+        'TP_PRESENCA_REDACAO': 'Redação'
+    }
+    
     dependencia_escola_mapping = {
         1: 'Federal',
         2: 'Estadual',
@@ -205,14 +217,8 @@ def get_mappings():
         "Q025": {"nome": "Acesso à Internet", "mapeamento": acesso_internet_mapping}
     }
 
-    # Mapeamento de regiões - Norte, Nordeste e Centro Oeste (MS e DF) REMOVIDO do dataset
-    regioes_mapping = {
-        "Norte": ['AC', 'AP', 'AM', 'PA', 'RO', 'RR', 'TO'],
-        "Nordeste": ['AL', 'BA', 'CE', 'MA', 'PB', 'PE', 'PI', 'RN', 'SE'],
-        "Sul": ["RS", "SC", "PR"],
-        "Sudeste": ["SP", "RJ", "ES", "MG"],
-        "Centro-Oeste": ["GO", "MT", "DF", "MS"],
-    }
+    # Mapeamento de regiões - definido em data/regioes.json (ver regiao_utils)
+    regioes_mapping = dict(REGIOES_BRASIL)
 
     # Configurações de visualização
     CONFIG_VISUALIZACAO = {
@@ -300,6 +306,7 @@ def get_mappings():
     return {
         'colunas_notas': colunas_notas,
         'competencia_mapping': competencia_mapping,
+        'colunas_presenca': colunas_presenca,
         'race_mapping': race_mapping,
         'sexo_mapping': sexo_mapping,
         'dependencia_escola_mapping': dependencia_escola_mapping,
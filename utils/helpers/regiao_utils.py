@@ -1,14 +1,38 @@
+import json
 import pandas as pd
 from typing import Dict, List
 
+# Arquivo de configuração com as regiões atendidas e seus estados.
+# Uma única implantação serve todo o país: para restringir ou alterar a
+# cobertura basta editar este arquivo, sem mudanças no código.
+ARQUIVO_REGIOES = "data/regioes.json"
+
+
+def carregar_regioes(arquivo: str = ARQUIVO_REGIOES) -> Dict[str, List[str]]:
+    """
+    Carrega o mapeamento de regiões para estados a partir do arquivo de configuração.
+    
+    Parâmetros:
+    -----------
+    arquivo : str, default=ARQUIVO_REGIOES
+        Caminho do arquivo JSON no formato {"Região": ["UF", ...]}
+        
+    Retorna:
+    --------
+    Dict[str, List[str]]: Dicionário com nomes das regiões e listas de siglas,
+    ou dicionário vazio se o arquivo não puder ser lido
+    """
+    try:
+        with open(arquivo, encoding="utf-8") as f:
+            regioes = json.load(f)
+        return {regiao: list(estados) for regiao, estados in regioes.items()}
+    except Exception as e:
+        print(f"Erro ao carregar regiões de {arquivo}: {e}")
+        return {}
+
+
 # Mapeamento constante de regiões do Brasil para uso em múltiplas funções
-# SUDESTE REMOVIDO - dados já filtrados no dataset
-REGIOES_BRASIL = {
-    'Norte': ['AC', 'AM', 'AP', 'PA', 'RO', 'RR', 'TO'],
-    'Nordeste': ['AL', 'BA', 'CE', 'MA', 'PB', 'PE', 'PI', 'RN', 'SE'],
-    'Centro-Oeste': ['DF', 'GO', 'MS', 'MT'],
-    'Sul': ['PR', 'RS', 'SC']
-}
+REGIOES_BRASIL = carregar_regioes()
 
 # Mapeamento inverso para uso eficiente
 ESTADO_PARA_REGIAO = {estado: regiao for regiao, estados in REGIOES_BRASIL.items() for estado in estados}
@@ -70,7 +94,7 @@ def obter_estados_da_regiao(regiao: str) -> List[str]:
     Parâmetros:
     -----------
     regiao : str
-        Nome da região (Norte, Nordeste, Centro-Oeste, Sul)
+        Nome da região (Norte, Nordeste, Centro-Oeste, Sudeste, Sul)
         
     Retorna:
     --------
@@ -103,4 +127,29 @@ def obter_todas_regioes() -> List[str]:
     --------
     List[str]: Lista de nomes das regiões
     """
-    return list(REGIOES_BRASIL.keys())
\ No newline at end of file
+    return list(REGIOES_BRASIL.keys())
+
+
+def obter_regioes_disponiveis(estados_disponiveis: List[str]) -> Dict[str, List[str]]:
+    """
+    Restringe o mapeamento de regiões aos estados presentes nos dados.
+    
+    Parâmetros:
+    -----------
+    estados_disponiveis : List[str]
+        Siglas dos estados que existem no dataset carregado
+        
+    Retorna:
+    --------
+    Dict[str, List[str]]: Regiões com pelo menos um estado disponível e
+    apenas os seus estados disponíveis
+    """
+    disponiveis = set(estados_disponiveis)
+    regioes = {}
+    
+    for regiao, estados in REGIOES_BRASIL.items():
+        estados_regiao = [estado for estado in estados if estado in disponiveis]
+        if estados_regiao:
+            regioes[regiao] = estados_regiao
+    
+    return regioes
@@ -2,12 +2,16 @@ import streamlit as st
 from typing import List, Tuple
 from data.data_loader import load_data_for_tab, agrupar_estados_em_regioes
 from utils.helpers.mappings import get_mappings
+from utils.helpers.regiao_utils import obter_regioes_disponiveis
 
-@st.cache_data(ttl=600, max_entries=1)
 def load_filter_data():
-    """Carrega dados apenas para filtros (otimizado)"""
+    """Carrega dados apenas para filtros (registro compartilhado, sem cópia por sessão)"""
     return load_data_for_tab("localizacao", apenas_filtros=True)
 
+def obter_todos_estados() -> List[str]:
+    """Retorna a seleção padrão "Brasil": todos os estados presentes nos dados, em ordem"""
+    return sorted(load_filter_data()['SG_UF_PROVA'].unique())
+
 def render_sidebar_filters() -> Tuple[List[str], List[str]]:
     """
     Renderiza filtros laterais padronizados para todas as páginas
@@ -24,14 +28,14 @@ def render_sidebar_filters() -> Tuple[List[str], List[str]]:
     if 'mappings' not in st.session_state:
         st.session_state.mappings = get_mappings()
     
-    mappings = st.session_state.mappings
-    regioes_mapping = mappings['regioes_mapping']
-    
     # ---------------------------- FILTROS SIDEBAR ----------------------------
     st.sidebar.header("🔧 Filtros de Seleção")
     
     # Obter lista de todos os estados disponíveis
-    todos_estados = sorted(filtros_dados['SG_UF_PROVA'].unique())
+    todos_estados = obter_todos_estados()
+    
+    # Regiões configuradas (data/regioes.json) restritas aos estados presentes nos dados
+    regioes_mapping = obter_regioes_disponiveis(todos_estados)
     todas_regioes = sorted(regioes_mapping.keys())
     
     # Checkbox para selecionar todo o Brasil
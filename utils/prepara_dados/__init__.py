@@ -16,19 +16,32 @@ from .validacao_dados import (
 from .prepara_dados_aspectos_sociais import (
     preparar_dados_correlacao,
     preparar_dados_distribuicao,
+    preparar_contagem_distribuicao,
     contar_candidatos_por_categoria,
     ordenar_categorias,
+    preparar_tabela_contingencia,
+    preparar_tabelas_associacao,
     preparar_dados_heatmap,
     preparar_dados_barras_empilhadas,
     preparar_dados_sankey,
-    preparar_dados_grafico_aspectos_por_estado
+    preparar_dados_grafico_aspectos_por_estado,
+    NORMALIZACOES_BARRAS
 )
 
 from .prepara_dados_geral import (
     preparar_dados_histograma,
+    preparar_dados_histograma_agregado,
     preparar_dados_grafico_faltas,
     preparar_dados_metricas_principais,
     preparar_dados_media_geral_estados,
     preparar_dados_comparativo_areas,
-    preparar_dados_evasao  # Adicionando a função que estava faltando
-)
\ No newline at end of file
+    preparar_dados_evasao,  # Adicionando a função que estava faltando
+    calcular_matriz_presenca
+)
+
+from .parciais_uf import (
+    agregar_parcial,
+    combinar_parciais,
+    calcular_parcial_estado,
+    agregar_estados
+)
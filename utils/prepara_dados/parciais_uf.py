@@ -0,0 +1,139 @@
+import pandas as pd
+from typing import Iterable, List, Sequence, Tuple
+from data.data_loader import COLUNA_PARTICAO, impressao_estado, ler_dados_estado
+from data.impressao_digital import normalizar_estados
+from utils.helpers.cache_utils import optimized_cache
+
+# ------------------------------------------------------------
+# AGREGADOS PARCIAIS POR UF
+# ------------------------------------------------------------
+#
+# Um parcial é a contagem de um único estado, em formato largo: as colunas
+# de chave e 'contagem'.
+#
+# Cada parcial é cacheado por (aba, UF, hash dos arquivos da UF, chaves),
+# então uma seleção qualquer de estados é atendida combinando os parciais
+# já calculados: marcar ou desmarcar um estado custa apenas o trabalho
+# daquele estado, ou nada, se ele já estiver no cache.
+
+
+def agregar_parcial(df: pd.DataFrame, chaves: Sequence[str]) -> pd.DataFrame:
+    """
+    Calcula o agregado parcial (contagens) de um DataFrame.
+
+    Parâmetros:
+    -----------
+    df : DataFrame
+        Microdados (em geral, de um único estado)
+    chaves : Sequence[str]
+        Colunas de agrupamento (tabela de contingência quando há mais de uma)
+
+    Retorna:
+    --------
+    DataFrame: Uma linha por combinação de chaves presente nos dados
+    """
+    chaves = [chave for chave in chaves if chave in df.columns]
+
+    colunas_resultado = chaves + ['contagem']
+    if df.empty or not chaves:
+        return pd.DataFrame(columns=colunas_resultado)
+
+    grupos_chaves = [df[chave] for chave in chaves]
+    parcial = df.groupby(grupos_chaves, observed=True, dropna=False, sort=False).size().rename('contagem')
+    parcial.index = parcial.index.set_names(chaves)
+    parcial = parcial.reset_index()
+
+    # Chaves como valores simples: parciais de estados diferentes combinam sem conflito de categorias
+    for chave in chaves:
+        if isinstance(parcial[chave].dtype, pd.CategoricalDtype):
+            parcial[chave] = parcial[chave].astype(object)
+
+    return parcial[colunas_resultado]
+
+
+def combinar_parciais(parciais: Iterable[pd.DataFrame], chaves: Sequence[str]) -> pd.DataFrame:
+    """
+    Combina parciais (por exemplo, de estados diferentes) somando as contagens.
+
+    Parâmetros:
+    -----------
+    parciais : Iterable[DataFrame]
+        Parciais no formato de agregar_parcial
+    chaves : Sequence[str]
+        Colunas de chave do resultado (as demais chaves são somadas)
+
+    Retorna:
+    --------
+    DataFrame: Parcial combinado
+    """
+    parciais = [parcial for parcial in parciais if not parcial.empty]
+    if not parciais:
+        return pd.DataFrame(columns=list(chaves) + ['contagem'])
+
+    tabela = pd.concat(parciais, ignore_index=True)
+    chaves = [chave for chave in chaves if chave in tabela.columns]
+
+    if not chaves:
+        return tabela[['contagem']].sum().to_frame().T
+
+    return tabela.groupby(chaves, dropna=False, sort=False)['contagem'].sum().reset_index()
+
+
+@optimized_cache(ttl=24 * 3600)
+def calcular_parcial_estado(
+    tab_name: str,
+    estado: str,
+    impressao: str,
+    chaves: Tuple[str, ...]
+) -> pd.DataFrame:
+    """
+    Calcula (com cache por estado) o agregado parcial de um estado.
+
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba de origem
+    estado : str
+        Sigla do estado
+    impressao : str
+        Hash dos dados do estado (ver data.data_loader.impressao_estado); só
+        compõe a chave do cache, para que dados alterados gerem parciais novos
+    chaves : Tuple[str, ...]
+        Ver agregar_parcial
+
+    Retorna:
+    --------
+    DataFrame: Parcial do estado
+    """
+    return agregar_parcial(ler_dados_estado(tab_name, estado, list(dict.fromkeys(chaves))), chaves)
+
+
+def agregar_estados(tab_name: str, estados: List[str], chaves: Sequence[str]) -> pd.DataFrame:
+    """
+    Agrega uma seleção de estados combinando os parciais de cada um.
+
+    Parâmetros:
+    -----------
+    tab_name : str
+        Nome da aba de origem ('geral', 'aspectos_sociais', 'desempenho')
+    estados : List[str]
+        Estados selecionados
+    chaves : Sequence[str]
+        Ver agregar_parcial
+
+    Retorna:
+    --------
+    DataFrame: Agregado da seleção, ou DataFrame vazio em caso de erro
+    """
+    chaves = tuple(chave for chave in chaves if chave != COLUNA_PARTICAO)
+
+    try:
+        parciais = [
+            calcular_parcial_estado(tab_name, estado, impressao_estado(tab_name, estado), chaves)
+            for estado in normalizar_estados(estados)
+        ]
+        return combinar_parciais(parciais, list(chaves))
+
+    except Exception as e:
+        print(f"Erro ao agregar parciais por estado ({tab_name}): {e}")
+        return pd.DataFrame()
@@ -1,15 +1,22 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Any
-from utils.helpers.cache_utils import optimized_cache, memory_intensive_function, release_memory
+from utils.helpers.cache_utils import optimized_cache, memory_intensive_function
 from utils.prepara_dados.validacao_dados import validar_completude_dados
+from utils.prepara_dados.parciais_uf import agregar_estados
 from utils.helpers.mappings import get_mappings
+from data.esquema_categorias import coluna_rotulo, rotular_serie
 
 # Obter mapeamentos e constantes
 mappings = get_mappings()
-CONFIG_PROCESSAMENTO = mappings['config_processamento']
 LIMIARES_PROCESSAMENTO = mappings['limiares_processamento']
 
+# Bases possíveis para o percentual das barras empilhadas
+NORMALIZACOES_BARRAS = ('linha', 'coluna', 'total')
+
+# Categoria de desempenho cruzada com as variáveis sociais na matriz de associações
+VARIAVEL_DESEMPENHO = 'NU_DESEMPENHO'
+
 @optimized_cache(ttl=1800)  # Cache válido por 30 minutos
 def preparar_dados_correlacao(
     microdados: pd.DataFrame, 
@@ -54,11 +61,9 @@ def preparar_dados_correlacao(
                            if taxa < LIMIARES_PROCESSAMENTO['min_completude_dados']]
         print(f"Aviso: Baixa completude nas colunas: {colunas_problema}")
     
-    # Selecionar apenas colunas necessárias para economizar memória
-    df_correlacao = microdados[colunas_necessarias].copy()
-    
-    # Remover registros com valores inválidos
-    df_correlacao = df_correlacao.dropna(subset=colunas_necessarias)
+    # Selecionar as colunas necessárias (com os rótulos já criados na carga) e
+    # remover registros com valores inválidos; a seleção já é um DataFrame novo
+    df_correlacao = microdados[_com_colunas_rotulo(microdados, colunas_necessarias)].dropna(subset=colunas_necessarias)
     
     # Aplicar mapeamentos para variável X
     var_x_plot = aplicar_mapeamento(df_correlacao, var_x, variaveis_sociais)
@@ -77,7 +82,11 @@ def aplicar_mapeamento(
     variaveis_sociais: Dict[str, Dict[str, Any]]
 ) -> str:
     """
-    Aplica mapeamento a uma variável se necessário e retorna o nome da coluna para uso em gráficos.
+    Retorna o nome da coluna com os rótulos de uma variável, para uso em gráficos.
+    
+    Os dados carregados por data.data_loader já trazem a coluna <VARIAVEL>_NOME
+    (ver data.esquema_categorias); só quando ela não existe os rótulos são
+    criados aqui, adicionando a coluna ao DataFrame recebido.
     
     Parâmetros:
     -----------
@@ -102,21 +111,14 @@ def aplicar_mapeamento(
         print(f"Aviso: Variável '{variavel}' não encontrada no dicionário de mapeamentos")
         return variavel
     
+    coluna_nome = coluna_rotulo(variavel)
+    if coluna_nome in df.columns:
+        return coluna_nome
+    
     # Verificar se precisamos aplicar mapeamento (se não for já do tipo object/string)
     if "mapeamento" in variaveis_sociais[variavel] and df[variavel].dtype != 'object':
-        coluna_nome = f'{variavel}_NOME'
-        
         try:
-            mapeamento = variaveis_sociais[variavel]["mapeamento"]
-            df[coluna_nome] = df[variavel].map(mapeamento)
-            
-            # Converter para categoria para economizar memória
-            categorias = list(mapeamento.values())
-            df[coluna_nome] = pd.Categorical(
-                df[coluna_nome], 
-                categories=categorias
-            )
-            
+            df[coluna_nome] = rotular_serie(df[variavel], variaveis_sociais[variavel]["mapeamento"], coluna_nome)
             return coluna_nome
         except Exception as e:
             print(f"Erro ao aplicar mapeamento para '{variavel}': {e}")
@@ -125,6 +127,11 @@ def aplicar_mapeamento(
     return variavel
 
 
+def _com_colunas_rotulo(df: pd.DataFrame, variaveis: List[str]) -> List[str]:
+    """Acrescenta às variáveis as colunas de rótulos que já existem no DataFrame."""
+    return variaveis + [coluna_rotulo(var) for var in variaveis if coluna_rotulo(var) in df.columns]
+
+
 @optimized_cache(ttl=1800)
 def preparar_dados_distribuicao(
     microdados: pd.DataFrame, 
@@ -153,11 +160,8 @@ def preparar_dados_distribuicao(
         print(f"Aviso: Aspecto social '{aspecto_social}' não encontrado nos dados")
         return pd.DataFrame(), aspecto_social
     
-    # Selecionar apenas a coluna necessária para economizar memória
-    df_dist = microdados[[aspecto_social]].copy()
-    
-    # Remover valores nulos
-    df_dist = df_dist.dropna(subset=[aspecto_social])
+    # Selecionar a coluna (e seus rótulos) e remover valores nulos
+    df_dist = microdados[_com_colunas_rotulo(microdados, [aspecto_social])].dropna(subset=[aspecto_social])
     
     # Aplicar mapeamento
     coluna_plot = aplicar_mapeamento(df_dist, aspecto_social, variaveis_sociais)
@@ -167,6 +171,69 @@ def preparar_dados_distribuicao(
     return df_dist, coluna_plot
 
 
+@optimized_cache(ttl=1800)
+def preparar_contagem_distribuicao(
+    estados_selecionados: List[str], 
+    aspecto_social: str, 
+    variaveis_sociais: Dict[str, Dict[str, Any]]
+) -> pd.DataFrame:
+    """
+    Conta os candidatos por categoria de um aspecto social nos estados selecionados.
+    
+    Equivale a preparar_dados_distribuicao seguido de contar_candidatos_por_categoria,
+    mas a partir das contagens parciais de cada estado (ver utils.prepara_dados.parciais_uf):
+    mudar a seleção de estados só calcula os estados que ainda não estão no cache.
+    
+    Parâmetros:
+    -----------
+    estados_selecionados : List[str]
+        Lista de estados selecionados
+    aspecto_social : str
+        Nome do aspecto social a ser analisado
+    variaveis_sociais : Dict
+        Dicionário com mapeamentos e configurações
+        
+    Retorna:
+    --------
+    DataFrame
+        DataFrame com as colunas Categoria, Quantidade e Percentual
+    """
+    colunas_resultado = ['Categoria', 'Quantidade', 'Percentual']
+    
+    contagens = agregar_estados("aspectos_sociais", estados_selecionados, [aspecto_social])
+    if contagens.empty or aspecto_social not in contagens.columns:
+        return pd.DataFrame(columns=colunas_resultado)
+    
+    try:
+        contagens = contagens.dropna(subset=[aspecto_social])
+        categorias = contagens[aspecto_social]
+        
+        # Mesmo mapeamento de aplicar_mapeamento: todas as categorias mapeadas aparecem, inclusive sem candidatos
+        mapeamento = variaveis_sociais.get(aspecto_social, {}).get("mapeamento")
+        ordem = None
+        if mapeamento:
+            categorias = categorias.map(mapeamento)
+            ordem = list(dict.fromkeys(mapeamento.values()))
+        
+        quantidade = contagens['contagem'].groupby(categorias.to_numpy(), sort=False).sum()
+        if ordem is not None:
+            quantidade = quantidade.reindex(ordem, fill_value=0)
+        
+        quantidade = quantidade.astype('int64').sort_values(ascending=False)
+        total = quantidade.sum()
+        
+        resultado = pd.DataFrame({
+            'Categoria': quantidade.index,
+            'Quantidade': quantidade.to_numpy(),
+        })
+        resultado['Percentual'] = (resultado['Quantidade'] / total * 100).round(2)
+        
+        return resultado
+    except Exception as e:
+        print(f"Erro ao contar candidatos por categoria: {e}")
+        return pd.DataFrame(columns=colunas_resultado)
+
+
 @memory_intensive_function
 def contar_candidatos_por_categoria(
     df: pd.DataFrame, 
@@ -283,9 +350,171 @@ def ordenar_categorias(
         return contagem_aspecto  # Retornar dados sem ordenação em caso de erro
 
 
-@memory_intensive_function
+def preparar_tabela_contingencia(
+    estados: List[str],
+    var_x: str,
+    var_y: str,
+    variaveis_sociais: Dict[str, Dict[str, Any]]
+) -> Tuple[pd.DataFrame, str, str]:
+    """
+    Monta a tabela de contingência rotulada de duas variáveis sociais a partir
+    do cubo de contingências por UF, sem percorrer os microdados.
+    
+    Parâmetros:
+    -----------
+    estados : List[str]
+        Estados selecionados
+    var_x : str
+        Variável das linhas
+    var_y : str
+        Variável das colunas
+    variaveis_sociais : Dict
+        Dicionário com mapeamentos e configurações das variáveis
+        
+    Retorna:
+    --------
+    Tuple[DataFrame, str, str]
+        (Contagens com as categorias de var_x nas linhas e de var_y nas colunas,
+        nome do eixo X, nome do eixo Y); os nomes seguem aplicar_mapeamento
+    """
+    # Importar localmente para evitar importação circular
+    from data.contingencia_social import obter_contingencias, consultar_contingencia
+    
+    try:
+        tabela = consultar_contingencia(obter_contingencias(), var_x, var_y, estados)
+        if tabela.empty:
+            return pd.DataFrame(), var_x, var_y
+        
+        tabela, var_x_plot = _rotular_eixo(tabela, var_x, variaveis_sociais)
+        tabela_t, var_y_plot = _rotular_eixo(tabela.T, var_y, variaveis_sociais)
+        return tabela_t.T, var_x_plot, var_y_plot
+    
+    except Exception as e:
+        print(f"Erro ao preparar tabela de contingência: {e}")
+        return pd.DataFrame(), var_x, var_y
+
+
+def _rotular_eixo(
+    tabela: pd.DataFrame, 
+    variavel: str, 
+    variaveis_sociais: Dict[str, Dict[str, Any]]
+) -> Tuple[pd.DataFrame, str]:
+    """
+    Troca as categorias originais das linhas pelos rótulos do mapeamento.
+    
+    Segue aplicar_mapeamento: categorias sem rótulo saem da tabela e todas as
+    categorias do mapeamento aparecem, na ordem dele, mesmo sem candidatos.
+    """
+    mapeamento = variaveis_sociais.get(variavel, {}).get("mapeamento")
+    if not mapeamento:
+        return tabela, variavel
+    
+    rotulos = tabela.index.map(mapeamento)
+    categorias = list(dict.fromkeys(mapeamento.values()))
+    
+    rotulada = tabela[rotulos.notna()].groupby(rotulos[rotulos.notna()], sort=False).sum()
+    rotulada = rotulada.reindex(categorias, fill_value=0)
+    
+    coluna_nome = f'{variavel}_NOME'
+    rotulada.index = pd.CategoricalIndex(rotulada.index, categories=categorias, name=coluna_nome)
+    return rotulada, coluna_nome
+
+
+def preparar_tabelas_associacao(
+    estados: List[str],
+    variaveis_sociais: Dict[str, Dict[str, Any]]
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Monta, de uma só vez, as tabelas de contingência rotuladas de todos os pares
+    de variáveis sociais e de cada variável social com a categoria de desempenho.
+    
+    As tabelas saem dos cubos de contingências densos (ver
+    obter_contingencias_densas): a seleção de estados é uma única máscara de
+    UFs e os rótulos são aplicados por projeção das categorias, como em
+    preparar_tabela_contingencia. Os pares com o desempenho usam a população
+    da aba de desempenho.
+    
+    Parâmetros:
+    -----------
+    estados : List[str]
+        Estados selecionados
+    variaveis_sociais : Dict
+        Dicionário com mapeamentos e configurações das variáveis
+        
+    Retorna:
+    --------
+    Tuple[DataFrame, ndarray]
+        (Pares, com as colunas Variavel_X e Variavel_Y, e as contagens de todos
+        os pares em um array pares × categorias de X × categorias de Y,
+        completado com zeros; o desempenho fica sempre em Variavel_Y)
+    """
+    # Importar localmente para evitar importação circular
+    from data.contingencia_social import ALVOS_CONTINGENCIA, SEPARADOR_PAR, obter_contingencias_densas
+    from data.impressao_digital import normalizar_estados
+    
+    pares_vazios = pd.DataFrame(columns=['Variavel_X', 'Variavel_Y'])
+    
+    try:
+        mapeamentos = {
+            variavel: config['mapeamento']
+            for variavel, config in variaveis_sociais.items() if config.get('mapeamento')
+        }
+        mapeamentos[VARIAVEL_DESEMPENHO] = mappings['desempenho_mapping']
+        selecionados = list(normalizar_estados(estados))
+        
+        pares, tabelas = [], []
+        for tab, alvo in ALVOS_CONTINGENCIA.items():
+            ufs, densas = obter_contingencias_densas(tab)
+            selecao = np.isin(ufs, selecionados)
+            
+            for par, (valores_x, valores_y, contagens) in densas.items():
+                var_x, var_y = par.split(SEPARADOR_PAR)
+                if var_x not in mapeamentos or var_y not in mapeamentos:
+                    continue
+                
+                tabela = contagens[selecao].sum(axis=0)
+                if var_x == alvo:
+                    var_x, var_y, valores_x, valores_y, tabela = var_y, var_x, valores_y, valores_x, tabela.T
+                
+                tabelas.append(
+                    _projecao_rotulos(valores_x, mapeamentos[var_x]).T
+                    @ tabela
+                    @ _projecao_rotulos(valores_y, mapeamentos[var_y])
+                )
+                pares.append((var_x, var_y))
+        
+        if not pares:
+            return pares_vazios, np.zeros((0, 0, 0), dtype='int64')
+        
+        # Um único array para todos os pares: as categorias a mais ficam com contagem zero
+        empilhadas = np.zeros(
+            (len(tabelas), max(t.shape[0] for t in tabelas), max(t.shape[1] for t in tabelas)), dtype='int64'
+        )
+        for i, tabela in enumerate(tabelas):
+            empilhadas[i, :tabela.shape[0], :tabela.shape[1]] = tabela
+        
+        return pd.DataFrame(pares, columns=['Variavel_X', 'Variavel_Y']), empilhadas
+    
+    except Exception as e:
+        print(f"Erro ao preparar tabelas da matriz de associações: {e}")
+        return pares_vazios, np.zeros((0, 0, 0), dtype='int64')
+
+
+def _projecao_rotulos(valores: np.ndarray, mapeamento: Dict[Any, str]) -> np.ndarray:
+    """Matriz categoria original × rótulo (1 onde a categoria recebe o rótulo; zeros para as sem rótulo)."""
+    categorias = list(dict.fromkeys(mapeamento.values()))
+    posicao = {rotulo: i for i, rotulo in enumerate(categorias)}
+    
+    projecao = np.zeros((len(valores), len(categorias)), dtype='int64')
+    for i, valor in enumerate(valores):
+        j = posicao.get(mapeamento.get(valor))
+        if j is not None:
+            projecao[i, j] = 1
+    return projecao
+
+
 def preparar_dados_heatmap(
-    df_correlacao: pd.DataFrame, 
+    tabela_contingencia: pd.DataFrame, 
     var_x_plot: str, 
     var_y_plot: str
 ) -> pd.DataFrame:
@@ -294,8 +523,8 @@ def preparar_dados_heatmap(
     
     Parâmetros:
     -----------
-    df_correlacao : DataFrame
-        DataFrame com dados correlacionados
+    tabela_contingencia : DataFrame
+        Contagens por combinação de categorias (ver preparar_tabela_contingencia)
     var_x_plot : str
         Nome da variável para o eixo X
     var_y_plot : str
@@ -307,23 +536,12 @@ def preparar_dados_heatmap(
         DataFrame normalizado para heatmap
     """
     # Verificar se temos dados válidos
-    if df_correlacao.empty or var_x_plot not in df_correlacao.columns or var_y_plot not in df_correlacao.columns:
+    if not _tabela_contingencia_valida(tabela_contingencia, var_x_plot, var_y_plot):
         print(f"Aviso: Dados insuficientes para criar heatmap")
         return pd.DataFrame()
     
     try:
-        # Contar ocorrências para cada combinação (método otimizado)
-        contagem = df_correlacao.groupby([var_x_plot, var_y_plot]).size().reset_index(name='Contagem')
-        
-        # Verificar se temos contagens para trabalhar
-        if contagem.empty:
-            return pd.DataFrame()
-        
-        # Calcular percentuais (normalização)
-        contagem_pivot = contagem.pivot(index=var_x_plot, columns=var_y_plot, values='Contagem')
-        
-        # Substituir NaN por 0
-        contagem_pivot = contagem_pivot.fillna(0)
+        contagem_pivot = tabela_contingencia.astype('float64')
         
         # Normalizar por linha (para mostrar distribuição percentual)
         row_sums = contagem_pivot.sum(axis=1)
@@ -332,7 +550,7 @@ def preparar_dados_heatmap(
         row_sums = row_sums.replace(0, np.nan)
         normalized_pivot = contagem_pivot.div(row_sums, axis=0) * 100
         
-        # Substituir NaN por 0 novamente
+        # Substituir NaN por 0
         normalized_pivot = normalized_pivot.fillna(0)
         
         return normalized_pivot
@@ -342,23 +560,26 @@ def preparar_dados_heatmap(
         return pd.DataFrame()
 
 
-@memory_intensive_function
 def preparar_dados_barras_empilhadas(
-    df_correlacao: pd.DataFrame, 
+    tabela_contingencia: pd.DataFrame, 
     var_x_plot: str, 
-    var_y_plot: str
+    var_y_plot: str,
+    normalizacao: str = 'linha'
 ) -> pd.DataFrame:
     """
     Prepara dados para visualização em barras empilhadas.
     
     Parâmetros:
     -----------
-    df_correlacao : DataFrame
-        DataFrame com dados correlacionados
+    tabela_contingencia : DataFrame
+        Contagens por combinação de categorias (ver preparar_tabela_contingencia)
     var_x_plot : str
         Nome da variável para o eixo X
     var_y_plot : str
         Nome da variável para o eixo Y
+    normalizacao : str, default='linha'
+        Base do percentual (ver NORMALIZACOES_BARRAS): 'linha' (cada categoria de X),
+        'coluna' (cada categoria de Y) ou 'total' (todos os candidatos da tabela)
         
     Retorna:
     --------
@@ -366,35 +587,33 @@ def preparar_dados_barras_empilhadas(
         DataFrame formatado para barras empilhadas
     """
     # Verificar se temos dados válidos
-    if df_correlacao.empty or var_x_plot not in df_correlacao.columns or var_y_plot not in df_correlacao.columns:
+    if not _tabela_contingencia_valida(tabela_contingencia, var_x_plot, var_y_plot):
         print(f"Aviso: Dados insuficientes para criar barras empilhadas")
         return pd.DataFrame()
     
+    if normalizacao not in NORMALIZACOES_BARRAS:
+        print(f"Aviso: Normalização '{normalizacao}' desconhecida; usando 'linha'")
+        normalizacao = 'linha'
+    
     try:
-        # Contar ocorrências para cada combinação (método otimizado)
-        contagem = df_correlacao.groupby([var_x_plot, var_y_plot]).size().reset_index(name='Contagem')
-        
-        # Verificar se temos contagens para trabalhar
-        if contagem.empty:
-            return pd.DataFrame()
-        
-        # Preparar dados para barras empilhadas
-        df_barras = contagem.copy()
-        
-        # Calcular totais por categoria X (mais eficiente)
-        totais = df_barras.groupby(var_x_plot)['Contagem'].sum()
-        
-        # Converter para dicionário para acesso mais rápido
-        totais_dict = totais.to_dict()
-        
-        # Adicionar coluna de Total para facilitar cálculos
-        df_barras['Total'] = df_barras[var_x_plot].map(totais_dict)
-        
-        # Calcular percentual para cada combinação
-        df_barras['Percentual'] = df_barras.apply(
-            lambda row: (row['Contagem'] / row['Total'] * 100) if row['Total'] > 0 else 0, 
-            axis=1
-        ).round(2)
+        # Uma linha por combinação (X, Y), inclusive as sem candidatos
+        df_barras = _contagem_longa(tabela_contingencia, var_x_plot, var_y_plot)
+        
+        # Denominador de cada célula, na mesma forma da tabela (linhas = X, colunas = Y)
+        contagens = tabela_contingencia.to_numpy(dtype='int64')
+        if normalizacao == 'linha':
+            totais = contagens.sum(axis=1, keepdims=True)
+        elif normalizacao == 'coluna':
+            totais = contagens.sum(axis=0, keepdims=True)
+        else:
+            totais = np.array([[contagens.sum()]])
+        totais = np.broadcast_to(totais, contagens.shape)
+        
+        # O formato longo percorre a tabela linha a linha, na mesma ordem de ravel()
+        df_barras['Total'] = totais.ravel()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentuais = np.where(totais > 0, contagens / totais * 100, 0.0)
+        df_barras['Percentual'] = np.round(percentuais.ravel(), 2)
         
         return df_barras
     
@@ -403,9 +622,8 @@ def preparar_dados_barras_empilhadas(
         return pd.DataFrame()
 
 
-@memory_intensive_function
 def preparar_dados_sankey(
-    df_correlacao: pd.DataFrame, 
+    tabela_contingencia: pd.DataFrame, 
     var_x_plot: str, 
     var_y_plot: str
 ) -> Tuple[List[str], List[int], List[int], List[int]]:
@@ -414,8 +632,8 @@ def preparar_dados_sankey(
     
     Parâmetros:
     -----------
-    df_correlacao : DataFrame
-        DataFrame com dados correlacionados
+    tabela_contingencia : DataFrame
+        Contagens por combinação de categorias (ver preparar_tabela_contingencia)
     var_x_plot : str
         Nome da variável para o eixo X
     var_y_plot : str
@@ -427,32 +645,21 @@ def preparar_dados_sankey(
         (labels, source, target, value) - dados para o diagrama Sankey
     """
     # Verificar se temos dados válidos
-    if df_correlacao.empty or var_x_plot not in df_correlacao.columns or var_y_plot not in df_correlacao.columns:
+    if not _tabela_contingencia_valida(tabela_contingencia, var_x_plot, var_y_plot):
         print(f"Aviso: Dados insuficientes para criar diagrama Sankey")
         return [], [], [], []
     
     try:
-        # Contar ocorrências para cada combinação (método otimizado)
-        contagem = df_correlacao.groupby([var_x_plot, var_y_plot]).size().reset_index(name='Contagem')
-        
-        # Verificar se temos contagens para trabalhar
-        if contagem.empty:
-            return [], [], [], []
-        
-        # Criar listas para o diagrama Sankey
-        categorias_x = contagem[var_x_plot].unique().tolist()
-        categorias_y = contagem[var_y_plot].unique().tolist()
+        # Criar listas para o diagrama Sankey (nós na ordem das linhas e colunas)
+        categorias_x = tabela_contingencia.index.tolist()
+        categorias_y = tabela_contingencia.columns.tolist()
         labels = categorias_x + categorias_y
         
-        # Mapear valores para índices (uso de dicionário é mais eficiente)
-        source_indices = {val: i for i, val in enumerate(categorias_x)}
-        target_offset = len(source_indices)
-        target_indices = {val: i + target_offset for i, val in enumerate(categorias_y)}
-        
-        # Criar listas de source, target e value
-        source = [source_indices[s] for s in contagem[var_x_plot]]
-        target = [target_indices[t] for t in contagem[var_y_plot]]
-        value = contagem['Contagem'].tolist()
+        # Um link por célula da tabela, percorrida linha a linha
+        num_x, num_y = tabela_contingencia.shape
+        source = np.repeat(np.arange(num_x), num_y).tolist()
+        target = np.tile(np.arange(num_y) + num_x, num_x).tolist()
+        value = tabela_contingencia.to_numpy().ravel().tolist()
         
         return labels, source, target, value
     
@@ -461,6 +668,21 @@ def preparar_dados_sankey(
         return [], [], [], []
 
 
+def _tabela_contingencia_valida(tabela_contingencia: pd.DataFrame, var_x_plot: str, var_y_plot: str) -> bool:
+    """Verifica se a tabela tem contagens e eixos com os nomes esperados."""
+    return (
+        tabela_contingencia is not None
+        and not tabela_contingencia.empty
+        and tabela_contingencia.index.name == var_x_plot
+        and tabela_contingencia.columns.name == var_y_plot
+    )
+
+
+def _contagem_longa(tabela_contingencia: pd.DataFrame, var_x_plot: str, var_y_plot: str) -> pd.DataFrame:
+    """Converte a tabela de contingência para o formato longo (X, Y, Contagem)."""
+    return tabela_contingencia.stack(future_stack=True).rename('Contagem').reset_index()
+
+
 @optimized_cache(ttl=1800)
 def preparar_dados_grafico_aspectos_por_estado(
     microdados_estados: pd.DataFrame, 
@@ -505,26 +727,33 @@ def preparar_dados_grafico_aspectos_por_estado(
         return pd.DataFrame()
     
     try:
-        # Processar dados em lotes para economizar memória
-        resultados = _processar_aspectos_por_estado(
+        # Matriz UF × categoria em uma única contagem sobre os códigos inteiros
+        ufs, totais, contagens, categorias = _contar_aspecto_por_estado(
             microdados_estados, 
             aspecto_social, 
-            estados_selecionados, 
             variaveis_sociais
         )
         
-        # Criar DataFrame a partir dos resultados
-        df_resultado = pd.DataFrame(resultados)
+        # Linhas dos estados selecionados, na ordem da seleção (estados sem dados ficam de fora)
+        posicao_uf = {uf: i for i, uf in enumerate(ufs) if totais[i] > 0}
+        estados = [estado for estado in estados_selecionados if estado in posicao_uf]
+        if not estados:
+            return pd.DataFrame()
         
-        # Se não houver resultados, retornar DataFrame vazio
-        if df_resultado.empty:
-            return df_resultado
+        linhas = np.array([posicao_uf[estado] for estado in estados])
+        contagens = contagens[linhas]
+        percentuais = np.round(contagens / totais[linhas, None] * 100, 2)
         
         # Agrupar por região se solicitado
         if agrupar_por_regiao:
-            df_resultado = _agrupar_por_regiao(df_resultado, aspecto_social)
-        
-        # Otimizar tipos de dados
+            df_resultado = _agregar_por_regiao(estados, contagens, percentuais, categorias)
+        else:
+            df_resultado = pd.DataFrame({
+                'Estado': np.repeat(estados, len(categorias)),
+                'Categoria': np.tile(np.asarray(categorias, dtype=object), len(estados)),
+                'Quantidade': contagens.ravel(),
+                'Percentual': percentuais.ravel(),
+            })
         
         # Ordenar resultado para garantir consistência na visualização
         df_resultado = df_resultado.sort_values(['Estado', 'Categoria'])
@@ -536,152 +765,112 @@ def preparar_dados_grafico_aspectos_por_estado(
         return pd.DataFrame()
 
 
-@memory_intensive_function
-def _processar_aspectos_por_estado(
+def _contar_aspecto_por_estado(
     microdados: pd.DataFrame, 
     aspecto_social: str, 
-    estados: List[str], 
     variaveis_sociais: Dict[str, Dict[str, Any]]
-) -> List[Dict[str, Any]]:
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Any]]:
     """
-    Processa dados de aspectos sociais por estado em lotes.
-    Função auxiliar para melhorar legibilidade e manutenção.
+    Conta os candidatos por UF e categoria de um aspecto social com um único np.bincount.
     
     Parâmetros:
     -----------
     microdados : DataFrame
-        DataFrame com os dados
+        DataFrame com SG_UF_PROVA e o aspecto social (não é copiado nem alterado)
     aspecto_social : str
-        Nome do aspecto social a analisar
-    estados : List[str]
-        Lista de estados a processar
+        Nome do aspecto social
     variaveis_sociais : Dict
         Dicionário com mapeamentos das variáveis
         
     Retorna:
     --------
-    List[Dict[str, Any]]: Lista de resultados calculados
+    Tuple[ndarray, ndarray, ndarray, List]
+        (UFs, total de candidatos por UF, matriz UF × categoria, categorias); o
+        total inclui os candidatos sem categoria mapeada
     """
-    resultados = []
-    
-    # Criar cópia para não modificar o DataFrame original
-    df = microdados.copy()
-    
-    # Aplicar mapeamento para o aspecto social
-    coluna_plot = aplicar_mapeamento(df, aspecto_social, variaveis_sociais)
-    
-    # Agrupar por estado para processamento mais eficiente
-    try:
-        grupos_estado = df.groupby('SG_UF_PROVA')
-    except Exception as e:
-        print(f"Erro ao agrupar por estado: {e}")
-        return resultados
-    
-    # Obter categorias do aspecto social
-    if "mapeamento" in variaveis_sociais[aspecto_social]:
-        categorias = list(variaveis_sociais[aspecto_social]["mapeamento"].values())
+    # Rótulos do aspecto social: a coluna criada na carga ou, sem ela, uma série à parte
+    coluna_plot = coluna_rotulo(aspecto_social)
+    mapeamento = variaveis_sociais[aspecto_social].get("mapeamento")
+    if coluna_plot in microdados.columns:
+        rotulos = microdados[coluna_plot]
+    elif mapeamento:
+        rotulos = rotular_serie(microdados[aspecto_social], mapeamento)
     else:
-        categorias = df[coluna_plot].unique().tolist()
+        rotulos = microdados[aspecto_social].astype('category')
     
-    # Processar cada estado em lotes
-    for i, estado in enumerate(estados):
-        try:
-            # Tentar obter dados do estado atual
-            dados_estado = grupos_estado.get_group(estado)
-        except KeyError:
-            # Estado não encontrado no agrupamento, pular
-            continue
-        
-        if dados_estado.empty:
-            continue  # Pular estados sem dados
-        
-        # Calcular total de candidatos para o estado
-        total_estado = len(dados_estado)
-        
-        # Contar cada categoria para o estado atual
-        contagem_categorias = dados_estado[coluna_plot].value_counts()
-        
-        # Converter contagem para dicionário para acesso mais rápido
-        contagem_dict = contagem_categorias.to_dict()
-        
-        # Gerar resultados para cada categoria
-        for categoria in categorias:
-            quantidade = contagem_dict.get(categoria, 0)
-            percentual = (quantidade / total_estado * 100) if total_estado > 0 else 0
-            
-            resultados.append({
-                'Estado': estado,
-                'Categoria': categoria,
-                'Quantidade': quantidade,
-                'Percentual': round(percentual, 2)
-            })
-        
-        # Liberar memória a cada X estados processados
-        if (i+1) % CONFIG_PROCESSAMENTO['tamanho_lote_estados'] == 0:
-            release_memory()
+    codigos_categoria = rotulos.cat.codes.to_numpy(dtype='int64')
+    categorias = rotulos.cat.categories.tolist()
     
-    return resultados
+    uf = microdados['SG_UF_PROVA']
+    if isinstance(uf.dtype, pd.CategoricalDtype):
+        codigos_uf, ufs = uf.cat.codes.to_numpy(dtype='int64'), np.asarray(uf.cat.categories, dtype=object)
+    else:
+        codigos_uf, ufs = pd.factorize(uf)
+        ufs = np.asarray(ufs, dtype=object)
+    
+    # A coluna 0 guarda os candidatos sem categoria (código -1), que entram só no total
+    largura = len(categorias) + 1
+    validos = codigos_uf >= 0
+    matriz = np.bincount(
+        codigos_uf[validos] * largura + codigos_categoria[validos] + 1,
+        minlength=len(ufs) * largura
+    ).reshape(len(ufs), largura)
+    
+    return ufs.astype(str), matriz.sum(axis=1), matriz[:, 1:], categorias
 
 
-def _agrupar_por_regiao(
-    df: pd.DataFrame, 
-    aspecto_social: str
+def _agregar_por_regiao(
+    estados: List[str], 
+    contagens: np.ndarray, 
+    percentuais: np.ndarray, 
+    categorias: List[Any]
 ) -> pd.DataFrame:
     """
-    Agrupa os dados por região em vez de por estado.
-    Função auxiliar para melhorar legibilidade e manutenção.
+    Agrega a matriz estado × categoria por região.
+    
+    O percentual da região é a média simples dos percentuais dos seus estados
+    e a quantidade é a soma das quantidades; estados fora do mapeamento de
+    regiões são ignorados.
     
     Parâmetros:
     -----------
-    df : DataFrame
-        DataFrame com dados por estado
-    aspecto_social : str
-        Nome do aspecto social analisado
+    estados : List[str]
+        Estados das linhas das matrizes
+    contagens : ndarray
+        Quantidade de candidatos por estado e categoria
+    percentuais : ndarray
+        Percentual de cada categoria no estado
+    categorias : List
+        Categorias das colunas das matrizes
         
     Retorna:
     --------
-    DataFrame: DataFrame com dados agrupados por região
+    DataFrame: Colunas Estado (região), Categoria, Percentual e Quantidade
     """
     # Importar localmente para evitar importação circular
     from utils.helpers.mappings import get_mappings
-    from utils.helpers.regiao_utils import obter_regiao_do_estado
-    
-    mappings = get_mappings()
-    regioes_mapping = mappings['regioes_mapping']
-    
-    # Verificar se temos dados para processar
-    if df.empty:
-        return df
     
-    try:
-        # Criar um mapeamento de estado para região
-        estado_para_regiao = {estado: regiao 
-                             for regiao, estados in regioes_mapping.items() 
-                             for estado in estados}
-        
-        # Adicionar coluna de região
-        df_com_regiao = df.copy()
-        df_com_regiao['Região'] = df_com_regiao['Estado'].map(estado_para_regiao)
-        
-        # Agrupar por região e categoria
-        df_agrupado = df_com_regiao.groupby(['Região', 'Categoria'])['Percentual'].mean().reset_index()
-        
-        # Calcular quantidades somando para cada região/categoria
-        quantidades = df_com_regiao.groupby(['Região', 'Categoria'])['Quantidade'].sum().reset_index()
-        
-        # Juntar quantidades com percentuais
-        df_agrupado = df_agrupado.merge(quantidades, on=['Região', 'Categoria'])
-        
-        # Renomear coluna de região para manter compatibilidade
-        df_agrupado = df_agrupado.rename(columns={'Região': 'Estado'})
-        
-        # Otimizar tipo de dados da coluna de região - SUDESTE REMOVIDO
-        regioes = ['Norte', 'Nordeste', 'Centro-Oeste', 'Sul']
-        df_agrupado['Estado'] = pd.Categorical(df_agrupado['Estado'], categories=regioes)
-        df_agrupado['Percentual'] = df_agrupado['Percentual'].round(2)
-        
-        return df_agrupado
-    
-    except Exception as e:
-        print(f"Erro ao agrupar por região: {e}")
-        return df  # Retornar dados originais em caso de erro
\ No newline at end of file
+    regioes_mapping = get_mappings()['regioes_mapping']
+    regioes = list(regioes_mapping.keys())
+    posicao_regiao = {estado: i for i, ufs in enumerate(regioes_mapping.values()) for estado in ufs}
+    
+    indice_regiao = np.array([posicao_regiao.get(estado, -1) for estado in estados])
+    com_regiao = indice_regiao >= 0
+    indice_regiao = indice_regiao[com_regiao]
+    
+    # Somas por região (linhas) e categoria (colunas)
+    somas_percentuais = np.zeros((len(regioes), len(categorias)))
+    quantidades = np.zeros((len(regioes), len(categorias)), dtype='int64')
+    np.add.at(somas_percentuais, indice_regiao, percentuais[com_regiao])
+    np.add.at(quantidades, indice_regiao, contagens[com_regiao])
+    num_estados = np.bincount(indice_regiao, minlength=len(regioes))
+    
+    presentes = np.flatnonzero(num_estados)
+    medias = np.round(somas_percentuais[presentes] / num_estados[presentes, None], 2)
+    
+    return pd.DataFrame({
+        'Estado': pd.Categorical(np.repeat(np.asarray(regioes, dtype=object)[presentes], len(categorias)), categories=regioes),
+        'Categoria': np.tile(np.asarray(categorias, dtype=object), len(presentes)),
+        'Percentual': medias.ravel(),
+        'Quantidade': quantidades[presentes].ravel(),
+    })
@@ -1,9 +1,10 @@
 import pandas as pd
 import warnings
 from typing import Dict, List, Tuple, Optional, Any, Union
-from data.data_loader import calcular_seguro
-from utils.helpers.cache_utils import optimized_cache, memory_intensive_function, release_memory
-from utils.prepara_dados.validacao_dados import validar_completude_dados
+from data.data_loader import decodificar_notas
+from data.cubo_agregado import consultar_cubo
+from data.estatisticas_notas import calcular_medias_por_grupo
+from utils.helpers.cache_utils import optimized_cache
 from utils.helpers.mappings import get_mappings
 
 # Suprimir warnings específicos do pandas
@@ -24,7 +25,9 @@ def preparar_dados_comparativo(
     variavel_selecionada: str, 
     variaveis_categoricas: Dict[str, Dict[str, Any]], 
     colunas_notas: List[str], 
-    competencia_mapping: Dict[str, str]
+    competencia_mapping: Dict[str, str],
+    cubo: Optional[Dict[str, pd.DataFrame]] = None,
+    estados: Optional[List[str]] = None
 ) -> pd.DataFrame:
     """
     Prepara os dados para análise comparativa de desempenho por variável categórica.
@@ -41,6 +44,11 @@ def preparar_dados_comparativo(
         Lista das colunas que contêm as notas a serem analisadas
     competencia_mapping : Dict
         Mapeamento de códigos de competência para nomes legíveis
+    cubo : Dict[str, DataFrame], opcional
+        Cubo de agregados; quando informado (junto com os estados) e a variável
+        estiver nele, as médias saem do cubo sem varrer os microdados
+    estados : List[str], opcional
+        Estados da seleção, usados para consultar o cubo
         
     Retorna:
     --------
@@ -59,27 +67,6 @@ def preparar_dados_comparativo(
     if not colunas_notas_disponiveis:
         return pd.DataFrame(columns=['Categoria', 'Competência', 'Média'])
     
-    # Verificar se temos dados suficientes
-    colunas_necessarias = [variavel_selecionada] + colunas_notas_disponiveis
-    dados_validos, taxas_completude = validar_completude_dados(
-        microdados_full, 
-        colunas_necessarias,
-        limiar_completude=LIMIARES_PROCESSAMENTO['min_completude_dados']
-    )
-    
-    if not dados_validos:
-        # Continuar processamento com dados disponíveis
-        pass
-    # Selecionar apenas colunas necessárias para economizar memória
-    df_trabalho = microdados_full[colunas_necessarias].copy()
-    
-    # Remover registros com valores inválidos na variável categórica
-    df_trabalho = df_trabalho.dropna(subset=[variavel_selecionada])
-    
-    # Verificar se ainda temos dados após limpeza
-    if df_trabalho.empty:
-        return pd.DataFrame(columns=['Categoria', 'Competência', 'Média'])
-    
     # Determinar mapeamento de valores e nome da coluna a ser usada
     nome_coluna_mapeada = variavel_selecionada
     mapeamento = None
@@ -87,14 +74,25 @@ def preparar_dados_comparativo(
     if variavel_selecionada in variaveis_categoricas and "mapeamento" in variaveis_categoricas[variavel_selecionada]:
         mapeamento = variaveis_categoricas[variavel_selecionada]["mapeamento"]
     
-    # Calcular médias para cada combinação categoria-competência
-    resultados = _calcular_medias_por_categoria(
-        df_trabalho, 
-        nome_coluna_mapeada, 
-        colunas_notas_disponiveis,  # Usar apenas colunas disponíveis
-        competencia_mapping,
-        mapeamento
-    )
+    # Médias a partir do cubo de agregados (sem cópia nem varredura dos microdados)
+    if cubo and estados is not None and variavel_selecionada in cubo:
+        resultados = _calcular_medias_por_categoria_cubo(
+            cubo,
+            variavel_selecionada,
+            estados,
+            colunas_notas_disponiveis,
+            competencia_mapping,
+            mapeamento
+        )
+    else:
+        # Médias direto dos microdados (categorias ausentes são ignoradas, sem cópia de trabalho)
+        resultados = _calcular_medias_por_categoria(
+            microdados_full, 
+            nome_coluna_mapeada, 
+            colunas_notas_disponiveis,  # Usar apenas colunas disponíveis
+            competencia_mapping,
+            mapeamento
+        )
     
     df_resultados = pd.DataFrame(resultados)
     
@@ -126,25 +124,23 @@ def preparar_dados_comparativo(
         # Ordenar o DataFrame pela ordem categórica
         df_resultados = df_resultados.sort_values('Categoria')
     
-    # Liberar memória da cópia de trabalho
-    release_memory(df_trabalho)
-    
     # Retornar dataframe otimizado
     return df_resultados
 
 
-@memory_intensive_function
 def _calcular_medias_por_categoria(
     df: pd.DataFrame, 
     coluna_categoria: str, 
     colunas_notas: List[str], 
     competencia_mapping: Dict[str, str],
     mapeamento: Optional[Dict[Any, str]] = None
-) -> List[Dict[str, Any]]:
+) -> pd.DataFrame:
     """
     Calcula médias de desempenho para cada combinação de categoria e competência.
     
-    Função auxiliar para melhorar legibilidade e manutenção.
+    Todas as médias saem de uma única redução agrupada (ver
+    data.estatisticas_notas.calcular_medias_por_grupo), qualquer que seja o
+    número de categorias.
     
     Parâmetros:
     -----------
@@ -161,103 +157,81 @@ def _calcular_medias_por_categoria(
         
     Retorna:
     --------
-    List[Dict[str, Any]]: Lista de dicionários com os resultados calculados
+    DataFrame: Colunas Categoria, Competência e Média (categorias na ordem de
+    aparição; média 0 quando não há notas válidas)
     """
-    resultados = []
-    
     # Verificar se temos dados válidos
-    if df.empty:
-        return resultados
+    if df.empty or coluna_categoria not in df.columns:
+        return pd.DataFrame(columns=['Categoria', 'Competência', 'Média'])
     
-    # Verificar se a coluna categoria existe
-    if coluna_categoria not in df.columns:
-        return resultados
+    medias = calcular_medias_por_grupo(df, coluna_categoria, colunas_notas)
     
-    # Obter categorias únicas de forma eficiente
-    categorias_unicas = df[coluna_categoria].unique()
-    categorias_unicas = [cat for cat in categorias_unicas if pd.notna(cat)]  # Remover NaN
-    total_categorias = len(categorias_unicas)
+    # Rótulos resolvidos uma vez por valor distinto, não por linha
+    categorias = medias[coluna_categoria]
+    rotulos = {
+        categoria: mapeamento.get(categoria, str(categoria)) if mapeamento else str(categoria)
+        for categoria in categorias.unique()
+    }
     
-    if total_categorias == 0:
-        return resultados
+    return pd.DataFrame({
+        'Categoria': categorias.map(rotulos),
+        'Competência': medias['competencia'].map(lambda competencia: competencia_mapping.get(competencia, competencia)),
+        'Média': medias['media'].round(2)
+    })
+
+
+def _calcular_medias_por_categoria_cubo(
+    cubo: Dict[str, pd.DataFrame],
+    coluna_categoria: str,
+    estados: List[str],
+    colunas_notas: List[str],
+    competencia_mapping: Dict[str, str],
+    mapeamento: Optional[Dict[Any, str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Calcula médias por categoria e competência consultando o cubo de agregados.
     
-    # Verificar se há muitas categorias (pode afetar performance)
-    if total_categorias > CONFIG_PROCESSAMENTO['max_categorias_alerta']:
-        pass  # Continuar processamento mesmo com muitas categorias
+    Produz as mesmas linhas de _calcular_medias_por_categoria (como lista de dicionários).
     
-    # Agrupar dados para economizar memória e melhorar performance
-    if total_categorias <= CONFIG_PROCESSAMENTO['limiar_agrupamento']:
-        # Cálculo eficiente com agrupamento - adicionar observed=True para evitar warning
-        df_agrupado = df.groupby(coluna_categoria, observed=True)
+    Parâmetros:
+    -----------
+    cubo : Dict[str, DataFrame]
+        Cubo de agregados (UF × categoria × competência)
+    coluna_categoria : str
+        Nome da variável categórica
+    estados : List[str]
+        Estados da seleção
+    colunas_notas : List[str]
+        Lista das colunas que contêm as notas
+    competencia_mapping : Dict
+        Mapeamento de códigos de competência para nomes legíveis
+    mapeamento : Dict, opcional
+        Mapeamento de valores numéricos de categoria para textos legíveis
         
-        for categoria in categorias_unicas:
-            # Determinar o valor de exibição da categoria
-            categoria_exibicao = mapeamento.get(categoria, str(categoria)) if mapeamento else str(categoria)
-            
-            try:
-                # Obter grupo de dados para a categoria
-                dados_categoria = df_agrupado.get_group(categoria)
-                
-                # Calcular médias para cada competência
-                for competencia in colunas_notas:
-                    if competencia not in dados_categoria.columns:
-                        continue
-                        
-                    # Filtrar apenas notas válidas (maiores que zero)
-                    notas_validas = dados_categoria[dados_categoria[competencia] > 0][competencia]
-                    
-                    if len(notas_validas) == 0:
-                        # Se não há notas válidas, usar 0 como média
-                        media_comp = 0
-                    else:
-                        # Calcular média ou usar zero se não houver notas válidas
-                        media_comp = calcular_seguro(notas_validas, 'media')
-                    
-                    competencia_nome = competencia_mapping.get(competencia, competencia)
-                    
-                    resultados.append({
-                        'Categoria': categoria_exibicao,
-                        'Competência': competencia_nome,
-                        'Média': round(media_comp, 2)
-                    })
-            except KeyError:
-                # Categoria pode não existir no agrupamento (caso raro)
+    Retorna:
+    --------
+    List[Dict[str, Any]]: Lista de dicionários com os resultados calculados
+    """
+    consulta = consultar_cubo(cubo, estados, coluna_categoria, agrupar_por=('categoria', 'competencia'))
+    if consulta.empty:
+        return []
+    
+    medias = consulta.set_index(['categoria', 'competencia'])['media']
+    
+    resultados = []
+    for categoria in consulta['categoria'].unique():
+        categoria_exibicao = mapeamento.get(categoria, str(categoria)) if mapeamento else str(categoria)
+        
+        for competencia in colunas_notas:
+            if (categoria, competencia) not in medias.index:
                 continue
-    else:
-        # Método alternativo para muitas categorias (processamento em lotes)
-        for i, categoria in enumerate(categorias_unicas):
-            # Filtrar dados para a categoria atual
-            dados_categoria = df[df[coluna_categoria] == categoria]
-            
-            # Determinar o valor de exibição da categoria
-            categoria_exibicao = mapeamento.get(categoria, str(categoria)) if mapeamento else str(categoria)
             
-            # Calcular médias para cada competência
-            for competencia in colunas_notas:
-                if competencia not in dados_categoria.columns:
-                    continue
-                    
-                # Filtrar apenas notas válidas (maiores que zero)
-                notas_validas = dados_categoria[dados_categoria[competencia] > 0][competencia]
-                
-                if len(notas_validas) == 0:
-                    # Se não há notas válidas, usar 0 como média
-                    media_comp = 0
-                else:
-                    # Calcular média ou usar zero se não houver notas válidas
-                    media_comp = calcular_seguro(notas_validas, 'media')
-                
-                competencia_nome = competencia_mapping.get(competencia, competencia)
-                
-                resultados.append({
-                    'Categoria': categoria_exibicao,
-                    'Competência': competencia_nome,
-                    'Média': round(media_comp, 2)
-                })
-            
-            # Liberar memória a cada lote processado
-            if (i+1) % CONFIG_PROCESSAMENTO['tamanho_lote'] == 0:
-                release_memory(dados_categoria)
+            # Categorias sem notas válidas têm média 0, como no cálculo sobre os microdados
+            resultados.append({
+                'Categoria': categoria_exibicao,
+                'Competência': competencia_mapping.get(competencia, competencia),
+                'Média': round(float(medias.loc[(categoria, competencia)]), 2)
+            })
     
     return resultados
 
@@ -544,6 +518,9 @@ def filtrar_dados_scatter(
     # Remover valores NaN nos eixos
     df = df.dropna(subset=[eixo_x, eixo_y])
     
+    # Notas compactas voltam para pontos (eixos, regressão e hover)
+    df = df.assign(**{eixo: decodificar_notas(df[eixo]) for eixo in {eixo_x, eixo_y}})
+    
     # Limitar número de amostras para performance
     if len(df) > max_amostras:
         df = df.sample(n=max_amostras, random_state=42)
@@ -590,17 +567,14 @@ def preparar_dados_grafico_linha_desempenho(
     if 'SG_UF_PROVA' not in microdados_estados.columns:
         return pd.DataFrame()
     
-    # Usar processamento em lotes para reduzir uso de memória
-    resultados = _processar_estados_em_lotes(
+    # Médias de todos os estados e áreas em uma única redução agrupada
+    df_final = _calcular_medias_por_estado(
         microdados_estados, 
         estados_selecionados, 
         colunas_notas, 
         competencia_mapping
     )
     
-    # Criar DataFrame otimizado
-    df_final = pd.DataFrame(resultados)
-    
     # Se não houver dados, retornar DataFrame vazio
     if df_final.empty:
         return df_final
@@ -615,15 +589,14 @@ def preparar_dados_grafico_linha_desempenho(
     return df_final
 
 
-@memory_intensive_function
-def _processar_estados_em_lotes(
+def _calcular_medias_por_estado(
     microdados: pd.DataFrame, 
     estados: List[str], 
     colunas_notas: List[str], 
     competencia_mapping: Dict[str, str]
-) -> List[Dict[str, Any]]:
+) -> pd.DataFrame:
     """
-    Processa estados em lotes para calcular médias de desempenho.
+    Calcula as médias de cada estado por área e a média geral (média das áreas).
     Função auxiliar para melhorar legibilidade e manutenção.
     
     Parâmetros:
@@ -639,68 +612,22 @@ def _processar_estados_em_lotes(
         
     Retorna:
     --------
-    List[Dict[str, Any]]: Lista de resultados calculados
+    DataFrame: Colunas Estado, Área e Média (estados sem candidatos ficam de fora)
     """
-    resultados = []
-    total_estados = len(estados)
+    medias = calcular_medias_por_grupo(microdados, 'SG_UF_PROVA', colunas_notas)
+    if medias.empty:
+        return pd.DataFrame(columns=['Estado', 'Área', 'Média'])
     
-    # Agrupar por estado para processamento mais eficiente
-    try:
-        grupos_estado = microdados.groupby('SG_UF_PROVA')
-    except Exception as e:
-        return resultados
-    
-    # Processar cada estado
-    for i, estado in enumerate(estados):
-        try:
-            # Tentar obter dados do estado atual
-            dados_estado = grupos_estado.get_group(estado)
-        except KeyError:
-            # Estado não encontrado no agrupamento, pular
-            continue
-        
-        if len(dados_estado) == 0:
-            continue  # Pular estados sem dados
-        
-        # Armazenar médias para calcular média geral
-        medias_estado = []
-        
-        # Calcular média para cada área de conhecimento
-        for area in colunas_notas:
-            if area not in dados_estado.columns:
-                continue
-                
-            # Filtrar notas válidas de forma mais eficiente
-            notas = dados_estado[area].values
-            notas_validas = notas[notas > 0]
-            
-            # Calcular média com função otimizada
-            media_area = calcular_seguro(notas_validas, 'media')
-            media_area = round(media_area, 2)
-            
-            # Adicionar ao resultado
-            resultados.append({
-                'Estado': estado,
-                'Área': competencia_mapping[area],
-                'Média': media_area
-            })
-            
-            # Armazenar para média geral
-            medias_estado.append(media_area)
-        
-        # Adicionar média geral para o estado
-        if medias_estado:
-            resultados.append({
-                'Estado': estado,
-                'Área': 'Média Geral',
-                'Média': round(sum(medias_estado) / len(medias_estado), 2)
-            })
-        
-        # Liberar memória a cada X estados processados
-        if (i+1) % CONFIG_PROCESSAMENTO['tamanho_lote_estados'] == 0:
-            release_memory()
+    # Matriz estado × área, na ordem dos estados solicitados
+    tabela = medias.pivot(index='SG_UF_PROVA', columns='competencia', values='media')
+    tabela = tabela.reindex(index=[estado for estado in estados if estado in tabela.index],
+                            columns=medias['competencia'].unique()).round(2)
+    tabela.columns = [competencia_mapping[area] for area in tabela.columns]
     
-    return resultados
+    # Média geral: média das médias (já arredondadas) das áreas
+    tabela['Média Geral'] = tabela.mean(axis=1).round(2)
+    
+    return tabela.rename_axis(index='Estado', columns='Área').stack().rename('Média').reset_index()
 
 
 def _otimizar_tipos_dados(
@@ -786,8 +713,8 @@ def _agrupar_por_regiao(df: pd.DataFrame) -> pd.DataFrame:
         # Renomear coluna de região para manter compatibilidade
         df_agrupado = df_agrupado.rename(columns={'Região': 'Estado'})
         
-        # Otimizar tipo de dados da coluna de região - SUDESTE REMOVIDO
-        regioes = ['Norte', 'Nordeste', 'Centro-Oeste', 'Sul']
+        # Otimizar tipo de dados da coluna de região
+        regioes = list(regioes_mapping.keys())
         df_agrupado['Estado'] = pd.Categorical(df_agrupado['Estado'], categories=regioes)
         
         return df_agrupado
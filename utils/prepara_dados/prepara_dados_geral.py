@@ -1,6 +1,10 @@
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Optional, Any
-from data.data_loader import calcular_seguro
+from data.data_loader import calcular_seguro, decodificar_notas
+from data.cubo_agregado import consultar_cubo, medias_estado_competencia
+from data.estatisticas_notas import calcular_estatisticas_notas
+from data.histograma_notas import LARGURA_FAIXA, contagens_histograma, mediana_histograma
 from utils.helpers.cache_utils import optimized_cache, memory_intensive_function, release_memory
 from utils.helpers.regiao_utils import obter_regiao_do_estado
 from utils.helpers.mappings import get_mappings
@@ -47,9 +51,9 @@ def preparar_dados_histograma(
         # Filtrar valores inválidos (notas -1 e 0) para análises mais precisas
         df_valido = df[(df[coluna] > 0) & (df[coluna].notna())].copy()
         
-        # Converter para float32 para economizar memória
+        # Converter para float32 (em pontos, mesmo se a nota estiver compacta) para economizar memória
         if not df_valido.empty:
-            df_valido[coluna] = df_valido[coluna].astype('float32')
+            df_valido[coluna] = decodificar_notas(df_valido[coluna], 'float32').astype('float32')
             
         # Otimizar tipos de dados
         
@@ -62,6 +66,69 @@ def preparar_dados_histograma(
         return pd.DataFrame(), coluna, competencia_mapping.get(coluna, coluna)
 
 
+@optimized_cache(ttl=1800)
+def preparar_dados_histograma_agregado(
+    contagens: np.ndarray, 
+    num_barras: int = 30
+) -> pd.DataFrame:
+    """
+    Reagrupa um histograma de notas pré-calculado nas barras do gráfico.
+    
+    As contagens por faixa de 0,1 ponto (já combinadas entre os estados
+    selecionados) são somadas em cerca de num_barras barras de largura
+    "redonda" (de 1 ponto para cima), como o agrupamento automático do
+    plotly faria com os microdados. Assim o gráfico recebe apenas as
+    barras, nunca as notas.
+    
+    Parâmetros:
+    -----------
+    contagens : np.ndarray
+        Contagens por faixa de nota (ver data.histograma_notas.contagens_histograma)
+    num_barras : int, default=30
+        Número aproximado de barras desejado
+        
+    Retorna:
+    --------
+    DataFrame: Colunas Inicio, Fim, Contagem e Percentual (percentual sobre o total)
+    """
+    colunas_resultado = ['Inicio', 'Fim', 'Contagem', 'Percentual']
+    
+    contagens = np.asarray(contagens, dtype='int64')
+    total = int(contagens.sum())
+    if total == 0:
+        return pd.DataFrame(columns=colunas_resultado)
+    
+    try:
+        # Faixas ocupadas (primeira e última com contagem)
+        ocupadas = np.flatnonzero(contagens)
+        primeira, ultima = int(ocupadas[0]), int(ocupadas[-1])
+        
+        # Menor largura "redonda" (em pontos) que gera no máximo num_barras barras
+        faixas_por_barra = next(
+            (k for k in (int(round(pontos / LARGURA_FAIXA)) for pontos in (1, 2, 5, 10, 20, 25, 50, 100, 200))
+             if (ultima - primeira + 1) / k <= num_barras),
+            len(contagens)
+        )
+        
+        inicio = (primeira // faixas_por_barra) * faixas_por_barra
+        indices_barra = (np.arange(inicio, ultima + 1) - inicio) // faixas_por_barra
+        contagem_barras = np.bincount(indices_barra, weights=contagens[inicio:ultima + 1]).astype('int64')
+        
+        # Arredondar para 0,1 ponto evita resíduos de ponto flutuante nas bordas
+        largura = round(faixas_por_barra * LARGURA_FAIXA, 1)
+        inicios = np.round((inicio + faixas_por_barra * np.arange(len(contagem_barras))) * LARGURA_FAIXA, 1)
+        
+        return pd.DataFrame({
+            'Inicio': inicios,
+            'Fim': inicios + largura,
+            'Contagem': contagem_barras,
+            'Percentual': contagem_barras / total * 100
+        })
+    except Exception as e:
+        print(f"Erro ao reagrupar histograma de notas: {e}")
+        return pd.DataFrame(columns=colunas_resultado)
+
+
 @optimized_cache(ttl=1800)
 def preparar_dados_grafico_faltas(
     microdados_estados: pd.DataFrame, 
@@ -129,7 +196,141 @@ def preparar_dados_grafico_faltas(
         return pd.DataFrame(columns=['Estado', 'Tipo de Falta', 'Percentual de Faltas'])
 
 
-@memory_intensive_function
+# Códigos de TP_PRESENCA_*: 0 = faltou, 1 = presente, 2 = eliminado; em TP_PRESENCA_GERAL,
+# 0 = faltou nos dois dias, 1 = só no primeiro, 2 = só no segundo, 3 = presente nos dois
+NUM_CODIGOS_PRESENCA = 4
+
+CATEGORIAS_FALTAS = {
+    0: 'Faltou nos dois dias',
+    1: 'Faltou no segundo dia',
+    2: 'Faltou no primeiro dia'
+}
+
+CATEGORIAS_EVASAO = {
+    3: 'Presentes',
+    2: 'Faltantes Dia 1',
+    1: 'Faltantes Dia 2',
+    0: 'Faltantes Ambos'
+}
+
+
+@optimized_cache(ttl=3600)
+def calcular_matriz_presenca(
+    df: pd.DataFrame,
+    grupos: Tuple[str, ...],
+    colunas_presenca: Tuple[str, ...] = ('TP_PRESENCA_GERAL',),
+    coluna_grupo: str = 'SG_UF_PROVA'
+) -> pd.DataFrame:
+    """
+    Conta, em uma única passada, os candidatos por grupo e código de presença.
+    
+    Parâmetros:
+    -----------
+    df : DataFrame
+        DataFrame com os microdados
+    grupos : Tuple[str, ...]
+        Valores de coluna_grupo que formam as linhas da matriz, nesta ordem
+    colunas_presenca : Tuple[str, ...], default=('TP_PRESENCA_GERAL',)
+        Colunas de presença contadas (TP_PRESENCA_GERAL e/ou TP_PRESENCA_* por área)
+    coluna_grupo : str, default='SG_UF_PROVA'
+        Coluna de agrupamento (UF, município, ...)
+        
+    Retorna:
+    --------
+    DataFrame: Uma linha por grupo, com a coluna 'Total' e as colunas
+    '<coluna>_<código>' (códigos 0 a NUM_CODIGOS_PRESENCA - 1)
+    """
+    nomes_colunas = ['Total'] + [
+        f"{coluna}_{codigo}" for coluna in colunas_presenca for codigo in range(NUM_CODIGOS_PRESENCA)
+    ]
+    indice = pd.Index(list(grupos), name=coluna_grupo)
+    
+    if df is None or df.empty or coluna_grupo not in df.columns:
+        return pd.DataFrame(0, index=indice, columns=nomes_colunas, dtype='int64')
+    
+    # Linha da matriz de cada candidato (-1 para grupos fora da seleção)
+    codigos_grupo, valores_grupo = _codificar_coluna(df[coluna_grupo])
+    linha_por_valor = np.append(indice.get_indexer(valores_grupo), -1)
+    linhas = linha_por_valor[codigos_grupo]
+    na_selecao = linhas >= 0
+    
+    num_grupos = len(indice)
+    matriz = {'Total': np.bincount(linhas[na_selecao], minlength=num_grupos)}
+    
+    for coluna in colunas_presenca:
+        if coluna not in df.columns:
+            contagens = np.zeros((num_grupos, NUM_CODIGOS_PRESENCA), dtype='int64')
+        else:
+            # Código de presença de cada valor distinto (-1 para ausentes ou fora de 0..3)
+            codigos_coluna, valores_coluna = _codificar_coluna(df[coluna])
+            valores_numericos = pd.to_numeric(pd.Series(valores_coluna), errors='coerce').to_numpy(dtype='float64')
+            validos_valor = (valores_numericos >= 0) & (valores_numericos < NUM_CODIGOS_PRESENCA)
+            codigo_por_valor = np.append(np.where(validos_valor, np.nan_to_num(valores_numericos), -1), -1).astype('int64')
+            codigos = codigo_por_valor[codigos_coluna]
+            
+            validos = na_selecao & (codigos >= 0)
+            celulas = linhas[validos] * NUM_CODIGOS_PRESENCA + codigos[validos]
+            contagens = np.bincount(celulas, minlength=num_grupos * NUM_CODIGOS_PRESENCA).reshape(
+                num_grupos, NUM_CODIGOS_PRESENCA
+            )
+        
+        for codigo in range(NUM_CODIGOS_PRESENCA):
+            matriz[f"{coluna}_{codigo}"] = contagens[:, codigo]
+    
+    return pd.DataFrame(matriz, index=indice)[nomes_colunas]
+
+
+def _codificar_coluna(serie: pd.Series) -> Tuple[np.ndarray, Any]:
+    """
+    Códigos inteiros e valores distintos de uma coluna (ausentes com código -1).
+    Colunas categóricas reaproveitam os códigos já existentes, sem nova passada de hash.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories
+    return pd.factorize(serie)
+
+
+def _tabela_percentuais_presenca(
+    matriz: pd.DataFrame,
+    coluna: str,
+    categorias: Dict[int, str],
+    nome_categoria: str,
+    nome_percentual: str
+) -> pd.DataFrame:
+    """
+    Converte a matriz de presença em formato longo (grupo × categoria), com percentuais sobre o total do grupo.
+    
+    Parâmetros:
+    -----------
+    matriz : DataFrame
+        Resultado de calcular_matriz_presenca
+    coluna : str
+        Coluna de presença usada
+    categorias : Dict[int, str]
+        Código -> nome da categoria, na ordem desejada
+    nome_categoria, nome_percentual : str
+        Nomes das colunas de categoria e de percentual no resultado
+        
+    Retorna:
+    --------
+    DataFrame: Colunas Estado, nome_categoria, nome_percentual, Contagem e Total
+    (grupos sem candidatos ficam de fora)
+    """
+    matriz = matriz[matriz['Total'] > 0]
+    
+    contagens = matriz[[f"{coluna}_{codigo}" for codigo in categorias]].to_numpy()
+    totais = matriz['Total'].to_numpy()
+    num_categorias = len(categorias)
+    
+    return pd.DataFrame({
+        'Estado': np.repeat(matriz.index.to_numpy(), num_categorias),
+        nome_categoria: np.tile(list(categorias.values()), len(matriz)),
+        nome_percentual: np.round(contagens / totais[:, None] * 100, 2).ravel(),
+        'Contagem': contagens.ravel(),
+        'Total': np.repeat(totais, num_categorias)
+    })
+
+
 def _calcular_faltas_por_estado(
     df: pd.DataFrame, 
     estados: List[str]
@@ -149,8 +350,6 @@ def _calcular_faltas_por_estado(
     --------
     DataFrame: Dados de faltas por estado
     """
-    dados_grafico = []
-    
     # Verificar se temos dados válidos
     if df is None or df.empty:
         print("Erro: DataFrame vazio em _calcular_faltas_por_estado")
@@ -160,70 +359,14 @@ def _calcular_faltas_por_estado(
         print("Erro: Lista de estados vazia")
         return pd.DataFrame(columns=['Estado', 'Tipo de Falta', 'Percentual de Faltas'])
     
-    # Processamento mais eficiente usando agrupamento
-    try:
-        grupos_estado = df.groupby('SG_UF_PROVA', observed=True)
-        print(f"Agrupamento criado com {len(grupos_estado)} grupos")
-    except Exception as e:
-        print(f"Erro ao agrupar por estado: {e}")
-        return pd.DataFrame(columns=['Estado', 'Tipo de Falta', 'Percentual de Faltas'])
-        
-    # Processar cada estado selecionado
-    estados_processados = 0
-    for i, estado in enumerate(estados):
-        try:
-            # Obter dados do estado atual
-            dados_estado = grupos_estado.get_group(estado)
-            estados_processados += 1
-        except KeyError:
-            # Estado não encontrado no agrupamento, pular
-            print(f"Aviso: Estado '{estado}' não encontrado nos dados agrupados")
-            continue
-        except Exception as e:
-            print(f"Erro ao processar estado '{estado}': {e}")
-            continue
-            
-        total_candidatos = len(dados_estado)
-        
-        if total_candidatos == 0:
-            print(f"Aviso: Nenhum candidato encontrado para o estado '{estado}'")
-            continue  # Pular estados sem candidatos
-        
-        # Contagem de faltas por categoria
-        categorias_faltas = {
-            0: {'nome': 'Faltou nos dois dias', 'contagem': 0},
-            1: {'nome': 'Faltou no segundo dia', 'contagem': 0},
-            2: {'nome': 'Faltou no primeiro dia', 'contagem': 0}
-        }
-        
-        # Contagem eficiente
-        try:
-            valores_presenca = dados_estado['TP_PRESENCA_GERAL'].value_counts()
-        except Exception as e:
-            print(f"Erro ao contar presenças para estado '{estado}': {e}")
-            continue
-        
-        for codigo, info in categorias_faltas.items():
-            contagem = valores_presenca.get(codigo, 0)
-            percentual = (contagem / total_candidatos * 100) if total_candidatos > 0 else 0
-            
-            dados_grafico.append({
-                'Estado': estado,
-                'Tipo de Falta': info['nome'],
-                'Percentual de Faltas': round(percentual, 2),
-                'Contagem': contagem,
-                'Total': total_candidatos
-            })
-            
-        # Liberar memória a cada lote de estados processados
-        if (i+1) % CONFIG_PROCESSAMENTO['tamanho_lote_estados'] == 0:
-            release_memory(dados_estado)
+    matriz = calcular_matriz_presenca(df, tuple(estados))
+    df_resultado = _tabela_percentuais_presenca(
+        matriz, 'TP_PRESENCA_GERAL', CATEGORIAS_FALTAS, 'Tipo de Falta', 'Percentual de Faltas'
+    )
     
+    estados_processados = df_resultado['Estado'].nunique()
     print(f"Processamento concluído: {estados_processados} estados processados de {len(estados)} solicitados")
     
-    # Criar DataFrame otimizado
-    df_resultado = pd.DataFrame(dados_grafico)
-    
     # Converter para categorias para economia de memória
     if not df_resultado.empty:
         df_resultado['Estado'] = pd.Categorical(df_resultado['Estado'], categories=estados)
@@ -397,7 +540,8 @@ def preparar_dados_media_geral_estados(
     microdados_estados: pd.DataFrame, 
     estados_selecionados: List[str], 
     colunas_notas: List[str], 
-    agrupar_por_regiao: bool = False
+    agrupar_por_regiao: bool = False,
+    cubo: Optional[Dict[str, pd.DataFrame]] = None
 ) -> pd.DataFrame:
     """
     Prepara dados para visualização da média geral por estado ou região.
@@ -412,11 +556,16 @@ def preparar_dados_media_geral_estados(
         Lista de colunas com notas a serem analisadas
     agrupar_por_regiao : bool, default=False
         Se True, agrupa os dados por região em vez de mostrar por estado
+    cubo : Dict[str, DataFrame], opcional
+        Cubo de agregados; quando informado, as médias saem dele sem varrer os microdados
         
     Retorna:
     --------
     DataFrame: Dados de média geral por estado ou região
     """
+    if cubo:
+        return _preparar_media_geral_cubo(cubo, estados_selecionados, colunas_notas, agrupar_por_regiao)
+    
     # Verificar se temos dados válidos
     if microdados_estados is None or microdados_estados.empty:
         print("Aviso: DataFrame de microdados vazio")
@@ -469,6 +618,48 @@ def preparar_dados_media_geral_estados(
         return pd.DataFrame(columns=['Local', 'Média Geral'])
 
 
+def _preparar_media_geral_cubo(
+    cubo: Dict[str, pd.DataFrame],
+    estados_selecionados: List[str],
+    colunas_notas: List[str],
+    agrupar_por_regiao: bool
+) -> pd.DataFrame:
+    """
+    Calcula a média geral por estado (média das médias por competência) a partir do cubo.
+    
+    Parâmetros:
+    -----------
+    cubo : Dict[str, DataFrame]
+        Cubo de agregados (UF × competência)
+    estados_selecionados : List[str]
+        Lista de estados selecionados para análise
+    colunas_notas : List[str]
+        Lista de colunas com notas a serem analisadas
+    agrupar_por_regiao : bool
+        Se True, agrupa os dados por região em vez de mostrar por estado
+        
+    Retorna:
+    --------
+    DataFrame: Dados de média geral por estado ou região
+    """
+    try:
+        matriz = medias_estado_competencia(cubo, estados_selecionados, colunas_notas)
+        media_geral = matriz.mean(axis=1).dropna()
+        
+        df_resultado = pd.DataFrame({
+            'Local': media_geral.index.astype(str),
+            'Média Geral': media_geral.round(2).to_numpy()
+        })
+        
+        if agrupar_por_regiao and not df_resultado.empty:
+            df_resultado = _agrupar_estados_por_regiao(df_resultado)
+            
+        return df_resultado
+    except Exception as e:
+        print(f"Erro ao preparar média geral pelo cubo de agregados: {e}")
+        return pd.DataFrame(columns=['Local', 'Média Geral'])
+
+
 def _agrupar_estados_por_regiao(df: pd.DataFrame) -> pd.DataFrame:
     """
     Agrupa estados por região, calculando a média dos valores numéricos.
@@ -542,56 +733,11 @@ def preparar_dados_evasao(
         return pd.DataFrame(columns=['Estado', 'Métrica', 'Valor'])
     
     try:
-        resultado = []
-        
-        # Processamento eficiente usando agrupamento
-        grupos_estado = microdados_estados.groupby('SG_UF_PROVA')
-        
-        for estado in estados_selecionados:
-            try:
-                dados_estado = grupos_estado.get_group(estado)
-            except KeyError:
-                continue  # Estado não encontrado, pular
-                
-            total_candidatos = len(dados_estado)
-            
-            # Contar presença/ausência
-            presenca_counts = dados_estado['TP_PRESENCA_GERAL'].value_counts()
-            
-            # Faltou nos dois dias (código 0)
-            faltas_ambos = presenca_counts.get(0, 0)
-            
-            # Faltou no segundo dia (código 1 - presente apenas no primeiro)
-            faltas_dia2 = presenca_counts.get(1, 0)
-            
-            # Faltou no primeiro dia (código 2 - presente apenas no segundo)
-            faltas_dia1 = presenca_counts.get(2, 0)
-            
-            # Presente nos dois dias (código 3)
-            presentes = presenca_counts.get(3, 0)
-            
-            # Calcular percentuais
-            if total_candidatos > 0:
-                percentual_faltas_ambos = (faltas_ambos / total_candidatos) * 100
-                percentual_faltas_dia1 = (faltas_dia1 / total_candidatos) * 100
-                percentual_faltas_dia2 = (faltas_dia2 / total_candidatos) * 100
-                percentual_presentes = (presentes / total_candidatos) * 100
-            else:
-                percentual_faltas_ambos = 0
-                percentual_faltas_dia1 = 0
-                percentual_faltas_dia2 = 0
-                percentual_presentes = 0
-                
-            # Adicionar dados ao resultado
-            resultado.extend([
-                {'Estado': estado, 'Métrica': 'Presentes', 'Valor': round(percentual_presentes, 2), 'Contagem': presentes},
-                {'Estado': estado, 'Métrica': 'Faltantes Dia 1', 'Valor': round(percentual_faltas_dia1, 2), 'Contagem': faltas_dia1},
-                {'Estado': estado, 'Métrica': 'Faltantes Dia 2', 'Valor': round(percentual_faltas_dia2, 2), 'Contagem': faltas_dia2},
-                {'Estado': estado, 'Métrica': 'Faltantes Ambos', 'Valor': round(percentual_faltas_ambos, 2), 'Contagem': faltas_ambos}
-            ])
-        
-        # Criar DataFrame otimizado
-        df_resultado = pd.DataFrame(resultado)
+        # Mesma matriz UF × presença usada no gráfico de faltas
+        matriz = calcular_matriz_presenca(microdados_estados, tuple(estados_selecionados))
+        df_resultado = _tabela_percentuais_presenca(
+            matriz, 'TP_PRESENCA_GERAL', CATEGORIAS_EVASAO, 'Métrica', 'Valor'
+        ).drop(columns='Total')
         
         # Converter para categorias para economia de memória
         if not df_resultado.empty:
@@ -600,6 +746,8 @@ def preparar_dados_evasao(
                 df_resultado['Métrica'], 
                 categories=['Presentes', 'Faltantes Dia 1', 'Faltantes Dia 2', 'Faltantes Ambos']
             )
+        
+        return df_resultado
             
     except Exception as e:
         print(f"Erro ao preparar dados de evasão: {e}")
@@ -611,7 +759,9 @@ def preparar_dados_comparativo_areas(
     microdados_estados: pd.DataFrame,
     estados_selecionados: List[str],
     colunas_notas: List[str],
-    competencia_mapping: Dict[str, str]
+    competencia_mapping: Dict[str, str],
+    cubo: Optional[Dict[str, pd.DataFrame]] = None,
+    histogramas: Optional[Dict[str, pd.DataFrame]] = None
 ) -> pd.DataFrame:
     """
     Prepara dados para comparativo de desempenho entre diferentes áreas de conhecimento.
@@ -626,11 +776,22 @@ def preparar_dados_comparativo_areas(
         Lista de colunas com notas a serem analisadas
     competencia_mapping : Dict[str, str]
         Mapeamento entre códigos de competência e nomes legíveis
+    cubo : Dict[str, DataFrame], opcional
+        Cubo de agregados; quando informado, média, desvio, mínimo e máximo
+        saem dele sem varrer os microdados
+    histogramas : Dict[str, DataFrame], opcional
+        Histogramas de notas; quando informados junto com o cubo, a mediana
+        sai deles (erro máximo de 1 ponto) em vez dos microdados
         
     Retorna:
     --------
     DataFrame: Dados de desempenho médio por área de conhecimento
     """
+    if cubo:
+        return _preparar_comparativo_areas_cubo(
+            cubo, microdados_estados, estados_selecionados, colunas_notas, competencia_mapping, histogramas
+        )
+    
     # Verificar se temos dados válidos
     if microdados_estados is None or microdados_estados.empty:
         print("Aviso: DataFrame de microdados vazio")
@@ -642,41 +803,97 @@ def preparar_dados_comparativo_areas(
         print(f"Aviso: Colunas ausentes: {colunas_ausentes}")
     
     try:
-        resultado = []
+        # Estatísticas de todas as áreas em uma única passada sobre as notas válidas (> 0)
+        estatisticas = calcular_estatisticas_notas(microdados_estados, colunas_notas, quantis=[0.5])
+        estatisticas = estatisticas[estatisticas['n'] > 0]
+        
+        resultado = [
+            {
+                'Area': competencia_mapping.get(coluna, coluna),
+                'Media': round(float(linha['media']), 2),
+                'DesvioPadrao': round(float(linha['desvio_padrao']), 2),
+                'Mediana': round(float(linha['q0.5']), 2),
+                'Minimo': round(float(linha['minimo']), 2),
+                'Maximo': round(float(linha['maximo']), 2)
+            }
+            for coluna, linha in estatisticas.iterrows()
+        ]
+        
+        # Criar DataFrame
+        df_resultado = pd.DataFrame(resultado)
         
+        # Ordenar por média decrescente
+        if not df_resultado.empty:
+            df_resultado = df_resultado.sort_values('Media', ascending=False)
+            
+        return df_resultado
+    except Exception as e:
+        print(f"Erro ao preparar dados comparativos entre áreas: {e}")
+        return pd.DataFrame(columns=['Area', 'Media', 'DesvioPadrao', 'Mediana'])
+
+
+def _preparar_comparativo_areas_cubo(
+    cubo: Dict[str, pd.DataFrame],
+    microdados_estados: Optional[pd.DataFrame],
+    estados_selecionados: List[str],
+    colunas_notas: List[str],
+    competencia_mapping: Dict[str, str],
+    histogramas: Optional[Dict[str, pd.DataFrame]] = None
+) -> pd.DataFrame:
+    """
+    Monta o comparativo entre áreas a partir do cubo de agregados.
+    
+    Parâmetros:
+    -----------
+    cubo : Dict[str, DataFrame]
+        Cubo de agregados (UF × competência)
+    microdados_estados : DataFrame, opcional
+        Microdados filtrados, usados para a mediana quando não há histogramas
+    estados_selecionados : List[str]
+        Lista de estados selecionados para análise
+    colunas_notas : List[str]
+        Lista de colunas com notas a serem analisadas
+    competencia_mapping : Dict[str, str]
+        Mapeamento entre códigos de competência e nomes legíveis
+    histogramas : Dict[str, DataFrame], opcional
+        Histogramas de notas, usados para a mediana
+        
+    Retorna:
+    --------
+    DataFrame: Dados de desempenho médio por área de conhecimento
+    """
+    try:
+        consulta = consultar_cubo(cubo, estados_selecionados).set_index('competencia')
+        
+        resultado = []
         for coluna in colunas_notas:
-            if coluna not in microdados_estados.columns:
+            if coluna not in consulta.index or consulta.at[coluna, 'n'] == 0:
                 continue
-                
-            # Filtrar notas válidas
-            notas_validas = microdados_estados[microdados_estados[coluna] > 0][coluna]
             
-            if len(notas_validas) > 0:
-                # Calcular estatísticas
-                media = calcular_seguro(notas_validas, 'media')
-                mediana = calcular_seguro(notas_validas, 'mediana')
-                desvio = calcular_seguro(notas_validas, 'desvio')
-                
-                # Obter nome legível da área
-                nome_area = competencia_mapping.get(coluna, coluna)
-                
-                resultado.append({
-                    'Area': nome_area,
-                    'Media': round(media, 2),
-                    'DesvioPadrao': round(desvio, 2),
-                    'Mediana': round(mediana, 2),
-                    'Minimo': round(float(notas_validas.min()), 2),
-                    'Maximo': round(float(notas_validas.max()), 2)
-                })
+            estatisticas = consulta.loc[coluna]
+            
+            # A mediana não é somável: combinar os histogramas dos estados ou, sem eles, usar os microdados
+            mediana = 0.0
+            if histogramas:
+                mediana = mediana_histograma(contagens_histograma(histogramas, coluna, estados_selecionados))
+            elif microdados_estados is not None and coluna in microdados_estados.columns:
+                mediana = calcular_seguro(microdados_estados[coluna][microdados_estados[coluna] > 0], 'mediana')
+            
+            resultado.append({
+                'Area': competencia_mapping.get(coluna, coluna),
+                'Media': round(float(estatisticas['media']), 2),
+                'DesvioPadrao': round(float(estatisticas['desvio_padrao']), 2),
+                'Mediana': round(mediana, 2),
+                'Minimo': round(float(estatisticas['minimo']), 2),
+                'Maximo': round(float(estatisticas['maximo']), 2)
+            })
         
-        # Criar DataFrame
         df_resultado = pd.DataFrame(resultado)
         
-        # Ordenar por média decrescente
         if not df_resultado.empty:
             df_resultado = df_resultado.sort_values('Media', ascending=False)
             
         return df_resultado
     except Exception as e:
-        print(f"Erro ao preparar dados comparativos entre áreas: {e}")
-        return pd.DataFrame(columns=['Area', 'Media', 'DesvioPadrao', 'Mediana'])
\ No newline at end of file
+        print(f"Erro ao preparar comparativo entre áreas pelo cubo de agregados: {e}")
+        return pd.DataFrame(columns=['Area', 'Media', 'DesvioPadrao', 'Mediana'])
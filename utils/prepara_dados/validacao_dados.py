@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Tuple
+from data.data_loader import decodificar_notas
+from data.estatisticas_notas import calcular_limites_iqr
 
 def validar_completude_dados(
     df: pd.DataFrame, 
@@ -95,16 +97,22 @@ def verificar_outliers(
         
         # Detectar outliers baseado no método escolhido
         if metodo == 'iqr':
-            q1 = serie.quantile(0.25)
-            q3 = serie.quantile(0.75)
-            iqr = q3 - q1
+            # Quartis, limites e contagem de outliers saem de uma única contagem dos valores
+            limites = calcular_limites_iqr(serie, limiar)
+            limite_inferior = limites['limite_inferior']
+            limite_superior = limites['limite_superior']
             
-            limite_inferior = q1 - limiar * iqr
-            limite_superior = q3 + limiar * iqr
-            
-            outliers = serie[(serie < limite_inferior) | (serie > limite_superior)]
+            resultados[coluna] = {
+                'quantidade': limites['outliers'],
+                'percentual': limites['outliers'] / len(serie),
+                'limites': (limite_inferior, limite_superior)
+            }
+            continue
             
-        elif metodo == 'zscore':
+        # Notas compactas voltam para pontos
+        serie = decodificar_notas(serie)
+        
+        if metodo == 'zscore':
             media = serie.mean()
             desvio = serie.std()
             
@@ -24,6 +24,7 @@ from .graficos_aspectos_sociais import (
     criar_grafico_sankey,
     criar_grafico_distribuicao,
     criar_grafico_aspectos_por_estado,
+    criar_grafico_matriz_associacao,
     _criar_grafico_vazio
 )
 
@@ -18,9 +18,8 @@ OPACIDADE_PADRAO = CONFIG_VIZ.get('opacidade_padrao', 0.8)
 ANGULO_EIXO_X = CONFIG_VIZ.get('angulo_eixo_x', -45)
 MIN_AMOSTRAS_GRAFICO = LIMIARES_PROCESSAMENTO.get('min_amostras_grafico', 10)
 
-@memory_intensive_function
 def criar_grafico_heatmap(
-    df_correlacao: pd.DataFrame, 
+    tabela_contingencia: pd.DataFrame, 
     var_x: str, 
     var_y: str, 
     var_x_plot: str, 
@@ -33,8 +32,8 @@ def criar_grafico_heatmap(
     
     Parâmetros:
     -----------
-    df_correlacao : DataFrame
-        DataFrame com os dados correlacionados
+    tabela_contingencia : DataFrame
+        Contagens por combinação de categorias (ver preparar_tabela_contingencia)
     var_x : str
         Código da variável para o eixo X
     var_y : str
@@ -54,21 +53,21 @@ def criar_grafico_heatmap(
         (Figura do gráfico, texto explicativo)
     """
     # Validação de dados
-    if df_correlacao is None or df_correlacao.empty:
+    if tabela_contingencia is None or tabela_contingencia.empty:
         return _criar_grafico_vazio("Dados insuficientes para análise de correlação"), ""
     
     # Verificar se as variáveis existem no dicionário de mapeamentos
     if var_x not in variaveis_sociais or var_y not in variaveis_sociais:
         return _criar_grafico_vazio("Variáveis não encontradas nos mapeamentos"), ""
     
-    # Verificar se as colunas de plotagem existem no DataFrame
-    if var_x_plot not in df_correlacao.columns or var_y_plot not in df_correlacao.columns:
+    # Verificar se os eixos da tabela correspondem às colunas de plotagem
+    if tabela_contingencia.index.name != var_x_plot or tabela_contingencia.columns.name != var_y_plot:
         return _criar_grafico_vazio(f"Colunas {var_x_plot} e/ou {var_y_plot} não encontradas nos dados"), ""
     
     try:
         # Usar a função de preparação de dados
         from utils.prepara_dados import preparar_dados_heatmap
-        normalized_pivot = preparar_dados_heatmap(df_correlacao, var_x_plot, var_y_plot)
+        normalized_pivot = preparar_dados_heatmap(tabela_contingencia, var_x_plot, var_y_plot)
         
         # Verificar se temos um resultado válido
         if normalized_pivot is None or normalized_pivot.empty:
@@ -116,23 +115,23 @@ def criar_grafico_heatmap(
 
 # Corrigir a função criar_grafico_barras_empilhadas
 
-@memory_intensive_function
 def criar_grafico_barras_empilhadas(
-    df_correlacao: pd.DataFrame, 
+    tabela_contingencia: pd.DataFrame, 
     var_x: str, 
     var_y: str, 
     var_x_plot: str, 
     var_y_plot: str, 
     variaveis_sociais: Dict[str, Dict[str, Any]], 
-    estados_texto: str
+    estados_texto: str,
+    normalizacao: str = 'linha'
 ) -> Tuple[Figure, str]:
     """
     Cria um gráfico de barras empilhadas para visualizar a correlação entre duas variáveis sociais.
     
     Parâmetros:
     -----------
-    df_correlacao : DataFrame
-        DataFrame com os dados correlacionados
+    tabela_contingencia : DataFrame
+        Contagens por combinação de categorias (ver preparar_tabela_contingencia)
     var_x : str
         Código da variável para o eixo X
     var_y : str
@@ -145,6 +144,8 @@ def criar_grafico_barras_empilhadas(
         Dicionário com mapeamentos e configurações
     estados_texto : str
         Texto descritivo dos estados incluídos na análise
+    normalizacao : str, default='linha'
+        Base do percentual: 'linha', 'coluna' ou 'total' (ver preparar_dados_barras_empilhadas)
         
     Retorna:
     --------
@@ -152,21 +153,21 @@ def criar_grafico_barras_empilhadas(
         (Figura do gráfico, texto explicativo)
     """
     # Validação de dados
-    if df_correlacao is None or df_correlacao.empty:
+    if tabela_contingencia is None or tabela_contingencia.empty:
         return _criar_grafico_vazio("Dados insuficientes para análise de correlação"), ""
     
     # Verificar se as variáveis existem no dicionário de mapeamentos
     if var_x not in variaveis_sociais or var_y not in variaveis_sociais:
         return _criar_grafico_vazio("Variáveis não encontradas nos mapeamentos"), ""
     
-    # Verificar se as colunas de plotagem existem no DataFrame
-    if var_x_plot not in df_correlacao.columns or var_y_plot not in df_correlacao.columns:
+    # Verificar se os eixos da tabela correspondem às colunas de plotagem
+    if tabela_contingencia.index.name != var_x_plot or tabela_contingencia.columns.name != var_y_plot:
         return _criar_grafico_vazio(f"Colunas {var_x_plot} e/ou {var_y_plot} não encontradas nos dados"), ""
     
     try:
         # Usar a função de preparação de dados
         from utils.prepara_dados import preparar_dados_barras_empilhadas
-        df_barras = preparar_dados_barras_empilhadas(df_correlacao, var_x_plot, var_y_plot)
+        df_barras = preparar_dados_barras_empilhadas(tabela_contingencia, var_x_plot, var_y_plot, normalizacao)
         
         # Verificar se temos um resultado válido
         if df_barras is None or df_barras.empty:
@@ -198,7 +199,8 @@ def criar_grafico_barras_empilhadas(
         from utils.explicacao.explicacao_aspectos_sociais import get_explicacao_barras_empilhadas
         explicacao = get_explicacao_barras_empilhadas(
             variaveis_sociais[var_x]['nome'], 
-            variaveis_sociais[var_y]['nome']
+            variaveis_sociais[var_y]['nome'],
+            normalizacao
         )
         
         return fig, explicacao
@@ -207,9 +209,8 @@ def criar_grafico_barras_empilhadas(
         print(f"Erro ao criar gráfico de barras empilhadas: {e}")
         return _criar_grafico_vazio(f"Erro ao criar visualização: {str(e)}"), ""
 
-@memory_intensive_function
 def criar_grafico_sankey(
-    df_correlacao: pd.DataFrame, 
+    tabela_contingencia: pd.DataFrame, 
     var_x: str, 
     var_y: str, 
     var_x_plot: str, 
@@ -222,8 +223,8 @@ def criar_grafico_sankey(
     
     Parâmetros:
     -----------
-    df_correlacao : DataFrame
-        DataFrame com os dados correlacionados
+    tabela_contingencia : DataFrame
+        Contagens por combinação de categorias (ver preparar_tabela_contingencia)
     var_x : str
         Código da variável para o eixo X
     var_y : str
@@ -243,21 +244,21 @@ def criar_grafico_sankey(
         (Figura do gráfico, texto explicativo)
     """
     # Validação de dados
-    if df_correlacao is None or df_correlacao.empty:
+    if tabela_contingencia is None or tabela_contingencia.empty:
         return _criar_grafico_vazio("Dados insuficientes para análise de fluxo"), ""
     
     # Verificar se as variáveis existem no dicionário de mapeamentos
     if var_x not in variaveis_sociais or var_y not in variaveis_sociais:
         return _criar_grafico_vazio("Variáveis não encontradas nos mapeamentos"), ""
     
-    # Verificar se as colunas de plotagem existem no DataFrame
-    if var_x_plot not in df_correlacao.columns or var_y_plot not in df_correlacao.columns:
+    # Verificar se os eixos da tabela correspondem às colunas de plotagem
+    if tabela_contingencia.index.name != var_x_plot or tabela_contingencia.columns.name != var_y_plot:
         return _criar_grafico_vazio(f"Colunas {var_x_plot} e/ou {var_y_plot} não encontradas nos dados"), ""
     
     try:
         # Usar a função de preparação de dados
         from utils.prepara_dados import preparar_dados_sankey
-        labels, source, target, value = preparar_dados_sankey(df_correlacao, var_x_plot, var_y_plot)
+        labels, source, target, value = preparar_dados_sankey(tabela_contingencia, var_x_plot, var_y_plot)
         
         # Verificar se temos dados válidos
         if not labels or not source or not target or not value:
@@ -479,6 +480,81 @@ def criar_grafico_aspectos_por_estado(
         return _criar_grafico_vazio(f"Erro ao criar visualização: {str(e)}")
 
 
+def criar_grafico_matriz_associacao(
+    associacoes: pd.DataFrame, 
+    estados_texto: str, 
+    metrica: str = 'v_cramer'
+) -> Tuple[Figure, str]:
+    """
+    Cria um heatmap com a associação entre todos os pares de variáveis sociais
+    (e de cada variável com a categoria de desempenho).
+    
+    Parâmetros:
+    -----------
+    associacoes : DataFrame
+        Medidas por par de variáveis (ver analisar_associacoes_sociais)
+    estados_texto : str
+        Texto descritivo dos estados incluídos na análise
+    metrica : str, default='v_cramer'
+        Coluna exibida (ver METRICAS_ASSOCIACAO)
+        
+    Retorna:
+    --------
+    Tuple[Figure, str]
+        (Figura do gráfico, texto explicativo)
+    """
+    # Importar localmente para evitar importação circular
+    from utils.estatisticas.analise_aspectos_sociais import METRICAS_ASSOCIACAO
+    
+    if associacoes is None or associacoes.empty:
+        return _criar_grafico_vazio("Dados insuficientes para a matriz de associações"), ""
+    
+    if metrica not in METRICAS_ASSOCIACAO or metrica not in associacoes.columns:
+        return _criar_grafico_vazio(f"Medida {metrica} não disponível"), ""
+    
+    try:
+        # Matriz simétrica: cada par aparece nas duas posições (a diagonal fica vazia)
+        nomes = list(dict.fromkeys(list(associacoes['Nome_X']) + list(associacoes['Nome_Y'])))
+        simetrica = pd.concat([
+            associacoes[['Nome_X', 'Nome_Y', metrica]],
+            associacoes[['Nome_Y', 'Nome_X', metrica]].set_axis(['Nome_X', 'Nome_Y', metrica], axis=1)
+        ])
+        matriz = simetrica.pivot(index='Nome_X', columns='Nome_Y', values=metrica).reindex(index=nomes, columns=nomes)
+        
+        # Valores-p menores são associações mais fortes: escala invertida
+        escala = 'YlGnBu_r' if metrica == 'valor_p' else 'YlGnBu'
+        
+        fig = px.imshow(
+            matriz,
+            labels=dict(x="", y="", color=METRICAS_ASSOCIACAO[metrica]),
+            x=matriz.columns,
+            y=matriz.index,
+            color_continuous_scale=escala,
+            zmin=0,
+            zmax=1,
+            title=f"{METRICAS_ASSOCIACAO[metrica]} entre aspectos sociais ({estados_texto})",
+            text_auto='.3f' if metrica == 'valor_p' else '.2f'
+        )
+        
+        fig.update_layout(
+            height=max(ALTURA_PADRAO, 45 * len(nomes)),
+            xaxis={'side': 'bottom', 'tickangle': ANGULO_EIXO_X},
+            coloraxis_colorbar=dict(title=METRICAS_ASSOCIACAO[metrica]),
+            plot_bgcolor='white',
+            font=dict(size=12)
+        )
+        
+        # Importar texto explicativo
+        from utils.explicacao.explicacao_aspectos_sociais import get_explicacao_matriz_associacao
+        explicacao = get_explicacao_matriz_associacao(METRICAS_ASSOCIACAO[metrica])
+        
+        return fig, explicacao
+    
+    except Exception as e:
+        print(f"Erro ao criar matriz de associações: {e}")
+        return _criar_grafico_vazio(f"Erro ao criar visualização: {str(e)}"), ""
+
+
 # Funções auxiliares para formatação de gráficos
 
 def _criar_grafico_vazio(mensagem: str = "Dados insuficientes para criar visualização") -> Figure:
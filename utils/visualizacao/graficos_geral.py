@@ -16,7 +16,8 @@ def criar_histograma(
     df: pd.DataFrame, 
     coluna: str, 
     nome_area: str, 
-    estatisticas: Dict[str, Any]
+    estatisticas: Dict[str, Any],
+    df_barras: Optional[pd.DataFrame] = None
 ) -> go.Figure:
     """
     Cria um histograma formatado com informações estatísticas para distribuição de notas.
@@ -24,20 +25,25 @@ def criar_histograma(
     Parâmetros:
     -----------
     df : DataFrame
-        DataFrame com os dados para análise
+        DataFrame com os dados para análise (ignorado quando df_barras é informado)
     coluna : str
         Nome da coluna com as notas
     nome_area : str
         Nome formatado da área de conhecimento
     estatisticas : Dict[str, Any]
         Dicionário com estatísticas calculadas
+    df_barras : DataFrame, opcional
+        Barras já agrupadas no servidor (ver preparar_dados_histograma_agregado);
+        quando informado, o gráfico recebe só as barras, e não as notas
         
     Retorna:
     --------
     Figure: Objeto de figura Plotly com o histograma formatado
     """
+    usar_barras = df_barras is not None and not df_barras.empty
+    
     # Verificar se temos dados válidos
-    if df is None or df.empty or coluna not in df.columns:
+    if not usar_barras and (df is None or df.empty or coluna not in df.columns):
         return _criar_grafico_vazio(f"Dados insuficientes para criar histograma de {nome_area}")
     
     try:
@@ -56,16 +62,19 @@ def criar_histograma(
             return _criar_grafico_vazio(f"Estatísticas insuficientes para criar histograma de {nome_area}")
 
         # Criar histograma
-        fig = px.histogram(
-            df,
-            x=coluna,
-            nbins=30,
-            histnorm='percent',
-            title=f"Distribuição de Notas - {nome_area}",
-            labels={coluna: f"Nota ({nome_area})"},
-            opacity=0.7,
-            color_discrete_sequence=['#3366CC']
-        )
+        if usar_barras:
+            fig = _criar_histograma_pre_agrupado(df_barras, nome_area)
+        else:
+            fig = px.histogram(
+                df,
+                x=coluna,
+                nbins=30,
+                histnorm='percent',
+                title=f"Distribuição de Notas - {nome_area}",
+                labels={coluna: f"Nota ({nome_area})"},
+                opacity=0.7,
+                color_discrete_sequence=['#3366CC']
+            )
         
         # Adicionar linhas de média e mediana
         fig.add_vline(x=media, line_dash="dash", line_color="red")
@@ -437,6 +446,37 @@ def _criar_grafico_vazio(mensagem: str = "Dados insuficientes para criar visuali
     return fig
 
 
+def _criar_histograma_pre_agrupado(df_barras: pd.DataFrame, nome_area: str) -> go.Figure:
+    """
+    Cria o histograma a partir de barras já agrupadas, com o mesmo visual do px.histogram.
+    
+    Parâmetros:
+    -----------
+    df_barras : DataFrame
+        Barras com colunas Inicio, Fim e Percentual
+    nome_area : str
+        Nome da área de conhecimento
+        
+    Retorna:
+    --------
+    Figure: Figura Plotly com o histograma
+    """
+    larguras = df_barras['Fim'] - df_barras['Inicio']
+    
+    fig = go.Figure(go.Bar(
+        x=df_barras['Inicio'] + larguras / 2,
+        y=df_barras['Percentual'],
+        width=larguras,
+        customdata=df_barras[['Inicio', 'Fim']].to_numpy(),
+        hovertemplate=f"Nota ({nome_area})=%{{customdata[0]:.0f}} - %{{customdata[1]:.0f}}<br>percent=%{{y:.2f}}<extra></extra>",
+        opacity=0.7,
+        marker_color='#3366CC'
+    ))
+    fig.update_layout(title=f"Distribuição de Notas - {nome_area}")
+    
+    return fig
+
+
 def _aplicar_layout_histograma(fig: go.Figure, nome_area: str) -> go.Figure:
     """
     Aplica layout padronizado para histograma.